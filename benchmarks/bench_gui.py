@@ -0,0 +1,454 @@
+#!/usr/bin/env python
+"""Headless benchmarks for the tag ingestion and rendering hot paths.
+
+Runs the real widgets under Qt's offscreen platform and writes one JSON
+document with throughput, per-call latency percentiles and RSS for every
+case. Compare two runs with --compare to spot regressions.
+
+    python -m benchmarks.bench_gui --output results.json
+    python -m benchmarks.bench_gui --quick --compare results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5.QtCore import QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication, QScrollArea
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+FORMAT_VERSION = 1
+FRAME_MS = 16
+
+FULL_PLAN = {
+    'sizes': [(3, 3), (10, 10), (32, 32), (100, 100)],
+    'renderers': ['widgets', 'painted'],
+    'epc_list_factors': [1, 10],
+    'rates': [1000, 10000, 50000, 100000],
+    'history_limits': [1000, 100000],
+    'tag_view_batches': [1, 320, 1600],
+    'report_batches': [1, 16, 256],
+    'decode_reads': 100000,
+    'iterations': 2000,
+    'ingest_seconds': 2.0,
+}
+
+QUICK_PLAN = {
+    'sizes': [(3, 3), (10, 10)],
+    'renderers': ['widgets', 'painted'],
+    'epc_list_factors': [1, 10],
+    'rates': [1000, 10000],
+    'history_limits': [1000],
+    'tag_view_batches': [1, 320],
+    'report_batches': [1, 256],
+    'decode_reads': 20000,
+    'iterations': 300,
+    'ingest_seconds': 0.5,
+}
+
+
+def make_epcs(count: int, prefix: str = 'E2801160') -> List[str]:
+    width = 24 - len(prefix)
+    return [f"{prefix}{i:0{width}X}" for i in range(count)]
+
+
+def synthetic_tags(epcs: List[str], count: int, unknown_fraction: float = 0.1,
+                   seed: int = 0) -> List[Dict[str, Any]]:
+    # Tag dicts as sllurp 3 reports them, a fraction with EPCs outside the list
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(epcs), count)
+    unknown = rng.random(count) < unknown_fraction
+    antennas = rng.integers(1, 5, count)
+    rssi = rng.uniform(-80, -30, count)
+    phase = rng.integers(0, 4096, count)
+    doppler = rng.integers(-400, 400, count)
+    now = int(time.time() * 1e6)
+    tags = []
+    for i in range(count):
+        epc = f"FFFF{i:020X}" if unknown[i] else epcs[picks[i]]
+        tags.append({
+            'EPC': epc.lower().encode('ascii'),
+            'AntennaID': int(antennas[i]),
+            'PeakRSSI': int(rssi[i]),
+            'ChannelIndex': 1 + i % 50,
+            'FirstSeenTimestampUTC': now + i,
+            'LastSeenTimestampUTC': now + i,
+            'TagSeenCount': 1,
+            'ImpinjPeakRSSI': int(rssi[i] * 100),
+            'ImpinjRFPhaseAngle': int(phase[i]),
+            'ImpinjRFDopplerFrequency': int(doppler[i]),
+        })
+    return tags
+
+
+def cell_data(epc: str, rssi: float) -> Dict[str, Any]:
+    # Plain dict in the shape TagReadStore.to_dict hands to the matrix views
+    now = time.time()
+    return {
+        'epc': epc, 'antenna': 1, 'peak_rssi': rssi, 'last_rssi': None, 'phase': 123.4,
+        'doppler': -1.5, 'first_seen': int(now * 1e6), 'last_seen': int(now * 1e6),
+        'read_count': 1, 'timestamp': now,
+    }
+
+
+def rss_kb() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    us = np.asarray(samples, dtype=np.float64) * 1e6
+    if not len(us):
+        return {}
+    p50, p90, p99 = np.percentile(us, [50, 90, 99])
+    return {'mean': float(us.mean()), 'p50': float(p50), 'p90': float(p90),
+            'p99': float(p99), 'max': float(us.max())}
+
+
+def result(name: str, params: Dict[str, Any], samples: List[float], items: int,
+           unit: str, **extra) -> Dict[str, Any]:
+    # items is the work done over all samples, e.g. calls or tag reads
+    seconds = float(sum(samples))
+    entry = {
+        'name': name,
+        'params': params,
+        'calls': len(samples),
+        'seconds': seconds,
+        'throughput': items / seconds if seconds > 0 else None,
+        'throughput_unit': unit,
+        'latency_us': latency_summary(samples),
+        'rss_kb': rss_kb(),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+    entry.update(extra)
+    return entry
+
+
+class GuiBenchmarks:
+    def __init__(self, plan: Dict[str, Any], only: Optional[List[str]] = None):
+        from rfid.gui.main_window import MainWindow
+
+        self.plan = plan
+        self.only = only
+        self.app = QApplication.instance() or QApplication([])
+        self.window = MainWindow()
+        # Ingestion is driven explicitly, not by the window timers
+        for timer in (self.window.timer, self.window.ingest_timer, self.window.stats_timer):
+            timer.stop()
+        self.window.resize(1280, 900)
+        self.window.show()
+        # Tabs are built lazily, build them all so every view takes part
+        self.window.ensure_all_tabs()
+        self.window.tab_widget.setCurrentWidget(self.window.matrix_tab)
+        self.app.processEvents()
+        self.results = []
+
+    def wanted(self, name: str) -> bool:
+        return not self.only or name in self.only
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.results.append(entry)
+        latency = entry['latency_us']
+        throughput = entry['throughput'] or 0.0
+        print(f"{entry['name']:<20} {json.dumps(entry['params']):<55} "
+              f"{throughput:>12.0f} {entry['throughput_unit']:<8} "
+              f"p50 {latency.get('p50', 0):>9.1f}us p99 {latency.get('p99', 0):>10.1f}us",
+              file=sys.stderr)
+
+    def run(self) -> List[Dict[str, Any]]:
+        for renderer in self.plan['renderers']:
+            for rows, cols in self.plan['sizes']:
+                self.setup_matrix(renderer, rows, cols)
+                params = {'renderer': renderer, 'rows': rows, 'cols': cols}
+                if self.wanted('matrix_update'):
+                    self.bench_matrix_update(params)
+                if self.wanted('refresh_all_cells'):
+                    self.bench_refresh_all_cells(params)
+                if self.wanted('handle_tag_data'):
+                    for factor in self.plan['epc_list_factors']:
+                        self.bench_handle_tag_data(params, rows * cols * factor)
+                if self.wanted('ingest'):
+                    for rate in self.plan['rates']:
+                        self.bench_ingest(params, rate)
+        if self.wanted('tag_view'):
+            for history in self.plan['history_limits']:
+                for batch in self.plan['tag_view_batches']:
+                    self.bench_tag_view(history, batch)
+        if self.wanted('report_decode'):
+            for batch in self.plan['report_batches']:
+                self.bench_report_decode(batch)
+        return self.results
+
+    def flush(self) -> None:
+        self.window.matrix_view.flush_dirty_cells()
+        self.app.processEvents()
+
+    def setup_matrix(self, renderer: str, rows: int, cols: int) -> None:
+        # Building the view doubles as the create_matrix benchmark
+        window = self.window
+        epcs = make_epcs(rows * cols)
+        window.clear_inventory()
+        window.config.set('matrix_rows', rows)
+        window.config.set('matrix_cols', cols)
+        window.config.set('epc_list', epcs)
+
+        start = time.perf_counter()
+        window.set_matrix_renderer(renderer)
+        created = time.perf_counter()
+        self.app.processEvents()
+        laid_out = time.perf_counter()
+        window.matrix_view.update_epcs(epcs)
+        self.flush()
+        populated = time.perf_counter()
+
+        if self.wanted('create_matrix'):
+            self.add(result('create_matrix', {'renderer': renderer, 'rows': rows, 'cols': cols},
+                            [populated - start], rows * cols, 'cells/s',
+                            create_s=created - start, first_layout_s=laid_out - created,
+                            populate_s=populated - laid_out))
+
+    def bench_matrix_update(self, params: Dict[str, Any]) -> None:
+        view = self.window.matrix_view
+        rows, cols = params['rows'], params['cols']
+        rng = np.random.default_rng(1)
+        iterations = self.plan['iterations']
+        cells = rng.integers(0, rows * cols, iterations).tolist()
+        rssi = rng.uniform(-80, -30, iterations).tolist()
+        per_frame = min(rows * cols, 100)
+
+        calls, frames = [], []
+        for i, (cell, value) in enumerate(zip(cells, rssi)):
+            data = cell_data(view.epc_list[cell], value)
+            start = time.perf_counter()
+            view.update_cell(cell // cols, cell % cols, data)
+            calls.append(time.perf_counter() - start)
+            if (i + 1) % per_frame == 0:
+                start = time.perf_counter()
+                self.flush()
+                frames.append(time.perf_counter() - start)
+
+        self.add(result('update_cell', params, calls, len(calls), 'calls/s'))
+        self.add(result('matrix_frame', dict(params, cells_per_frame=per_frame), frames,
+                        len(frames) * per_frame, 'cells/s'))
+
+    def bench_refresh_all_cells(self, params: Dict[str, Any]) -> None:
+        view = self.window.matrix_view
+        repeats = max(3, min(50, self.plan['iterations'] // (params['rows'] * params['cols'])))
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            view.refresh_all_cells()
+            self.flush()
+            samples.append(time.perf_counter() - start)
+        self.add(result('refresh_all_cells', params, samples, len(samples), 'calls/s'))
+
+    def bench_handle_tag_data(self, params: Dict[str, Any], epc_count: int) -> None:
+        window = self.window
+        epcs = make_epcs(epc_count)
+        window.config.set('epc_list', epcs)
+        window.matrix_view.update_epcs(epcs)
+        self.flush()
+        tags = synthetic_tags(epcs, self.plan['iterations'])
+
+        samples = []
+        for i, tag in enumerate(tags):
+            start = time.perf_counter()
+            window.handle_tag_data(tag)
+            samples.append(time.perf_counter() - start)
+            if i % 256 == 255:
+                self.flush()
+        self.flush()
+        self.add(result('handle_tag_data', dict(params, epc_list=epc_count), samples,
+                        len(samples), 'reads/s'))
+
+        # Back to one EPC per cell for the following cases
+        epcs = epcs[:params['rows'] * params['cols']]
+        window.config.set('epc_list', epcs)
+        window.matrix_view.update_epcs(epcs)
+        self.flush()
+
+    def bench_ingest(self, params: Dict[str, Any], rate: int) -> None:
+        # Reader callback plus one ingest frame, as driven by the ingest timer
+        window = self.window
+        per_frame = max(1, rate * FRAME_MS // 1000)
+        frames = max(5, int(self.plan['ingest_seconds'] * 1000 / FRAME_MS))
+        pool = synthetic_tags(window.config.get('epc_list'), per_frame * min(frames, 20), seed=rate)
+        batches = [pool[i:i + per_frame] for i in range(0, len(pool), per_frame)]
+
+        samples = []
+        for i in range(frames):
+            window.on_tag_report(None, batches[i % len(batches)])
+            start = time.perf_counter()
+            window.drain_tag_buffer()
+            self.flush()
+            samples.append(time.perf_counter() - start)
+
+        budget = FRAME_MS / 1000.0
+        self.add(result('ingest', dict(params, rate=rate, reads_per_frame=per_frame), samples,
+                        frames * per_frame, 'reads/s',
+                        frames_over_budget=int(sum(s > budget for s in samples)),
+                        dropped=window.tag_buffer.dropped))
+        window.clear_inventory()
+
+    def bench_tag_view(self, history: int, batch: int) -> None:
+        from rfid.gui.tag_data_view import TagDataView
+        from rfid.store import TagReadStore
+
+        store = TagReadStore()
+        view = TagDataView(store)
+        view.set_history_limit(history)
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(view)
+        scroll.resize(1280, 900)
+        scroll.show()
+        self.app.processEvents()
+
+        tags = synthetic_tags(make_epcs(1000), batch * 20, seed=batch)
+        batches = [tags[i:i + batch] for i in range(0, len(tags), batch)]
+        calls = max(20, self.plan['iterations'] // max(1, batch // 20))
+        samples = []
+        for i in range(calls):
+            first, reads = store.append_reports(batches[i % len(batches)], time.time_ns() // 1000)
+            seqs = np.arange(first, first + len(reads), dtype=np.int64)
+            start = time.perf_counter()
+            view.update_reads(seqs)
+            self.app.processEvents()
+            samples.append(time.perf_counter() - start)
+
+        self.add(result('tag_view', {'history': history, 'batch': batch}, samples,
+                        calls * batch, 'reads/s'))
+        scroll.close()
+        scroll.deleteLater()
+        self.app.processEvents()
+
+    def bench_report_decode(self, batch: int) -> None:
+        # LLRP bytes to queued reads: sllurp decoding plus one handoff per report,
+        # per 64 KiB socket read, for the tags-per-report setting of the ROSpec
+        from sllurp.llrp import LLRPReaderClient, LLRPReaderState
+        from rfid.ingest import TagReadBuffer
+        from rfid.simulator import TagPopulation, encode_reports
+
+        total = self.plan['decode_reads']
+        reads = TagPopulation(make_epcs(1000), seed=batch).sample(total, 0.0, 1.0)
+        data, reports = encode_reports(reads, batch, 1)
+        buffer = TagReadBuffer(total)
+        client = LLRPReaderClient('127.0.0.1')
+        client.llrp.transport_tx_write = lambda data: None
+        client.add_tag_report_callback(lambda reader, tags: buffer.put_report(tags))
+        client.llrp.setState(LLRPReaderState.STATE_INVENTORYING)
+
+        samples = []
+        for offset in range(0, len(data), 65536):
+            start = time.perf_counter()
+            client.raw_data_received(data[offset:offset + 65536])
+            samples.append(time.perf_counter() - start)
+        self.add(result('report_decode', {'tags_per_report': batch}, samples, buffer.received, 'reads/s',
+                        reports=reports, bytes=len(data)))
+
+
+def result_key(entry: Dict[str, Any]) -> str:
+    return entry['name'] + json.dumps(entry['params'], sort_keys=True)
+
+
+def compare(results: List[Dict[str, Any]], baseline_file: str, threshold: float) -> int:
+    # Prints cases whose throughput dropped or p99 latency grew past threshold
+    with open(baseline_file) as f:
+        baseline = {result_key(entry): entry for entry in json.load(f)['results']}
+
+    regressions = 0
+    for entry in results:
+        old = baseline.get(result_key(entry))
+        if not old or not old['throughput'] or not entry['throughput']:
+            continue
+        speed = entry['throughput'] / old['throughput']
+        p99 = entry['latency_us'].get('p99', 0) / max(old['latency_us'].get('p99', 0), 1e-9)
+        regressed = speed < 1 - threshold or p99 > 1 + threshold
+        regressions += regressed
+        print(f"{'REGRESSION' if regressed else 'ok':<11}{entry['name']:<20} "
+              f"{json.dumps(entry['params']):<55} throughput x{speed:.2f}  p99 x{p99:.2f}",
+              file=sys.stderr)
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless GUI ingestion and rendering benchmarks")
+    parser.add_argument('--quick', action='store_true', help="small matrices and short runs")
+    parser.add_argument('--only', help="comma separated subset of create_matrix, matrix_update, refresh_all_cells, "
+                             "handle_tag_data, ingest, tag_view and report_decode")
+    parser.add_argument('--sizes', help="matrix sizes such as 3x3,100x100")
+    parser.add_argument('--renderers', help="widgets, painted or both")
+    parser.add_argument('--rates', help="ingest read rates in reads/s")
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="baseline JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="relative change reported as a regression (default 0.15)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    plan = dict(QUICK_PLAN if args.quick else FULL_PLAN)
+    if args.sizes:
+        plan['sizes'] = [tuple(int(n) for n in size.split('x')) for size in args.sizes.split(',')]
+    if args.renderers:
+        plan['renderers'] = args.renderers.split(',')
+    if args.rates:
+        plan['rates'] = [int(rate) for rate in args.rates.split(',')]
+    only = args.only.split(',') if args.only else None
+
+    started = time.time()
+    results = GuiBenchmarks(plan, only).run()
+    document = {
+        'format_version': FORMAT_VERSION,
+        'revision': git_revision(),
+        'started': started,
+        'duration_s': time.time() - started,
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'platform': platform.platform(),
+        'qpa_platform': os.environ.get('QT_QPA_PLATFORM'),
+        'plan': plan,
+        'results': results,
+    }
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,6 @@
 
 import sys
 import logging
-from PyQt5.QtWidgets import QApplication
-from rfid.gui.main_window import MainWindow
 
 def setup_logging():
     logging.basicConfig(
@@ -12,10 +10,44 @@ def setup_logging():
     )
 
 def main():
+    # Headless mode never imports Qt
+    if '--headless' in sys.argv[1:]:
+        from rfid.daemon import main as daemon_main
+        sys.exit(daemon_main([arg for arg in sys.argv[1:] if arg != '--headless']))
+
+    # --startup-timing prints a phase and import breakdown once the window is up
+    timer = None
+    if '--startup-timing' in sys.argv[1:]:
+        sys.argv.remove('--startup-timing')
+        from rfid.startup import StartupTimer
+        timer = StartupTimer()
+        timer.imports.install()
+
+    def mark(phase):
+        if timer:
+            timer.mark(phase)
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    mark("import PyQt5")
+    from rfid.gui.main_window import MainWindow
+    mark("import rfid.gui")
+
     setup_logging()
     app = QApplication(sys.argv)
-    window = MainWindow()
+    mark("create QApplication")
+    window = MainWindow(timer)
+    mark("create MainWindow")
     window.show()
+    mark("show window")
+    if timer:
+        timer.imports.uninstall()
+
+        def report():
+            mark("first event loop pass")
+            print(timer.report(), file=sys.stderr)
+
+        QTimer.singleShot(0, report)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# A report arrives after its newest read by the network and queueing delay, which
+# is never negative: the lowest (arrival - reader timestamp) per bucket is closest
+# to the true clock offset, and a line through those minima gives offset and drift
+BUCKET_US = 1000000
+WINDOW_BUCKETS = 300
+MIN_FIT_BUCKETS = 10
+MAX_DRIFT_PPM = 500.0
+# A reader clock that jumps by more than this (reboot, NTP step) starts a new estimate
+STEP_US = 2000000
+
+
+def host_micros() -> int:
+    return time.time_ns() // 1000
+
+
+def format_timestamp(micros: int, date: bool = True) -> str:
+    # Local time with milliseconds, only for rows that are actually shown or exported
+    seconds, micros = divmod(int(micros), 1000000)
+    text = time.strftime('%Y-%m-%d %H:%M:%S' if date else '%H:%M:%S', time.localtime(seconds))
+    return f"{text}.{micros // 1000:03d}"
+
+
+def tag_timestamp(tag_data: Dict[str, Any]) -> int:
+    # Reader timestamp (µs) of a read, 0 without one
+    value = (tag_data.get('LastSeenTimestampUTC') or tag_data.get('LastSeenTimestampUptime')
+             or tag_data.get('LastSeenTimestamp'))
+    if isinstance(value, dict):
+        value = value.get('Value')
+    return value or 0
+
+
+def report_timestamp(tags: List[Dict[str, Any]]) -> int:
+    # Newest reader timestamp (µs) of a report, 0 without timestamps
+    return max((tag_timestamp(tag_data) for tag_data in tags), default=0)
+
+
+class ReaderClock:
+    """Offset and drift of one reader's microsecond clock against host time.
+
+    Works for UTC and uptime timestamps alike, as both are a plain offset
+    (plus drift) away from the host clock. observe() takes the newest
+    reader timestamp of a report and the host arrival time; the model is
+    refitted once per bucket, so it costs next to nothing per report.
+    """
+
+    def __init__(self):
+        self._buckets = deque(maxlen=WINDOW_BUCKETS)  # [bucket, reader_us, lowest host - reader]
+        self._model = None  # (reference reader_us, offset at reference, drift), replaced atomically
+        self._last_reader_us = None
+        self.samples = 0
+        self.steps = 0
+
+    def reset(self) -> None:
+        self._buckets.clear()
+        self._model = None
+        self._last_reader_us = None
+
+    def observe(self, reader_us: int, host_us: int) -> None:
+        delta = host_us - reader_us
+        model = self._model
+        if self._last_reader_us is not None and (
+                reader_us < self._last_reader_us - STEP_US
+                or (model and delta < model[1] + model[2] * (reader_us - model[0]) - STEP_US)):
+            self.reset()
+            self.steps += 1
+        self._last_reader_us = reader_us
+        self.samples += 1
+
+        bucket = reader_us // BUCKET_US
+        if self._buckets and self._buckets[-1][0] == bucket:
+            entry = self._buckets[-1]
+            if delta < entry[2]:
+                entry[1], entry[2] = reader_us, delta
+                if len(self._buckets) < MIN_FIT_BUCKETS:
+                    self._fit()
+            return
+        self._buckets.append([bucket, reader_us, delta])
+        self._fit()
+
+    def _fit(self) -> None:
+        points = [(reader_us, delta) for _, reader_us, delta in self._buckets]
+        reference = points[-1][0]
+        drift = 0.0
+        if len(points) >= MIN_FIT_BUCKETS:
+            xs = [reader_us - reference for reader_us, _ in points]
+            ys = [delta for _, delta in points]
+            mean_x = sum(xs) / len(xs)
+            mean_y = sum(ys) / len(ys)
+            var = sum((x - mean_x) ** 2 for x in xs)
+            if var > 0:
+                drift = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+                limit = MAX_DRIFT_PPM * 1e-6
+                drift = max(-limit, min(limit, drift))
+        # The line goes through the lowest point once the drift is taken out
+        offset = min(delta - drift * (reader_us - reference) for reader_us, delta in points)
+        self._model = (reference, offset, drift)
+
+    def to_host(self, reader_us: np.ndarray) -> Optional[np.ndarray]:
+        # Host µs for reader µs, None until the first observation
+        model = self._model
+        if model is None:
+            return None
+        reference, offset, drift = model
+        reader_us = reader_us.astype(np.int64)
+        return reader_us + np.int64(offset) + np.round(drift * (reader_us - reference)).astype(np.int64)
+
+    def status(self) -> Dict[str, Any]:
+        model = self._model
+        return {
+            'offset_ms': model[1] / 1000.0 if model else None,
+            'drift_ppm': model[2] * 1e6 if model else None,
+            'samples': self.samples,
+            'steps': self.steps,
+        }
+
+
+class ClockAlignment:
+    """ReaderClocks by reader id, fed from reports and applied to READ_DTYPE rows.
+
+    observe_report runs on the network thread as reports arrive; align
+    runs wherever rows are built and fills time_us, the reader's
+    last_seen on the host clock, or leaves the arrival time for rows
+    without a reader timestamp or from a reader without an estimate.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clocks: Dict[int, ReaderClock] = {}
+
+    def clock(self, reader_id: int) -> ReaderClock:
+        clock = self.clocks.get(reader_id)
+        if clock is None:
+            with self._lock:
+                clock = self.clocks.setdefault(reader_id, ReaderClock())
+        return clock
+
+    def observe_report(self, tags: List[Dict[str, Any]], host_us: Optional[int] = None) -> None:
+        if not tags:
+            return
+        reader_us = report_timestamp(tags)
+        if reader_us:
+            self.clock(tags[0].get('ReaderID', 0)).observe(reader_us, host_micros() if host_us is None else host_us)
+
+    def report_times(self, tags: List[Dict[str, Any]], host_us: int) -> np.ndarray:
+        # Host µs of each read of one reader's report, host_us where the clock cannot place it
+        times = np.full(len(tags), host_us, dtype=np.int64)
+        clock = self.clocks.get(tags[0].get('ReaderID', 0)) if tags else None
+        if clock is None:
+            return times
+        reader_us = np.array([tag_timestamp(tag_data) for tag_data in tags], dtype=np.int64)
+        rows = np.flatnonzero(reader_us > 0)
+        aligned = clock.to_host(reader_us[rows])
+        if aligned is not None:
+            times[rows] = aligned
+        return times
+
+    def align(self, reads: np.ndarray) -> np.ndarray:
+        if not len(reads):
+            return reads
+        reader_ids = reads['reader_id']
+        for reader_id in np.unique(reader_ids).tolist():
+            clock = self.clocks.get(reader_id)
+            if clock is None:
+                continue
+            rows = np.flatnonzero((reader_ids == reader_id) & (reads['last_seen'] > 0))
+            times = clock.to_host(reads['last_seen'][rows])
+            if times is not None:
+                reads['time_us'][rows] = times
+        return reads
+
+    def reset(self) -> None:
+        with self._lock:
+            self.clocks = {}
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [dict(clock.status(), reader_id=reader_id) for reader_id, clock in sorted(self.clocks.items())]
@@ -2,13 +2,30 @@ import json
 import logging
 from typing import Dict, List, Any
 
+from .epc_index import EPCIndex
+
 class RFIDConfig:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.config_data = {
             'epc_list': [],
+            'epc_rules': [],
             'matrix_rows': 3,
             'matrix_cols': 3,
+            'tag_history_limit': 1000,
+            'ingest_capacity': 100000,
+            'ingest_overflow': 'drop_oldest',
+            'metrics_port': 0,
+            'metrics_address': '127.0.0.1',
+            'latency_tracing': False,
+            'trace_sample_ms': 100,
+            'channel_plan': 'FCC',
+            'motion_window_ms': 1000,
+            'presence_timeout_ms': 2000,
+            'presence_dwell_ms': 5000,
+            'presence_enter_rssi': None,
+            'presence_exit_rssi': None,
+            'presence_zones': {},
             'display_settings': {
                 'peak_rssi': True,
                 'last_rssi': True,
@@ -16,6 +33,7 @@ class RFIDConfig:
                 'last_seen': True,
                 'phase': True,
                 'doppler': True,
+                'motion': True,
                 'read_count': True,
                 'epc': True
             },
@@ -23,16 +41,32 @@ class RFIDConfig:
                 'ip': '192.168.254.100',
                 'antennas': [1],
                 'power': 30,
+                'antenna_power': {},
+                'antenna_dwell_ms': {},
+                'antenna_rounds': {},
+                'search_mode': 2,
+                'session': 2,
+                'report_mode': 'tags',
                 'report_every_n': 1,
-                'rssi_threshold': -75
+                'report_interval_ms': 100,
+                'round_silence_ms': 100,
+                'round_timeout_ms': 1000,
+                'rssi_threshold': -75,
+                'auto_reconnect': True,
+                'keepalive_interval': 5.0,
+                'filter_by_epc': True,
+                'reader_side_filter': True,
+                'rssi_floor': None
             }
         }
+        self.epc_index = EPCIndex()
 
     def load_from_file(self, filename: str) -> None:
         try:
             with open(filename, 'r') as f:
                 loaded_config = json.load(f)
                 self.config_data.update(loaded_config)
+            self._sync_epc_index()
         except Exception as e:
             self.logger.error(f"Error loading configuration from {filename}: {e}")
 
@@ -48,6 +82,8 @@ class RFIDConfig:
 
     def set(self, key: str, value: Any) -> None:
         self.config_data[key] = value
+        if key in ('epc_list', 'epc_rules'):
+            self._sync_epc_index()
 
     def update_display_settings(self, settings: Dict[str, bool]) -> None:
         self.config_data['display_settings'].update(settings)
@@ -55,9 +91,26 @@ class RFIDConfig:
     def update_reader_settings(self, settings: Dict[str, Any]) -> None:
         self.config_data['reader_settings'].update(settings)
 
+    def connection_settings(self) -> Dict[str, Any]:
+        # reader_settings plus the EPC list and rules, for the reader-side filter
+        settings = dict(self.config_data.get('reader_settings', {}))
+        settings['epc_list'] = list(self.config_data.get('epc_list', []))
+        settings['epc_rules'] = list(self.config_data.get('epc_rules', []))
+        return settings
+
     def update_matrix_size(self, rows: int, cols: int) -> None:
         self.config_data['matrix_rows'] = rows
         self.config_data['matrix_cols'] = cols
 
     def update_epc_list(self, epc_list: List[str]) -> None:
         self.config_data['epc_list'] = epc_list
+        self.epc_index.set_epcs(epc_list)
+
+    def update_epc_rules(self, rules: List[str]) -> None:
+        self.config_data['epc_rules'] = rules
+        self.epc_index.set_rules(rules)
+
+    def _sync_epc_index(self) -> None:
+        self.epc_index.set_epcs(self.config_data.get('epc_list', []))
+        if self.epc_index.rules != self.config_data.get('epc_rules', []):
+            self.epc_index.set_rules(self.config_data.get('epc_rules', []))
@@ -0,0 +1,530 @@
+#!/usr/bin/env python
+"""Headless reader daemon.
+
+Connects to one or more readers, filters tag reads with the configured EPC
+list and rules, and streams them as newline-delimited JSON or as binary
+session records (the .rfrec block format) to stdout, a file or a local
+socket. Nothing here imports Qt.
+
+    python -m rfid.daemon --reader 192.168.254.100 --config rfid.json
+    python -m rfid.daemon --reader 10.0.0.5,10.0.0.6 --format binary --output unix:/run/rfid.sock
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable
+
+import numpy as np
+
+from .clock import host_micros
+from .config import RFIDConfig
+from .epc_index import EPCIdLookup
+from .ingest import TagReadBuffer
+from .metrics import (MetricsRegistry, ErrorCounter, register_reader_metrics, start_metrics_server,
+                      DEFAULT_METRICS_ADDRESS)
+from .presence import PresenceEngine, EVENT_NAMES
+from .recording import BlockEncoder
+from .stats import AntennaRates
+from .store import EPCTable, reads_from_reports
+from .tuning import tuned_settings
+
+DEFAULT_BUFFER_CAPACITY = 1000000
+DEFAULT_FLUSH_INTERVAL = 0.05
+DEFAULT_STATS_INTERVAL = 10.0
+MAX_READS_PER_FLUSH = 100000
+# Distinct EPCs interned before the table is compacted down to the tags still present
+DEFAULT_MAX_EPCS = 100000
+SOCKET_SEND_TIMEOUT = 1.0
+DISCONNECT_TIMEOUT = 3.0
+
+
+# first_seen and last_seen are reader times on the host clock in epoch µs, timestamp is last_seen
+# in seconds, channel the hop table index (0 when not reported)
+NDJSON_LINE = ('{"epc":%s,"reader":%d,"antenna":%d,"peak_rssi":%s,"last_rssi":%s,"phase":%s,"doppler":%s,'
+               '"channel":%d,"first_seen":%s,"last_seen":%s,"read_count":%d,"timestamp":%r}\n')
+
+
+def _json_floats(values: np.ndarray) -> List[str]:
+    return ['null' if value != value else repr(value) for value in values.astype(np.float64).tolist()]
+
+
+def _json_optional_ints(values: np.ndarray) -> List[str]:
+    return [str(value) if value else 'null' for value in values.tolist()]
+
+
+class NDJSONFormat:
+    """One JSON object per read, keys as in TagReadStore.to_dict.
+
+    Lines are filled from whole columns with a fixed template instead of
+    json.dumps per read, which is about three times faster.
+    """
+
+    def __init__(self, epcs: EPCTable):
+        self.epcs = epcs
+        self._epc_strings = []  # JSON-quoted EPCs by id
+
+    def header(self) -> bytes:
+        return b''
+
+    def reset(self) -> None:
+        self._epc_strings = []
+
+    def encode(self, reads: np.ndarray) -> bytes:
+        epcs = self.epcs.epcs
+        if len(self._epc_strings) < len(epcs):
+            self._epc_strings.extend(json.dumps(epc) for epc in epcs[len(self._epc_strings):])
+        epc_strings = self._epc_strings
+        # Reader timestamps on the host clock (µs), like TagReadStore.to_dict
+        time_us = reads['time_us']
+        first_seen, last_seen = reads['first_seen'].astype(np.int64), reads['last_seen'].astype(np.int64)
+        timed = (first_seen > 0) & (last_seen > 0)
+        columns = (
+            [epc_strings[epc_id] for epc_id in reads['epc_id'].tolist()],
+            reads['reader_id'].tolist(),
+            reads['antenna'].tolist(),
+            _json_floats(reads['peak_rssi']),
+            _json_floats(reads['last_rssi']),
+            _json_floats(reads['phase']),
+            _json_floats(reads['doppler']),
+            reads['channel'].tolist(),
+            _json_optional_ints(np.where(timed, time_us - (last_seen - first_seen), 0)),
+            _json_optional_ints(np.where(last_seen > 0, time_us, 0)),
+            reads['seen_count'].tolist(),
+            (time_us / 1e6).tolist(),
+        )
+        return ''.join([NDJSON_LINE % row for row in zip(*columns)]).encode()
+
+
+class BinaryFormat:
+    """Session recording blocks, readable with rfid.recording.SessionFile."""
+
+    def __init__(self, epcs: EPCTable):
+        self.encoder = BlockEncoder(epcs)
+
+    def header(self) -> bytes:
+        return self.encoder.header()
+
+    def reset(self) -> None:
+        self.encoder.reset()
+
+    def encode(self, reads: np.ndarray) -> bytes:
+        return self.encoder.encode(reads)
+
+
+FORMATS = {'ndjson': NDJSONFormat, 'binary': BinaryFormat}
+
+
+class StreamSink:
+    """Writes to stdout or a file."""
+
+    def __init__(self, stream, make_format: Callable, epcs: EPCTable):
+        self.epcs = epcs
+        self.stream = stream
+        self.format = make_format(epcs)
+        self.stream.write(self.format.header())
+
+    def write(self, reads: np.ndarray) -> None:
+        self.stream.write(self.format.encode(reads))
+        self.stream.flush()
+
+    def reset(self) -> None:
+        # The EPC ids changed
+        self.format.reset()
+
+    def close(self) -> None:
+        if self.stream is not sys.stdout.buffer:
+            self.stream.close()
+
+
+class SocketSink:
+    """Serves the stream to every client of a listening unix or TCP socket.
+
+    Each client gets its own formatter, so binary clients that join late
+    still receive the EPC dictionary first. Clients that stop reading for
+    SOCKET_SEND_TIMEOUT are dropped instead of stalling the stream.
+    """
+
+    def __init__(self, address: str, make_format: Callable, epcs: EPCTable):
+        self.logger = logging.getLogger(__name__)
+        self.make_format = make_format
+        self.epcs = epcs
+        self._lock = threading.Lock()
+        self._clients = []  # (socket, format)
+        self._path = None
+        kind, _, target = address.partition(':')
+        if kind == 'unix':
+            self._path = target
+            if os.path.exists(target):
+                os.unlink(target)
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(target)
+        else:
+            host, _, port = target.rpartition(':')
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._server.bind((host or '127.0.0.1', int(port)))
+        self._server.listen()
+        self._thread = threading.Thread(target=self._accept, name='daemon-accept', daemon=True)
+        self._thread.start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            client.settimeout(SOCKET_SEND_TIMEOUT)
+            fmt = self.make_format(self.epcs)
+            try:
+                client.sendall(fmt.header())
+            except OSError:
+                client.close()
+                continue
+            with self._lock:
+                self._clients.append((client, fmt))
+
+    def write(self, reads: np.ndarray) -> None:
+        with self._lock:
+            clients = list(self._clients)
+        for client, fmt in clients:
+            try:
+                client.sendall(fmt.encode(reads))
+            except OSError as e:
+                self.logger.info(f"Dropping stream client: {e}")
+                client.close()
+                with self._lock:
+                    self._clients = [entry for entry in self._clients if entry[0] is not client]
+
+    def reset(self) -> None:
+        with self._lock:
+            for _, fmt in self._clients:
+                fmt.reset()
+
+    def close(self) -> None:
+        self._server.close()
+        with self._lock:
+            for client, _ in self._clients:
+                client.close()
+            self._clients = []
+        if self._path and os.path.exists(self._path):
+            os.unlink(self._path)
+
+
+def open_sink(output: str, fmt: str, epcs: EPCTable):
+    make_format = FORMATS[fmt]
+    if output == '-':
+        return StreamSink(sys.stdout.buffer, make_format, epcs)
+    if output.startswith(('unix:', 'tcp:')):
+        return SocketSink(output, make_format, epcs)
+    return StreamSink(open(output, 'wb'), make_format, epcs)
+
+
+class HeadlessDaemon:
+    """Reader connection plus a writer loop, without any Qt dependency.
+
+    The reader callback only queues reports; the writer loop drains them
+    in large batches, so sustained rates are bound by parsing and
+    encoding rather than by widget updates.
+    """
+
+    def __init__(self, config: RFIDConfig, addresses: str, sink, filter_epcs: bool = False,
+                 min_rssi: Optional[float] = None, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 stats_interval: float = DEFAULT_STATS_INTERVAL, auto_tune: float = 0,
+                 config_file: Optional[str] = None, metrics_port: int = 0,
+                 metrics_address: str = DEFAULT_METRICS_ADDRESS, events=None, max_epcs: int = DEFAULT_MAX_EPCS):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.addresses = addresses
+        self.sink = sink
+        self.filter_epcs = filter_epcs
+        self.min_rssi = min_rssi
+        self.flush_interval = flush_interval
+        self.stats_interval = stats_interval
+        self.auto_tune = auto_tune  # seconds per auto-tune trial, 0 skips tuning
+        self.config_file = config_file
+        self.settings = {}
+        self.buffer = TagReadBuffer(DEFAULT_BUFFER_CAPACITY)
+        self.epc_lookup = EPCIdLookup(config.epc_index)
+        self.max_epcs = max_epcs
+        self._compact_at = max_epcs
+        self.reads_written = 0
+        self.antenna_rates = AntennaRates(stats_interval or 10.0)
+        self.reader = None
+        self._stop = threading.Event()
+        self.metrics_port = metrics_port  # 0 serves no metrics
+        self.metrics_address = metrics_address
+        # Tag presence is only tracked for an events stream
+        self.events = events
+        self.presence = None
+        if events is not None:
+            self.presence = PresenceEngine(config.get('presence_timeout_ms', 2000) / 1000.0,
+                                           config.get('presence_dwell_ms', 5000) / 1000.0,
+                                           config.get('presence_enter_rssi'), config.get('presence_exit_rssi'),
+                                           config.get('presence_zones'))
+        self.setup_metrics()
+
+    def setup_metrics(self) -> None:
+        self.metrics = MetricsRegistry()
+        self.error_counter = ErrorCounter(self.metrics)
+        self.metrics.counter('rfid_reads_received_total', "Tag reads queued by the reader callback",
+                             function=lambda: self.buffer.total_received)
+        self.metrics.counter('rfid_reads_dropped_total', "Tag reads dropped by the full queue",
+                             function=lambda: self.buffer.total_dropped)
+        self.reads_filtered = self.metrics.counter('rfid_reads_filtered_total',
+                                                   "Tag reads removed by the EPC list and rules")
+        self.metrics.counter('rfid_reads_written_total', "Tag reads written to the output",
+                             function=lambda: self.reads_written)
+        self.metrics.gauge('rfid_queue_depth', "Tag reads waiting to be written",
+                           function=lambda: self.buffer.depth())
+        self.callback_time = self.metrics.histogram('rfid_callback_seconds',
+                                                    "Time the reader callback takes to queue a report")
+        self.queue_wait = self.metrics.histogram('rfid_queue_wait_seconds',
+                                                 "Time the oldest read of a flush waited in the queue")
+        self.flush_time = self.metrics.histogram('rfid_flush_seconds',
+                                                 "Time to parse, filter, encode and write a batch of reads")
+        self.read_latency = self.metrics.histogram('rfid_read_latency_seconds',
+                                                   "Time from the reader timestamp of the newest read to the output")
+        register_reader_metrics(self.metrics, lambda: self.reader)
+        if self.presence:
+            self.metrics.gauge('rfid_tags_present', "Tags in at least one zone right now",
+                               function=lambda: self.presence.present_count())
+            self.metrics.counter('rfid_presence_events_total', "Tag enter, exit and dwell events", ('event',),
+                                 function=lambda: dict(zip(EVENT_NAMES, self.presence.total_events)))
+
+    def on_tag_report(self, reader, tags: List[Dict[str, Any]]) -> None:
+        # Reader thread: queue only
+        start = time.perf_counter()
+        self.buffer.put_report(tags)
+        self.callback_time.observe(time.perf_counter() - start)
+
+    def connect(self) -> bool:
+        settings = self.config.connection_settings()
+        # The reader only singulates listed EPCs when host-side filtering is on as well
+        settings['filter_by_epc'] = self.filter_epcs
+        if self.min_rssi is not None:
+            settings['rssi_floor'] = self.min_rssi
+        self.settings = settings
+        if ',' in self.addresses:
+            from .reader_pool import ReaderPool
+            self.reader = ReaderPool()
+        else:
+            from .reader import RFIDReader
+            self.reader = RFIDReader()
+        self.reader.connection_error.connect(self.logger.error)
+        return self.reader.connect(self.addresses, settings, self.on_tag_report)
+
+    def stop(self, *args) -> None:
+        self._stop.set()
+
+    def run(self, duration: float = 0) -> int:
+        self.error_counter.install()
+        server = None
+        if self.metrics_port:
+            server = start_metrics_server(self.metrics, self.metrics_port, self.metrics_address)
+        try:
+            if not self.connect():
+                return 1
+            return self.stream(duration)
+        finally:
+            if server:
+                server.close()
+            self.error_counter.uninstall()
+
+    def stream(self, duration: float) -> int:
+        # A pool finishes connecting in the background and starts readers as they come up
+        self.reader.start_inventory()
+        self.logger.info(f"Streaming reads from {self.addresses}")
+        if self.auto_tune:
+            threading.Thread(target=self.run_auto_tune, name='auto-tune', daemon=True).start()
+
+        started = time.monotonic()
+        last_stats = started
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(self.flush_interval)
+                self.flush()
+                if self.presence:
+                    self.write_events(self.presence.advance())
+                now = time.monotonic()
+                if self.stats_interval and now - last_stats >= self.stats_interval:
+                    last_stats = now
+                    links = self.reader.status()
+                    self.logger.info(f"Received {self.buffer.received} reads, wrote {self.reads_written}, "
+                                     f"dropped {self.buffer.dropped}, {self.error_counter.counter.total():.0f} errors, "
+                                     f"{sum(link['state'] in ('connected', 'inventorying') for link in links)}"
+                                     f"/{len(links)} readers up, "
+                                     f"{sum(link['reconnects'] for link in links)} reconnects"
+                                     + (f", {self.presence.present_count()} tags present" if self.presence else ''))
+                    for entry in self.reader.clock.status():
+                        if entry['offset_ms'] is not None:
+                            self.logger.info(f"Reader {entry['reader_id']} clock: offset {entry['offset_ms']:.1f} ms, "
+                                             f"drift {entry['drift_ppm']:.1f} ppm")
+                    for entry in self.antenna_rates.rates(now):
+                        self.logger.info(f"Reader {entry['reader']} antenna {entry['antenna']}: "
+                                         f"{entry['reads_per_s']:.0f} reads/s, {entry['tags_per_s']:.1f} tags/s")
+                if duration and now - started >= duration:
+                    break
+        except BrokenPipeError:
+            self.logger.info("Output closed")
+        finally:
+            # disconnect stops the inventory politely itself
+            self.reader.disconnect(timeout=DISCONNECT_TIMEOUT)
+            try:
+                self.flush()
+            except OSError:
+                pass
+            self.sink.close()
+            if self.events is not None and self.events is not sys.stdout:
+                self.events.close()
+        return 0
+
+    def run_auto_tune(self) -> None:
+        # Runs next to the writer loop, the reads of the trials are streamed as usual
+        best = self.reader.auto_tune(self.settings, trial_seconds=self.auto_tune)
+        if not best:
+            self.logger.error("Auto-tune failed, keeping the configured reader settings")
+            return
+        tuned = tuned_settings(best)
+        self.config.update_reader_settings(tuned)
+        self.logger.info(f"Auto-tuned reader settings: {tuned}")
+        if self.config_file:
+            self.config.save_to_file(self.config_file)
+
+    def flush(self) -> None:
+        while True:
+            tags = self.buffer.drain(MAX_READS_PER_FLUSH)
+            if not tags:
+                return
+            self.queue_wait.observe(self.buffer.last_wait)
+            start = time.perf_counter()
+            epcs = self.sink.epcs
+            now = host_micros()
+            reads = self.reader.clock.align(reads_from_reports(tags, epcs.intern, now))
+            if self.filter_epcs:
+                accepted, _ = self.epc_lookup.tables(epcs.epcs)
+                count = len(reads)
+                reads = reads[accepted[reads['epc_id']]]
+                self.reads_filtered.inc(count - len(reads))
+            if self.presence:
+                self.write_events(self.presence.update(reads))
+            if len(reads):
+                self.antenna_rates.update(reads)
+                self.sink.write(reads)
+                self.reads_written += len(reads)
+                timed = reads['time_us'][reads['last_seen'] > 0]
+                if len(timed):
+                    self.read_latency.observe(max(0, now - int(timed.max())) / 1e6)
+            if len(epcs) > self._compact_at:
+                self.compact_epcs()
+            self.flush_time.observe(time.perf_counter() - start)
+            if len(tags) < MAX_READS_PER_FLUSH:
+                return
+
+    def compact_epcs(self) -> None:
+        # Bounds the EPC table and everything keyed by its ids; only present tags keep an id.
+        # Binary clients get the dictionary again before the next reads.
+        epcs = self.sink.epcs
+        count = len(epcs)
+        keep = np.flatnonzero(self.presence.epc_zones[:count] > 0) if self.presence else np.zeros(0, dtype=np.int64)
+        mapping = epcs.compact(keep)
+        if self.presence:
+            self.presence.compact_epcs(mapping)
+        self.antenna_rates.compact_epcs(mapping)
+        self.epc_lookup.clear()
+        self.sink.reset()
+        # Present tags alone can exceed the limit, the next compaction waits until the table doubled
+        self._compact_at = max(self.max_epcs, 2 * len(epcs))
+        self.logger.info(f"Compacted the EPC table from {count} to {len(epcs)} EPCs")
+
+
+    def write_events(self, events: np.ndarray) -> None:
+        if len(events):
+            self.presence.write_ndjson(self.events, events, self.sink.epcs)
+            self.events.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Stream tag reads without the GUI")
+    parser.add_argument('--config', help="JSON configuration file (reader settings, EPC list and rules)")
+    parser.add_argument('--reader', help="reader address, host[:port]; comma separated for several readers "
+                                         "(default: reader_settings.ip of the configuration)")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson',
+                        help="ndjson: one JSON object per read; binary: .rfrec session blocks, replayable in the GUI")
+    parser.add_argument('--output', default='-',
+                        help="'-' for stdout, a file name, unix:PATH or tcp:[HOST:]PORT to serve clients")
+    filter_group = parser.add_mutually_exclusive_group()
+    filter_group.add_argument('--filter', dest='filter_epcs', action='store_true', default=None,
+                              help="only stream EPCs accepted by the EPC list and rules")
+    filter_group.add_argument('--no-filter', dest='filter_epcs', action='store_false')
+    parser.add_argument('--min-rssi', type=float, help="drop reads with a lower peak RSSI (dBm)")
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL)
+    parser.add_argument('--stats-interval', type=float, default=DEFAULT_STATS_INTERVAL,
+                        help="seconds between counters on stderr, 0 disables")
+    parser.add_argument('--auto-tune', type=float, default=0, metavar='SECONDS',
+                        help="auto-tune power, search mode, session and report batching with trials of this "
+                             "many seconds after connecting, saved to --config")
+    parser.add_argument('--metrics-port', type=int, help="serve Prometheus metrics on this HTTP port "
+                                                        "(default: metrics_port of the configuration, 0 disables)")
+    parser.add_argument('--metrics-address', help="address for --metrics-port (default: metrics_address of the "
+                                                  "configuration, 127.0.0.1)")
+    parser.add_argument('--events', metavar='FILE',
+                        help="append tag enter, exit and dwell events as JSON lines to this file ('-' for stdout "
+                             "when --output is elsewhere); timeouts, RSSI levels and zones come from --config")
+    parser.add_argument('--max-epcs', type=int, default=DEFAULT_MAX_EPCS,
+                        help="distinct EPCs kept in memory before forgetting the ones no longer present "
+                             f"(default {DEFAULT_MAX_EPCS})")
+    parser.add_argument('--duration', type=float, default=0, help="stop after this many seconds")
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args(argv)
+
+    # Logs go to stderr, stdout is reserved for the stream
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    config = RFIDConfig()
+    if args.config:
+        config.load_from_file(args.config)
+    settings = config.get('reader_settings', {})
+    addresses = args.reader or settings.get('ip', '')
+    filter_epcs = args.filter_epcs
+    if filter_epcs is None:
+        # Like the GUI checkbox, but an empty list and rule set means everything passes
+        filter_epcs = settings.get('filter_by_epc', True) and bool(config.get('epc_list') or config.get('epc_rules'))
+
+    epcs = EPCTable()
+    try:
+        sink = open_sink(args.output, args.format, epcs)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error opening output {args.output}: {e}")
+        return 1
+
+    events = None
+    if args.events:
+        if args.events == '-' and args.output == '-':
+            logger.error("--events and --output cannot both be stdout")
+            return 1
+        try:
+            events = sys.stdout if args.events == '-' else open(args.events, 'a')
+        except OSError as e:
+            logger.error(f"Error opening events file {args.events}: {e}")
+            return 1
+
+    daemon = HeadlessDaemon(config, addresses, sink, filter_epcs, args.min_rssi,
+                            args.flush_interval, args.stats_interval, args.auto_tune, args.config,
+                            config.get('metrics_port', 0) if args.metrics_port is None else args.metrics_port,
+                            args.metrics_address or config.get('metrics_address', DEFAULT_METRICS_ADDRESS), events,
+                            args.max_epcs)
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    return daemon.run(args.duration)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import logging
+from bisect import bisect_right
+from typing import List, Optional, Tuple, Iterable
+
+import numpy as np
+
+# Cached lookups are dropped once the tag population grows past this
+MAX_CACHE_SIZE = 500000
+# Impinj readers take two C1G2 filters per inventory command, more make ADD_ROSPEC fail
+DEFAULT_READER_FILTERS = 2
+# Hex digits of a 96-bit EPC, assumed for value/mask and range rules when the list is empty
+EPC_HEX_LENGTH = 24
+
+
+def normalize_epc(epc) -> str:
+    if isinstance(epc, (bytes, bytearray)):
+        epc = epc.decode('ascii', 'ignore')
+    return str(epc).strip().upper()
+
+
+def reader_filter_prefixes(epcs: Iterable[str], rules: Iterable[str],
+                           limit: int = DEFAULT_READER_FILTERS) -> List[str]:
+    """EPC prefixes for reader-side C1G2 filters covering every accepted EPC.
+
+    The list EPCs and prefix rules are used as they are, value/mask and
+    range rules contribute the leading digits they fix. When more than
+    `limit` prefixes are needed they are shortened to common prefixes, so
+    the result may accept more than the list and host-side filtering stays
+    authoritative. An empty result means the reader has to report every tag.
+    """
+    epcs = [epc for epc in (normalize_epc(epc) for epc in epcs) if epc]
+    lengths = {len(epc) for epc in epcs}
+    length = lengths.pop() if len(lengths) == 1 else EPC_HEX_LENGTH
+    prefixes = set(epcs)
+    for rule in rules:
+        rule = rule.strip().upper()
+        if not rule:
+            continue
+        try:
+            prefix = _rule_prefix(rule, length)
+        except ValueError:
+            continue  # Reported by EPCIndex.set_rules
+        if not prefix:
+            return []
+        prefixes.add(prefix)
+    if not prefixes:
+        return []
+
+    prefixes = _minimal_prefixes(prefixes)
+    for cut in range(max(map(len, prefixes)), 0, -1):
+        covering = _minimal_prefixes({prefix[:cut] for prefix in prefixes})
+        if len(covering) <= limit:
+            return sorted(covering)
+    return []
+
+
+def _rule_prefix(rule: str, length: int) -> str:
+    # Leading hex digits every EPC accepted by the rule shares, '' if none
+    if rule.endswith('*'):
+        return rule[:-1]
+    if '/' in rule:
+        value, mask = rule.split('/', 1)
+        # Masks compare numerically, so they only pin EPC digits at full EPC length
+        if len(mask) != length:
+            return ''
+        fixed = len(mask) - len(mask.lstrip('F'))
+        return format(int(value, 16) & int(mask, 16), f'0{length}X')[:fixed]
+    if '-' in rule:
+        low, high = sorted(int(bound, 16) for bound in rule.split('-', 1))
+        if high >= 16 ** length:
+            return ''
+        low, high = format(low, f'0{length}X'), format(high, f'0{length}X')
+        shared = 0
+        while shared < length and low[shared] == high[shared]:
+            shared += 1
+        return low[:shared]
+    return rule
+
+
+def _minimal_prefixes(prefixes: Iterable[str]) -> set:
+    # Drops prefixes already covered by a shorter one
+    kept = set()
+    for prefix in sorted(prefixes, key=len):
+        if not any(prefix[:i] in kept for i in range(1, len(prefix) + 1)):
+            kept.add(prefix)
+    return kept
+
+
+class EPCIndex:
+    """O(1) EPC to matrix slot index plus prefix, mask and range rules.
+
+    Rules are written one per line:
+        30340242*                  EPC prefix (the * is optional)
+        30340242.../FFFFFFFF...    value/mask (hex, compared bitwise)
+        A000-AFFF                  inclusive hex range
+    """
+
+    def __init__(self, epcs: Optional[List[str]] = None, rules: Optional[List[str]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.epcs = []
+        self.slots = {}
+        self.rules = []
+        self._prefixes = {}  # prefix length -> set of prefixes
+        self._masks = {}  # mask -> set of masked values
+        self._range_starts = []
+        self._range_ends = []
+        self._cache = {}
+        self.version = 0  # bumped whenever a lookup result may change
+        if epcs:
+            self.set_epcs(epcs)
+        if rules:
+            self.set_rules(rules)
+
+    def set_epcs(self, epcs: List[str]) -> None:
+        new = [normalize_epc(epc) for epc in epcs]
+        old = self.epcs
+
+        # Only slots from the first changed position onwards move
+        start = 0
+        limit = min(len(old), len(new))
+        while start < limit and old[start] == new[start]:
+            start += 1
+        if start == len(old) == len(new):
+            return
+
+        for epc in old[start:]:
+            if self.slots.get(epc, -1) >= start:
+                del self.slots[epc]
+        for i in range(start, len(new)):
+            self.slots.setdefault(new[i], i)
+
+        self.epcs = new
+        self._cache.clear()
+        self.version += 1
+
+    def set_rules(self, rules: Iterable[str]) -> None:
+        prefixes = {}
+        masks = {}
+        ranges = []
+        parsed = []
+        for rule in rules:
+            rule = rule.strip().upper()
+            if not rule:
+                continue
+            try:
+                if rule.endswith('*'):
+                    prefix = rule[:-1]
+                    prefixes.setdefault(len(prefix), set()).add(prefix)
+                elif '/' in rule:
+                    value, mask = rule.split('/', 1)
+                    mask = int(mask, 16)
+                    masks.setdefault(mask, set()).add(int(value, 16) & mask)
+                elif '-' in rule:
+                    low, high = rule.split('-', 1)
+                    low, high = int(low, 16), int(high, 16)
+                    ranges.append((min(low, high), max(low, high)))
+                else:
+                    prefixes.setdefault(len(rule), set()).add(rule)
+                parsed.append(rule)
+            except ValueError:
+                self.logger.error(f"Invalid EPC rule: {rule}")
+
+        self.rules = parsed
+        self._prefixes = prefixes
+        self._masks = masks
+        self._range_starts, self._range_ends = self._merge_ranges(ranges)
+        self._cache.clear()
+        self.version += 1
+
+    @staticmethod
+    def _merge_ranges(ranges: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+        starts, ends = [], []
+        for low, high in sorted(ranges):
+            if ends and low <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], high)
+            else:
+                starts.append(low)
+                ends.append(high)
+        return starts, ends
+
+    def lookup(self, epc) -> Tuple[bool, Optional[int]]:
+        # Returns (accepted, slot); slot is None for EPCs outside the list
+        result = self._cache.get(epc)
+        if result is None:
+            result = self._resolve(epc)
+            if len(self._cache) >= MAX_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[epc] = result
+        return result
+
+    def slot(self, epc) -> Optional[int]:
+        return self.lookup(epc)[1]
+
+    def accepts(self, epc) -> bool:
+        return self.lookup(epc)[0]
+
+    def _resolve(self, epc) -> Tuple[bool, Optional[int]]:
+        key = normalize_epc(epc)
+        slot = self.slots.get(key)
+        if slot is not None:
+            return True, slot
+        return self._matches_rules(key), None
+
+    def _matches_rules(self, key: str) -> bool:
+        for length, prefixes in self._prefixes.items():
+            if key[:length] in prefixes:
+                return True
+
+        if self._masks or self._range_starts:
+            try:
+                value = int(key, 16)
+            except ValueError:
+                return False
+            for mask, values in self._masks.items():
+                if value & mask in values:
+                    return True
+            i = bisect_right(self._range_starts, value) - 1
+            if i >= 0 and value <= self._range_ends[i]:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self.epcs)
+
+    def __contains__(self, epc) -> bool:
+        return self.slot(epc) is not None
+
+
+class EPCIdLookup:
+    """Filter and slot lookup tables indexed by interned EPC id.
+
+    Each distinct EPC is resolved against the EPCIndex once, and again only
+    after the list or the rules change, so batches are filtered with array
+    indexing.
+    """
+
+    def __init__(self, index: EPCIndex):
+        self.index = index
+        self.clear()
+
+    def clear(self) -> None:
+        # After the EPC ids were cleared or compacted
+        self.accepted = np.zeros(0, dtype=bool)
+        self.slots = np.zeros(0, dtype=np.int64)
+        self._version = self.index.version
+
+    def tables(self, epcs: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        if self._version != self.index.version:
+            self.clear()
+
+        known = len(self.accepted)
+        if len(epcs) > known:
+            results = [self.index.lookup(epc) for epc in epcs[known:]]
+            self.accepted = np.concatenate([self.accepted, np.array([r[0] for r in results], dtype=bool)])
+            self.slots = np.concatenate([self.slots, np.array(
+                [-1 if r[1] is None else r[1] for r in results], dtype=np.int64)])
+        return self.accepted, self.slots
@@ -0,0 +1,283 @@
+import time
+
+from PyQt5.QtWidgets import QWidget, QToolTip, QSizePolicy
+from PyQt5.QtCore import Qt, QTimer, QRect, QEvent
+from PyQt5.QtGui import QColor, QPainter, QPen, QFont
+from typing import Dict, Optional, Any, List, Tuple
+
+from .matrix_view import format_tag_lines, ABSENT_COLOR
+
+# RSSI color lookup table resolution (entries per dBm)
+LUT_STEPS_PER_DB = 4
+
+# Level of detail thresholds in pixels per cell
+FULL_DETAIL_SIZE = (150, 60)
+SHORT_DETAIL_SIZE = (48, 14)
+GRID_LINE_SIZE = 6
+
+# Cell size at zoom 1.0
+BASE_CELL_SIZE = (150, 60)
+MIN_ZOOM = 0.02
+MAX_ZOOM = 2.0
+
+# Above this many dirty cells a full repaint is cheaper than a region
+MAX_PARTIAL_UPDATES = 64
+
+EMPTY_COLOR = QColor(Qt.white)
+GRID_COLOR = QColor('#BDBDBD')
+
+
+class HeatmapMatrixView(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = 0
+        self.cols = 0
+        self.min_rssi = -100
+        self.max_rssi = -30
+        self.display_settings = {
+            'peak_rssi': True,
+            'last_rssi': True,
+            'first_seen': True,
+            'last_seen': True,
+            'phase': True,
+            'doppler': True,
+            'motion': True,
+            'read_count': True,
+            'epc': True
+        }
+        self.epc_list = []  # List of EPCs to display
+        self.tag_data = {}  # Store current tag data
+        self.zoom = 1.0
+
+        # (row, col) -> [tag_data, color, cached text]
+        self.cells = {}
+        self.dirty_cells = set()
+        self._flush_scheduled = False
+        self.on_repaint = None  # called with the seconds each paint took
+        self._no_signal_color = self.get_color_for_rssi(None)
+        self._absent_color = QColor(ABSENT_COLOR)
+        self._color_lut = []
+        self.build_color_lut()
+
+        self.setFont(QFont('monospace', 8))
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def get_color_for_rssi(self, rssi: Optional[float]) -> QColor:
+        if rssi is None:
+            return QColor(200, 200, 200)  # Gray for no signal
+
+        normalized = (rssi - self.min_rssi) / (self.max_rssi - self.min_rssi)
+        normalized = max(0, min(1, normalized))
+
+        red = int(255 * (1 - normalized))
+        green = int(255 * normalized)
+
+        return QColor(red, green, 0)
+
+    def build_color_lut(self) -> None:
+        steps = int((self.max_rssi - self.min_rssi) * LUT_STEPS_PER_DB) + 1
+        self._color_lut = [
+            self.get_color_for_rssi(self.min_rssi + i / LUT_STEPS_PER_DB)
+            for i in range(max(steps, 1))
+        ]
+
+    def color_for_rssi(self, rssi: Optional[float]) -> QColor:
+        if rssi is None:
+            return self._no_signal_color
+        i = int((rssi - self.min_rssi) * LUT_STEPS_PER_DB)
+        return self._color_lut[max(0, min(len(self._color_lut) - 1, i))]
+
+    def color_for_cell(self, tag_data: Dict[str, Any]) -> QColor:
+        if tag_data.get('present') is False:
+            return self._absent_color
+        return self.color_for_rssi(tag_data.get('peak_rssi'))
+
+    def set_display_settings(self, settings: Dict[str, bool]) -> None:
+        changed = any(self.display_settings.get(k) != v for k, v in settings.items())
+        self.display_settings.update(settings)
+        if changed:
+            for cell in self.cells.values():
+                cell[2] = None
+            self.update()
+
+    def update_epcs(self, epcs: List[str]) -> None:
+        self.epc_list = list(epcs)
+        self.refresh_all_cells()
+
+    def create_matrix(self, rows: int, cols: int) -> None:
+        if (rows, cols) == (self.rows, self.cols):
+            return
+        self.rows = rows
+        self.cols = cols
+        self.cells.clear()
+        self.dirty_cells.clear()
+        self._apply_zoom()
+        self.refresh_all_cells()
+
+    def update_cell(self, row: int, col: int, tag_data: Dict[str, Any]) -> None:
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return
+
+        slot = row * self.cols + col
+        epc = self.epc_list[slot] if slot < len(self.epc_list) else tag_data.get('epc')
+        if epc is not None:
+            self.tag_data[epc] = tag_data
+        self._set_cell((row, col), tag_data)
+
+    def cell_widget(self, row: int, col: int) -> Optional[QWidget]:
+        # Every cell is painted by the view itself
+        return self
+
+    def set_present(self, row: int, col: int, present: bool) -> None:
+        slot = row * self.cols + col
+        tag_data = self.tag_data.get(self.epc_list[slot]) if slot < len(self.epc_list) else None
+        if tag_data is not None and tag_data.get('present', True) != present:
+            self.update_cell(row, col, dict(tag_data, present=present))
+
+    def update_tag_data(self, epc: str, data: Dict[str, Any]) -> None:
+        self.tag_data[epc] = data
+        if epc in self.epc_list:
+            i = self.epc_list.index(epc)
+            if i < self.rows * self.cols:
+                self._set_cell((i // self.cols, i % self.cols), data)
+
+    def _set_cell(self, position: Tuple[int, int], tag_data: Dict[str, Any]) -> None:
+        # Text is formatted lazily when the cell is painted with detail
+        self.cells[position] = [tag_data, self.color_for_cell(tag_data), None]
+        self._mark_dirty(position)
+
+    def _mark_dirty(self, position: Tuple[int, int]) -> None:
+        self.dirty_cells.add(position)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self.flush_dirty_cells)
+
+    def flush_dirty_cells(self) -> None:
+        self._flush_scheduled = False
+        dirty, self.dirty_cells = self.dirty_cells, set()
+        if len(dirty) > MAX_PARTIAL_UPDATES:
+            self.update()
+            return
+        for position in dirty:
+            self.update(self._cell_rect(*position))
+
+    def refresh_all_cells(self) -> None:
+        self.cells.clear()
+        for i, epc in enumerate(self.epc_list[:self.rows * self.cols]):
+            tag_data = self.tag_data.get(epc, {'epc': epc})
+            self.cells[(i // self.cols, i % self.cols)] = [tag_data, self.color_for_cell(tag_data), None]
+        self.update()
+
+    def update_rssi_range(self, min_rssi: float, max_rssi: float) -> None:
+        if (min_rssi, max_rssi) == (self.min_rssi, self.max_rssi):
+            return
+        self.min_rssi = min_rssi
+        self.max_rssi = max_rssi
+        self.build_color_lut()
+        self.refresh_all_cells()
+
+    def clear(self) -> None:
+        self.tag_data.clear()
+        self.cells.clear()
+        self.update()
+
+    def set_zoom(self, zoom: float) -> None:
+        self.zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+        self._apply_zoom()
+        self.update()
+
+    def _apply_zoom(self) -> None:
+        self.setMinimumSize(
+            int(self.cols * BASE_CELL_SIZE[0] * self.zoom),
+            int(self.rows * BASE_CELL_SIZE[1] * self.zoom)
+        )
+
+    def _cell_size(self) -> Tuple[float, float]:
+        if not self.rows or not self.cols:
+            return 0.0, 0.0
+        return self.width() / self.cols, self.height() / self.rows
+
+    def _cell_rect(self, row: int, col: int) -> QRect:
+        width, height = self._cell_size()
+        x, y = int(col * width), int(row * height)
+        return QRect(x, y, int((col + 1) * width) - x, int((row + 1) * height) - y)
+
+    def _cell_text(self, cell: list, short: bool) -> str:
+        if short:
+            tag_data = cell[0]
+            rssi = tag_data.get('peak_rssi')
+            epc = tag_data.get('epc', '')[-4:]
+            return f"{epc}\n{rssi:.0f}" if rssi is not None else epc
+        if cell[2] is None:
+            cell[2] = '\n'.join(format_tag_lines(cell[0], self.display_settings))
+        return cell[2]
+
+    def paintEvent(self, event) -> None:
+        start = time.perf_counter()
+        self._paint(event)
+        if self.on_repaint:
+            self.on_repaint(time.perf_counter() - start)
+
+    def _paint(self, event) -> None:
+        painter = QPainter(self)
+        exposed = event.rect()
+        painter.fillRect(exposed, EMPTY_COLOR)
+        if not self.rows or not self.cols:
+            return
+
+        width, height = self._cell_size()
+        first_col = max(0, int(exposed.left() / width))
+        last_col = min(self.cols - 1, int(exposed.right() / width))
+        first_row = max(0, int(exposed.top() / height))
+        last_row = min(self.rows - 1, int(exposed.bottom() / height))
+
+        full_detail = width >= FULL_DETAIL_SIZE[0] and height >= FULL_DETAIL_SIZE[1]
+        short_detail = not full_detail and width >= SHORT_DETAIL_SIZE[0] and height >= SHORT_DETAIL_SIZE[1]
+        draw_grid = width >= GRID_LINE_SIZE and height >= GRID_LINE_SIZE
+
+        cells = self.cells
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                cell = cells.get((row, col))
+                if cell is not None:
+                    painter.fillRect(self._cell_rect(row, col), cell[1])
+
+        if draw_grid:
+            painter.setPen(QPen(GRID_COLOR))
+            for col in range(first_col, last_col + 2):
+                x = int(col * width)
+                painter.drawLine(x, exposed.top(), x, exposed.bottom())
+            for row in range(first_row, last_row + 2):
+                y = int(row * height)
+                painter.drawLine(exposed.left(), y, exposed.right(), y)
+
+        if full_detail or short_detail:
+            painter.setPen(QPen(Qt.black))
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    cell = cells.get((row, col))
+                    if cell is not None:
+                        painter.drawText(self._cell_rect(row, col), Qt.AlignCenter,
+                                         self._cell_text(cell, short_detail))
+
+    def wheelEvent(self, event) -> None:
+        # Ctrl + wheel zooms, plain wheel scrolls the parent
+        if event.modifiers() & Qt.ControlModifier:
+            factor = 1.25 if event.angleDelta().y() > 0 else 0.8
+            self.set_zoom(self.zoom * factor)
+            event.accept()
+        else:
+            event.ignore()
+
+    def event(self, event) -> bool:
+        if event.type() == QEvent.ToolTip and self.rows and self.cols:
+            width, height = self._cell_size()
+            position = (int(event.pos().y() / height), int(event.pos().x() / width))
+            cell = self.cells.get(position)
+            if cell is not None:
+                QToolTip.showText(event.globalPos(), self._cell_text(cell, False), self)
+            else:
+                QToolTip.hideText()
+            return True
+        return super().event(event)
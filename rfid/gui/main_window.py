@@ -1,31 +1,86 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                            QLabel, QLineEdit, QPushButton, QGroupBox, QCheckBox,
                            QTabWidget, QFileDialog, QTreeWidget, QTreeWidgetItem,
-                           QInputDialog, QDialog, QTextEdit)
+                           QInputDialog, QDialog, QTextEdit, QScrollArea,
+                           QComboBox, QStackedWidget)
 from PyQt5.QtCore import QTimer, pyqtSignal, Qt, QThread, QObject
-from datetime import datetime
 import logging
+import time
+
+import numpy as np
 
 from ..config import RFIDConfig
-from ..reader import RFIDReader
+from ..reader import RFIDReader, REPORT_MODES, SEARCH_MODES, DEFAULT_SEARCH_MODE, DEFAULT_SESSION
+from ..reader_pool import ReaderPool, parse_addresses
+from ..ingest import TagReadBuffer, OVERFLOW_POLICIES, DROP_OLDEST
+from ..stats import StatisticsEngine
+from ..motion import DEFAULT_CHANNEL_PLAN
+from ..presence import PresenceEngine, EVENT_NAMES, EXIT
+from ..tuning import tuned_settings
+from ..clock import host_micros
+from ..metrics import (MetricsRegistry, ErrorCounter, register_reader_metrics, start_metrics_server,
+                       DEFAULT_METRICS_ADDRESS)
+from ..store import TagReadStore
+from ..epc_index import EPCIdLookup
+from ..recording import SessionRecorder, SessionFile, SessionReplay
+from ..tracing import LatencyTracer, DEFAULT_SAMPLE_INTERVAL
 from .matrix_view import MatrixView
-from .tag_data_view import TagDataView
-from typing import Dict, Any, Optional
+from .heatmap_view import HeatmapMatrixView
+from .tag_data_view import TagDataView, MAX_HISTORY_LIMIT
+from .tag_stats_view import TagStatsView
+from .metrics_panel import MetricsPanel
+from .paint_watcher import PaintWatcher
+from typing import Dict, Any, Optional, List
 import json
 
+# Tag reads are drained from the ingest buffer once per frame
+INGEST_FRAME_MS = 16
+MAX_READS_PER_FRAME = 20000
+
+# Refresh rate of the aggregated statistics view
+STATS_REFRESH_MS = 500
+
+# Refresh rate of the metrics panel in the status bar
+METRICS_REFRESH_MS = 1000
+
+# Tag presence timers are checked at this rate
+PRESENCE_TICK_MS = 50
+
+# Replay speed as a multiple of real time, 0 replays as fast as possible
+REPLAY_SPEEDS = {'1x': 1.0, '2x': 2.0, '10x': 10.0, '100x': 100.0, 'Max': 0.0}
+SESSION_FILTER = "Session Recordings (*.rfrec)"
+TRACE_FILTER = "Chrome Trace (*.json)"
+EVENTS_FILTER = "CSV Files (*.csv);;JSON Lines (*.ndjson)"
+
+
+def format_antenna_map(values: Dict[Any, Any]) -> str:
+    return ', '.join(f"{antenna}:{value}" for antenna, value in values.items())
+
+
+def parse_antenna_map(text: str) -> Dict[str, int]:
+    # "1:30, 2:25" -> {'1': 30, '2': 25}, keys as they come back from JSON
+    values = {}
+    for entry in text.replace(';', ',').split(','):
+        if entry.strip():
+            antenna, _, value = entry.partition(':')
+            values[str(int(antenna))] = int(value)
+    return values
+
 class ReaderConnectWorker(QObject):
     finished = pyqtSignal()
     connection_success = pyqtSignal()
     connection_error = pyqtSignal(str)
 
-    def __init__(self, reader, ip_address):
+    def __init__(self, reader, ip_address, settings, callback):
         super().__init__()
         self.reader = reader
         self.ip_address = ip_address
+        self.settings = settings
+        self.callback = callback
 
     def run(self):
         try:
-            if self.reader.connect(self.ip_address, RFIDConfig().get('reader_settings', {}), MainWindow.handle_tag_data):
+            if self.reader.connect(self.ip_address, self.settings, self.callback):
                 self.connection_success.emit()
             else:
                 self.connection_error.emit("Connection Failed")
@@ -34,26 +89,164 @@ class ReaderConnectWorker(QObject):
         finally:
             self.finished.emit()
 
+class AutoTuneWorker(QObject):
+    finished = pyqtSignal(object)  # best settings, None on failure
+    progress = pyqtSignal(int, int, str)
+
+    def __init__(self, reader, settings):
+        super().__init__()
+        self.reader = reader
+        self.settings = settings
+
+    def run(self):
+        best = None
+        try:
+            best = self.reader.auto_tune(self.settings, progress=self.report_progress)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Error auto-tuning reader: {e}")
+        finally:
+            self.finished.emit(best)
+
+    def report_progress(self, done: int, total: int, trial: Dict[str, Any]) -> None:
+        if trial['error']:
+            self.progress.emit(done, total, f"failed: {trial['error']}")
+        else:
+            self.progress.emit(done, total, f"{trial['unique_per_s']:.0f} tags/s")
+
 class MainWindow(QMainWindow):
     tag_data_signal = pyqtSignal(dict)
+    pool_state_signal = pyqtSignal(int, str)
+    reader_link_signal = pyqtSignal(str, str)
+    reader_reconfigured_signal = pyqtSignal(float, list, str)
 
-    def __init__(self):
+    def __init__(self, startup_timer=None):
         super().__init__()
         self.logger = logging.getLogger(__name__)
+        self.startup_timer = startup_timer
         
         # Initialize components
         self.config = RFIDConfig()
         self.reader = RFIDReader()
+        self.reader_pool = ReaderPool()
+        # The single reader or the pool, whichever the last connect used
+        self.active_reader = self.reader
+        self.tag_buffer = TagReadBuffer(self.config.get('ingest_capacity', 100000),
+                                        self.config.get('ingest_overflow', DROP_OLDEST))
+        self.read_store = TagReadStore()
+        self.epc_lookup = EPCIdLookup(self.config.epc_index)
+        self.recorder = None
+        self.replay = None
+        self.tag_stats = StatisticsEngine(motion_window=self.config.get('motion_window_ms', 1000) / 1000.0,
+                                          channel_plan=self.config.get('channel_plan', DEFAULT_CHANNEL_PLAN))
+        self.presence = PresenceEngine(self.config.get('presence_timeout_ms', 2000) / 1000.0,
+                                       self.config.get('presence_dwell_ms', 5000) / 1000.0,
+                                       self.config.get('presence_enter_rssi'), self.config.get('presence_exit_rssi'),
+                                       self.config.get('presence_zones'), PRESENCE_TICK_MS / 1000.0)
+        self._ingest_status = None
+        self.metrics_server = None
+        self.setup_metrics()
+        # Latency tracing follows sampled reads from the reader to the paint, off unless enabled
+        self.tracer = LatencyTracer(self.config.get('trace_sample_ms', DEFAULT_SAMPLE_INTERVAL * 1000) / 1000.0)
+        self.reader.tracer = self.reader_pool.tracer = self.tracer
+        self.paint_watcher = PaintWatcher(self)
         self.setup_ui()
+        self.trace_label = QLabel()
+        self.trace_label.setVisible(False)
+        self.statusBar().addPermanentWidget(self.trace_label)
+        self.statusBar().addPermanentWidget(self.metrics_panel, 1)
+        self.set_latency_tracing(self.config.get('latency_tracing', False))
+        self.start_metrics_server(self.config.get('metrics_port', 0))
         
         # Connect signals
         self.tag_data_signal.connect(self.handle_tag_data)
+        self.reader_pool.connection_error.connect(self.logger.error)
+        # Pool signals fire on the network thread, hop to the GUI thread first
+        self.pool_state_signal.connect(self.update_pool_status)
+        self.reader_pool.reader_state_changed.connect(self.pool_state_signal.emit)
+        self.reader_link_signal.connect(self.update_link_status)
+        self.reader.link_state_changed.connect(
+            lambda state, error: self.reader_link_signal.emit(state, error or ''))
+        self.reader_reconfigured_signal.connect(self.handle_reconfigured)
+        for source in (self.reader, self.reader_pool):
+            source.reconfigured.connect(
+                lambda pause, changed, error: self.reader_reconfigured_signal.emit(pause, list(changed), error or ''))
         
         # Start update timer
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_matrix)
         self.timer.start(1000)
 
+        # Drain buffered tag reads once per frame
+        self.ingest_timer = QTimer()
+        self.ingest_timer.timeout.connect(self.drain_tag_buffer)
+        self.ingest_timer.start(INGEST_FRAME_MS)
+
+        # Refresh the statistics view at a fixed rate while it is shown
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.refresh_tag_stats)
+        self.stats_timer.start(STATS_REFRESH_MS)
+
+        self.presence_timer = QTimer()
+        self.presence_timer.timeout.connect(self.advance_presence)
+        self.presence_timer.start(PRESENCE_TICK_MS)
+
+        self.metrics_timer = QTimer()
+        self.metrics_timer.timeout.connect(self.metrics_panel.refresh)
+        self.metrics_timer.timeout.connect(self.refresh_trace_summary)
+        self.metrics_timer.start(METRICS_REFRESH_MS)
+
+        # Feeds a replayed session into the ingest buffer
+        self.replay_timer = QTimer()
+        self.replay_timer.timeout.connect(self.replay_tick)
+
+    def setup_metrics(self):
+        # Counters the pipeline keeps anyway are read at scrape time, the rest is recorded per frame
+        self.metrics = MetricsRegistry()
+        self.error_counter = ErrorCounter(self.metrics)
+        self.error_counter.install()
+        self.metrics.counter('rfid_reads_received_total', "Tag reads queued for the GUI, live and replayed",
+                             function=lambda: self.tag_buffer.total_received)
+        self.metrics.counter('rfid_reads_dropped_total', "Tag reads dropped by the ingest queue overflow policy",
+                             function=lambda: self.tag_buffer.total_dropped)
+        self.reads_filtered = self.metrics.counter('rfid_reads_filtered_total',
+                                                   "Tag reads removed by the EPC list and rules")
+        self.reads_rendered = self.metrics.counter('rfid_reads_rendered_total', "Tag reads applied to the views")
+        self.reader_reads = self.metrics.counter('rfid_reader_reads_total', "Stored tag reads by reader id",
+                                                 ('reader',))
+        self.metrics.gauge('rfid_queue_depth', "Tag reads waiting in the ingest queue",
+                           function=lambda: self.tag_buffer.depth())
+        self.metrics.gauge('rfid_queue_capacity', "Capacity of the ingest queue",
+                           function=lambda: self.tag_buffer.capacity)
+        self.metrics.gauge('rfid_tag_data_rows', "Rows in the Tag Data read log",
+                           function=lambda: self.tag_data_view.model.rowCount() if self.tag_data_view else 0)
+        self.metrics.gauge('rfid_tags_seen', "Distinct EPCs read since the last clear",
+                           function=lambda: len(self.read_store.epcs.epcs))
+        self.metrics.gauge('rfid_tags_present', "Tags in at least one zone right now",
+                           function=lambda: self.presence.present_count())
+        self.metrics.counter('rfid_presence_events_total', "Tag enter, exit and dwell events", ('event',),
+                             function=lambda: dict(zip(EVENT_NAMES, self.presence.total_events)))
+        self.callback_time = self.metrics.histogram('rfid_callback_seconds',
+                                                    "Time the reader callback takes to queue a report")
+        self.queue_wait = self.metrics.histogram('rfid_queue_wait_seconds',
+                                                 "Time the oldest read of a frame waited in the ingest queue")
+        self.view_update_time = self.metrics.histogram('rfid_view_update_seconds',
+                                                       "Time to store a frame of reads and update the views")
+        self.read_latency = self.metrics.histogram(
+            'rfid_read_latency_seconds', "Time from the reader timestamp of the newest live read to the views")
+        self.repaint_time = self.metrics.histogram('rfid_matrix_repaint_seconds', "Time of a matrix repaint")
+        register_reader_metrics(self.metrics, lambda: self.active_reader)
+        self.metrics_panel = MetricsPanel(self.metrics, self.error_counter)
+
+    def start_metrics_server(self, port: int) -> None:
+        if self.metrics_server:
+            self.metrics_server.close()
+            self.metrics_server = None
+        if port:
+            self.metrics_server = start_metrics_server(
+                self.metrics, port, self.config.get('metrics_address', DEFAULT_METRICS_ADDRESS))
+        self.metrics_panel.set_endpoint(
+            f"http://{self.metrics_server.address}:{self.metrics_server.port}/metrics" if self.metrics_server else None)
+
     def setup_ui(self):
         self.setWindowTitle("RFID Reader GUI")
         self.setup_styles()
@@ -106,6 +299,7 @@ class MainWindow(QMainWindow):
         # IP Address
         ip_layout = QHBoxLayout()
         self.ip_entry = QLineEdit(self.config.get('reader_settings', {}).get('ip', '192.168.254.100'))
+        self.ip_entry.setToolTip("Reader address, or a comma separated list to run several readers at once")
         ip_layout.addWidget(QLabel("Reader IP:"))
         ip_layout.addWidget(self.ip_entry)
         
@@ -119,6 +313,14 @@ class MainWindow(QMainWindow):
         self.start_button.clicked.connect(self.start_inventory)
         self.stop_button.clicked.connect(self.stop_inventory)
         self.clear_button.clicked.connect(self.clear_inventory)
+
+        # Session recording and replay
+        self.record_button = QPushButton("Start Recording")
+        self.replay_button = QPushButton("Replay Session")
+        self.replay_speed = QComboBox()
+        self.replay_speed.addItems(REPLAY_SPEEDS.keys())
+        self.record_button.clicked.connect(self.toggle_recording)
+        self.replay_button.clicked.connect(self.toggle_replay)
         
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(False)
@@ -128,10 +330,17 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.start_button)
         layout.addWidget(self.stop_button)
         layout.addWidget(self.clear_button)
+        layout.addWidget(self.record_button)
+        layout.addWidget(self.replay_button)
+        layout.addWidget(self.replay_speed)
         
         self.status_label = QLabel("Status: Disconnected")
         self.status_label.setStyleSheet("color: #f44336;")
         layout.addWidget(self.status_label)
+
+        self.ingest_label = QLabel("Queue: 0 | Dropped: 0")
+        self.ingest_label.setToolTip("Reads handed from the network thread to the GUI, waiting for the next frame")
+        layout.addWidget(self.ingest_label)
         
         layout.addStretch()
         parent_layout.addWidget(panel)
@@ -139,22 +348,38 @@ class MainWindow(QMainWindow):
     def create_tab_widget(self, parent_layout):
         self.tab_widget = QTabWidget()
         
-        # Create tabs
+        # Create tabs, their contents are built when first shown
         self.config_tab = QWidget()
         self.matrix_tab = QWidget()
         self.tag_data_tab = QWidget()
+        self.matrix_view = None
+        self.tag_data_view = None
+        self.tag_stats_view = None
+        self._tab_builders = {
+            self.config_tab: self.setup_config_tab,
+            self.matrix_tab: self.setup_matrix_tab,
+            self.tag_data_tab: self.setup_tag_data_tab,
+        }
         
         self.tab_widget.addTab(self.config_tab, "Configuration")
         self.tab_widget.addTab(self.matrix_tab, "Tag Matrix")
         self.tab_widget.addTab(self.tag_data_tab, "Tag Data")
-        
-        # Setup tab contents
-        self.setup_config_tab()
-        self.setup_matrix_tab()
-        self.setup_tag_data_tab()
+        self.tab_widget.currentChanged.connect(self.ensure_tab)
+        self.ensure_tab(self.tab_widget.currentIndex())
         
         parent_layout.addWidget(self.tab_widget)
 
+    def ensure_tab(self, index: int) -> None:
+        builder = self._tab_builders.pop(self.tab_widget.widget(index), None)
+        if builder:
+            builder()
+            if self.startup_timer:
+                self.startup_timer.mark(f"build {self.tab_widget.tabText(index)} tab")
+
+    def ensure_all_tabs(self) -> None:
+        for index in range(self.tab_widget.count()):
+            self.ensure_tab(index)
+
     def setup_config_tab(self):
         layout = QVBoxLayout(self.config_tab)
         
@@ -168,18 +393,30 @@ class MainWindow(QMainWindow):
         
         # Antennas
         antenna_label = QLabel("Antennas:")
-        self.antenna_entry = QLineEdit("1")
+        reader_settings = self.config.get('reader_settings', {})
+        self.antenna_entry = QLineEdit(', '.join(str(antenna) for antenna in reader_settings.get('antennas', [1])))
         antenna_hint = QLabel("(comma-separated list)")
         
         # TX Power
         power_label = QLabel("TX Power:")
-        self.power_entry = QLineEdit("0")
+        self.power_entry = QLineEdit(str(reader_settings.get('power', 30)))
         self.power_entry.setMaximumWidth(50)
         
         # Report Every N Tags
         report_label = QLabel("Report Every N Tags:")
-        self.report_entry = QLineEdit("20")
+        self.report_entry = QLineEdit(str(reader_settings.get('report_every_n', 1)))
         self.report_entry.setMaximumWidth(50)
+
+        # Report generation: fewer, larger reports trade latency for throughput
+        report_mode_label = QLabel("Report Mode:")
+        self.report_mode = QComboBox()
+        self.report_mode.addItems(REPORT_MODES)
+        self.report_mode.setCurrentText(reader_settings.get('report_mode', 'tags'))
+        self.report_mode.setToolTip("tags: every N tags, interval: every N ms, "
+                                    "round: once per inventory round")
+        interval_ms_label = QLabel("Report Interval (ms):")
+        self.report_interval_entry = QLineEdit(str(reader_settings.get('report_interval_ms', 100)))
+        self.report_interval_entry.setMaximumWidth(50)
         
         # Add basic widgets to layout
         basic_layout.addWidget(antenna_label)
@@ -189,6 +426,19 @@ class MainWindow(QMainWindow):
         basic_layout.addWidget(self.power_entry)
         basic_layout.addWidget(report_label)
         basic_layout.addWidget(self.report_entry)
+        basic_layout.addWidget(report_mode_label)
+        basic_layout.addWidget(self.report_mode)
+        basic_layout.addWidget(interval_ms_label)
+        basic_layout.addWidget(self.report_interval_entry)
+
+        # Pushes the settings above to a connected reader without reconnecting
+        self.apply_reader_button = QPushButton("Apply to Reader")
+        self.apply_reader_button.setToolTip("Stops inventory, reprograms antennas, power, report mode and "
+                                            "EPC filters, and restarts inventory on the open connection")
+        self.apply_reader_button.clicked.connect(self.apply_reader_settings)
+        self.reconfigure_label = QLabel("")
+        basic_layout.addWidget(self.apply_reader_button)
+        basic_layout.addWidget(self.reconfigure_label)
         basic_layout.addStretch()
         
         # RSSI Settings
@@ -205,6 +455,8 @@ class MainWindow(QMainWindow):
 
         # Additional Reader Settings
         self.filter_by_epc = QCheckBox("Filter Tag Data by EPC List")
+        self.filter_by_epc.setToolTip("Also programs the reader to singulate only matching EPCs "
+                                      "(up to two prefix filters)")
         self.filter_by_epc.setChecked(self.config.get('reader_settings', {}).get('filter_by_epc', True))
         reader_layout.addWidget(self.filter_by_epc)
 
@@ -215,6 +467,45 @@ class MainWindow(QMainWindow):
         # Add all layouts to reader group
         reader_layout.addLayout(basic_layout)
         reader_layout.addLayout(rssi_layout)
+
+        # Per-antenna power, dwell and inventory rounds; antennas without an entry use TX Power
+        schedule_layout = QHBoxLayout()
+        self.antenna_power_entry = QLineEdit(format_antenna_map(reader_settings.get('antenna_power', {})))
+        self.antenna_dwell_entry = QLineEdit(format_antenna_map(reader_settings.get('antenna_dwell_ms', {})))
+        self.antenna_rounds_entry = QLineEdit(format_antenna_map(reader_settings.get('antenna_rounds', {})))
+        self.antenna_dwell_entry.setToolTip("With a dwell or round count the reader cycles through the antennas, "
+                                            "one at a time in the order of the antenna list")
+        for label, entry in (("Power per Antenna:", self.antenna_power_entry),
+                             ("Dwell (ms):", self.antenna_dwell_entry),
+                             ("Rounds:", self.antenna_rounds_entry)):
+            entry.setPlaceholderText("1:30, 2:25")
+            schedule_layout.addWidget(QLabel(label))
+            schedule_layout.addWidget(entry)
+        reader_layout.addLayout(schedule_layout)
+
+        # Inventory search, set by hand or by Auto-Tune from trial runs on the connected reader
+        tuning_layout = QHBoxLayout()
+        self.search_mode_combo = QComboBox()
+        for mode, name in SEARCH_MODES.items():
+            self.search_mode_combo.addItem(f"{mode} - {name}", mode)
+        self.session_combo = QComboBox()
+        for session in range(4):
+            self.session_combo.addItem(f"S{session}", session)
+        self.set_inventory_search(reader_settings)
+        self.auto_tune_button = QPushButton("Auto-Tune")
+        self.auto_tune_button.setToolTip("Runs short inventory trials over power, search mode, session and "
+                                         "report batching, then applies and saves the best combination")
+        self.auto_tune_button.clicked.connect(self.toggle_auto_tune)
+        self.auto_tune_label = QLabel("")
+        tuning_layout.addWidget(QLabel("Search Mode:"))
+        tuning_layout.addWidget(self.search_mode_combo)
+        tuning_layout.addWidget(QLabel("Session:"))
+        tuning_layout.addWidget(self.session_combo)
+        tuning_layout.addWidget(self.auto_tune_button)
+        tuning_layout.addWidget(self.auto_tune_label)
+        tuning_layout.addStretch()
+        reader_layout.addLayout(tuning_layout)
+        self.auto_tuning = False
         reader_group.setLayout(reader_layout)
         layout.addWidget(reader_group)
 
@@ -230,6 +521,47 @@ class MainWindow(QMainWindow):
         self.interval_entry.setMaximumWidth(50)
         interval_layout.addWidget(interval_label)
         interval_layout.addWidget(self.interval_entry)
+
+        overflow_label = QLabel("Queue Overflow:")
+        self.overflow_policy = QComboBox()
+        self.overflow_policy.addItems(OVERFLOW_POLICIES)
+        self.overflow_policy.setCurrentText(self.tag_buffer.policy)
+        self.overflow_policy.setToolTip("What the network thread does when the GUI falls behind: "
+                                        "drop the oldest queued reads, drop new reads, or wait briefly for the GUI")
+        self.overflow_policy.currentTextChanged.connect(self.update_overflow_policy)
+
+        history_label = QLabel("Tag History Rows:")
+        self.history_entry = QLineEdit(str(self.config.get('tag_history_limit', 1000)))
+        self.history_entry.setMaximumWidth(80)
+        history_hint = QLabel("(up to 1000000)")
+        interval_layout.addWidget(history_label)
+        interval_layout.addWidget(self.history_entry)
+        interval_layout.addWidget(history_hint)
+        interval_layout.addWidget(overflow_label)
+        interval_layout.addWidget(self.overflow_policy)
+
+        metrics_label = QLabel("Metrics Port:")
+        self.metrics_port_entry = QLineEdit(str(self.config.get('metrics_port', 0)))
+        self.metrics_port_entry.setMaximumWidth(60)
+        self.metrics_port_entry.setToolTip("Serve Prometheus metrics on this local HTTP port, 0 turns it off")
+        self.metrics_port_entry.editingFinished.connect(self.update_metrics_port)
+        interval_layout.addWidget(metrics_label)
+        interval_layout.addWidget(self.metrics_port_entry)
+
+        self.trace_checkbox = QCheckBox("Trace Latency")
+        self.trace_checkbox.setChecked(self.config.get('latency_tracing', False))
+        self.trace_checkbox.setToolTip("Follow sampled reads from the reader timestamp to the paint that shows them")
+        self.trace_checkbox.toggled.connect(self.set_latency_tracing)
+        self.save_trace_button = QPushButton("Save Trace")
+        self.save_trace_button.setToolTip("Write the traced reads as Chrome trace-event JSON "
+                                          "(chrome://tracing or ui.perfetto.dev)")
+        self.save_trace_button.clicked.connect(self.save_trace)
+        interval_layout.addWidget(self.trace_checkbox)
+        interval_layout.addWidget(self.save_trace_button)
+        self.export_events_button = QPushButton("Export Events")
+        self.export_events_button.setToolTip("Write the tag enter, exit and dwell events as CSV or JSON lines")
+        self.export_events_button.clicked.connect(self.export_presence_events)
+        interval_layout.addWidget(self.export_events_button)
         interval_layout.addStretch()
 
         # Display Options
@@ -242,6 +574,7 @@ class MainWindow(QMainWindow):
             ('last_seen', 'Last Seen Time'),
             ('phase', 'Phase Angle'),
             ('doppler', 'Doppler Frequency'),
+            ('motion', 'Motion'),
             ('read_count', 'Read Count'),
             ('epc', 'EPC')
         ]:
@@ -277,6 +610,12 @@ class MainWindow(QMainWindow):
         size_layout.addStretch()
         
         matrix_layout.addLayout(size_layout)
+
+        self.painted_matrix = QCheckBox("Painted heatmap matrix (for large grids, Ctrl+wheel to zoom)")
+        self.painted_matrix.setChecked(self.config.get('matrix_renderer', 'widgets') == 'painted')
+        self.painted_matrix.toggled.connect(
+            lambda checked: self.set_matrix_renderer('painted' if checked else 'widgets'))
+        matrix_layout.addWidget(self.painted_matrix)
         
         # EPC List
         epc_layout = QVBoxLayout()
@@ -305,8 +644,9 @@ class MainWindow(QMainWindow):
         add_epc = QPushButton("Edit EPCs")
         load_epcs = QPushButton("Load EPCs")
         save_epcs = QPushButton("Save EPCs")
+        edit_rules = QPushButton("Edit Filter Rules")
         
-        for button in [add_epc, load_epcs, save_epcs]:
+        for button in [add_epc, load_epcs, save_epcs, edit_rules]:
             button.setStyleSheet("""
                 QPushButton {
                     background-color: #2196F3;
@@ -323,6 +663,7 @@ class MainWindow(QMainWindow):
         epc_buttons.addWidget(add_epc)
         epc_buttons.addWidget(load_epcs)
         epc_buttons.addWidget(save_epcs)
+        epc_buttons.addWidget(edit_rules)
         epc_buttons.addStretch()
         
         epc_layout.addLayout(epc_buttons)
@@ -335,28 +676,109 @@ class MainWindow(QMainWindow):
         add_epc.clicked.connect(self.add_epc)
         load_epcs.clicked.connect(self.load_epcs)
         save_epcs.clicked.connect(self.save_epcs)
+        edit_rules.clicked.connect(self.edit_epc_rules)
         self.rows_entry.textChanged.connect(self.update_matrix_size)
         self.cols_entry.textChanged.connect(self.update_matrix_size)
         self.rssi_threshold_entry.textChanged.connect(self.update_rssi_threshold)
         self.interval_entry.textChanged.connect(self.update_display_settings)
+        self.history_entry.editingFinished.connect(self.update_history_limit)
         self.update_display_settings()
 
     def setup_matrix_tab(self):
         layout = QVBoxLayout(self.matrix_tab)
         
         # Create matrix view with initial size from config
-        self.matrix_view = MatrixView()
-        matrix_rows = self.config.get('matrix_rows', 3)
-        matrix_cols = self.config.get('matrix_cols', 3)
-        self.matrix_view.create_matrix(matrix_rows, matrix_cols)
+        self.matrix_scroll = QScrollArea()
+        self.matrix_scroll.setWidgetResizable(True)
+        self.matrix_view = self.create_matrix_view(self.config.get('matrix_renderer', 'widgets'))
+        self.matrix_scroll.setWidget(self.matrix_view)
         
         # Add to layout
-        layout.addWidget(self.matrix_view)
+        layout.addWidget(self.matrix_scroll)
+        self.restore_matrix()
+
+    def restore_matrix(self) -> None:
+        # Reads that arrived before the tab was built are in the store already
+        rows = self.config.get('matrix_rows', 3)
+        cols = self.config.get('matrix_cols', 3)
+        _, slots = self.epc_lookup.tables(self.read_store.epcs.epcs)
+        latest = self.read_store.latest_seq[:len(slots)]
+        for epc_id in np.flatnonzero((slots >= 0) & (latest >= 0)).tolist():
+            row, col = divmod(int(slots[epc_id]), cols)
+            record = self.read_store.record(int(latest[epc_id]))
+            if row < rows and record is not None:
+                self.matrix_view.update_cell(row, col, self.cell_data(record))
+
+    def cell_data(self, record: np.void) -> Dict[str, Any]:
+        # A stored read as the matrix shows it, with the motion of its tag at that antenna and its presence
+        tag_data = self.read_store.to_dict(record)
+        tag_data['present'] = self.presence.is_present(int(record['epc_id']))
+        motion = self.tag_stats.motion.get(int(record['epc_id']), int(record['reader_id']), int(record['antenna']))
+        if motion is not None:
+            tag_data.update(motion)
+        return tag_data
+
+    def create_matrix_view(self, renderer: str):
+        matrix_view = HeatmapMatrixView() if renderer == 'painted' else MatrixView()
+        matrix_rows = self.config.get('matrix_rows', 3)
+        matrix_cols = self.config.get('matrix_cols', 3)
+        matrix_view.create_matrix(matrix_rows, matrix_cols)
+        matrix_view.on_repaint = self.repaint_time.observe
+        return matrix_view
+
+    def set_matrix_renderer(self, renderer: str) -> None:
+        # Both renderers share the same API, so the new one takes over the state
+        old_view = self.matrix_view
+        self.config.set('matrix_renderer', renderer)
+        if old_view is None:
+            return
+        self.matrix_view = self.create_matrix_view(renderer)
+        self.matrix_view.set_display_settings(old_view.display_settings)
+        self.matrix_view.update_rssi_range(old_view.min_rssi, old_view.max_rssi)
+        self.matrix_view.tag_data = dict(old_view.tag_data)
+        self.matrix_view.update_epcs(old_view.epc_list)
+        self.matrix_scroll.setWidget(self.matrix_view)
 
     def setup_tag_data_tab(self):
         layout = QVBoxLayout(self.tag_data_tab)
-        self.tag_data_view = TagDataView()
-        layout.addWidget(self.tag_data_view)
+
+        mode_layout = QHBoxLayout()
+        self.tag_view_mode = QComboBox()
+        self.tag_view_mode.addItems(["Read Log", "Statistics per EPC/Antenna"])
+        mode_layout.addWidget(QLabel("View:"))
+        mode_layout.addWidget(self.tag_view_mode)
+        mode_layout.addStretch()
+        layout.addLayout(mode_layout)
+
+        self.tag_data_view = TagDataView(self.read_store)
+        self.tag_data_view.set_history_limit(self.config.get('tag_history_limit', 1000))
+        self.tag_data_view.set_rssi_threshold(self.config.get('reader_settings', {}).get('rssi_threshold', -75))
+        self.tag_stats_view = TagStatsView(self.tag_stats)
+
+        self.tag_view_stack = QStackedWidget()
+        self.tag_view_stack.addWidget(self.tag_data_view)
+        self.tag_view_stack.addWidget(self.tag_stats_view)
+        self.tag_view_mode.currentIndexChanged.connect(self.tag_view_stack.setCurrentIndex)
+        self.tag_view_mode.currentIndexChanged.connect(self.refresh_tag_stats)
+        layout.addWidget(self.tag_view_stack)
+        self.restore_tag_data()
+
+    def restore_tag_data(self) -> None:
+        # Fill the read log with the stored reads it would have shown
+        stop = self.read_store.next_seq
+        start = max(self.read_store.first_seq, stop - self.config.get('tag_history_limit', 1000))
+        seqs = np.arange(start, stop, dtype=np.int64)
+        if len(seqs) and self.filter_by_epc.isChecked():
+            accepted, _ = self.epc_lookup.tables(self.read_store.epcs.epcs)
+            seqs = seqs[accepted[self.read_store.slice(start, stop)['epc_id']]]
+        if len(seqs):
+            self.tag_data_view.update_reads(seqs)
+
+    def refresh_tag_stats(self) -> None:
+        self.tag_stats.flush()
+        self.update_pool_status()
+        if self.tag_stats_view and self.tag_stats_view.isVisible():
+            self.tag_stats_view.refresh()
 
     def connect_reader(self):
         try:
@@ -366,9 +788,17 @@ class MainWindow(QMainWindow):
                 self.logger.error("IP address is required")
                 return
 
+            if len(parse_addresses(ip_address)) > 1:
+                self.connect_reader_pool(ip_address)
+                return
+            if self.active_reader is self.reader_pool:
+                self.reader_pool.disconnect()
+                self.active_reader = self.reader
+
             # Create worker thread for connection
             self.connect_thread = QThread()
-            self.connect_worker = ReaderConnectWorker(self.reader, ip_address)
+            self.connect_worker = ReaderConnectWorker(self.reader, ip_address, self.reader_connection_settings(),
+                                                      self.on_tag_report)
             self.connect_worker.moveToThread(self.connect_thread)
 
             # Connect signals
@@ -393,8 +823,163 @@ class MainWindow(QMainWindow):
             self.status_label.setStyleSheet("color: #f44336;")
             self.connect_button.setEnabled(True)
 
+    def connect_reader_pool(self, addresses: str) -> None:
+        # Pool connects are non-blocking, readers report in through reader_state_changed
+        if self.reader.is_connected():
+            self.reader.disconnect()
+        self.active_reader = self.reader_pool
+        if self.reader_pool.connect(addresses, self.reader_connection_settings(), self.on_tag_report):
+            self.handle_connection_success()
+            self.update_pool_status()
+        else:
+            self.handle_connection_error("Connection Failed")
+
+    def reader_connection_settings(self) -> Dict[str, Any]:
+        # Antennas, power and report size as entered, plus the EPC list for the reader-side filter
+        settings = {'filter_by_epc': self.filter_by_epc.isChecked(),
+                    'report_mode': self.report_mode.currentText()}
+        try:
+            settings['antennas'] = [int(p.strip()) for p in self.antenna_entry.text().split(',') if p.strip()]
+            settings['power'] = int(self.power_entry.text())
+            settings['report_every_n'] = int(self.report_entry.text())
+            settings['report_interval_ms'] = int(self.report_interval_entry.text())
+            settings['antenna_power'] = parse_antenna_map(self.antenna_power_entry.text())
+            settings['antenna_dwell_ms'] = parse_antenna_map(self.antenna_dwell_entry.text())
+            settings['antenna_rounds'] = parse_antenna_map(self.antenna_rounds_entry.text())
+            settings['search_mode'] = self.search_mode_combo.currentData()
+            settings['session'] = self.session_combo.currentData()
+        except ValueError as e:
+            self.logger.error(f"Invalid reader setting, keeping the saved value: {e}")
+        self.config.update_reader_settings(settings)
+        return self.config.connection_settings()
+
+    def apply_reader_settings(self) -> None:
+        settings = self.reader_connection_settings()
+        if not self.active_reader.is_connected():
+            self.reconfigure_label.setText("Saved, used on the next connect")
+            self.reconfigure_label.setStyleSheet("")
+            return
+        if self.active_reader.reconfigure(settings):
+            self.apply_reader_button.setEnabled(False)
+            self.reconfigure_label.setText("Applying...")
+            self.reconfigure_label.setStyleSheet("color: #FFA000;")
+        else:
+            self.reconfigure_label.setText("Failed, see log")
+            self.reconfigure_label.setStyleSheet("color: #f44336;")
+
+    def handle_reconfigured(self, pause: float, changed: List[str], error: str) -> None:
+        # Network thread result of apply_reader_settings, pause is how long inventory stopped
+        if self.auto_tuning:
+            return  # a trial of the running auto-tune
+        self.apply_reader_button.setEnabled(True)
+        if error:
+            self.reconfigure_label.setText(f"Failed: {error}")
+            self.reconfigure_label.setStyleSheet("color: #f44336;")
+        elif not changed:
+            self.reconfigure_label.setText("No changes")
+            self.reconfigure_label.setStyleSheet("")
+        else:
+            self.reconfigure_label.setText(f"Applied {', '.join(changed)}, inventory paused {pause * 1000:.0f} ms")
+            self.reconfigure_label.setStyleSheet("color: #4CAF50;")
+
+    def set_inventory_search(self, settings: Dict[str, Any]) -> None:
+        index = self.search_mode_combo.findData(int(settings.get('search_mode', DEFAULT_SEARCH_MODE)))
+        self.search_mode_combo.setCurrentIndex(max(index, 0))
+        index = self.session_combo.findData(int(settings.get('session', DEFAULT_SESSION)))
+        self.session_combo.setCurrentIndex(max(index, 0))
+
+    def toggle_auto_tune(self) -> None:
+        if self.auto_tuning:
+            tuner = self.active_reader.tuner
+            if tuner:
+                tuner.cancel()
+                self.auto_tune_label.setText("Cancelling...")
+            return
+        if not self.active_reader.is_connected():
+            self.auto_tune_label.setText("Connect a reader first")
+            self.auto_tune_label.setStyleSheet("color: #f44336;")
+            return
+        self.auto_tuning = True
+        self.auto_tune_thread = QThread()
+        self.auto_tune_worker = AutoTuneWorker(self.active_reader, self.reader_connection_settings())
+        self.auto_tune_worker.moveToThread(self.auto_tune_thread)
+        self.auto_tune_thread.started.connect(self.auto_tune_worker.run)
+        self.auto_tune_worker.progress.connect(self.handle_auto_tune_progress)
+        self.auto_tune_worker.finished.connect(self.handle_auto_tune_finished)
+        self.auto_tune_worker.finished.connect(self.auto_tune_thread.quit)
+        self.auto_tune_worker.finished.connect(self.auto_tune_worker.deleteLater)
+        self.auto_tune_thread.finished.connect(self.auto_tune_thread.deleteLater)
+        self.auto_tune_button.setText("Cancel Auto-Tune")
+        self.apply_reader_button.setEnabled(False)
+        self.auto_tune_label.setText("Starting trials...")
+        self.auto_tune_label.setStyleSheet("color: #FFA000;")
+        self.auto_tune_thread.start()
+
+    def handle_auto_tune_progress(self, done: int, total: int, summary: str) -> None:
+        self.auto_tune_label.setText(f"Trial {done}/{total}: {summary}")
+
+    def handle_auto_tune_finished(self, best: Optional[Dict[str, Any]]) -> None:
+        self.auto_tuning = False
+        self.auto_tune_button.setText("Auto-Tune")
+        self.apply_reader_button.setEnabled(True)
+        if not best:
+            self.auto_tune_label.setText("Auto-tune failed, see log")
+            self.auto_tune_label.setStyleSheet("color: #f44336;")
+            return
+        self.config.update_reader_settings(tuned_settings(best))
+        self.power_entry.setText(str(best.get('power', 30)))
+        self.antenna_power_entry.setText(format_antenna_map(best.get('antenna_power') or {}))
+        self.report_entry.setText(str(best.get('report_every_n', 1)))
+        self.set_inventory_search(best)
+        self.auto_tune_label.setText(f"Tuned: power {best.get('power')}, search mode {best.get('search_mode')}, "
+                                     f"S{best.get('session')}, report every {best.get('report_every_n')}")
+        self.auto_tune_label.setStyleSheet("color: #4CAF50;")
+
+    def update_pool_status(self, reader_id: int = 0, state: str = '') -> None:
+        if self.active_reader is not self.reader_pool:
+            return
+        status = self.reader_pool.status()
+        if not status:
+            return
+        running = sum(entry['state'] in ('connected', 'inventorying') for entry in status)
+        self.status_label.setText(
+            f"Status: {running}/{len(status)} readers | {self.reader_pool.total_rate():.0f} reads/s")
+        self.status_label.setStyleSheet("color: #4CAF50;" if running == len(status) else "color: #FFA000;")
+        self.status_label.setToolTip('\n'.join(
+            f"#{entry['reader_id']} {self.format_link_status(entry)}, {entry['rate']:.0f} reads/s"
+            for entry in status))
+
+    @staticmethod
+    def format_link_status(entry: Dict[str, Any]) -> str:
+        text = f"{entry['address']}: {entry['state']}"
+        if entry['error'] and entry['state'] in ('error', 'reconnecting', 'connecting'):
+            text += f" ({entry['error']})"
+        if entry['uptime']:
+            text += f", up {entry['uptime']:.0f}s"
+        if entry['reconnects']:
+            text += (f", {entry['reconnects']} reconnects, last gap {entry['last_gap']:.1f}s, "
+                     f"availability {entry['availability']:.2%}")
+        return text
+
+    def update_link_status(self, state: str, error: str) -> None:
+        # Supervised single reader: the link went down, is being retried or came back
+        if self.active_reader is not self.reader:
+            return
+        if state in ('error', 'disconnected'):
+            self.handle_connection_error(error or "Disconnected")
+            return
+        if state in ('reconnecting', 'connecting'):
+            self.status_label.setText("Status: Reconnecting...")
+            self.status_label.setStyleSheet("color: #FFA000;")
+        else:
+            self.status_label.setText("Status: Connected")
+            self.status_label.setStyleSheet("color: #4CAF50;")
+        status = self.reader.status()
+        self.status_label.setToolTip(self.format_link_status(status[0]) if status else "")
+
     def handle_connection_success(self):
         self.status_label.setText("Status: Connected")
+        self.status_label.setToolTip("")
         self.status_label.setStyleSheet("color: #4CAF50;")
         self.connect_button.setEnabled(True)
         self.start_button.setEnabled(True)
@@ -439,6 +1024,35 @@ class MainWindow(QMainWindow):
         dialog.setLayout(layout)
         dialog.exec_()
 
+    def edit_epc_rules(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Edit EPC Filter Rules")
+        layout = QVBoxLayout()
+
+        layout.addWidget(QLabel("One rule per line: PREFIX*, VALUE/MASK or START-END (hex)"))
+        text_edit = QTextEdit()
+        text_edit.setPlainText('\n'.join(self.config.get('epc_rules', [])))
+        layout.addWidget(text_edit)
+
+        button_box = QHBoxLayout()
+        save_button = QPushButton("Save")
+        cancel_button = QPushButton("Cancel")
+
+        def save_rules():
+            rules = [rule.strip() for rule in text_edit.toPlainText().split('\n') if rule.strip()]
+            self.config.update_epc_rules(rules)
+            dialog.accept()
+
+        save_button.clicked.connect(save_rules)
+        cancel_button.clicked.connect(dialog.reject)
+
+        button_box.addWidget(save_button)
+        button_box.addWidget(cancel_button)
+        layout.addLayout(button_box)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
+
     def load_epcs(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "Load EPCs", "", "Text Files (*.txt);;JSON Files (*.json)")
         if file_name:
@@ -475,71 +1089,292 @@ class MainWindow(QMainWindow):
                 self.logger.error(f"Error saving EPCs: {e}")
 
     def start_inventory(self):
-        if self.reader.start_inventory():
+        if self.active_reader.start_inventory():
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
 
     def stop_inventory(self):
-        if self.reader.stop_inventory():
+        if self.active_reader.stop_inventory():
             self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
 
     def clear_inventory(self):
-        self.matrix_view.clear()
-        self.tag_data_view.clear()
+        self.tag_buffer.clear()
+        self.tag_buffer.reset_counters()
+        self.read_store.clear()
+        self.epc_lookup.clear()
+        self.tag_stats.clear()
+        self.presence.clear()
+        for view in (self.matrix_view, self.tag_data_view, self.tag_stats_view):
+            if view:
+                view.clear()
 
-    def handle_tag_data(self, tag_data: Dict[str, Any]) -> None:
+    def toggle_recording(self):
+        if self.recorder:
+            self.reader.remove_tag_listener(self.recorder.on_tag_report)
+            self.reader_pool.remove_tag_listener(self.recorder.on_tag_report)
+            self.recorder.close()
+            self.logger.info(f"Recorded {self.recorder.reads_written} reads to {self.recorder.filename}")
+            self.recorder = None
+            self.record_button.setText("Start Recording")
+            return
+
+        file_name, _ = QFileDialog.getSaveFileName(self, "Record Session", "", SESSION_FILTER)
+        if file_name:
+            try:
+                if not file_name.endswith('.rfrec'):
+                    file_name += '.rfrec'
+                self.recorder = SessionRecorder(file_name, clock=self.active_reader.clock)
+                self.reader.add_tag_listener(self.recorder.on_tag_report)
+                self.reader_pool.add_tag_listener(self.recorder.on_tag_report)
+                self.record_button.setText("Stop Recording")
+            except Exception as e:
+                self.logger.error(f"Error starting recording: {e}")
+
+    def toggle_replay(self):
+        if self.replay:
+            self.stop_replay()
+            return
+
+        file_name, _ = QFileDialog.getOpenFileName(self, "Replay Session", "", SESSION_FILTER)
+        if file_name:
+            try:
+                self.start_replay(file_name, REPLAY_SPEEDS[self.replay_speed.currentText()])
+            except Exception as e:
+                self.logger.error(f"Error replaying session: {e}")
+
+    def start_replay(self, file_name: str, speed: float = 1.0) -> None:
+        self.replay = SessionReplay(SessionFile(file_name), speed)
+        self.replay.start()
+        self.replay_button.setText("Stop Replay")
+        self.replay_timer.start(INGEST_FRAME_MS)
+
+    def stop_replay(self) -> None:
+        self.replay_timer.stop()
+        if self.replay:
+            self.replay.session.close()
+            self.replay = None
+        self.replay_button.setText("Replay Session")
+
+    def closeEvent(self, event):
+        # Flush a running recording before the process exits
+        if self.recorder:
+            self.toggle_recording()
+        if self.auto_tuning and self.active_reader.tuner:
+            self.active_reader.tuner.cancel()
+        # The network thread dies with the process, let the readers delete their ROSpecs first
+        self.active_reader.disconnect(timeout=2.0)
+        if self.metrics_server:
+            self.metrics_server.close()
+        self.error_counter.uninstall()
+        super().closeEvent(event)
+
+    def replay_tick(self) -> None:
+        try:
+            reads = self.replay.due(MAX_READS_PER_FRAME)
+            if len(reads):
+                # Handled apart from the live reads in the buffer, they keep their recorded times
+                self.handle_tag_batch(self.replay.session.to_tag_dicts(reads), replayed=True)
+            if self.replay.finished:
+                self.stop_replay()
+        except Exception as e:
+            self.logger.error(f"Error replaying session: {e}")
+            self.stop_replay()
+
+    def on_tag_report(self, reader, tags: List[Dict[str, Any]]) -> None:
+        # Called on the reader thread: only buffer, never touch widgets here
+        start = time.perf_counter()
+        if self.tracer.enabled:
+            trace, mark = self.tracer.claim()
+            position = self.tag_buffer.put_report(tags, mark)
+            if trace:
+                self.tracer.queued(trace, position)
+        else:
+            self.tag_buffer.put_report(tags)
+        self.callback_time.observe(time.perf_counter() - start)
+
+    def drain_tag_buffer(self) -> None:
+        batch = self.tag_buffer.drain(MAX_READS_PER_FRAME)
+        if batch:
+            self.queue_wait.observe(self.tag_buffer.last_wait)
+            traced = self.tracer.drained(self.tag_buffer.drain_position, len(batch))
+            first_seq = self.read_store.next_seq
+            start = time.perf_counter()
+            self.handle_tag_batch(batch)
+            self.view_update_time.observe(time.perf_counter() - start)
+            if traced:
+                self.trace_views(traced, first_seq)
+
+        status = (self.tag_buffer.depth(), self.tag_buffer.dropped,
+                  int(self.tag_buffer.blocked_time * 1000))
+        if status != self._ingest_status:
+            previous, self._ingest_status = self._ingest_status, status
+            depth, dropped, blocked_ms = status
+            text = f"Queue: {depth}/{self.tag_buffer.capacity} | Dropped: {dropped}"
+            if blocked_ms:
+                text += f" | Blocked: {blocked_ms} ms"
+            self.ingest_label.setText(text)
+            # Red while reads are being lost, amber once the queue is half full
+            if previous and dropped > previous[1]:
+                self.ingest_label.setStyleSheet("color: #f44336;")
+            elif self.tag_buffer.pressure() >= 0.5:
+                self.ingest_label.setStyleSheet("color: #FFA000;")
+            else:
+                self.ingest_label.setStyleSheet("")
+
+    def trace_views(self, traced: List[Any], first_seq: int) -> None:
+        # Traced reads of a handled batch: stamp the view update and watch the widgets that will paint them
+        try:
+            accepted, slots = self.epc_lookup.tables(self.read_store.epcs.epcs)
+            cells = self.config.get('matrix_rows', 3) * self.config.get('matrix_cols', 3)
+            cols = self.config.get('matrix_cols', 3)
+            for index, trace in traced:
+                seq = first_seq + index
+                record = self.read_store.record(seq)
+                if record is None:
+                    self.tracer.finish(trace, 'dropped')
+                    continue
+                epc_id = int(record['epc_id'])
+                if self.filter_by_epc.isChecked() and not accepted[epc_id]:
+                    self.tracer.finish(trace, 'filtered')
+                    continue
+                widgets = []
+                if self.tag_data_view and self.tag_data_view.isVisible():
+                    widgets.append(self.tag_data_view.table.viewport())
+                slot = int(slots[epc_id])
+                # A newer read of the same tag in the batch is painted in its place, the paint still ends the trace
+                if self.matrix_view and self.matrix_view.isVisible() and 0 <= slot < cells:
+                    widget = self.matrix_view.cell_widget(slot // cols, slot % cols)
+                    if widget is not None:
+                        widgets.append(widget)
+                self.tracer.viewed(trace, bool(widgets))
+                for widget in widgets:
+                    self.paint_watcher.watch(widget, lambda trace=trace: self.tracer.painted(trace))
+        except Exception as e:
+            self.logger.error(f"Error tracing tag reads: {e}")
+
+    def set_latency_tracing(self, enabled: bool) -> None:
+        self.tracer.set_enabled(enabled)
+        self.config.set('latency_tracing', enabled)
+        if not enabled:
+            self.paint_watcher.clear()
+        self.trace_label.setVisible(enabled)
+        self.refresh_trace_summary()
+
+    def refresh_trace_summary(self) -> None:
+        if not self.tracer.enabled:
+            return
+        self.tracer.expire()
+        self.paint_watcher.prune()
+        summary = self.tracer.summary()
+        total = summary[-1]
+        if total['count']:
+            # The stage with the highest p95 is where to look first
+            slowest = max((row for row in summary[:-1] if row['count']), key=lambda row: row['p95'])
+            self.trace_label.setText(f"Trace: p95 {total['p95']:.1f} ms, slowest {slowest['span']} "
+                                     f"{slowest['p95']:.1f} ms")
+        else:
+            self.trace_label.setText(f"Trace: {self.tracer.finished} reads, none from reader to paint yet")
+
+        def cell(value):
+            return f"{value:8.2f}" if value is not None else f"{'-':>8}"
+
+        lines = [f"{'span (ms)':<16}{'p50':>8}{'p95':>8}{'p99':>8}  reads"]
+        lines += [f"{row['span']:<16}{cell(row['p50'])}{cell(row['p95'])}{cell(row['p99'])}  {row['count']}"
+                  for row in summary]
+        outcomes = {}
+        for trace in list(self.tracer.completed):
+            outcomes[trace.outcome] = outcomes.get(trace.outcome, 0) + 1
+        lines.append(', '.join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items())))
+        self.trace_label.setToolTip("<pre>" + '\n'.join(lines) + "</pre>")
+
+    def save_trace(self) -> None:
+        file_name, _ = QFileDialog.getSaveFileName(self, "Save Latency Trace", "", TRACE_FILTER)
+        if not file_name:
+            return
         try:
-            # Extract tag data
-            epc = tag_data.get('EPC', '')
-            
-            # Filter by EPC list if enabled
-            if self.filter_by_epc.isChecked() and epc not in self.config.get('epc_list', []):
+            count = self.tracer.write(file_name)
+            self.logger.info(f"Wrote {count} traced reads to {file_name}")
+        except Exception as e:
+            self.logger.error(f"Error saving latency trace: {e}")
+
+    def advance_presence(self) -> None:
+        # Grey out the matrix cells of tags that left their last zone
+        try:
+            events = self.presence.advance()
+            if not len(events) or self.matrix_view is None:
                 return
+            epc_ids = events['epc_id'][events['kind'] == EXIT].astype(np.int64)
+            gone = np.unique(epc_ids[self.presence.epc_zones[epc_ids] == 0])
+            _, slots = self.epc_lookup.tables(self.read_store.epcs.epcs)
+            cols = self.matrix_view.cols
+            for slot in slots[gone].tolist():
+                if slot >= 0 and cols:
+                    self.matrix_view.set_present(slot // cols, slot % cols, False)
+        except Exception as e:
+            self.logger.error(f"Error updating tag presence: {e}")
 
-            antenna = tag_data.get('AntennaID', 0)
-            peak_rssi = tag_data.get('PeakRSSI', {}).get('Value', None)
-            last_rssi = tag_data.get('RSSI', {}).get('Value', None)
-            phase = tag_data.get('Phase', {}).get('Value', None)
-            doppler = tag_data.get('DopplerFrequency', {}).get('Value', None)
-            first_seen = tag_data.get('FirstSeenTimestamp', {}).get('Value', None)
-            last_seen = tag_data.get('LastSeenTimestamp', {}).get('Value', None)
-            read_count = tag_data.get('TagSeenCount', {}).get('Value', 1)
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            # Update tag data view
-            self.tag_data_view.update_tag({
-                'epc': epc,
-                'antenna': antenna,
-                'peak_rssi': peak_rssi,
-                'last_rssi': last_rssi,
-                'phase': phase,
-                'doppler': doppler,
-                'first_seen': first_seen,
-                'last_seen': last_seen,
-                'read_count': read_count,
-                'timestamp': timestamp
-            })
-
-            # Update matrix if EPC is in the configured list
-            if epc in self.config.get('epc_list', []):
-                matrix_rows = self.config.get('matrix_rows', 3)
-                matrix_cols = self.config.get('matrix_cols', 3)
-                epc_index = self.config.get('epc_list', []).index(epc)
-                row = epc_index // matrix_cols
-                col = epc_index % matrix_cols
-                
-                if row < matrix_rows and col < matrix_cols:
-                    self.matrix_view.update_cell(row, col, {
-                        'epc': epc,
-                        'peak_rssi': peak_rssi,
-                        'last_rssi': last_rssi,
-                        'phase': phase,
-                        'doppler': doppler,
-                        'first_seen': first_seen,
-                        'last_seen': last_seen,
-                        'read_count': read_count
-                    })
+    def export_presence_events(self) -> None:
+        file_name, _ = QFileDialog.getSaveFileName(self, "Export Presence Events", "", EVENTS_FILTER)
+        if not file_name:
+            return
+        try:
+            count = self.presence.write(file_name, self.read_store.epcs)
+            self.logger.info(f"Wrote {count} presence events to {file_name}")
+        except Exception as e:
+            self.logger.error(f"Error exporting presence events: {e}")
+
+    def handle_tag_data(self, tag_data: Dict[str, Any]) -> None:
+        self.handle_tag_batch([tag_data])
+
+    def handle_tag_batch(self, batch: List[Dict[str, Any]], replayed: bool = False) -> None:
+        try:
+            matrix_rows = self.config.get('matrix_rows', 3)
+            matrix_cols = self.config.get('matrix_cols', 3)
+
+            # Store the batch once, every view works from the stored columns
+            # Replayed reads keep their recorded times, live ones are mapped to the host clock
+            clock = None if replayed else self.active_reader.clock
+            now = host_micros()
+            first, reads = self.read_store.append_reports(batch, now, clock)
+            seqs = np.arange(first, first + len(reads), dtype=np.int64)
+            accepted, slots = self.epc_lookup.tables(self.read_store.epcs.epcs)
+            epc_ids = reads['epc_id']
+            if len(reads):
+                for reader_id, count in enumerate(np.bincount(reads['reader_id']).tolist()):
+                    if count:
+                        self.reader_reads.inc(count, (reader_id,))
+                timed = reads['time_us'][reads['last_seen'] > 0]
+                if clock and len(timed):
+                    self.read_latency.observe(max(0, now - int(timed.max())) / 1e6)
+
+            # Filter by EPC list and rules if enabled
+            if self.filter_by_epc.isChecked():
+                keep = accepted[epc_ids]
+                self.reads_filtered.inc(len(keep) - int(np.count_nonzero(keep)))
+                reads, seqs, epc_ids = reads[keep], seqs[keep], epc_ids[keep]
+            self.reads_rendered.inc(len(reads))
+
+            # Update tag data view and statistics
+            if self.tag_data_view:
+                self.tag_data_view.update_reads(seqs)
+            self.tag_stats.update(reads, self.read_store.epcs)
+            self.presence.update(reads)
+            if self.matrix_view is None:
+                return  # Rebuilt from the store once the tab is shown
+
+            # Update matrix with the latest read per slot of the configured list
+            read_slots = slots[epc_ids]
+            in_list = read_slots >= 0
+            if in_list.any():
+                latest_slots, last = np.unique(read_slots[in_list][::-1], return_index=True)
+                latest_seqs = seqs[in_list][::-1][last]
+                for slot, seq in zip(latest_slots.tolist(), latest_seqs.tolist()):
+                    row = slot // matrix_cols
+                    col = slot % matrix_cols
+
+                    if row < matrix_rows and col < matrix_cols:
+                        self.matrix_view.update_cell(row, col, self.cell_data(self.read_store.record(seq)))
 
         except Exception as e:
             self.logger.error(f"Error handling tag data: {e}")
@@ -549,12 +1384,14 @@ class MainWindow(QMainWindow):
             # Update matrix size if needed
             matrix_rows = self.config.get('matrix_rows', 3)
             matrix_cols = self.config.get('matrix_cols', 3)
-            self.matrix_view.create_matrix(matrix_rows, matrix_cols)
+            if self.matrix_view:
+                self.matrix_view.create_matrix(matrix_rows, matrix_cols)
+                self.matrix_view.update_rssi_range(-100, -30)  # Typical RSSI range for RFID
 
             # Update RSSI range
             rssi_threshold = self.config.get('reader_settings', {}).get('rssi_threshold', -75)
-            self.matrix_view.update_rssi_range(-100, -30)  # Typical RSSI range for RFID
-            self.tag_data_view.set_rssi_threshold(rssi_threshold)
+            if self.tag_data_view:
+                self.tag_data_view.set_rssi_threshold(rssi_threshold)
 
         except Exception as e:
             self.logger.error(f"Error updating matrix: {e}")
@@ -567,11 +1404,12 @@ class MainWindow(QMainWindow):
             if rows > 0 and cols > 0:
                 self.config.set('matrix_rows', rows)
                 self.config.set('matrix_cols', cols)
-                self.matrix_view.create_matrix(rows, cols)
                 # Update matrix with current EPCs
                 epcs = [item.text(0) for item in self.epc_list.findItems("", Qt.MatchContains | Qt.MatchRecursive)]
                 self.config.set('epc_list', epcs)
-                self.matrix_view.update_epcs(epcs)
+                if self.matrix_view:
+                    self.matrix_view.create_matrix(rows, cols)
+                    self.matrix_view.update_epcs(epcs)
         except ValueError:
             pass
 
@@ -580,8 +1418,32 @@ class MainWindow(QMainWindow):
         try:
             rssi_threshold = int(self.rssi_threshold_entry.text())
             if -100 <= rssi_threshold <= -30:  # Validate within typical RFID RSSI range
-                self.config.set('reader_settings', {'rssi_threshold': rssi_threshold})
-                self.tag_data_view.set_rssi_threshold(rssi_threshold)
+                self.config.update_reader_settings({'rssi_threshold': rssi_threshold})
+                if self.tag_data_view:
+                    self.tag_data_view.set_rssi_threshold(rssi_threshold)
+        except ValueError:
+            pass
+
+    def update_overflow_policy(self, policy: str) -> None:
+        self.tag_buffer.set_policy(policy)
+        self.config.set('ingest_overflow', policy)
+
+    def update_metrics_port(self) -> None:
+        try:
+            port = int(self.metrics_port_entry.text() or 0)
+        except ValueError:
+            return
+        if 0 <= port <= 65535 and port != self.config.get('metrics_port', 0):
+            self.config.set('metrics_port', port)
+            self.start_metrics_server(port)
+
+    def update_history_limit(self):
+        try:
+            limit = int(self.history_entry.text())
+            if 0 < limit <= MAX_HISTORY_LIMIT:
+                self.config.set('tag_history_limit', limit)
+                if self.tag_data_view:
+                    self.tag_data_view.set_history_limit(limit)
         except ValueError:
             pass
 
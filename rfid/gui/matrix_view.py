@@ -1,13 +1,89 @@
+import time
+
 from PyQt5.QtWidgets import QWidget, QGridLayout, QLabel
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QColor
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple
+
+from ..clock import format_timestamp
+
+CELL_STYLE = """
+    QLabel {{
+        background-color: {color};
+        border: 1px solid #BDBDBD;
+        padding: 10px;
+        min-width: 150px;
+        min-height: 60px;
+        font-family: monospace;
+        qproperty-alignment: AlignCenter;
+    }}
+"""
+
+EMPTY_COLOR = 'white'
+# Tags that left every zone keep their last read, greyed out
+ABSENT_COLOR = '#E0E0E0'
+
+
+def format_tag_lines(tag_data: Dict[str, Any], display_settings: Dict[str, bool]) -> List[str]:
+    epc = tag_data.get('epc', 'Unknown')
+    display_lines = []
+
+    if display_settings['epc']:
+        display_lines.append(f"EPC: {epc[-4:]}")
+
+    if display_settings['peak_rssi']:
+        peak_rssi = tag_data.get('peak_rssi')
+        if peak_rssi is not None:
+            display_lines.append(f"Peak RSSI: {peak_rssi:.1f} dBm")
+
+    if display_settings['last_rssi']:
+        last_rssi = tag_data.get('last_rssi')
+        if last_rssi is not None:
+            display_lines.append(f"Last RSSI: {last_rssi:.1f} dBm")
+
+    if display_settings['first_seen']:
+        first_seen = tag_data.get('first_seen')
+        if first_seen is not None:
+            display_lines.append(f"First: {format_timestamp(first_seen, date=False)}")
+
+    if display_settings['last_seen']:
+        last_seen = tag_data.get('last_seen')
+        if last_seen is not None:
+            display_lines.append(f"Last: {format_timestamp(last_seen, date=False)}")
+
+    if display_settings['phase']:
+        phase = tag_data.get('phase')
+        if phase is not None:
+            display_lines.append(f"Phase: {phase:.1f}°")
+
+    if display_settings['doppler']:
+        doppler = tag_data.get('doppler')
+        if doppler is not None:
+            display_lines.append(f"Doppler: {doppler:.1f} Hz")
+
+    if display_settings['motion']:
+        motion = tag_data.get('motion')
+        velocity = tag_data.get('velocity')
+        if motion == 'moving':
+            display_lines.append(f"{tag_data['direction'].capitalize()}: {abs(velocity):.2f} m/s")
+        elif motion == 'stationary':
+            display_lines.append("Stationary")
+
+    if display_settings['read_count']:
+        read_count = tag_data.get('read_count')
+        if read_count is not None:
+            display_lines.append(f"Count: {read_count}")
+
+    return display_lines
+
 
 class MatrixView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.grid_layout = QGridLayout(self)
         self.labels = {}  # Dictionary to store labels by position
+        self.rows = 0
+        self.cols = 0
         self.min_rssi = -100
         self.max_rssi = -30
         self.display_settings = {
@@ -17,161 +93,177 @@ class MatrixView(QWidget):
             'last_seen': True,
             'phase': True,
             'doppler': True,
+            'motion': True,
             'read_count': True,
             'epc': True
         }
         self.epc_list = []  # List of EPCs to display
         self.tag_data = {}  # Store current tag data
 
+        # Rendered (text, color) per cell, and cells waiting to be repainted
+        self.cell_state = {}
+        self.dirty_cells = {}
+        self._style_cache = {}
+        self._flush_scheduled = False
+        self.on_repaint = None  # called with the seconds each flush of dirty cells took
+
     def set_display_settings(self, settings: Dict[str, bool]) -> None:
+        changed = any(self.display_settings.get(k) != v for k, v in settings.items())
         self.display_settings.update(settings)
-        self.refresh_all_cells()
+        if changed:
+            self.refresh_all_cells()
 
     def update_epcs(self, epcs: List[str]) -> None:
-        self.epc_list = epcs
-        self.refresh_all_cells()
+        old = self.epc_list
+        self.epc_list = list(epcs)
+        if not self.cols:
+            return
+
+        # Only cells whose EPC moved need to be redrawn
+        for i in range(min(max(len(old), len(epcs)), self.rows * self.cols)):
+            epc = epcs[i] if i < len(epcs) else None
+            if i < len(old) and old[i] == epc:
+                continue
+            position = (i // self.cols, i % self.cols)
+            if epc is None:
+                self._mark_dirty(position, "EPC Not Found", EMPTY_COLOR)
+            else:
+                self._render(position, self.tag_data.get(epc, {'epc': epc}))
 
     def create_matrix(self, rows: int, cols: int) -> None:
+        # Widgets are kept across ticks, only a real size change rebuilds
+        if (rows, cols) == (self.rows, self.cols):
+            return
+
         # Clear existing labels
         for label in self.labels.values():
             self.grid_layout.removeWidget(label)
             label.deleteLater()
         self.labels.clear()
+        self.cell_state.clear()
+        self.dirty_cells.clear()
+        self.rows = rows
+        self.cols = cols
 
         # Create new matrix
+        style = self._style_for(EMPTY_COLOR)
         for i in range(rows):
             for j in range(cols):
                 label = QLabel()
                 label.setAlignment(Qt.AlignCenter)
-                label.setStyleSheet("""
-                    QLabel {
-                        background-color: white;
-                        border: 1px solid #BDBDBD;
-                        padding: 10px;
-                        min-width: 150px;
-                        min-height: 60px;
-                        font-family: monospace;
-                    }
-                """)
+                label.setStyleSheet(style)
                 self.grid_layout.addWidget(label, i, j)
                 self.labels[(i, j)] = label
-        
+                self.cell_state[(i, j)] = ('', EMPTY_COLOR)
+
         self.refresh_all_cells()
 
     def get_color_for_rssi(self, rssi: Optional[float]) -> QColor:
         if rssi is None:
             return QColor(200, 200, 200)  # Gray for no signal
-        
+
         normalized = (rssi - self.min_rssi) / (self.max_rssi - self.min_rssi)
         normalized = max(0, min(1, normalized))
-        
+
         red = int(255 * (1 - normalized))
         green = int(255 * normalized)
-        
+
         return QColor(red, green, 0)
 
+    def format_cell(self, tag_data: Dict[str, Any]) -> str:
+        return '\n'.join(format_tag_lines(tag_data, self.display_settings))
+
     def update_cell(self, row: int, col: int, tag_data: Dict[str, Any]) -> None:
-        label = self.labels.get((row, col))
-        if not label:
+        if (row, col) not in self.labels:
             return
 
-        epc = tag_data.get('epc', 'Unknown')
-        display_lines = []
-
-        if self.display_settings['epc']:
-            display_lines.append(f"EPC: {epc[-4:]}")
-
-        if self.display_settings['peak_rssi']:
-            peak_rssi = tag_data.get('peak_rssi')
-            if peak_rssi is not None:
-                display_lines.append(f"Peak RSSI: {peak_rssi:.1f} dBm")
-
-        if self.display_settings['last_rssi']:
-            last_rssi = tag_data.get('last_rssi')
-            if last_rssi is not None:
-                display_lines.append(f"Last RSSI: {last_rssi:.1f} dBm")
-
-        if self.display_settings['first_seen']:
-            first_seen = tag_data.get('first_seen')
-            if first_seen is not None:
-                display_lines.append(f"First: {first_seen:.2f}s")
-
-        if self.display_settings['last_seen']:
-            last_seen = tag_data.get('last_seen')
-            if last_seen is not None:
-                display_lines.append(f"Last: {last_seen:.2f}s")
-
-        if self.display_settings['phase']:
-            phase = tag_data.get('phase')
-            if phase is not None:
-                display_lines.append(f"Phase: {phase:.1f}°")
-
-        if self.display_settings['doppler']:
-            doppler = tag_data.get('doppler')
-            if doppler is not None:
-                display_lines.append(f"Doppler: {doppler:.1f} Hz")
-
-        if self.display_settings['read_count']:
-            read_count = tag_data.get('read_count')
-            if read_count is not None:
-                display_lines.append(f"Count: {read_count}")
-
-        label.setText('\n'.join(display_lines))
-        label.setStyleSheet(f"""
-            QLabel {{
-                background-color: {self.get_color_for_rssi(tag_data.get('peak_rssi')).name()};
-                border: 1px solid #BDBDBD;
-                padding: 10px;
-                min-width: 150px;
-                min-height: 60px;
-                font-family: monospace;
-                qproperty-alignment: AlignCenter;
-            }}
-        """)
+        # Keep the data under the EPC as listed so refreshes find it again
+        slot = row * self.cols + col
+        epc = self.epc_list[slot] if slot < len(self.epc_list) else tag_data.get('epc')
+        if epc is not None:
+            self.tag_data[epc] = tag_data
+        self._render((row, col), tag_data)
+
+    def _render(self, position: Tuple[int, int], tag_data: Dict[str, Any]) -> None:
+        text = self.format_cell(tag_data)
+        if tag_data.get('present') is False:
+            color = ABSENT_COLOR
+        else:
+            color = self.get_color_for_rssi(tag_data.get('peak_rssi')).name()
+        self._mark_dirty(position, text, color)
+
+    def _mark_dirty(self, position: Tuple[int, int], text: str, color: str) -> None:
+        if self.cell_state.get(position) == (text, color):
+            self.dirty_cells.pop(position, None)
+            return
+        self.dirty_cells[position] = (text, color)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self.flush_dirty_cells)
+
+    def _style_for(self, color: str) -> str:
+        style = self._style_cache.get(color)
+        if style is None:
+            style = CELL_STYLE.format(color=color)
+            self._style_cache[color] = style
+        return style
+
+    def flush_dirty_cells(self) -> None:
+        start = time.perf_counter()
+        self._flush_scheduled = False
+        dirty, self.dirty_cells = self.dirty_cells, {}
+        for position, (text, color) in dirty.items():
+            label = self.labels.get(position)
+            if label is None:
+                continue
+            old_text, old_color = self.cell_state.get(position, (None, None))
+            if text != old_text:
+                label.setText(text)
+            if color != old_color:
+                label.setStyleSheet(self._style_for(color))
+            self.cell_state[position] = (text, color)
+        if self.on_repaint and dirty:
+            self.on_repaint(time.perf_counter() - start)
+
+    def cell_widget(self, row: int, col: int) -> Optional[QWidget]:
+        # The widget that paints a cell
+        return self.labels.get((row, col))
+
+    def set_present(self, row: int, col: int, present: bool) -> None:
+        slot = row * self.cols + col
+        tag_data = self.tag_data.get(self.epc_list[slot]) if slot < len(self.epc_list) else None
+        if tag_data is not None and tag_data.get('present', True) != present:
+            self.update_cell(row, col, dict(tag_data, present=present))
 
     def update_tag_data(self, epc: str, data: Dict[str, Any]) -> None:
         self.tag_data[epc] = data
-        self.refresh_all_cells()
+        if epc in self.epc_list:
+            i = self.epc_list.index(epc)
+            if i < self.rows * self.cols:
+                self._render((i // self.cols, i % self.cols), data)
 
     def refresh_all_cells(self) -> None:
         if not self.epc_list or not self.labels:
             return
 
-        # Calculate rows and columns from the grid layout
-        positions = list(self.labels.keys())
-        if not positions:
-            return
-            
-        max_row = max(pos[0] for pos in positions) + 1
-        max_col = max(pos[1] for pos in positions) + 1
-        
         for i, epc in enumerate(self.epc_list):
-            if i >= max_row * max_col:
+            if i >= self.rows * self.cols:
                 break
-            
-            row = i // max_col
-            col = i % max_col
-            
+
+            row = i // self.cols
+            col = i % self.cols
+
             tag_data = self.tag_data.get(epc, {'epc': epc})
-            self.update_cell(row, col, tag_data)
+            self._render((row, col), tag_data)
 
     def update_rssi_range(self, min_rssi: float, max_rssi: float) -> None:
+        if (min_rssi, max_rssi) == (self.min_rssi, self.max_rssi):
+            return
         self.min_rssi = min_rssi
         self.max_rssi = max_rssi
         self.refresh_all_cells()
 
     def clear(self) -> None:
         self.tag_data.clear()
-        for label in self.labels.values():
-            label.setText("EPC Not Found")
-            label.setStyleSheet("""
-                QLabel {
-                    background-color: white;
-                    border: 1px solid #BDBDBD;
-                    padding: 10px;
-                    min-width: 150px;
-                    min-height: 60px;
-                    font-family: monospace;
-                    qproperty-alignment: AlignCenter;
-                }
-            """)
+        for position in self.labels:
+            self._mark_dirty(position, "EPC Not Found", EMPTY_COLOR)
@@ -0,0 +1,78 @@
+import time
+from typing import Optional
+
+from PyQt5.QtWidgets import QLabel
+
+from ..metrics import MetricsRegistry, ErrorCounter, quantile
+
+# (label, counter) shown as reads per second
+PANEL_RATES = (
+    ('In', 'rfid_reads_received_total'),
+    ('Filtered', 'rfid_reads_filtered_total'),
+    ('Shown', 'rfid_reads_rendered_total'),
+)
+# (label, histogram) shown as the 95th percentile over the last refresh interval
+PANEL_LATENCIES = (
+    ('Queue', 'rfid_queue_wait_seconds'),
+    ('View', 'rfid_view_update_seconds'),
+    ('Repaint', 'rfid_matrix_repaint_seconds'),
+)
+PANEL_QUANTILE = 0.95
+
+
+class MetricsPanel(QLabel):
+    """One-line status bar summary of the metrics registry.
+
+    refresh() turns counter and histogram differences since the previous
+    call into read rates and p95 stage latencies, so the panel shows the
+    recent state while the registry keeps process totals for scraping.
+    """
+
+    def __init__(self, registry: MetricsRegistry, errors: ErrorCounter, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self.errors = errors
+        self.endpoint = ''
+        self._previous = None  # (monotonic time, counter totals, histogram bucket counts)
+        self.setText("Metrics: collecting...")
+
+    def refresh(self) -> None:
+        now = time.monotonic()
+        totals = {name: self._total(name) for _, name in PANEL_RATES}
+        totals['errors'] = self.errors.counter.total()
+        buckets = {name: self.registry.get(name).snapshot()[0] for _, name in PANEL_LATENCIES}
+        previous, self._previous = self._previous, (now, totals, buckets)
+        if previous is None or now <= previous[0]:
+            return
+
+        elapsed = now - previous[0]
+        parts = [f"{label} {max(0.0, totals[name] - previous[1][name]) / elapsed:,.0f}/s"
+                 for label, name in PANEL_RATES]
+        details = []
+        for label, name in PANEL_LATENCIES:
+            histogram = self.registry.get(name)
+            counts = [count - old for count, old in zip(buckets[name], previous[2][name])]
+            p95 = quantile(histogram.buckets, counts, PANEL_QUANTILE)
+            parts.append(f"{label} {p95 * 1000:.1f} ms" if p95 is not None else f"{label} -")
+            details.append(f"{histogram.help}: {sum(counts)} samples")
+        parts.append(f"Present {self._total('rfid_tags_present'):,.0f}")
+        parts.append(f"Rows {self._total('rfid_tag_data_rows'):,.0f}")
+        parts.append(f"Reconnects {self._total('rfid_reader_reconnects_total'):.0f}")
+        parts.append(f"Errors {totals['errors']:.0f}")
+        self.setText(" | ".join(parts))
+
+        # Red while new errors are being logged
+        self.setStyleSheet("color: #f44336;" if totals['errors'] > previous[1]['errors'] else "")
+        tooltip = [f"Latencies are p{PANEL_QUANTILE * 100:.0f} over the last {elapsed:.1f}s"] + details
+        if self.errors.last_message:
+            tooltip.append(f"Last error: {self.errors.last_message}")
+        if self.endpoint:
+            tooltip.append(f"Prometheus endpoint: {self.endpoint}")
+        self.setToolTip('\n'.join(tooltip))
+
+    def _total(self, name: str) -> float:
+        metric = self.registry.get(name)
+        return metric.total() if metric is not None else 0.0
+
+    def set_endpoint(self, url: Optional[str]) -> None:
+        self.endpoint = url or ''
@@ -0,0 +1,45 @@
+from typing import Callable, Dict, List
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QEvent
+from PyQt5.QtWidgets import QWidget
+
+
+class PaintWatcher(QObject):
+    """Calls back when a widget gets its next paint event.
+
+    The event filter is only installed on widgets that are being watched
+    and removed at their paint, so unwatched widgets paint at full speed.
+    Used by latency tracing to stamp the paint that shows a read.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._waiting: Dict[QWidget, List[Callable[[], None]]] = {}
+
+    def watch(self, widget: QWidget, callback: Callable[[], None]) -> None:
+        callbacks = self._waiting.get(widget)
+        if callbacks is None:
+            callbacks = self._waiting[widget] = []
+            widget.installEventFilter(self)
+        callbacks.append(callback)
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() == QEvent.Paint:
+            callbacks = self._waiting.pop(obj, None)
+            if callbacks is not None:
+                obj.removeEventFilter(self)
+                for callback in callbacks:
+                    callback()
+        return False
+
+    def prune(self) -> None:
+        # Forget widgets deleted before they painted, such as cells of a rebuilt matrix
+        for widget in [widget for widget in self._waiting if sip.isdeleted(widget)]:
+            del self._waiting[widget]
+
+    def clear(self) -> None:
+        for widget in self._waiting:
+            if not sip.isdeleted(widget):
+                widget.removeEventFilter(self)
+        self._waiting = {}
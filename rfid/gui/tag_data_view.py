@@ -1,81 +1,207 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTableView, QHeaderView, QAbstractItemView
 from PyQt5.QtGui import QColor
-from PyQt5.QtCore import Qt
-from typing import Dict, Any, Optional
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from typing import Dict
 import logging
+import math
+
+import numpy as np
+
+from ..clock import format_timestamp
+from ..store import TagReadStore
+
+DEFAULT_HISTORY_LIMIT = 1000
+MAX_HISTORY_LIMIT = 1000000
+
+COLUMNS = ["#", "Reader", "Antenna", "EPC", "Timestamp", "Count", "RSSI (dBm)", "Phase", "Doppler"]
+
+BELOW_THRESHOLD_COLOR = QColor(255, 0, 0)
+
+# Store field per column, "#" and "EPC" are handled separately
+COLUMN_FIELDS = [None, 'reader_id', 'antenna', None, 'time_us', 'seen_count', 'peak_rssi', 'phase', 'doppler']
+
+
+class TagReadModel(QAbstractTableModel):
+    """Table model over a fixed-capacity ring buffer of read sequence numbers.
+
+    The reads themselves live in the shared TagReadStore and are only
+    formatted in data(), so the cost of a read does not depend on how much
+    history is kept.
+    """
+
+    def __init__(self, store: TagReadStore, capacity: int = DEFAULT_HISTORY_LIMIT, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.rssi_threshold = -75
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._start = 0
+        self._size = 0
+        self._seqs = np.zeros(capacity, dtype=np.int64)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._size
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def seq(self, row: int) -> int:
+        return int(self._seqs[(self._start + row) % self.capacity])
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._size:
+            return None
+        seq = self.seq(index.row())
+        record = self.store.record(seq)
+        if record is None:
+            return "N/A" if role == Qt.DisplayRole else None
+
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == 0:
+                return str(seq + 1)
+            if column == 3:
+                return self.store.epcs.epc(int(record['epc_id']))
+            value = record[COLUMN_FIELDS[column]]
+            if column == 4:
+                return format_timestamp(value)
+            if column < 6:
+                return str(value)
+            if math.isnan(value):
+                return "N/A"
+            return f"{value:.1f}" if column < 8 else f"{value:g}"
+
+        if role == Qt.ForegroundRole:
+            # Highlight row if RSSI is below threshold
+            if record['peak_rssi'] < self.rssi_threshold:
+                return BELOW_THRESHOLD_COLOR
+        return None
+
+    def append_seqs(self, seqs: np.ndarray) -> None:
+        seqs = seqs[-self.capacity:]
+        if not len(seqs):
+            return
+
+        # Evict the oldest rows in one batch
+        excess = self._size + len(seqs) - self.capacity
+        if excess > 0:
+            self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+            self._start = (self._start + excess) % self.capacity
+            self._size -= excess
+            self.endRemoveRows()
+
+        first = self._size
+        self.beginInsertRows(QModelIndex(), first, first + len(seqs) - 1)
+        position = (self._start + first) % self.capacity
+        head = min(len(seqs), self.capacity - position)
+        self._seqs[position:position + head] = seqs[:head]
+        self._seqs[:len(seqs) - head] = seqs[head:]
+        self._size += len(seqs)
+        self.endInsertRows()
+
+    def _ordered_seqs(self) -> np.ndarray:
+        return np.roll(self._seqs, -self._start)[:self._size]
+
+    def set_capacity(self, capacity: int) -> None:
+        capacity = max(1, min(MAX_HISTORY_LIMIT, capacity))
+        if capacity == self.capacity:
+            return
+        self.beginResetModel()
+        seqs = self._ordered_seqs()[-capacity:]
+        self._allocate(capacity)
+        self._seqs[:len(seqs)] = seqs
+        self._size = len(seqs)
+        self.endResetModel()
+
+    def sort_rows(self, column: int, order=Qt.AscendingOrder) -> None:
+        # Sorts the buffered history in place, new reads keep appending
+        seqs = self._ordered_seqs()
+        if column == 0:
+            keys = seqs
+        else:
+            records = self.store.take(seqs)
+            if column == 3:
+                keys = np.array(self.store.epcs.epcs, dtype=object)[records['epc_id']].astype(str)
+            else:
+                keys = records[COLUMN_FIELDS[column]]
+        ordered = seqs[np.argsort(keys, kind='stable')]
+        if order == Qt.DescendingOrder:
+            ordered = ordered[::-1]
+
+        self.layoutAboutToBeChanged.emit()
+        self._seqs[:self._size] = ordered
+        self._start = 0
+        self.layoutChanged.emit()
+
+    def set_rssi_threshold(self, threshold: float) -> None:
+        if threshold == self.rssi_threshold:
+            return
+        self.rssi_threshold = threshold
+        if self._size:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._size - 1, len(COLUMNS) - 1),
+                                  [Qt.ForegroundRole])
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._start = 0
+        self._size = 0
+        self.endResetModel()
+
 
 class TagDataView(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, store: TagReadStore, parent=None):
         super().__init__(parent)
         self.logger = logging.getLogger(__name__)
         self.layout = QVBoxLayout(self)
-        self.setup_tree()
-        self.tag_counts = {}
+        self.store = store
+        self.model = TagReadModel(store)
+        self.setup_table()
         self.rssi_threshold = -75
 
-    def setup_tree(self) -> None:
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels([
-            "#", "Antenna", "EPC", "Timestamp", "Count", 
-            "RSSI (dBm)", "Phase", "Doppler"
-        ])
-        
-        self.tree.setStyleSheet("""
-            QTreeWidget {
+    def setup_table(self) -> None:
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        # Fixed row heights keep scrolling independent of the history size
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        self.table.setStyleSheet("""
+            QTableView {
                 background-color: white;
                 font-family: monospace;
             }
-            QTreeWidget::item {
-                padding: 5px;
-            }
         """)
-        
-        self.layout.addWidget(self.tree)
-
-    def update_tag(self, tag_data: Dict[str, Any]) -> None:
-        try:
-            epc = tag_data.get('epc', '')
-            antenna = tag_data.get('antenna', '')
-            timestamp = tag_data.get('timestamp', '')
-            count = tag_data.get('count', 0)
-            rssi = tag_data.get('rssi')
-            phase = tag_data.get('phase')
-            doppler = tag_data.get('doppler')
-
-            item = QTreeWidgetItem(self.tree)
-            item.setText(0, str(self.tree.topLevelItemCount()))
-            item.setText(1, str(antenna))
-            item.setText(2, epc)
-            item.setText(3, str(timestamp))
-            item.setText(4, str(count))
-            item.setText(5, f"{rssi:.1f}" if rssi is not None else "N/A")
-            item.setText(6, f"{phase:.1f}" if phase is not None else "N/A")
-            item.setText(7, str(doppler) if doppler is not None else "N/A")
-
-            # Update tag count
-            self.tag_counts[epc] = self.tag_counts.get(epc, 0) + 1
-
-            # Highlight row if RSSI is below threshold
-            if rssi is not None and rssi < self.rssi_threshold:
-                for col in range(item.columnCount()):
-                    item.setForeground(col, QColor(255, 0, 0))
 
-            # Limit the number of items
-            while self.tree.topLevelItemCount() > 1000:
-                self.tree.takeTopLevelItem(0)
+        self.layout.addWidget(self.table)
 
+    def update_reads(self, seqs: np.ndarray) -> None:
+        try:
+            self.model.append_seqs(seqs)
         except Exception as e:
             self.logger.error(f"Error updating tag data: {e}")
 
+    def set_history_limit(self, limit: int) -> None:
+        self.model.set_capacity(limit)
+
     def set_rssi_threshold(self, threshold: float) -> None:
         self.rssi_threshold = threshold
+        self.model.set_rssi_threshold(threshold)
 
     def clear(self) -> None:
-        self.tree.clear()
-        self.tag_counts.clear()
+        self.model.clear()
 
     def get_tag_counts(self) -> Dict[str, int]:
-        return self.tag_counts.copy()
+        return self.store.tag_counts()
 
     def sort_by_rssi(self) -> None:
-        self.tree.sortItems(5, Qt.DescendingOrder)
+        self.model.sort_rows(6, Qt.DescendingOrder)
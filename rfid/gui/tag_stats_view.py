@@ -0,0 +1,162 @@
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTableView, QHeaderView, QAbstractItemView, QLabel
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from typing import Any, Dict, Optional
+import logging
+import time
+
+from ..stats import StatisticsEngine
+
+COLUMNS = ["EPC", "Reader", "Antenna", "Reads", "Reads/s", "Min RSSI", "Max RSSI",
+           "Mean RSSI", "Std RSSI", "Last Phase", "Last Doppler", "Velocity (m/s)", "Motion"]
+
+
+def _format(value: Optional[float], spec: str = '.1f') -> str:
+    return "N/A" if value is None else format(value, spec)
+
+
+def _motion_text(motion: Optional[Dict[str, Any]]) -> Optional[str]:
+    # Direction while moving, else the state
+    if motion is None or motion['motion'] == 'unknown':
+        return None
+    return motion['direction'] or motion['motion']
+
+
+class TagStatsModel(QAbstractTableModel):
+    def __init__(self, engine: StatisticsEngine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self._rows = 0
+        self._now = time.monotonic()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._rows:
+            return None
+        entry = self.engine.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return entry.epc
+            if column == 1:
+                return str(entry.reader)
+            if column == 2:
+                return str(entry.antenna)
+            if column == 3:
+                return str(entry.count)
+            if column == 4:
+                return f"{entry.rate(self._now):.1f}"
+            if column == 5:
+                return _format(entry.rssi_min)
+            if column == 6:
+                return _format(entry.rssi_max)
+            if column == 7:
+                return _format(entry.rssi_mean if entry.rssi_count else None, '.2f')
+            if column == 8:
+                return _format(entry.rssi_stddev, '.2f')
+            if column == 9:
+                return _format(entry.last_phase)
+            if column == 10:
+                return _format(entry.last_doppler, 'g')
+            if column == 11:
+                motion = self.engine.motion_of(entry)
+                return _format(motion and motion['velocity'], '+.2f')
+            if column == 12:
+                return _motion_text(self.engine.motion_of(entry)) or "N/A"
+
+        if role == Qt.UserRole:
+            # Raw values for sorting
+            if column >= 11:
+                motion = self.engine.motion_of(entry)
+                return motion and (motion['velocity'] if column == 11 else _motion_text(motion))
+            return [entry.epc, entry.reader, entry.antenna, entry.count, entry.rate(self._now),
+                    entry.rssi_min, entry.rssi_max,
+                    entry.rssi_mean if entry.rssi_count else None,
+                    entry.rssi_stddev, entry.last_phase, entry.last_doppler][column]
+        return None
+
+    def refresh(self) -> None:
+        # Cost depends on the number of distinct tags, not the read rate
+        self._now = time.monotonic()
+        rows = len(self.engine.rows)
+        if rows < self._rows:
+            self.beginResetModel()
+            self._rows = rows
+            self.endResetModel()
+            return
+        if rows > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows, rows - 1)
+            self._rows = rows
+            self.endInsertRows()
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 3), self.index(self._rows - 1, len(COLUMNS) - 1))
+
+
+class _StatsSortProxy(QSortFilterProxyModel):
+    def lessThan(self, left, right) -> bool:
+        a = left.data(Qt.UserRole)
+        b = right.data(Qt.UserRole)
+        if a is None or b is None:
+            return a is None and b is not None
+        return a < b
+
+
+class TagStatsView(QWidget):
+    def __init__(self, engine: StatisticsEngine, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.layout = QVBoxLayout(self)
+        self.engine = engine
+        self.model = TagStatsModel(engine)
+        self.proxy = _StatsSortProxy()
+        self.proxy.setSourceModel(self.model)
+        # Per-antenna throughput and coverage, for tuning power and dwell
+        self.antenna_label = QLabel("")
+        self.antenna_label.setWordWrap(True)
+        self.layout.addWidget(self.antenna_label)
+        self.setup_table()
+
+    def setup_table(self) -> None:
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        self.table.setStyleSheet("""
+            QTableView {
+                background-color: white;
+                font-family: monospace;
+            }
+        """)
+
+        self.layout.addWidget(self.table)
+
+    def refresh(self) -> None:
+        try:
+            self.model.refresh()
+            parts = [f"Reader {entry['reader']} Antenna {entry['antenna']}: {entry['reads_per_s']:.0f} reads/s, "
+                     f"{entry['tags_per_s']:.1f} tags/s" for entry in self.engine.antennas.rates()]
+            motion = self.engine.motion.counts()
+            if motion['moving'] or motion['stationary']:
+                parts.append(f"{motion['moving']} moving, {motion['stationary']} stationary")
+            self.antenna_label.setText(' | '.join(parts))
+        except Exception as e:
+            self.logger.error(f"Error refreshing tag statistics: {e}")
+
+    def clear(self) -> None:
+        # The engine is cleared by its owner
+        self.model.refresh()
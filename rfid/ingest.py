@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Any, Iterable, Optional
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+DEFAULT_CAPACITY = 100000
+# A blocked producer is the network thread, it must get back to its sockets
+DEFAULT_BLOCK_TIMEOUT = 0.25
+
+
+class TagReadBuffer:
+    """Thread-safe bounded handoff between the network thread and the GUI.
+
+    The network thread pushes whole tag reports, the GUI drains them in
+    batches once per frame. When the buffer is full the overflow policy
+    decides: drop_oldest evicts queued reads, drop_newest discards the
+    incoming ones, and block makes the producer wait for the GUI for up
+    to block_timeout seconds before dropping the newest reads, so a
+    stalled GUI can never hold the LLRP connections indefinitely.
+    Each report's arrival time is kept, so drain can tell how long the
+    oldest read of a batch waited (last_wait). Queued reads are numbered
+    in order (positions), so a read marked in put_report can be found
+    again in a drained batch at index position - drain_position.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, policy: str = DROP_OLDEST,
+                 block_timeout: float = DEFAULT_BLOCK_TIMEOUT):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}")
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._reads = deque()
+        self._arrivals = deque()  # [reads, monotonic time] per queued report, oldest first
+        self.capacity = capacity
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.received = 0
+        self.dropped = 0
+        self.blocked_time = 0.0
+        self.high_water = 0
+        # Never reset, for monitoring
+        self.total_received = 0
+        self.total_dropped = 0
+        self.last_wait = 0.0
+        self.enqueued = 0  # positions handed out, the next queued read gets this one
+        self.dequeued = 0  # position of the oldest queued read
+        self.drain_position = 0  # position of the first read of the last drained batch
+
+    def set_policy(self, policy: str) -> None:
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}")
+        with self._lock:
+            self.policy = policy
+            self._space.notify_all()
+
+    def put(self, tag_data: Dict[str, Any]) -> None:
+        self.put_report((tag_data,))
+
+    def put_report(self, tags: Iterable[Dict[str, Any]], mark: Optional[int] = None) -> int:
+        # Returns the position of tags[mark], -1 without a mark or when that read was dropped
+        tags = list(tags)
+        position = -1
+        with self._lock:
+            self.received += len(tags)
+            self.total_received += len(tags)
+            if self.policy == BLOCK and len(self._reads) + len(tags) > self.capacity:
+                start = time.monotonic()
+                deadline = start + self.block_timeout
+                while (self.policy == BLOCK and self._reads
+                       and len(self._reads) + len(tags) > self.capacity):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._space.wait(remaining)
+                self.blocked_time += time.monotonic() - start
+
+            overflow = len(self._reads) + len(tags) - self.capacity
+            if overflow > 0:
+                self.dropped += overflow
+                self.total_dropped += overflow
+                if self.policy == DROP_OLDEST:
+                    evicted = min(overflow, len(self._reads))
+                    popleft = self._reads.popleft
+                    for _ in range(evicted):
+                        popleft()
+                    self._consume_arrivals(evicted)
+                    self.dequeued += evicted
+                    kept = tags[-self.capacity:]
+                    if mark is not None:
+                        mark -= len(tags) - len(kept)
+                    tags = kept
+                else:
+                    tags = tags[:len(tags) - overflow]
+            if tags:
+                if mark is not None and 0 <= mark < len(tags):
+                    position = self.enqueued + mark
+                self._reads.extend(tags)
+                self.enqueued += len(tags)
+                self._arrivals.append([len(tags), time.monotonic()])
+            self.high_water = max(self.high_water, len(self._reads))
+        return position
+
+    def drain(self, max_reads: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            if not max_reads or max_reads >= len(self._reads):
+                batch = list(self._reads)
+                self._reads.clear()
+            else:
+                popleft = self._reads.popleft
+                batch = [popleft() for _ in range(max_reads)]
+            if batch:
+                self.last_wait = time.monotonic() - self._arrivals[0][1]
+                self._consume_arrivals(len(batch))
+                self.drain_position = self.dequeued
+                self.dequeued += len(batch)
+                self._space.notify_all()
+        return batch
+
+    def _consume_arrivals(self, count: int) -> None:
+        arrivals = self._arrivals
+        while count and arrivals:
+            if arrivals[0][0] <= count:
+                count -= arrivals.popleft()[0]
+            else:
+                arrivals[0][0] -= count
+                count = 0
+
+    def depth(self) -> int:
+        return len(self._reads)
+
+    def pressure(self) -> float:
+        # Fill level between 0 and 1
+        return len(self._reads) / self.capacity if self.capacity else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self.dequeued += len(self._reads)
+            self._reads.clear()
+            self._arrivals.clear()
+            self._space.notify_all()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.received = 0
+            self.dropped = 0
+            self.blocked_time = 0.0
+            self.high_water = len(self._reads)
@@ -0,0 +1,278 @@
+import bisect
+import logging
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_METRICS_ADDRESS = '127.0.0.1'
+# Upper bounds (seconds) for pipeline latencies, from sub-millisecond callbacks to stalled frames
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value == int(value) and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _label_text(names: Sequence[str], values: Sequence[Any]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """One metric family, with optional label names.
+
+    Values are either kept here (inc/set from any thread) or, with a
+    function, read at scrape time: the function returns a number, or a
+    dict of label value tuples to numbers. Functions cost nothing on the
+    hot path, so counters the pipeline already keeps are exported that way.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 function: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.function = function
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def values(self) -> Dict[Labels, float]:
+        if self.function is None:
+            with self._lock:
+                values = dict(self._values)
+            # Without labels the family reports 0 before the first update, like any counter
+            return values if values or self.label_names else {(): 0.0}
+        value = self.function()
+        if isinstance(value, dict):
+            return {tuple(str(part) for part in (key if isinstance(key, tuple) else (key,))): float(number)
+                    for key, number in value.items()}
+        return {(): float(value or 0)}
+
+    def value(self, *labels: Any) -> float:
+        return self.values().get(tuple(str(label) for label in labels), 0.0)
+
+    def total(self) -> float:
+        return sum(self.values().values())
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_label_text(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in sorted(self.values().items())]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, labels: Sequence[Any] = ()) -> None:
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, labels: Sequence[Any] = ()) -> None:
+        with self._lock:
+            self._values[tuple(str(label) for label in labels)] = value
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds, as Prometheus expects it."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        # Per-bucket (not cumulative) counts and the sum, to diff between two points in time
+        with self._lock:
+            return list(self._counts), self._sum
+
+    def samples(self) -> List[str]:
+        counts, total = self.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+def quantile(buckets: Sequence[float], counts: Sequence[int], q: float) -> Optional[float]:
+    """Estimate a quantile from per-bucket counts, interpolating inside the bucket like histogram_quantile."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if index >= len(buckets):
+                return buckets[-1]  # beyond the largest bound
+            lower = buckets[index - 1] if index else 0.0
+            return lower + (buckets[index] - lower) * (rank - seen) / count
+        seen += count
+    return buckets[-1]
+
+
+class MetricsRegistry:
+    """The metric families of one process, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+
+    def _add(self, metric):
+        with self._lock:
+            # Registering a name again returns the existing family
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = (),
+                function: Optional[Callable[[], Any]] = None) -> Counter:
+        return self._add(Counter(name, help_text, labels, function))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = (),
+              function: Optional[Callable[[], Any]] = None) -> Gauge:
+        return self._add(Gauge(name, help_text, labels, function))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, buckets))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def exposition(self) -> str:
+        logger = logging.getLogger(__name__)
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                # One failing collector must not take the whole scrape down
+                logger.warning(f"Error collecting metric {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+class ErrorCounter(logging.Handler):
+    """Counts ERROR and worse log records by logger name.
+
+    Most failures in the pipeline are caught and logged, so this turns
+    them into rfid_errors_total and keeps the latest message for the GUI.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        super().__init__(logging.ERROR)
+        self.counter = registry.counter('rfid_errors_total', "Log records at ERROR level or above",
+                                        ('logger',))
+        self.last_message = ''
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.counter.inc(1, (record.name,))
+        try:
+            self.last_message = f"{record.name}: {record.getMessage()}"
+        except Exception:
+            self.last_message = record.name
+
+    def install(self, logger: Optional[logging.Logger] = None) -> None:
+        (logger or logging.getLogger()).addHandler(self)
+
+    def uninstall(self, logger: Optional[logging.Logger] = None) -> None:
+        (logger or logging.getLogger()).removeHandler(self)
+
+
+def register_reader_metrics(registry: MetricsRegistry, get_reader: Callable[[], Any]) -> None:
+    """Per-reader link figures of an RFIDReader or ReaderPool, read from status() at scrape time."""
+
+    def by_reader(field: Callable[[Dict[str, Any]], float]) -> Callable[[], Dict[Labels, float]]:
+        def collect():
+            reader = get_reader()
+            entries = reader.status() if reader is not None else []
+            return {(entry['reader_id'], entry['address']): field(entry) for entry in entries}
+        return collect
+
+    labels = ('reader', 'address')
+    registry.gauge('rfid_reader_up', "1 while the reader connection is up", labels,
+                   by_reader(lambda entry: entry['state'] in ('connected', 'inventorying')))
+    registry.counter('rfid_reader_reconnects_total', "Reconnects since the reader was connected", labels,
+                     by_reader(lambda entry: entry['reconnects']))
+    registry.gauge('rfid_reader_availability_ratio', "Share of time connected since the first connect", labels,
+                   by_reader(lambda entry: entry['availability']))
+
+
+class MetricsServer:
+    """Serves a registry as Prometheus text on http://address:port/metrics from a daemon thread."""
+
+    def __init__(self, registry: MetricsRegistry, port: int, address: str = DEFAULT_METRICS_ADDRESS):
+        # Imported here, http.server adds about 30 ms to startup and the endpoint is off by default
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.logger = logging.getLogger(__name__)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.exposition().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # scrapes every few seconds would flood the log
+
+        self._server = ThreadingHTTPServer((address, port), Handler)
+        self._server.daemon_threads = True
+        self.address, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Serving metrics on http://{self.address}:{self.port}/metrics")
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int,
+                         address: str = DEFAULT_METRICS_ADDRESS) -> Optional[MetricsServer]:
+    # A port that is taken only costs the endpoint, never the reader
+    try:
+        return MetricsServer(registry, port, address)
+    except OSError as e:
+        logging.getLogger(__name__).error(f"Error starting metrics server on {address}:{port}: {e}")
+        return None
@@ -0,0 +1,241 @@
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .store import SlotTable
+
+SPEED_OF_LIGHT = 299792458.0
+# Hop table frequencies (Hz) by ChannelIndex - 1
+CHANNEL_PLANS = {
+    'FCC': 902.75e6 + 0.5e6 * np.arange(50),
+    'ETSI': np.array([865.7e6, 866.3e6, 866.9e6, 867.5e6]),
+}
+DEFAULT_CHANNEL_PLAN = 'FCC'
+DEFAULT_WINDOW = 1.0
+# Reads kept per tag and antenna, the window is cut to this many at high read rates
+WINDOW_READS = 32
+# Longest gap (seconds) between two reads on one channel that the phase is unwrapped across
+MAX_GAP = 0.5
+# Phase differences in the window needed before the phase slope is trusted over the Doppler
+MIN_PAIRS = 3
+# Radial speed (m/s) from which a tag counts as moving
+MOVING_SPEED = 0.05
+# Queued reads from which add() processes the queue without waiting for flush()
+MAX_PENDING = 16384
+
+UNKNOWN, STATIONARY, MOVING = 0, 1, 2
+STATE_NAMES = ('unknown', 'stationary', 'moving')
+
+TWO_PI = 2 * math.pi
+
+# (attribute, dtype, initial value, one entry per window read) of the arrays indexed by slot
+SLOT_ARRAYS = (
+    ('_times', np.int64, 0, True),
+    ('_steps', np.float64, np.nan, True),  # metres moved since the previous read on the same channel
+    ('_step_seconds', np.float64, 0.0, True),
+    ('_doppler_velocity', np.float64, np.nan, True),
+    ('_count', np.int64, 0, False),
+    ('last_time', np.int64, 0, False),
+    ('last_phase', np.float64, np.nan, False),
+    ('last_channel', np.int64, -1, False),
+    ('displacement', np.float64, 0.0, False),  # unwrapped phase as metres moved since the first read
+    ('velocity', np.float64, np.nan, False),
+    ('phase_velocity', np.float64, np.nan, False),
+    ('doppler_velocity', np.float64, np.nan, False),
+    ('state', np.int8, UNKNOWN, False),
+)
+
+
+class MotionEngine:
+    """Radial velocity and moving/stationary state per (EPC, reader, antenna).
+
+    The phase of a backscattered read is 4πfd/c plus an offset that
+    changes with every channel hop, so consecutive reads are only unwrapped
+    against each other when they share a ChannelIndex. The Doppler shift
+    predicts the phase change between them, which resolves the whole turns
+    a plain wrapped difference misses at conveyor speeds. The last
+    WINDOW_READS phase steps and Doppler velocities of every tag sit in
+    ring arrays; the velocity over the window is the phase slope (distance
+    moved over time spent) once MIN_PAIRS steps are in, the mean Doppler
+    velocity before that. Positive velocities move away from the antenna.
+
+    update() takes a READ_DTYPE batch and updates every tag in it with a
+    few array operations, independent of how many reads a tag has. The
+    operations cost the same for one read as for thousands, so a live
+    stream queues its batches with add() and runs them together with
+    flush() at display rate; get() and counts() are as of the last flush.
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW, channel_plan: str = DEFAULT_CHANNEL_PLAN,
+                 moving_speed: float = MOVING_SPEED):
+        self.window_us = int(window * 1e6)
+        self.moving_speed = moving_speed
+        self.set_channel_plan(channel_plan)
+        self.clear()
+
+    def set_channel_plan(self, channel_plan: str) -> None:
+        if channel_plan not in CHANNEL_PLANS:
+            raise ValueError(f"Unknown channel plan {channel_plan}, expected one of {', '.join(CHANNEL_PLANS)}")
+        self.channel_plan = channel_plan
+        frequencies = CHANNEL_PLANS[channel_plan]
+        # Index 0 is a read without ChannelIndex, taken at the middle of the band
+        self._frequencies = np.concatenate([[frequencies.mean()], frequencies])
+
+    def clear(self) -> None:
+        self._pending = []
+        self._pending_reads = 0
+        self.slots = SlotTable()  # (epc_id, reader_id, antenna) keys
+        self._allocate(0, keep=False)
+
+    def _allocate(self, capacity: int, keep: bool = True) -> None:
+        for name, dtype, fill, ring in SLOT_ARRAYS:
+            array = np.full((capacity, WINDOW_READS) if ring else (capacity,), fill, dtype=dtype)
+            old = getattr(self, name, None) if keep else None
+            if old is not None:
+                array[:len(old)] = old
+            setattr(self, name, array)
+
+    @staticmethod
+    def key(epc_ids, reader_ids, antennas):
+        return (np.asarray(epc_ids, dtype=np.int64) << 32 | np.asarray(reader_ids, dtype=np.int64) << 16
+                | np.asarray(antennas, dtype=np.int64))
+
+    def _slots(self, keys: np.ndarray) -> np.ndarray:
+        slots = self.slots.slots(keys)
+        if len(self.slots) > len(self._count):
+            self._allocate(max(len(self.slots), 2 * len(self._count), 64))
+        return slots
+
+    def add(self, reads: np.ndarray) -> None:
+        # Queue a batch of READ_DTYPE records for the next flush()
+        if not len(reads):
+            return
+        self._pending.append(reads)
+        self._pending_reads += len(reads)
+        if self._pending_reads >= MAX_PENDING:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        reads = self._pending[0] if len(self._pending) == 1 else np.concatenate(self._pending)
+        self._pending = []
+        self._pending_reads = 0
+        self._update(reads)
+
+    def update(self, reads: np.ndarray) -> None:
+        # reads is a batch of READ_DTYPE records, processed after any queued ones
+        self.add(reads)
+        self.flush()
+
+    def _update(self, reads: np.ndarray) -> None:
+        if not len(reads):
+            return
+        slots = self._slots(self.key(reads['epc_id'], reads['reader_id'], reads['antenna']))
+        time_us = reads['time_us'].astype(np.int64)
+        order = np.lexsort((time_us, slots))
+        slots, time_us, reads = slots[order], time_us[order], reads[order]
+
+        phase = np.radians(reads['phase'].astype(np.float64))
+        channel = reads['channel'].astype(np.int64)
+        frequency = self._frequencies[np.where(channel < len(self._frequencies), channel, 0)]
+        doppler = reads['doppler'].astype(np.float64)
+
+        # The read before each one: the previous row of its group, or the tag's last read
+        first = np.ones(len(slots), dtype=bool)
+        first[1:] = slots[1:] != slots[:-1]
+        previous_time = np.roll(time_us, 1)
+        previous_phase = np.roll(phase, 1)
+        previous_channel = np.roll(channel, 1)
+        previous_time[first] = self.last_time[slots[first]]
+        previous_phase[first] = self.last_phase[slots[first]]
+        previous_channel[first] = self.last_channel[slots[first]]
+
+        seconds = (time_us - previous_time) / 1e6
+        step = (phase - previous_phase + math.pi) % TWO_PI - math.pi
+        # Doppler predicts the phase change, whole turns the wrapped step lacks are added back
+        predicted = -TWO_PI * np.nan_to_num(doppler) * seconds
+        step += TWO_PI * np.round((predicted - step) / TWO_PI)
+        paired = ((channel == previous_channel) & (previous_time > 0) & (seconds > 0) & (seconds <= MAX_GAP)
+                  & np.isfinite(step))
+        steps = np.where(paired, step * SPEED_OF_LIGHT / (2 * TWO_PI * frequency), np.nan)
+        doppler_velocity = -doppler * SPEED_OF_LIGHT / (2 * frequency)
+
+        # Group bookkeeping: the slot of every group and each read's rank within its group
+        group = np.cumsum(first) - 1
+        starts = np.flatnonzero(first)
+        touched = slots[starts]
+        sizes = np.diff(np.append(starts, len(slots)))
+        rank = np.arange(len(slots)) - starts[group]
+        last = starts + sizes - 1
+
+        # Only the newest WINDOW_READS of a group can be in the ring after this batch
+        keep = rank >= sizes[group] - WINDOW_READS
+        rows = slots[keep]
+        columns = (self._count[rows] + rank[keep]) % WINDOW_READS
+        self._times[rows, columns] = time_us[keep]
+        self._steps[rows, columns] = steps[keep]
+        self._step_seconds[rows, columns] = np.where(paired, seconds, 0.0)[keep]
+        self._doppler_velocity[rows, columns] = doppler_velocity[keep]
+
+        self._count[touched] += sizes
+        self.last_time[touched] = time_us[last]
+        self.last_phase[touched] = phase[last]
+        self.last_channel[touched] = channel[last]
+        self.displacement[touched] += np.bincount(group, weights=np.nan_to_num(steps), minlength=len(starts))
+        self._estimate(touched)
+
+    def _estimate(self, slots: np.ndarray) -> None:
+        # Window statistics of the given slots, relative to each tag's own latest read
+        times = self._times[slots]
+        recent = (times > 0) & (self.last_time[slots, None] - times <= self.window_us)
+        steps = self._steps[slots]
+        pairs = recent & np.isfinite(steps)
+        moved = np.where(pairs, steps, 0.0).sum(axis=1)
+        elapsed = np.where(pairs, self._step_seconds[slots], 0.0).sum(axis=1)
+        trusted = (pairs.sum(axis=1) >= MIN_PAIRS) & (elapsed > 0)
+        phase_velocity = np.full(len(slots), np.nan)
+        phase_velocity[trusted] = moved[trusted] / elapsed[trusted]
+
+        dopplers = self._doppler_velocity[slots]
+        measured = recent & np.isfinite(dopplers)
+        counts = measured.sum(axis=1)
+        doppler_velocity = np.full(len(slots), np.nan)
+        doppler_velocity[counts > 0] = (np.where(measured, dopplers, 0.0).sum(axis=1)[counts > 0]
+                                        / counts[counts > 0])
+
+        velocity = np.where(trusted, phase_velocity, doppler_velocity)
+        state = np.where(np.abs(velocity) >= self.moving_speed, MOVING, STATIONARY)
+        self.phase_velocity[slots] = phase_velocity
+        self.doppler_velocity[slots] = doppler_velocity
+        self.velocity[slots] = velocity
+        self.state[slots] = np.where(np.isfinite(velocity), state, UNKNOWN)
+
+    def get(self, epc_id: int, reader_id: int, antenna: int) -> Optional[Dict[str, Any]]:
+        slot = self.slots.find(int(self.key(epc_id, reader_id, antenna)))
+        if slot < 0:
+            return None
+
+        def optional(value):
+            value = float(value)
+            return None if value != value else value
+
+        velocity = optional(self.velocity[slot])
+        state = STATE_NAMES[self.state[slot]]
+        direction = None
+        if state == 'moving':
+            direction = 'receding' if velocity > 0 else 'approaching'
+        return {
+            'velocity': velocity,
+            'phase_velocity': optional(self.phase_velocity[slot]),
+            'doppler_velocity': optional(self.doppler_velocity[slot]),
+            'displacement': float(self.displacement[slot]),
+            'motion': state,
+            'direction': direction,
+        }
+
+    def counts(self) -> Dict[str, int]:
+        # Tags and antennas per state
+        counts = np.bincount(self.state[:len(self.slots)], minlength=len(STATE_NAMES))
+        return {name: int(count) for name, count in zip(STATE_NAMES, counts)}
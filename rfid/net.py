@@ -0,0 +1,711 @@
+import errno
+import heapq
+import itertools
+import logging
+import random
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import sllurp
+from sllurp.llrp import LLRPClient, LLRPReaderClient, LLRPReaderConfig, LLRPReaderState
+
+from .clock import host_micros
+from .reader import add_ready_callback, add_report_trigger
+
+RECV_SIZE = 65536
+MAX_RECV_PER_EVENT = 4  # recv calls per readiness event, keeps busy readers from starving the rest
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_STOP_TIMEOUT = 2.0
+# Reconnect delays start around a second and double up to a minute
+DEFAULT_RECONNECT_INITIAL = 1.0
+DEFAULT_RECONNECT_MAX = 60.0
+# A reconfigured reader must be inventorying again within this many seconds
+RECONFIGURE_TIMEOUT = 2.0
+# LLRPReaderConfig attributes that reconfigure() can change on a live connection
+LIVE_CONFIG_KEYS = ('antennas', 'tx_power', 'tag_filter_mask', 'session', 'impinj_search_mode')
+STARTING_STATES = (LLRPReaderState.STATE_SENT_ADD_ROSPEC, LLRPReaderState.STATE_SENT_ENABLE_ROSPEC,
+                   LLRPReaderState.STATE_SENT_START_ROSPEC)
+
+# sllurp internals LLRPConnection relies on: it takes over the transport and the
+# KEEPALIVE answer, rewrites the ROSpec and resets the state machine between links.
+# Checked against this major version; the attributes only exist on instances.
+SLLURP_MAJOR = 3
+CLIENT_METHODS = ('raw_data_received', 'add_state_callback', 'add_tag_report_callback')
+LLRP_METHODS = ('send_KEEPALIVE_ACK', 'getROSpec', 'setState', 'get_tx_power')
+CLIENT_ATTRIBUTES = ('llrp', 'config', 'expected_bytes', 'partial_data')
+LLRP_ATTRIBUTES = ('transport_tx_write', '_deferreds', 'rospec', 'disconnecting', 'state', 'tx_power_table')
+
+
+def _check_sllurp() -> None:
+    version = getattr(sllurp, '__version__', '')
+    missing = [f"LLRPReaderClient.{name}" for name in CLIENT_METHODS if not hasattr(LLRPReaderClient, name)]
+    missing += [f"LLRPClient.{name}" for name in LLRP_METHODS if not hasattr(LLRPClient, name)]
+    if version.split('.')[0] != str(SLLURP_MAJOR) or missing:
+        raise ImportError(f"rfid.net needs sllurp {SLLURP_MAJOR}.x, found {version or 'an unknown version'}"
+                          + (f" without {', '.join(missing)}" if missing else ''))
+
+
+def _check_client(client: LLRPReaderClient) -> None:
+    missing = [f"LLRPReaderClient.{name}" for name in CLIENT_ATTRIBUTES if not hasattr(client, name)]
+    if not missing:
+        missing = [f"LLRPClient.{name}" for name in LLRP_ATTRIBUTES if not hasattr(client.llrp, name)]
+    if missing:
+        raise RuntimeError(f"Unsupported sllurp {getattr(sllurp, '__version__', '')}: no {', '.join(missing)}")
+
+
+_check_sllurp()
+
+
+class EventLoop:
+    """One network thread multiplexing every reader socket with selectors.
+
+    Anything that touches a connection runs on this thread; other threads
+    hand work over with call_soon.
+    """
+
+    def __init__(self, name: str = 'rfid-net'):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.selector = selectors.DefaultSelector()
+        self._calls = deque()
+        self._timers = []  # heap of (when, sequence, callback, args)
+        self._scheduled = set()  # handles of the timers that have neither fired nor been cancelled
+        self._sequence = itertools.count()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self.selector.register(self._wake_recv, selectors.EVENT_READ, self._drain_wakeups)
+        self._thread = None
+        self._running = False
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        self._running = False
+        self._wakeup()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def call_soon(self, callback: Callable, *args) -> None:
+        # Thread-safe
+        self._calls.append((callback, args))
+        if not self.in_loop_thread():
+            self._wakeup()
+
+    def call_later(self, delay: float, callback: Callable, *args) -> int:
+        # Loop thread only, returns a handle for cancel()
+        handle = next(self._sequence)
+        heapq.heappush(self._timers, (time.monotonic() + delay, handle, callback, args))
+        self._scheduled.add(handle)
+        return handle
+
+    def cancel(self, handle: Optional[int]) -> None:
+        # Cancelling a timer that already fired is a no-op
+        self._scheduled.discard(handle)
+
+    def register(self, sock: socket.socket, events: int, callback: Callable) -> None:
+        self.selector.register(sock, events, callback)
+
+    def modify(self, sock: socket.socket, events: int, callback: Callable) -> None:
+        self.selector.modify(sock, events, callback)
+
+    def unregister(self, sock: socket.socket) -> None:
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
+    def _wakeup(self) -> None:
+        try:
+            self._wake_send.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # A wakeup is already pending
+
+    def _drain_wakeups(self, mask: int) -> None:
+        try:
+            while self._wake_recv.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self) -> None:
+        while self._running:
+            timeout = None
+            if self._calls:
+                timeout = 0
+            elif self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+
+            for key, mask in self.selector.select(timeout):
+                self._invoke(key.data, (mask,))
+
+            while self._calls:
+                callback, args = self._calls.popleft()
+                self._invoke(callback, args)
+
+            now = time.monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, handle, callback, args = heapq.heappop(self._timers)
+                if handle in self._scheduled:
+                    self._scheduled.discard(handle)
+                    self._invoke(callback, args)
+
+    def _invoke(self, callback: Callable, args) -> None:
+        try:
+            callback(*args)
+        except Exception as e:
+            self.logger.error(f"Error in network loop callback {getattr(callback, '__qualname__', callback)}: {e}")
+
+
+class Backoff:
+    """Exponential reconnect delays with jitter.
+
+    Each delay is drawn from the upper half of the current step, so readers
+    that dropped together (a switch reboot) do not retry in lockstep.
+    """
+
+    def __init__(self, initial: float = DEFAULT_RECONNECT_INITIAL, maximum: float = DEFAULT_RECONNECT_MAX,
+                 factor: float = 2.0, jitter: float = 0.5):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.attempts = 0
+
+    def next(self) -> float:
+        step = min(self.maximum, self.initial * self.factor ** self.attempts)
+        self.attempts += 1
+        return step * (1.0 - self.jitter * random.random())
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+
+_shared_loop = None
+_shared_loop_lock = threading.Lock()
+
+
+def shared_loop() -> EventLoop:
+    # The process-wide network thread, started on first use and kept for the process lifetime
+    global _shared_loop
+    with _shared_loop_lock:
+        if _shared_loop is None:
+            _shared_loop = EventLoop('rfid-net')
+        _shared_loop.start()
+        return _shared_loop
+
+
+class LLRPConnection:
+    """A sllurp LLRP client driven by an EventLoop instead of its own thread.
+
+    The socket is non-blocking end to end: connects time out on the loop,
+    outgoing messages are buffered, and a reader that stops reading or
+    answering never blocks the loop. on_state is called on the loop thread
+    with (connection, state, error) where state is one of 'connecting',
+    'connected', 'inventorying', 'disconnected' or 'error'.
+
+    start_inventory and stop_inventory record the wanted state and act as
+    soon as the LLRP state machine allows it, so a start during a pending
+    stop (or before the handshake finished) is not lost.
+
+    With a backoff the connection is supervised: a lost link, a failed
+    connect or a reader that stops sending for link_timeout seconds moves
+    it to 'reconnecting' instead of 'error', and it reopens after the
+    next backoff delay. The same config is sent again during the handshake
+    and inventory resumes if it was wanted. The link watchdog is armed by
+    the first KEEPALIVE, so readers without keepalives are never dropped
+    for being idle.
+
+    reconfigure changes antennas, power, EPC masks and the report trigger
+    on the open connection: a running inventory is stopped, the ROSpec is
+    rebuilt and inventory restarts, or the link is failed (and reopened
+    with the new config when supervised) if that takes longer than
+    RECONFIGURE_TIMEOUT.
+    """
+
+    def __init__(self, loop: EventLoop, host: str, port: int, config: LLRPReaderConfig,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, backoff: Optional[Backoff] = None,
+                 link_timeout: float = 0.0, report_trigger: Optional[Dict[str, Any]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.loop = loop
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.backoff = backoff
+        self.link_timeout = link_timeout
+        self.client = LLRPReaderClient(host, port, config)
+        _check_client(self.client)
+        self.client.llrp.transport_tx_write = self._write
+        send_keepalive_ack = self.client.llrp.send_KEEPALIVE_ACK
+
+        def on_keepalive():
+            self._on_keepalive()
+            send_keepalive_ack()
+
+        # sllurp answers KEEPALIVEs internally, this is the only place to observe them
+        self.client.llrp.send_KEEPALIVE_ACK = on_keepalive
+        add_ready_callback(self.client, self._on_ready)
+        self.report_trigger = report_trigger
+        if report_trigger:
+            add_report_trigger(self.client, lambda: self.report_trigger)
+        self.client.add_state_callback(LLRPReaderState.STATE_INVENTORYING, self._on_llrp_state)
+        self.state = 'disconnected'
+        self.error = None
+        self.on_state = None
+        self.inventory_wanted = False
+        self._sock = None
+        self._resolving = None  # token of the pending host name lookup
+        self._out = bytearray()
+        self._timer = None
+        self._closing = False
+        self._established = False  # TCP connect finished
+        self._retry_timer = None
+        self._watchdog = None
+        self._reconfiguring = None  # pending reconfiguration while inventory restarts
+        self._queued_reconfigure = None
+        self.closed = threading.Event()
+        self.closed.set()
+        # Link statistics, monotonic times
+        self.last_rx = None
+        self.rx_us = None  # host µs of the last recv, the data sllurp is decoding during a tag report
+        self.connected_at = None  # start of the current link, None while down
+        self.lost_at = None  # when a supervised link went down
+        self.first_connected_at = None
+        self.reconnects = 0
+        self.last_gap = 0.0
+        self.total_gap = 0.0
+        self.keepalives = 0
+        self.last_keepalive = None
+        self.keepalive_interval = None  # measured between the last two keepalives
+
+    @property
+    def address(self) -> str:
+        host = f"[{self.host}]" if ':' in self.host else self.host
+        return f"{host}:{self.port}"
+
+    def add_tag_report_callback(self, callback: Callable) -> None:
+        self.client.add_tag_report_callback(callback)
+
+    def _set_state(self, state: str, error: Optional[str] = None) -> None:
+        if state == self.state and error == self.error:
+            return
+        self.state = state
+        self.error = error
+        if self.on_state:
+            self.on_state(self, state, error)
+
+    def open(self) -> None:
+        if self._sock or self._resolving:
+            return
+        self._closing = False
+        self._established = False
+        self._out.clear()
+        self._retry_timer = None
+        self.last_keepalive = None
+        self.closed.clear()
+        # Fresh LLRP state machine for every connection attempt, the config is sent again
+        llrp = self.client.llrp
+        llrp._deferreds.clear()
+        llrp.rospec = None
+        llrp.disconnecting = False
+        llrp.setState(LLRPReaderState.STATE_DISCONNECTED)
+        self.client.expected_bytes = 0
+        self.client.partial_data = b''
+        # The connect timeout covers resolving the host name too
+        self._timer = self.loop.call_later(self.connect_timeout, self._on_connect_timeout)
+        self._set_state('connecting')
+        token = self._resolving = object()
+        try:
+            addresses = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM, flags=socket.AI_NUMERICHOST)
+        except socket.gaierror:
+            # A host name, the DNS lookup blocks so it runs off the shared loop thread
+            threading.Thread(target=self._resolve, args=(token,), name=f"resolve-{self.address}",
+                             daemon=True).start()
+            return
+        self._on_resolved(token, addresses)
+
+    def _resolve(self, token: object) -> None:
+        try:
+            addresses = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            addresses = e
+        self.loop.call_soon(self._on_resolved, token, addresses)
+
+    def _on_resolved(self, token: object, addresses) -> None:
+        # addresses: the getaddrinfo result, or the OSError it raised
+        if token is not self._resolving:
+            # Closed or timed out while resolving
+            return
+        self._resolving = None
+        if isinstance(addresses, OSError):
+            self._fail(f"Error resolving {self.address}: {addresses}")
+            return
+        family, type_, proto, _, address = addresses[0]
+        try:
+            self._sock = socket.socket(family, type_, proto)
+            self._sock.setblocking(False)
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            result = self._sock.connect_ex(address)
+        except OSError as e:
+            self._fail(f"Error connecting to {self.address}: {e}")
+            return
+        if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            self._fail(f"Error connecting to {self.address}: {errno.errorcode.get(result, result)}")
+            return
+        self.loop.register(self._sock, selectors.EVENT_WRITE, self._on_connect_event)
+
+    def _on_connect_timeout(self) -> None:
+        self._timer = None
+        if self.state == 'connecting':
+            self._fail(f"Timed out connecting to {self.address}")
+
+    def _on_connect_event(self, mask: int) -> None:
+        result = self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if result:
+            self._fail(f"Error connecting to {self.address}: {errno.errorcode.get(result, result)}")
+            return
+        self._established = True
+        self.loop.modify(self._sock, self._events(), self._on_event)
+        # The LLRP handshake (capabilities, config) runs as messages arrive
+        self.logger.info(f"TCP connection to {self.address} established")
+
+    def _on_ready(self, client) -> None:
+        if self.state == 'connecting':
+            self.loop.cancel(self._timer)
+            self._timer = None
+        if not self._closing:
+            if self.connected_at is None:
+                self._link_up()
+            self._set_state('connected')
+            # on_state handlers may have started it already
+            if self.inventory_wanted and self.client.llrp.state == LLRPReaderState.STATE_CONNECTED:
+                self.client.llrp.startInventory()
+
+    def _link_up(self) -> None:
+        now = time.monotonic()
+        self.connected_at = now
+        if self.first_connected_at is None:
+            self.first_connected_at = now
+        if self.lost_at is not None:
+            self.last_gap = now - self.lost_at
+            self.total_gap += self.last_gap
+            self.reconnects += 1
+            self.lost_at = None
+            self.logger.info(f"Reconnected to {self.address} after {self.last_gap:.1f}s")
+        if self.backoff:
+            self.backoff.reset()
+
+    def _on_keepalive(self) -> None:
+        now = time.monotonic()
+        if self.last_keepalive is not None:
+            self.keepalive_interval = now - self.last_keepalive
+        elif self.link_timeout and self._watchdog is None:
+            self._watchdog = self.loop.call_later(self.link_timeout / 2, self._check_link)
+        self.last_keepalive = now
+        self.keepalives += 1
+
+    def _check_link(self) -> None:
+        self._watchdog = None
+        if not self._sock or self._closing:
+            return
+        silent = time.monotonic() - self.last_rx
+        if silent > self.link_timeout:
+            self._fail(f"No data from {self.address} for {silent:.1f}s, link presumed dead", since=self.last_rx)
+            return
+        self._watchdog = self.loop.call_later(self.link_timeout / 2, self._check_link)
+
+    def _on_llrp_state(self, client, state: int) -> None:
+        if state == LLRPReaderState.STATE_INVENTORYING:
+            self._set_state('inventorying')
+            if self._reconfiguring and self._reconfiguring['applied']:
+                self._finish_reconfigure()
+            if not self.inventory_wanted and not self._closing:
+                self._stop_politely()
+
+    def _events(self) -> int:
+        return selectors.EVENT_READ | (selectors.EVENT_WRITE if self._out else 0)
+
+    def _on_event(self, mask: int) -> None:
+        if mask & selectors.EVENT_WRITE:
+            self._flush()
+        if mask & selectors.EVENT_READ and self._sock:
+            self._read()
+
+    def _read(self) -> None:
+        for _ in range(MAX_RECV_PER_EVENT):
+            try:
+                data = self._sock.recv(RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                self._fail(f"Connection to {self.address} lost: {e}")
+                return
+            self.last_rx = time.monotonic()
+            self.rx_us = host_micros()
+            if not data:
+                if self._closing:
+                    self.close()
+                else:
+                    self._fail(f"Connection to {self.address} closed by reader")
+                return
+            try:
+                self.client.raw_data_received(data)
+            except Exception as e:
+                self._fail(f"Reader {self.address} failed: {e}")
+                return
+            if not self._sock or len(data) < RECV_SIZE:
+                return
+
+    def _write(self, data: bytes) -> None:
+        # transport_tx_write for the sllurp state machine, always on the loop thread
+        if not self._sock:
+            return
+        was_empty = not self._out
+        self._out += data
+        self._flush()
+        if was_empty and self._out and self._sock and self._established:
+            self.loop.modify(self._sock, self._events(), self._on_event)
+
+    def _flush(self) -> None:
+        if not self._out or not self._sock:
+            return
+        try:
+            sent = self._sock.send(self._out)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fail(f"Error sending to {self.address}: {e}")
+            return
+        del self._out[:sent]
+        if not self._out and self._established:
+            self.loop.modify(self._sock, self._events(), self._on_event)
+
+    def start_inventory(self) -> None:
+        self.inventory_wanted = True
+        if self._sock and self.state == 'connected' and self.client.llrp.state == LLRPReaderState.STATE_CONNECTED:
+            self.client.llrp.startInventory()
+
+    def stop_inventory(self) -> None:
+        self.inventory_wanted = False
+        if self._sock and self.client.llrp.state == LLRPReaderState.STATE_INVENTORYING:
+            self._stop_politely()
+
+    def _stop_politely(self, before_restart: Optional[Callable] = None) -> None:
+        # sllurp stays in SENT_DELETE_ROSPEC after a polite stop, move it back
+        # to CONNECTED so the ready callback fires and inventory can restart
+        def on_stopped(state, is_success, *args):
+            if is_success and self._sock and not self._closing:
+                if before_restart:
+                    before_restart()
+                self.client.llrp.setState(LLRPReaderState.STATE_CONNECTED)
+
+        self.client.llrp.stopPolitely(onCompletion=on_stopped)
+
+    def reconfigure(self, args: Dict[str, Any], report_trigger: Optional[Dict[str, Any]] = None,
+                    on_done: Optional[Callable] = None) -> None:
+        """Apply reader_config_args() and a report trigger to the live connection.
+
+        Only the LIVE_CONFIG_KEYS that differ from the current config and a
+        changed report trigger are applied. on_done(pause, changed, error)
+        is called on the loop thread with the seconds between stopping and
+        restarting inventory (0 when it was not running) and the changed
+        keys. A reconfigure during a pending one waits for it to finish.
+        """
+        if self._reconfiguring:
+            queued = self._queued_reconfigure
+            callbacks = (queued[2] if queued else []) + ([on_done] if on_done else [])
+            self._queued_reconfigure = (args, report_trigger, callbacks)
+            return
+        config = self.client.config
+        llrp = self.client.llrp
+        try:
+            antennas = args.get('antennas', config.antennas)
+            tx_power = args.get('tx_power', config.tx_power)
+            if isinstance(tx_power, int):
+                # sllurp keeps one power table index per antenna
+                tx_power = {antenna: tx_power for antenna in antennas}
+            if set(tx_power) != set(antennas):
+                raise ValueError("tx_power must be given for every antenna")
+            if llrp.tx_power_table:
+                # Validates against the power table and resolves 0 (maximum) to its index
+                tx_power = {antenna: index for antenna, (index, _) in llrp.get_tx_power(tx_power).items()}
+            wanted = {'antennas': antennas, 'tx_power': tx_power, 'tag_filter_mask': args.get('tag_filter_mask'),
+                      'session': args.get('session', config.session),
+                      'impinj_search_mode': args.get('impinj_search_mode', config.impinj_search_mode)}
+            changes = {key: wanted[key] for key in LIVE_CONFIG_KEYS if wanted[key] != getattr(config, key)}
+            if 'antennas' in changes:
+                changes['tx_power'] = tx_power
+        except Exception as e:
+            self._reconfigure_done([on_done], 0.0, [], f"Invalid configuration for {self.address}: {e}")
+            return
+        if report_trigger is not None and report_trigger != self.report_trigger:
+            changes['report_trigger'] = report_trigger
+        if not changes:
+            self._reconfigure_done([on_done], 0.0, [], None)
+            return
+
+        if self._sock and llrp.state in STARTING_STATES:
+            # The old ROSpec is on its way to the reader, stop it once it runs
+            self.loop.call_later(0.05, self.reconfigure, args, report_trigger, on_done)
+            return
+        if not (self._sock and llrp.state == LLRPReaderState.STATE_INVENTORYING):
+            # Takes effect with the next ROSpec, or the next handshake while reconnecting
+            self._apply_config(changes)
+            self._reconfigure_done([on_done], 0.0, list(changes), None)
+            return
+        self._reconfiguring = {'changes': changes, 'callbacks': [on_done], 'start': time.monotonic(),
+                               'applied': False, 'timer': self.loop.call_later(RECONFIGURE_TIMEOUT,
+                                                                              self._on_reconfigure_timeout)}
+        self.logger.info(f"Reconfiguring {self.address}: {', '.join(changes)}")
+        self._stop_politely(before_restart=self._apply_pending)
+
+    def _apply_pending(self) -> None:
+        pending = self._reconfiguring
+        if pending and not pending['applied']:
+            self._apply_config(pending['changes'])
+            pending['applied'] = True
+
+    def _apply_config(self, changes: Dict[str, Any]) -> None:
+        changes = dict(changes)
+        if 'report_trigger' in changes:
+            self.report_trigger = changes.pop('report_trigger')
+        config = self.client.config
+        config.update_config(changes)
+        if 'tx_power' in changes and self.client.llrp.tx_power_table:
+            self.client.llrp.setTxPower(config.tx_power)
+        # Rebuilt from the config on the next start
+        self.client.llrp.rospec = None
+
+    def _on_reconfigure_timeout(self) -> None:
+        pending = self._reconfiguring
+        if not pending:
+            return
+        pending['timer'] = None
+        # A reopened link picks up the new config in its handshake
+        self._apply_pending()
+        error = f"{self.address} did not restart inventory within {RECONFIGURE_TIMEOUT:.0f}s of reconfiguring"
+        self._finish_reconfigure(error)
+        self._fail(error)
+
+    def _finish_reconfigure(self, error: Optional[str] = None) -> None:
+        pending, self._reconfiguring = self._reconfiguring, None
+        if not pending:
+            return
+        self.loop.cancel(pending['timer'])
+        pause = time.monotonic() - pending['start']
+        if not error:
+            self.logger.info(f"Reconfigured {self.address}, inventory paused {pause * 1000:.0f} ms")
+        self._reconfigure_done(pending['callbacks'], pause, list(pending['changes']), error)
+        queued, self._queued_reconfigure = self._queued_reconfigure, None
+        if queued:
+            args, report_trigger, callbacks = queued
+            if error:
+                self._reconfigure_done(callbacks, 0.0, [], error)
+            else:
+                self.reconfigure(args, report_trigger,
+                                 lambda *result: self._reconfigure_done(callbacks, *result))
+
+    def _reconfigure_done(self, callbacks, pause: float, changed, error: Optional[str]) -> None:
+        for callback in callbacks:
+            if callback:
+                try:
+                    callback(pause, changed, error)
+                except Exception as e:
+                    self.logger.error(f"Error in reconfigure callback: {e}")
+
+    def disconnect(self, timeout: float = DEFAULT_STOP_TIMEOUT) -> None:
+        # Delete the ROSpecs politely, close once the reader confirms or after timeout
+        if not self._sock:
+            self.close()
+            return
+        if self.client.llrp.state in (LLRPReaderState.STATE_CONNECTED, LLRPReaderState.STATE_INVENTORYING):
+            self._closing = True
+            self.client.llrp.stopPolitely(onCompletion=lambda *args: self.close(), disconnect=True)
+            self.loop.cancel(self._timer)
+            self._timer = self.loop.call_later(timeout, self.close)
+        else:
+            self.close()
+
+    def close(self, state: str = 'disconnected', error: Optional[str] = None) -> None:
+        self.loop.cancel(self._retry_timer)
+        self._retry_timer = None
+        self._release()
+        self.connected_at = None
+        self.lost_at = None
+        self.closed.set()
+        self._set_state(state, error)
+
+    def _release(self) -> None:
+        # Tear down the socket without deciding what happens next
+        if self._reconfiguring:
+            self._apply_pending()
+            self._finish_reconfigure(f"Connection to {self.address} lost while reconfiguring")
+        self._resolving = None
+        self.loop.cancel(self._timer)
+        self._timer = None
+        self.loop.cancel(self._watchdog)
+        self._watchdog = None
+        if self._sock:
+            self.loop.unregister(self._sock)
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        self._established = False
+        self._out.clear()
+        self.client.llrp.setState(LLRPReaderState.STATE_DISCONNECTED)
+
+    def _fail(self, error: str, since: Optional[float] = None) -> None:
+        # since: when the link was last known good, for failures detected late
+        self.logger.error(error)
+        if self.backoff is None or self._closing:
+            self.close('error', error)
+            return
+        self._release()
+        if self.connected_at is not None:
+            # Availability counts from the first connect, failed first attempts are no gap
+            self.connected_at = None
+            self.lost_at = since or time.monotonic()
+        delay = self.backoff.next()
+        self.logger.info(f"Reconnecting to {self.address} in {delay:.1f}s (attempt {self.backoff.attempts})")
+        self._retry_timer = self.loop.call_later(delay, self.open)
+        self._set_state('reconnecting', error)
+
+    def link_status(self) -> Dict[str, Any]:
+        # Availability figures for this reader, safe to call from any thread
+        now = time.monotonic()
+        connected_at, first = self.connected_at, self.first_connected_at
+        gap = self.total_gap + (now - self.lost_at if self.lost_at is not None else 0.0)
+        return {
+            'address': self.address,
+            'state': self.state,
+            'error': self.error,
+            'uptime': now - connected_at if connected_at is not None else 0.0,
+            'reconnects': self.reconnects,
+            'last_gap': self.last_gap,
+            'total_gap': gap,
+            'availability': 1.0 - gap / (now - first) if first is not None and now > first else 0.0,
+            'keepalives': self.keepalives,
+            'keepalive_interval': self.keepalive_interval,
+        }
+
+    @property
+    def is_open(self) -> bool:
+        return self._sock is not None
@@ -0,0 +1,425 @@
+import csv
+import json
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .clock import format_timestamp, host_micros
+from .store import SMALL_BATCH, EPCTable, SlotTable
+
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_DWELL = 5.0
+DEFAULT_TICK = 0.05
+# Events kept for export
+MAX_EVENTS = 100000
+
+WHEEL_BITS = 6  # 64 slots per level
+WHEEL_LEVELS = 4  # 50 ms ticks reach about 9.7 days before the overflow list
+
+ENTER, EXIT, DWELL = 0, 1, 2
+EVENT_NAMES = ('enter', 'exit', 'dwell')
+EVENT_DTYPE = np.dtype([
+    ('kind', np.uint8),
+    ('epc_id', np.uint32),
+    ('reader_id', np.uint16),  # the read that caused the event, the last one for an exit
+    ('antenna', np.uint16),
+    ('zone', np.uint16),
+    ('time_us', np.int64),  # host clock, UTC µs
+    ('duration_us', np.int64),  # time in the zone so far, 0 for an enter
+    ('rssi', np.float32),
+])
+EVENT_COLUMNS = ['event', 'epc', 'reader', 'antenna', 'zone', 'time', 'time_us', 'duration_s', 'rssi']
+
+# (attribute, dtype, initial value) of the arrays indexed by presence slot
+SLOT_ARRAYS = (
+    ('present', np.bool_, False),
+    ('entered', np.int64, 0),
+    ('last_seen', np.int64, 0),
+    ('last_rssi', np.float32, np.nan),
+    ('last_reader', np.uint16, 0),
+    ('last_antenna', np.uint16, 0),
+    ('dwelled', np.bool_, False),
+)
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+_NO_EVENTS = np.zeros(0, dtype=EVENT_DTYPE)
+
+
+class TimerWheel:
+    """Hierarchical timing wheel of integer timer ids.
+
+    Level 0 has one slot per tick, every further level 64 times coarser
+    ones; a timer sits in the finest level its deadline fits in and moves
+    down one level when the wheel reaches its slot, so scheduling is O(1)
+    and a tick costs the timers that fire or cascade. Timers are batches
+    of ids in NumPy arrays and are never cancelled: the owner checks a
+    fired id against its own state and schedules it again if needed.
+    """
+
+    def __init__(self, tick: float = DEFAULT_TICK, now_us: Optional[int] = None):
+        self.tick_us = max(1, int(tick * 1e6))
+        self.slots = 1 << WHEEL_BITS
+        self.mask = self.slots - 1
+        self._spans = [1 << (WHEEL_BITS * (level + 1)) for level in range(WHEEL_LEVELS)]
+        self._levels = [[[] for _ in range(self.slots)] for _ in range(WHEEL_LEVELS)]
+        self._overflow = []  # (ids, ticks) beyond the last level
+        self._tick = (host_micros() if now_us is None else now_us) // self.tick_us
+        self.pending = 0
+
+    def schedule(self, ids: np.ndarray, deadlines_us: np.ndarray) -> None:
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        # Rounded up to whole ticks, and never into the current one
+        ticks = np.maximum(-(-np.asarray(deadlines_us, dtype=np.int64) // self.tick_us), self._tick + 1)
+        self.pending += len(ids)
+        self._place(ids, ticks)
+
+    def _place(self, ids: np.ndarray, ticks: np.ndarray) -> None:
+        level = np.searchsorted(self._spans, ticks - self._tick, side='right')
+        beyond = level >= WHEEL_LEVELS
+        if beyond.any():
+            self._overflow.append((ids[beyond], ticks[beyond]))
+            ids, ticks, level = ids[~beyond], ticks[~beyond], level[~beyond]
+        index = (ticks >> (WHEEL_BITS * level)) & self.mask
+        buckets = level * self.slots + index
+        order = np.argsort(buckets, kind='stable')
+        buckets, ids, ticks = buckets[order], ids[order], ticks[order]
+        starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+        for start, end in zip(starts.tolist(), np.append(starts[1:], len(buckets)).tolist()):
+            level, index = divmod(int(buckets[start]), self.slots)
+            self._levels[level][index].append((ids[start:end], ticks[start:end]))
+
+    def advance(self, now_us: Optional[int] = None) -> np.ndarray:
+        # Ids of the timers due up to now, in no particular order
+        target = (host_micros() if now_us is None else now_us) // self.tick_us
+        if not self.pending:
+            self._tick = max(self._tick, target)
+            return _EMPTY
+        fired = []
+        while self._tick < target:
+            self._tick += 1
+            # Coarser slots move down whenever the finer level wraps around
+            for level in range(1, WHEEL_LEVELS):
+                if self._tick & ((1 << (WHEEL_BITS * level)) - 1):
+                    break
+                self._cascade(self._levels[level], (self._tick >> (WHEEL_BITS * level)) & self.mask)
+            if not self._tick & (self._spans[-1] - 1) and self._overflow:
+                overflow, self._overflow = self._overflow, []
+                for ids, ticks in overflow:
+                    self._place(ids, ticks)
+            index = self._tick & self.mask
+            if self._levels[0][index]:
+                fired.extend(ids for ids, _ in self._levels[0][index])
+                self._levels[0][index] = []
+        if not fired:
+            return _EMPTY
+        fired = np.concatenate(fired)
+        self.pending -= len(fired)
+        return fired
+
+    def _cascade(self, level: list, index: int) -> None:
+        chunks, level[index] = level[index], []
+        for ids, ticks in chunks:
+            self._place(ids, ticks)
+
+    def clear(self) -> None:
+        self._levels = [[[] for _ in range(self.slots)] for _ in range(WHEEL_LEVELS)]
+        self._overflow = []
+        self.pending = 0
+
+
+class PresenceEngine:
+    """Which tags are in which zone right now, as enter, exit and dwell events.
+
+    A zone is a group of antennas (zones maps "antenna" or
+    "reader:antenna" to a zone name, unmapped antennas are zones of
+    their own). A tag enters a zone with a read at or above enter_rssi
+    and stays while reads at or above exit_rssi keep coming; it exits
+    timeout seconds after the last of those and dwells once it has been
+    in the zone for dwell seconds. Reads without RSSI always count.
+
+    Reads only update arrays, vectorized per batch; exits and dwells are
+    timers on a TimerWheel that are checked and re-armed lazily when they
+    fire, so the cost per read and per tick does not grow with the
+    number of tracked tags. Batches of up to SMALL_BATCH reads that
+    enter no zone are applied read by read, which costs less than the
+    array passes at a few reads per batch. Times are arrival times on the host clock,
+    which keeps replays and stalled reader clocks out of the timeouts.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, dwell: float = DEFAULT_DWELL,
+                 enter_rssi: Optional[float] = None, exit_rssi: Optional[float] = None,
+                 zones: Optional[Dict[str, str]] = None, tick: float = DEFAULT_TICK):
+        self.timeout_us = int(timeout * 1e6)
+        self.dwell_us = int(dwell * 1e6)  # 0 sends no dwell events
+        self.enter_rssi = enter_rssi
+        # Without a separate exit level the enter level holds for staying too
+        self.exit_rssi = enter_rssi if exit_rssi is None else exit_rssi
+        self.zone_map = dict(zones or {})
+        self.tick = tick
+        self.events = deque()  # arrays of EVENT_DTYPE, at most MAX_EVENTS events in all
+        self.total_events = [0] * len(EVENT_NAMES)
+        self.clear()
+
+    def clear(self) -> None:
+        self.wheel = TimerWheel(self.tick)
+        self.slots = SlotTable()  # (epc_id, zone) keys
+        self.zone_names: List[str] = []
+        self._zones: Dict[int, int] = {}  # (reader_id << 16 | antenna) -> zone index
+        self._zone_table = np.full((0, 0), -1, dtype=np.int64)  # [reader_id, antenna] -> zone index, -1 unknown
+        self.epc_zones = np.zeros(0, dtype=np.int32)  # zones each epc_id is present in
+        self.events.clear()
+        self._event_count = 0
+        for name, dtype, fill in SLOT_ARRAYS:
+            setattr(self, name, np.full(0, fill, dtype=dtype))
+
+    def _grow(self) -> None:
+        capacity = max(len(self.slots), 2 * len(self.present), 1024)
+        for name, dtype, fill in SLOT_ARRAYS:
+            array = np.full(capacity, fill, dtype=dtype)
+            old = getattr(self, name)
+            array[:len(old)] = old
+            setattr(self, name, array)
+
+    def compact_epcs(self, mapping: np.ndarray) -> None:
+        """Follows EPCTable.compact: renumbers the EPC ids and forgets absent tags.
+
+        mapping is the new id of every old one; present tags must keep
+        theirs. Their timers are armed again for the new slots, and the
+        kept event history, which names EPCs by old id, is dropped.
+        """
+        count = len(self.slots)
+        kept = np.flatnonzero(self.present[:count])
+        keys = self.slots.keys[kept]
+        old_epc_ids = keys >> 16
+        self.slots = SlotTable()
+        new = self.slots.slots(mapping[old_epc_ids] << 16 | (keys & 0xFFFF))
+        for name, dtype, fill in SLOT_ARRAYS:
+            array = np.full(max(len(kept), 1024), fill, dtype=dtype)
+            array[new] = getattr(self, name)[kept]
+            setattr(self, name, array)
+        epc_zones = np.zeros(max(int(mapping.max(initial=-1)) + 1, 1), dtype=np.int32)
+        known = np.flatnonzero(mapping[:len(self.epc_zones)] >= 0)
+        epc_zones[mapping[known]] = self.epc_zones[known]
+        self.epc_zones = epc_zones
+
+        self.wheel.clear()
+        self.wheel.schedule(new << 1, self.last_seen[new] + self.timeout_us)
+        if self.dwell_us:
+            waiting = new[~self.dwelled[new]]
+            self.wheel.schedule(waiting << 1 | 1, self.entered[waiting] + self.dwell_us)
+        self.events.clear()
+        self._event_count = 0
+
+    def zone(self, reader_id: int, antenna: int) -> int:
+        key = reader_id << 16 | antenna
+        index = self._zones.get(key)
+        if index is None:
+            name = self.zone_map.get(f"{reader_id}:{antenna}") or self.zone_map.get(str(antenna))
+            if name is None:
+                name = f"{reader_id}:{antenna}" if reader_id else str(antenna)
+            if name not in self.zone_names:
+                self.zone_names.append(name)
+            index = self._zones[key] = self.zone_names.index(name)
+        return index
+
+    def _zone_indexes(self, reader_ids: np.ndarray, antennas: np.ndarray) -> np.ndarray:
+        # Zone of every read, zone() only runs for antennas not seen before
+        rows, columns = int(reader_ids.max()) + 1, int(antennas.max()) + 1
+        table = self._zone_table
+        if rows > table.shape[0] or columns > table.shape[1]:
+            table = np.full((max(rows, table.shape[0]), max(columns, table.shape[1])), -1, dtype=np.int64)
+            table[:self._zone_table.shape[0], :self._zone_table.shape[1]] = self._zone_table
+            self._zone_table = table
+        zones = table[reader_ids, antennas]
+        unknown = zones < 0
+        if unknown.any():
+            for reader_id, antenna in sorted(set(zip(reader_ids[unknown].tolist(), antennas[unknown].tolist()))):
+                table[reader_id, antenna] = self.zone(reader_id, antenna)
+            zones = table[reader_ids, antennas]
+        return zones
+
+    def _cover_epcs(self, max_epc_id: int) -> None:
+        if len(self.epc_zones) <= max_epc_id:
+            grown = np.zeros(max(max_epc_id + 1, 2 * len(self.epc_zones)), dtype=np.int32)
+            grown[:len(self.epc_zones)] = self.epc_zones
+            self.epc_zones = grown
+
+    def _update_small(self, reads: np.ndarray) -> bool:
+        # Applies a batch read by read unless one of its reads would enter a zone
+        zones = self._zones
+        epc_ids, reader_ids, antennas = reads['epc_id'].tolist(), reads['reader_id'].tolist(), reads['antenna'].tolist()
+        try:
+            keys = [epc_id << 16 | zones[reader_id << 16 | antenna]
+                    for epc_id, reader_id, antenna in zip(epc_ids, reader_ids, antennas)]
+        except KeyError:
+            return False
+        slots = self.slots.lookup(keys)
+        present = (slots >= 0) & self.present[slots] if len(self.present) else np.zeros(len(slots), dtype=bool)
+        latest = {}
+        for slot, is_present, reader_id, antenna, rssi, host_us in zip(
+                slots.tolist(), present.tolist(), reader_ids, antennas,
+                reads['peak_rssi'].tolist(), reads['host_us'].tolist()):
+            if not is_present:
+                if self.enter_rssi is None or not rssi < self.enter_rssi:
+                    return False
+            elif self.exit_rssi is None or not rssi < self.exit_rssi:
+                latest[slot] = (host_us, rssi, reader_id, antenna)
+        self._cover_epcs(max(epc_ids))
+        if latest:
+            kept = np.fromiter(latest, dtype=np.int64, count=len(latest))
+            host_us, rssi, reader_id, antenna = zip(*latest.values())
+            self.last_seen[kept] = np.maximum(self.last_seen[kept], host_us)
+            self.last_rssi[kept] = rssi
+            self.last_reader[kept] = reader_id
+            self.last_antenna[kept] = antenna
+        return True
+
+    def update(self, reads: np.ndarray) -> np.ndarray:
+        """Takes a batch of READ_DTYPE records and returns the enter events it caused."""
+        if not len(reads):
+            return _NO_EVENTS
+        if len(reads) <= SMALL_BATCH and self._update_small(reads):
+            return _NO_EVENTS
+        zones = self._zone_indexes(reads['reader_id'].astype(np.int64), reads['antenna'].astype(np.int64))
+        epc_ids = reads['epc_id'].astype(np.int64)
+        slots = self.slots.slots(epc_ids << 16 | zones)
+        if len(self.slots) > len(self.present):
+            self._grow()
+        self._cover_epcs(int(epc_ids.max()))
+
+        rssi = reads['peak_rssi']
+        host_us = reads['host_us']
+        # NaN compares False, so reads without RSSI pass both levels
+        stays = ~(rssi < self.exit_rssi) if self.exit_rssi is not None else np.ones(len(reads), dtype=bool)
+        enters = ~(rssi < self.enter_rssi) if self.enter_rssi is not None else stays
+
+        # Tags not in their zone yet enter with their first read strong enough
+        candidates, first = np.unique(slots[enters], return_index=True)
+        new = ~self.present[candidates]
+        entering, first = candidates[new], np.flatnonzero(enters)[first[new]]
+        if len(entering):
+            self.present[entering] = True
+            self.entered[entering] = host_us[first]
+            self.last_seen[entering] = host_us[first]
+            self.dwelled[entering] = False
+            np.add.at(self.epc_zones, epc_ids[first], 1)
+
+        # Every read that may keep its tag in the zone refreshes it, the newest one wins
+        keeping = stays & self.present[slots]
+        kept, last = np.unique(slots[keeping][::-1], return_index=True)
+        last = np.flatnonzero(keeping)[::-1][last]
+        self.last_seen[kept] = np.maximum(self.last_seen[kept], host_us[last])
+        self.last_rssi[kept] = rssi[last]
+        self.last_reader[kept] = reads['reader_id'][last]
+        self.last_antenna[kept] = reads['antenna'][last]
+        if not len(entering):
+            return _NO_EVENTS
+
+        # Exit timers are armed once per presence and re-armed when they find newer reads
+        self.wheel.schedule(entering << 1, self.last_seen[entering] + self.timeout_us)
+        if self.dwell_us:
+            self.wheel.schedule(entering << 1 | 1, self.entered[entering] + self.dwell_us)
+
+        events = np.zeros(len(entering), dtype=EVENT_DTYPE)
+        events['kind'] = ENTER
+        events['epc_id'] = epc_ids[first]
+        events['reader_id'] = reads['reader_id'][first]
+        events['antenna'] = reads['antenna'][first]
+        events['zone'] = zones[first]
+        events['time_us'] = host_us[first]
+        events['rssi'] = rssi[first]
+        self._record(events)
+        return events
+
+    def advance(self, now_us: Optional[int] = None) -> np.ndarray:
+        """Fires the due timers and returns the exit and dwell events."""
+        now_us = host_micros() if now_us is None else now_us
+        fired = self.wheel.advance(now_us)
+        if not len(fired):
+            return _NO_EVENTS
+        fired = np.unique(fired)  # a dwell timer of an earlier presence can fire with the current one
+        slots, kinds = fired >> 1, fired & 1
+
+        # Exits: present tags whose last read is older than the timeout, the others run again
+        checked = slots[(kinds == 0) & self.present[slots]]
+        deadline = self.last_seen[checked] + self.timeout_us
+        exiting = checked[deadline <= now_us]
+        self.wheel.schedule(checked[deadline > now_us] << 1, deadline[deadline > now_us])
+        self.present[exiting] = False
+
+        # Dwells: once per presence, timers of an earlier presence of the tag are ignored
+        checked = slots[(kinds == 1) & self.present[slots] & ~self.dwelled[slots]]
+        dwelling = checked[self.entered[checked] + self.dwell_us <= now_us]
+        self.dwelled[dwelling] = True
+
+        epc_ids = (self.slots.keys[exiting] >> 16).astype(np.int64)
+        np.add.at(self.epc_zones, epc_ids, -1)
+        events = np.zeros(len(exiting) + len(dwelling), dtype=EVENT_DTYPE)
+        events['kind'][:len(exiting)] = EXIT
+        events['kind'][len(exiting):] = DWELL
+        affected = np.concatenate([exiting, dwelling])
+        events['epc_id'] = self.slots.keys[affected] >> 16
+        events['zone'] = self.slots.keys[affected] & 0xFFFF
+        events['reader_id'] = self.last_reader[affected]
+        events['antenna'] = self.last_antenna[affected]
+        events['time_us'][:len(exiting)] = self.last_seen[exiting] + self.timeout_us
+        events['time_us'][len(exiting):] = self.entered[dwelling] + self.dwell_us
+        events['duration_us'] = events['time_us'] - self.entered[affected]
+        events['rssi'] = self.last_rssi[affected]
+        self._record(events)
+        return events
+
+    def _record(self, events: np.ndarray) -> None:
+        if not len(events):
+            return
+        for kind, count in enumerate(np.bincount(events['kind'], minlength=len(EVENT_NAMES)).tolist()):
+            self.total_events[kind] += count
+        self.events.append(events)
+        self._event_count += len(events)
+        while self._event_count - len(self.events[0]) >= MAX_EVENTS:
+            self._event_count -= len(self.events.popleft())
+
+    def history(self) -> np.ndarray:
+        # Kept events, oldest first
+        return np.concatenate(self.events) if self.events else _NO_EVENTS.copy()
+
+    def present_count(self) -> int:
+        # Tags present in at least one zone
+        return int(np.count_nonzero(self.epc_zones))
+
+    def is_present(self, epc_id: int) -> bool:
+        return epc_id < len(self.epc_zones) and self.epc_zones[epc_id] > 0
+
+    def event_dicts(self, events: np.ndarray, epcs: EPCTable) -> List[Dict[str, Any]]:
+        return [{
+            'event': EVENT_NAMES[kind],
+            'epc': epcs.epc(epc_id),
+            'reader': reader_id,
+            'antenna': antenna,
+            'zone': self.zone_names[zone],
+            'time_us': time_us,
+            'duration_s': duration_us / 1e6,
+            'rssi': None if rssi != rssi else round(rssi, 2),
+        } for kind, epc_id, reader_id, antenna, zone, time_us, duration_us, rssi in events.tolist()]
+
+    def write_ndjson(self, stream, events: np.ndarray, epcs: EPCTable) -> None:
+        for event in self.event_dicts(events, epcs):
+            stream.write(json.dumps(event) + '\n')
+
+    def write(self, path: str, epcs: EPCTable) -> int:
+        # CSV for a .csv file name, NDJSON otherwise; returns the number of events written
+        events = self.history()
+        with open(path, 'w', newline='') as f:
+            if path.lower().endswith('.csv'):
+                writer = csv.writer(f)
+                writer.writerow(EVENT_COLUMNS)
+                for event in self.event_dicts(events, epcs):
+                    writer.writerow([event['event'], event['epc'], event['reader'], event['antenna'], event['zone'],
+                                     format_timestamp(event['time_us']), event['time_us'],
+                                     f"{event['duration_s']:.3f}", '' if event['rssi'] is None else event['rssi']])
+            else:
+                self.write_ndjson(f, events, epcs)
+        return len(events)
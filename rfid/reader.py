@@ -1,95 +1,468 @@
 import logging
-from typing import List, Dict, Any, Optional
-from sllurp.llrp import LLRPReaderConfig, LLRPReaderClient, LLRP_DEFAULT_PORT
-from PyQt5.QtCore import QObject, pyqtSignal
-
-class RFIDReader(QObject):
-    # Define signals for connection status
-    connected = pyqtSignal()
-    disconnected = pyqtSignal()
-    connection_error = pyqtSignal(str)
-    
-    def __init__(self):
-        super().__init__()
+import threading
+from typing import Callable, List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+
+from .clock import ClockAlignment
+from .epc_index import DEFAULT_READER_FILTERS, reader_filter_prefixes
+from .signals import Signal
+from .store import peak_rssi
+
+if TYPE_CHECKING:
+    from sllurp.llrp import LLRPReaderConfig, LLRPReaderClient
+    from .net import EventLoop
+
+LLRP_DEFAULT_PORT = 5084
+# ReaderID of a single reader's reads, as for the first reader of a ReaderPool
+READER_ID = 1
+
+# Seconds allowed for the TCP connect plus the LLRP handshake (capabilities, config, ROSpec reset)
+HANDSHAKE_TIMEOUT = 5.0
+DEFAULT_KEEPALIVE_INTERVAL = 5.0
+# A supervised link is presumed dead after this many keepalive intervals without any data
+KEEPALIVE_MISSES = 3
+
+REPORT_MODES = ('tags', 'interval', 'round')
+DEFAULT_REPORT_INTERVAL_MS = 100
+DEFAULT_ROUND_SILENCE_MS = 100
+DEFAULT_ROUND_TIMEOUT_MS = 1000
+# Dwell of antennas without an entry once any antenna has a dwell or round count
+DEFAULT_DWELL_MS = 200
+# Impinj InventorySearchMode values
+SEARCH_MODES = {1: 'Single Target', 2: 'Dual Target', 3: 'Single Target Suppression'}
+DEFAULT_SEARCH_MODE = 2
+DEFAULT_SESSION = 2
+# Settings that are only read when a connection opens, everything else can be reconfigured live
+RECONNECT_SETTINGS = ('ip', 'keepalive_interval', 'auto_reconnect')
+
+
+def load_llrp():
+    # sllurp is only needed from the first connect on, keep it off the startup path
+    from sllurp import llrp
+    return llrp
+
+
+def add_ready_callback(client: 'LLRPReaderClient', callback) -> None:
+    # sllurp enters STATE_CONNECTED once before it fetches and sets the reader
+    # config; only a CONNECTED after that means the handshake is complete and
+    # inventory may start. callback(client) also runs after each inventory stop.
+    LLRPReaderState = load_llrp().LLRPReaderState
+    configured = [False]
+
+    def on_state(client, state):
+        if state == LLRPReaderState.STATE_SENT_GET_CAPABILITIES:
+            configured[0] = False
+        elif state == LLRPReaderState.STATE_SENT_GET_CONFIG:
+            configured[0] = True
+        elif configured[0]:
+            callback(client)
+
+    for state in (LLRPReaderState.STATE_SENT_GET_CAPABILITIES, LLRPReaderState.STATE_SENT_GET_CONFIG,
+                  LLRPReaderState.STATE_CONNECTED):
+        client.add_state_callback(state, on_state)
+
+
+def antenna_values(settings: Dict[str, Any], key: str, default: Any) -> Dict[int, Any]:
+    # Per-antenna setting such as antenna_power for every configured antenna;
+    # keys are antenna numbers, as strings once the config went through JSON
+    values = settings.get(key) or {}
+    return {antenna: values.get(str(antenna), values.get(antenna, default))
+            for antenna in (int(antenna) for antenna in settings.get('antennas', [1]))}
+
+
+def reader_config_args(settings: Dict[str, Any]) -> Dict[str, Any]:
+    # LLRPReaderConfig factory arguments for RFIDConfig.connection_settings()
+    power = antenna_values(settings, 'antenna_power', settings.get('power', 30))
+    args = {
+        'antennas': list(power),
+        'tx_power': {antenna: int(value) for antenna, value in power.items()},
+        # Report triggers are set on the ROSpec by add_report_trigger
+        'start_inventory': False,
+        'keepalive_interval': int(settings.get('keepalive_interval', DEFAULT_KEEPALIVE_INTERVAL) * 1000),
+        'tag_content_selector': {
+            'EnableROSpecID': True,
+            'EnableSpecIndex': True,
+            'EnableInventoryParameterSpecID': True,
+            'EnableAntennaID': True,
+            'EnableChannelIndex': True,
+            'EnablePeakRSSI': True,
+            'EnableFirstSeenTimestamp': True,
+            'EnableLastSeenTimestamp': True,
+            'EnableTagSeenCount': True,
+            'EnableAccessSpecID': True,
+            'C1G2EPCMemorySelector': {
+                'EnableCRC': True,
+                'EnablePCBits': True,
+            }
+        },
+        'impinj_search_mode': str(settings.get('search_mode', DEFAULT_SEARCH_MODE)),
+        'session': int(settings.get('session', DEFAULT_SESSION)),
+        'impinj_tag_content_selector': {
+            'EnableRFPhaseAngle': True,
+            'EnablePeakRSSI': True,
+            'EnableRFDopplerFrequency': True
+        }
+    }
+    prefixes = reader_tag_filter(settings)
+    if prefixes:
+        # C1G2 inventory masks on the EPC bank, see sllurp's LLRPROSpec
+        args['tag_filter_mask'] = prefixes
+    return args
+
+
+def report_trigger(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """ROReportSpec and AISpecStopTrigger for the report_mode of the settings.
+
+    tags      a report every report_every_n tags, inventory runs continuously
+    interval  a report every report_interval_ms; LLRP 1.0.1 has no timed
+              report trigger, so the AISpec is cut into intervals and each
+              one reports when it ends
+    round     a report per inventory round: the AISpec ends once no tag
+              answered for round_silence_ms, at the latest after
+              round_timeout_ms
+
+    With an antenna_schedule() every antenna gets an AISpec of its own
+    whose dwell replaces the interval and round stop triggers, so those
+    modes report once per dwell.
+    """
+    mode = settings.get('report_mode', 'tags')
+    n = 0
+    if mode == 'tags':
+        n = min(max(1, int(settings.get('report_every_n', 1))), 0xFFFF)
+        stop = {'AISpecStopTriggerType': 'Null', 'DurationTriggerValue': 0}
+    elif mode == 'interval':
+        stop = {'AISpecStopTriggerType': 'Duration',
+                'DurationTriggerValue': int(settings.get('report_interval_ms', DEFAULT_REPORT_INTERVAL_MS))}
+    elif mode == 'round':
+        stop = {
+            'AISpecStopTriggerType': 'Tag observation',
+            'DurationTriggerValue': 0,
+            'TagObservationTrigger': {
+                'TriggerType': 'UponSilenceMs',
+                'NumberOfTags': 0,
+                'NumberOfAttempts': 0,
+                'T': int(settings.get('round_silence_ms', DEFAULT_ROUND_SILENCE_MS)),
+                'Timeout': int(settings.get('round_timeout_ms', DEFAULT_ROUND_TIMEOUT_MS)),
+            },
+        }
+    else:
+        raise ValueError(f"Unknown report mode {mode!r}, expected one of {', '.join(REPORT_MODES)}")
+    return {'ROReportSpec': {'ROReportTrigger': 'Upon_N_Tags_Or_End_Of_AISpec', 'N': n},
+            'AISpecStopTrigger': stop, 'AntennaSchedule': antenna_schedule(settings)}
+
+
+def antenna_schedule(settings: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+    """AISpecStopTrigger per antenna from antenna_dwell_ms and antenna_rounds.
+
+    The reader cycles through one AISpec per antenna in the order of the
+    antennas setting. An antenna with a round count ends its AISpec after
+    that many inventory rounds (its dwell, if any, is the timeout), one
+    with only a dwell after that many milliseconds, and the rest after
+    DEFAULT_DWELL_MS. Empty when neither setting has an entry, the
+    antennas then share one AISpec.
+    """
+    dwell = antenna_values(settings, 'antenna_dwell_ms', 0)
+    rounds = antenna_values(settings, 'antenna_rounds', 0)
+    if not any(dwell.values()) and not any(rounds.values()):
+        return {}
+    schedule = {}
+    for antenna, dwell_ms in dwell.items():
+        if rounds[antenna]:
+            schedule[antenna] = {
+                'AISpecStopTriggerType': 'Tag observation',
+                'DurationTriggerValue': 0,
+                'TagObservationTrigger': {
+                    'TriggerType': 'UponNAttempts',
+                    'NumberOfTags': 0,
+                    'NumberOfAttempts': int(rounds[antenna]),
+                    'T': 0,
+                    'Timeout': int(dwell_ms),
+                },
+            }
+        else:
+            schedule[antenna] = {'AISpecStopTriggerType': 'Duration',
+                                 'DurationTriggerValue': int(dwell_ms) or DEFAULT_DWELL_MS}
+    return schedule
+
+
+def describe_stop(stop: Dict[str, Any]) -> str:
+    # "300 ms" or "4 rounds", for logs and the GUI
+    observation = stop.get('TagObservationTrigger')
+    if observation:
+        text = f"{observation['NumberOfAttempts']} rounds"
+        return text + f" (max {observation['Timeout']} ms)" if observation['Timeout'] else text
+    return f"{stop['DurationTriggerValue']} ms"
+
+
+def add_report_trigger(client: 'LLRPReaderClient', get_trigger: Callable[[], Dict[str, Any]]) -> None:
+    # sllurp only knows N-tag reports, which it gets by ending the AISpec after
+    # N tags and so restarts the inventory round for every report. Put the
+    # current report_trigger() into every ROSpec it builds instead.
+    get_rospec = client.llrp.getROSpec
+
+    def getROSpec(*args, **kwargs):
+        rospec = get_rospec(*args, **kwargs)
+        trigger = get_trigger()
+        rospec['ROReportSpec'].update(trigger['ROReportSpec'])
+        schedule = trigger.get('AntennaSchedule')
+        if schedule:
+            _split_aispecs(rospec, schedule)
+        else:
+            for aispec in rospec['AISpec']:
+                aispec['AISpecStopTrigger'] = dict(trigger['AISpecStopTrigger'])
+        return rospec
+
+    client.llrp.getROSpec = getROSpec
+
+
+def _antenna_configurations(rospec: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+    return {conf['AntennaID']: conf for aispec in rospec['AISpec']
+            for conf in aispec['InventoryParameterSpec'][0]['AntennaConfiguration']}
+
+
+def _split_aispecs(rospec: Dict[str, Any], schedule: Dict[int, Dict[str, Any]]) -> None:
+    # One AISpec per scheduled antenna, each with its own antenna configuration
+    # (power, C1G2 masks) and stop trigger; also runs on an already split ROSpec
+    configs = _antenna_configurations(rospec)
+    protocol = rospec['AISpec'][0]['InventoryParameterSpec'][0]['ProtocolID']
+    antennas = [antenna for antenna in schedule if antenna in configs]
+    rospec['AISpec'] = [{
+        'AntennaID': [antenna],
+        'AISpecStopTrigger': dict(schedule[antenna]),
+        'InventoryParameterSpec': [{'InventoryParameterSpecID': spec_id, 'ProtocolID': protocol,
+                                    'AntennaConfiguration': [configs[antenna]]}],
+    } for spec_id, antenna in enumerate(antennas, start=1)]
+
+
+def reader_tag_filter(settings: Dict[str, Any]) -> List[str]:
+    # EPC prefixes the reader should singulate, empty to report every tag
+    if not settings.get('filter_by_epc', True) or not settings.get('reader_side_filter', True):
+        return []
+    return reader_filter_prefixes(settings.get('epc_list', []), settings.get('epc_rules', []),
+                                  settings.get('reader_filter_limit', DEFAULT_READER_FILTERS))
+
+
+def drop_weak_reads(tags: List[Dict[str, Any]], floor: Optional[float]) -> List[Dict[str, Any]]:
+    # LLRP has no portable RSSI filter, so the floor is applied on the network
+    # thread before reports are queued. Reads without an RSSI field pass.
+    if floor is None:
+        return tags
+    kept = []
+    for tag_data in tags:
+        rssi = peak_rssi(tag_data)
+        if rssi is None or rssi >= floor:
+            kept.append(tag_data)
+    return kept
+
+
+def connection_options(settings: Dict[str, Any]) -> Dict[str, Any]:
+    # LLRPConnection arguments (report trigger, supervision) for RFIDConfig.connection_settings()
+    options = {'report_trigger': report_trigger(settings)}
+    if settings.get('auto_reconnect', True):
+        from .net import Backoff
+        keepalive = settings.get('keepalive_interval', DEFAULT_KEEPALIVE_INTERVAL)
+        options['backoff'] = Backoff()
+        options['link_timeout'] = KEEPALIVE_MISSES * keepalive if keepalive else 0.0
+    return options
+
+
+class RFIDReader:
+    """One LLRP reader driven from the shared network thread (rfid.net).
+
+    Every call that touches the connection is marshalled onto that thread;
+    connect blocks the caller until the LLRP handshake is done. Tag reports
+    are delivered on the network thread, so the callback must only hand
+    them off (see TagReadBuffer).
+
+    With auto_reconnect in the reader settings a lost link is reopened in
+    the background and inventory resumes; link_state_changed reports the
+    transitions and status() the uptime, reconnect count and gaps.
+
+    reconfigure applies changed settings to the connected reader without
+    reconnecting; reconfigured reports how long inventory was paused.
+    auto_tune searches the search mode, session, power and report
+    batching for the best read figures with short trials (see AutoTuner).
+    """
+
+    def __init__(self, loop: Optional['EventLoop'] = None):
         self.logger = logging.getLogger(__name__)
-        self.reader = None
+        # Connection status signals, emitted on the calling or network thread
+        self.connected = Signal()
+        self.disconnected = Signal()
+        self.connection_error = Signal()
+        self.link_state_changed = Signal()  # (state, error) after connect, on the network thread
+        self.reconfigured = Signal()  # (pause seconds, changed keys, error), on the network thread
+        self.loop = loop
+        self.connection = None
         self.reader_config = None
         self.inventory_running = False
+        self.rssi_floor = None
+        self.settings = {}
+        self.tuner = None  # AutoTuner while auto_tune runs
+        self.clock = ClockAlignment()  # reader timestamps to host time, see store.reads_from_reports
+        self.tracer = None  # LatencyTracer that samples reports, see rfid.tracing
         self._callback = None
+        self._tag_listeners = []
 
-    def create_config(self, settings: Dict[str, Any]) -> Optional[LLRPReaderConfig]:
+    def add_tag_listener(self, listener) -> None:
+        # Listeners get every tag report as (reader, tags), next to the main callback
+        if listener not in self._tag_listeners:
+            self._tag_listeners.append(listener)
+
+    def remove_tag_listener(self, listener) -> None:
+        if listener in self._tag_listeners:
+            self._tag_listeners.remove(listener)
+
+    def _on_tag_report(self, client, tags) -> None:
+        for tag_data in tags:
+            tag_data['ReaderID'] = READER_ID
+        self.clock.observe_report(tags)
+        tags = drop_weak_reads(tags, self.rssi_floor)
+        if not tags:
+            return
+        tracer = self.tracer
+        if tracer is not None and tracer.sample():
+            connection = self.connection
+            tracer.begin(tags, self.clock, connection.rx_us if connection else None)
+        if self._callback:
+            self._callback(self, tags)
+        for listener in list(self._tag_listeners):
+            try:
+                listener(self, tags)
+            except Exception as e:
+                self.logger.error(f"Error in tag listener: {e}")
+
+    def create_config(self, settings: Dict[str, Any]) -> Optional['LLRPReaderConfig']:
         try:
-            factory_args = {
-                'tx_power': settings.get('power', 30),
-                'report_every_n_tags': settings.get('report_every_n', 1),
-                'start_inventory': False,
-                'tag_content_selector': {
-                    'EnableROSpecID': True,
-                    'EnableSpecIndex': True,
-                    'EnableInventoryParameterSpecID': True,
-                    'EnableAntennaID': True,
-                    'EnableChannelIndex': True,
-                    'EnablePeakRSSI': True,
-                    'EnableFirstSeenTimestamp': True,
-                    'EnableLastSeenTimestamp': True,
-                    'EnableTagSeenCount': True,
-                    'EnableAccessSpecID': True,
-                    'C1G2EPCMemorySelector': {
-                        'EnableCRC': True,
-                        'EnablePCBits': True,
-                    }
-                },
-                'impinj_search_mode': '2',
-                'impinj_tag_content_selector': {
-                    'EnableRFPhaseAngle': True,
-                    'EnablePeakRSSI': True,
-                    'EnableRFDopplerFrequency': True
-                }
-            }
-            
-            return LLRPReaderConfig(factory_args)
+            args = reader_config_args(settings)
+            if 'tag_filter_mask' in args:
+                self.logger.info(f"Reader-side EPC filter: {', '.join(args['tag_filter_mask'])}")
+            elif settings.get('filter_by_epc', True) and (settings.get('epc_list') or settings.get('epc_rules')):
+                self.logger.info("EPC list and rules need more reader filters than available, filtering on the host")
+            schedule = antenna_schedule(settings)
+            if schedule:
+                self.logger.info("Antenna schedule: " + ', '.join(
+                    f"{antenna} {describe_stop(stop)} at power {args['tx_power'][antenna]}"
+                    for antenna, stop in schedule.items()))
+            return load_llrp().LLRPReaderConfig(args)
         except Exception as e:
             self.logger.error(f"Error creating reader config: {e}")
             return None
 
     def connect(self, ip: str, config: Dict[str, Any], callback) -> bool:
         try:
+            if self.connection:
+                self.disconnect()
             self.reader_config = self.create_config(config)
             if not self.reader_config:
                 self.connection_error.emit("Failed to create reader configuration")
                 return False
 
+            from .net import LLRPConnection, shared_loop
+            if self.loop is None:
+                self.loop = shared_loop()
             self._callback = callback
-            self.reader = LLRPReaderClient(ip, LLRP_DEFAULT_PORT, self.reader_config)
-            self.reader.add_tag_report_callback(callback)
-            
-            # Connect in a non-blocking way
-            def on_connect(proto):
-                self.logger.info("Connected to reader")
-                self.connected.emit()
-                return proto
-
-            def on_failed(failure):
-                error_msg = str(failure.value)
-                self.logger.error(f"Connection failed: {error_msg}")
-                self.connection_error.emit(error_msg)
-                self.reader = None
-                return failure
-
-            d = self.reader.connect()
-            d.addCallbacks(on_connect, on_failed)
+            self.rssi_floor = config.get('rssi_floor')
+            self.settings = dict(config)
+            self.clock.reset()
+            host, port = self.parse_address(ip)
+            options = connection_options(config)
+            # The first connect is not retried, the caller gets the error
+            backoff = options.pop('backoff', None)
+            connection = LLRPConnection(self.loop, host, port, self.reader_config,
+                                        connect_timeout=HANDSHAKE_TIMEOUT, **options)
+            connection.add_tag_report_callback(self._on_tag_report)
+            done = threading.Event()
+            result = {}
+
+            def on_state(conn, state, error):
+                if not done.is_set():
+                    if state in ('connected', 'error', 'disconnected'):
+                        result['state'], result['error'] = state, error
+                        done.set()
+                    return
+                if conn is not self.connection:
+                    return
+                self.link_state_changed.emit(state, error)
+                if state in ('error', 'disconnected'):
+                    # Lost after connecting
+                    self.connection = None
+                    self.inventory_running = False
+                    if state == 'error':
+                        self.connection_error.emit(error)
+                    self.disconnected.emit()
+
+            connection.on_state = on_state
+            self.connection = connection
+            self.loop.call_soon(connection.open)
+            # The connection enforces HANDSHAKE_TIMEOUT itself, this only guards a stuck loop
+            if not done.wait(HANDSHAKE_TIMEOUT + 1.0):
+                self.connection = None
+                self.loop.call_soon(connection.close)
+                raise TimeoutError(f"no LLRP handshake within {HANDSHAKE_TIMEOUT:.0f}s")
+            if result['state'] != 'connected':
+                self.connection = None
+                raise ConnectionError(result['error'] or "connection closed")
+            connection.backoff = backoff
+            self.logger.info(f"Connected to reader at {host}:{port}")
+            self.connected.emit()
             return True
-            
+
         except Exception as e:
             error_msg = f"Error connecting to reader: {e}"
             self.logger.error(error_msg)
             self.connection_error.emit(error_msg)
+            self.connection = None
             return False
 
+    def reconfigure(self, settings: Dict[str, Any]) -> bool:
+        # Apply changed connection settings live, the outcome arrives through reconfigured
+        try:
+            if not self.connection:
+                return False
+            args = reader_config_args(settings)
+            trigger = report_trigger(settings)
+            restart = [key for key in RECONNECT_SETTINGS if key in settings and settings[key] != self.settings.get(key)]
+            if restart:
+                self.logger.warning(f"{', '.join(restart)} take effect on the next connect")
+            self.rssi_floor = settings.get('rssi_floor')
+            self.settings = dict(settings)
+            self.loop.call_soon(self.connection.reconfigure, args, trigger,
+                                lambda pause, changed, error: self.reconfigured.emit(pause, changed, error))
+            return True
+        except Exception as e:
+            self.logger.error(f"Error reconfiguring reader: {e}")
+            return False
+
+    def auto_tune(self, settings: Optional[Dict[str, Any]] = None, **options) -> Optional[Dict[str, Any]]:
+        # Blocks for the whole search, call it off the GUI thread. Returns the applied
+        # best settings for the caller to store, None when the reader is not connected.
+        try:
+            if not self.connection:
+                return None
+            from .tuning import AutoTuner
+            self.tuner = AutoTuner(self, settings or self.settings, **options)
+            return self.tuner.run()
+        except Exception as e:
+            self.logger.error(f"Error auto-tuning reader: {e}")
+            return None
+        finally:
+            self.tuner = None
+
+    @staticmethod
+    def parse_address(address: str) -> Tuple[str, int]:
+        # "host" or "host:port", e.g. a simulated reader on 127.0.0.1:5084, IPv6 as "::1" or "[::1]:5084"
+        address = address.strip()
+        host, _, port = address.rpartition(':')
+        if host.startswith('[') and host.endswith(']') and port.isdigit():
+            return host[1:-1], int(port)
+        if not host or not port.isdigit() or ':' in host:
+            return address.strip('[]'), LLRP_DEFAULT_PORT
+        return host, int(port)
+
     def start_inventory(self) -> bool:
         try:
-            if self.reader and not self.inventory_running:
-                self.reader.start_inventory()
+            if self.connection and not self.inventory_running:
+                self.loop.call_soon(self.connection.start_inventory)
                 self.inventory_running = True
                 return True
             return False
@@ -99,8 +472,8 @@ class RFIDReader(QObject):
 
     def stop_inventory(self) -> bool:
         try:
-            if self.reader and self.inventory_running:
-                self.reader.stop_inventory()
+            if self.connection and self.inventory_running:
+                self.loop.call_soon(self.connection.stop_inventory)
                 self.inventory_running = False
                 return True
             return False
@@ -108,16 +481,24 @@ class RFIDReader(QObject):
             self.logger.error(f"Error stopping inventory: {e}")
             return False
 
-    def disconnect(self) -> None:
+    def disconnect(self, timeout: float = 0) -> None:
+        # timeout > 0 waits for the reader to confirm the ROSpec deletion, e.g. before exiting
         try:
-            if self.reader:
-                if self.inventory_running:
-                    self.stop_inventory()
-                self.reader.disconnect()
-                self.reader = None
+            if self.connection:
+                # The connection deletes the ROSpecs itself before closing
+                connection, self.connection = self.connection, None
+                self.inventory_running = False
+                self.loop.call_soon(connection.disconnect)
+                if timeout:
+                    connection.closed.wait(timeout)
                 self.disconnected.emit()
         except Exception as e:
             self.logger.error(f"Error disconnecting from reader: {e}")
 
     def is_connected(self) -> bool:
-        return self.reader is not None and not getattr(self.reader, '_disconnecting', False)
+        return self.connection is not None
+
+    def status(self) -> List[Dict[str, Any]]:
+        # Same shape as ReaderPool.status, one entry
+        connection = self.connection
+        return [dict(connection.link_status(), reader_id=READER_ID)] if connection else []
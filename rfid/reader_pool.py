@@ -0,0 +1,297 @@
+import logging
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+
+from .clock import ClockAlignment, host_micros
+from .reader import RFIDReader, connection_options, drop_weak_reads, load_llrp, reader_config_args, report_trigger
+from .signals import Signal
+
+if TYPE_CHECKING:
+    from .net import LLRPConnection
+
+DEFAULT_MERGE_WINDOW = 0.05
+RATE_INTERVAL = 1.0
+
+
+def parse_addresses(addresses: str) -> List[Tuple[str, int]]:
+    # Comma, semicolon or whitespace separated "host[:port]" entries
+    entries = addresses.replace(';', ',').replace(' ', ',').split(',')
+    return [RFIDReader.parse_address(entry) for entry in entries if entry.strip()]
+
+
+class ReportMerger:
+    """Merges tag reports from several readers into one time-ordered stream.
+
+    Reports are held for `window` seconds after arrival; everything that
+    has aged out is released sorted by host time: the reader timestamp
+    mapped through the reader's clock estimate, or the arrival time for
+    reads without either. Without a ClockAlignment every read sorts by
+    arrival.
+    """
+
+    def __init__(self, window: float = DEFAULT_MERGE_WINDOW, clock: Optional[ClockAlignment] = None):
+        self.window = window
+        self.clock = clock
+        self._pending = deque()  # (arrival, host µs of each read, tags)
+
+    def push(self, tags: List[Dict[str, Any]], arrival: float, host_us: Optional[int] = None) -> None:
+        # arrival is monotonic for the window, host_us the arrival on the host clock
+        if not tags:
+            return
+        if host_us is None:
+            host_us = host_micros()
+        if self.clock is not None:
+            times = self.clock.report_times(tags, host_us).tolist()
+        else:
+            times = [host_us] * len(tags)
+        self._pending.append((arrival, times, tags))
+
+    def pop_ready(self, now: float) -> List[Dict[str, Any]]:
+        ready = []
+        while self._pending and self._pending[0][0] <= now - self.window:
+            _, times, tags = self._pending.popleft()
+            ready.extend(zip(times, tags))
+        # Stable, reads with equal times keep their arrival order
+        ready.sort(key=lambda item: item[0])
+        return [tag_data for _, tag_data in ready]
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class PooledReader:
+    """Connection state and read counters of one reader in a ReaderPool."""
+
+    def __init__(self, reader_id: int, connection: 'LLRPConnection'):
+        self.reader_id = reader_id
+        self.connection = connection
+        self.reads = 0
+        self.rate = 0.0
+        self._rate_reads = 0
+
+    @property
+    def address(self) -> str:
+        return self.connection.address
+
+    @property
+    def state(self) -> str:
+        return self.connection.state
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self.connection.link_status(), reader_id=self.reader_id, reads=self.reads, rate=self.rate)
+
+
+class ReaderPool:
+    """Runs inventory on several readers at once from the shared network thread.
+
+    Offers the same connect/inventory interface as RFIDReader, so the GUI
+    can use either. Every read is stamped with a 'ReaderID' (1-based
+    position in the address list) and listeners receive one merged,
+    time-ordered stream. A reader that fails or stalls only changes its
+    own state, and with auto_reconnect it keeps retrying on its own
+    backoff, including readers that were unreachable from the start.
+    Signals are emitted on the network thread.
+    """
+
+    def __init__(self, merge_window: float = DEFAULT_MERGE_WINDOW):
+        self.logger = logging.getLogger(__name__)
+        self.connected = Signal()
+        self.disconnected = Signal()
+        self.connection_error = Signal()
+        self.reader_state_changed = Signal()  # (reader_id, state)
+        self.reconfigured = Signal()  # (longest pause, changed keys, first error) once every reader is done
+        self.loop = None  # The shared network thread, from the first connect on
+        self.readers = []
+        self.inventory_running = False
+        self.rssi_floor = None
+        self.tuner = None  # AutoTuner while auto_tune runs
+        self.clock = ClockAlignment()  # one ReaderClock per ReaderID
+        self.merger = ReportMerger(merge_window, self.clock)
+        self.tracer = None  # LatencyTracer, its reads are found again after the merge
+        self._callback = None
+        self._tag_listeners = []
+        self._merge_timer = None
+        self._last_rate_time = None
+
+    def add_tag_listener(self, listener) -> None:
+        if listener not in self._tag_listeners:
+            self._tag_listeners.append(listener)
+
+    def remove_tag_listener(self, listener) -> None:
+        if listener in self._tag_listeners:
+            self._tag_listeners.remove(listener)
+
+    def connect(self, addresses: str, config: Dict[str, Any], callback) -> bool:
+        try:
+            if self.readers:
+                self.disconnect()
+            self._callback = callback
+            self.rssi_floor = config.get('rssi_floor')
+            self.clock.reset()
+            from .net import LLRPConnection, shared_loop
+            self.loop = shared_loop()
+            LLRPReaderConfig = load_llrp().LLRPReaderConfig
+            for reader_id, (host, port) in enumerate(parse_addresses(addresses), start=1):
+                # sllurp keeps per-client state in the config, so each reader gets its own
+                connection = LLRPConnection(self.loop, host, port, LLRPReaderConfig(reader_config_args(config)),
+                                            **connection_options(config))
+                reader = PooledReader(reader_id, connection)
+                connection.on_state = self._on_state
+                connection.add_tag_report_callback(
+                    lambda client, tags, reader=reader: self._on_tag_report(reader, tags))
+                self.readers.append(reader)
+            if not self.readers:
+                self.connection_error.emit("No reader addresses given")
+                return False
+
+            self.loop.call_soon(self._open_all)
+            return True
+        except Exception as e:
+            error_msg = f"Error connecting to readers: {e}"
+            self.logger.error(error_msg)
+            self.connection_error.emit(error_msg)
+            return False
+
+    def _open_all(self) -> None:
+        for reader in self.readers:
+            reader.connection.open()
+        self._last_rate_time = time.monotonic()
+        self._schedule_merge()
+
+    def _schedule_merge(self) -> None:
+        self._merge_timer = self.loop.call_later(self.merger.window / 2, self._merge_tick)
+
+    def _merge_tick(self) -> None:
+        now = time.monotonic()
+        tags = self.merger.pop_ready(now)
+        if tags:
+            self._deliver(tags)
+        if now - self._last_rate_time >= RATE_INTERVAL:
+            elapsed = now - self._last_rate_time
+            for reader in self.readers:
+                reader.rate = reader._rate_reads / elapsed
+                reader._rate_reads = 0
+            self._last_rate_time = now
+        self._schedule_merge()
+
+    def _on_tag_report(self, reader: PooledReader, tags: List[Dict[str, Any]]) -> None:
+        for tag_data in tags:
+            tag_data['ReaderID'] = reader.reader_id
+        host_us = host_micros()
+        self.clock.observe_report(tags, host_us)
+        reader.reads += len(tags)
+        reader._rate_reads += len(tags)
+        tags = drop_weak_reads(tags, self.rssi_floor)
+        tracer = self.tracer
+        if tags and tracer is not None and tracer.sample():
+            tracer.begin_merge(tags, self.clock, reader.connection.rx_us)
+        self.merger.push(tags, time.monotonic(), host_us)
+
+    def _deliver(self, tags: List[Dict[str, Any]]) -> None:
+        if self.tracer is not None:
+            self.tracer.locate(tags)
+        if self._callback:
+            try:
+                self._callback(self, tags)
+            except Exception as e:
+                self.logger.error(f"Error in tag callback: {e}")
+        for listener in list(self._tag_listeners):
+            try:
+                listener(self, tags)
+            except Exception as e:
+                self.logger.error(f"Error in tag listener: {e}")
+
+    def _on_state(self, connection: 'LLRPConnection', state: str, error: Optional[str]) -> None:
+        reader = next((r for r in self.readers if r.connection is connection), None)
+        if reader is None:
+            return
+        self.reader_state_changed.emit(reader.reader_id, state)
+        if state == 'error':
+            self.connection_error.emit(f"Reader {reader.reader_id} ({reader.address}): {error}")
+        elif state == 'connected':
+            # Late readers join a running inventory by themselves, see LLRPConnection.inventory_wanted
+            if sum(r.state in ('connected', 'inventorying') for r in self.readers) == 1:
+                self.connected.emit()
+
+    def reconfigure(self, settings: Dict[str, Any]) -> bool:
+        # Every reader pauses on its own, the pool reports the longest pause
+        try:
+            if not self.readers:
+                return False
+            trigger = report_trigger(settings)
+            self.rssi_floor = settings.get('rssi_floor')
+            results = []
+            readers = list(self.readers)
+
+            def on_done(pause, changed, error):
+                results.append((pause, changed, error))
+                if len(results) == len(readers):
+                    errors = [error for _, _, error in results if error]
+                    keys = sorted({key for _, changed, _ in results for key in changed})
+                    self.reconfigured.emit(max(pause for pause, _, _ in results), keys,
+                                           errors[0] if errors else None)
+
+            for reader in readers:
+                # Each connection gets its own copy, sllurp edits the config in place
+                self.loop.call_soon(reader.connection.reconfigure, reader_config_args(settings), trigger, on_done)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error reconfiguring readers: {e}")
+            return False
+
+    def auto_tune(self, settings: Dict[str, Any], **options) -> Optional[Dict[str, Any]]:
+        # One search for the whole pool, every reader runs each trial's settings
+        try:
+            if not self.readers:
+                return None
+            from .tuning import AutoTuner
+            self.tuner = AutoTuner(self, settings, **options)
+            return self.tuner.run()
+        except Exception as e:
+            self.logger.error(f"Error auto-tuning readers: {e}")
+            return None
+        finally:
+            self.tuner = None
+
+    def start_inventory(self) -> bool:
+        if not self.readers or self.inventory_running:
+            return False
+        self.inventory_running = True
+        for reader in self.readers:
+            self.loop.call_soon(reader.connection.start_inventory)
+        return True
+
+    def stop_inventory(self) -> bool:
+        if not self.readers or not self.inventory_running:
+            return False
+        self.inventory_running = False
+        for reader in self.readers:
+            self.loop.call_soon(reader.connection.stop_inventory)
+        return True
+
+    def disconnect(self, timeout: float = 0) -> None:
+        try:
+            readers, self.readers = self.readers, []
+            self.inventory_running = False
+            for reader in readers:
+                self.loop.call_soon(reader.connection.disconnect)
+            if self._merge_timer is not None:
+                self.loop.call_soon(self.loop.cancel, self._merge_timer)
+                self._merge_timer = None
+            deadline = time.monotonic() + timeout
+            for reader in readers if timeout else ():
+                reader.connection.closed.wait(max(0.0, deadline - time.monotonic()))
+            if readers:
+                self.disconnected.emit()
+        except Exception as e:
+            self.logger.error(f"Error disconnecting from readers: {e}")
+
+    def is_connected(self) -> bool:
+        return any(reader.connection.is_open for reader in self.readers)
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [reader.status() for reader in self.readers]
+
+    def total_rate(self) -> float:
+        return sum(reader.rate for reader in self.readers)
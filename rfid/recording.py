@@ -0,0 +1,307 @@
+import logging
+import mmap
+import queue
+import struct
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from .clock import ClockAlignment, host_micros
+from .store import READ_DTYPE, EPCTable, reads_from_reports
+
+# File layout: a header followed by blocks. EPCS blocks define new EPC ids
+# before the READ blocks that reference them; READ blocks hold packed
+# READ_DTYPE records, so a whole block can be mapped as one array. A live
+# stream that compacts its EPC table defines ids again from 0 on.
+MAGIC = b'R420REC\x00'
+VERSION = 4
+# Version 3 records have no channel, version 2 ones also end in the arrival
+# time as float seconds instead of the µs times
+V3_READ_DTYPE = np.dtype([field for field in READ_DTYPE.descr if field[0] != 'channel'])
+V2_READ_DTYPE = np.dtype(V3_READ_DTYPE.descr[:-2] + [('host_time', np.float64)])
+FILE_HEADER = struct.Struct('<8sHH4x')  # magic, version, record size
+BLOCK_HEADER = struct.Struct('<4sIQ')  # kind, record count, payload bytes
+EPC_ENTRY = struct.Struct('<IH')  # epc id, length
+
+EPC_BLOCK = b'EPCS'
+READ_BLOCK = b'READ'
+
+DEFAULT_CHUNK_READS = 4096
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+
+class BlockEncoder:
+    """Encodes READ_DTYPE chunks as recording blocks.
+
+    Tracks which EPCs of the table have been emitted, so every encoded
+    chunk is preceded by an EPCS block for the ids it introduces. The
+    same byte stream works as a file or as a live feed.
+    """
+
+    def __init__(self, epcs: EPCTable):
+        self.epcs = epcs
+        self._written_epcs = 0
+
+    def reset(self) -> None:
+        # After the table was compacted, the next chunk defines all of its ids again
+        self._written_epcs = 0
+
+    @staticmethod
+    def header() -> bytes:
+        return FILE_HEADER.pack(MAGIC, VERSION, READ_DTYPE.itemsize)
+
+    def encode(self, reads: np.ndarray) -> bytes:
+        parts = []
+        new_epcs = self.epcs.epcs[self._written_epcs:]
+        if new_epcs:
+            payload = b''.join(
+                EPC_ENTRY.pack(self._written_epcs + i, len(data)) + data
+                for i, data in enumerate(epc.encode('ascii', 'ignore') for epc in new_epcs))
+            parts += [BLOCK_HEADER.pack(EPC_BLOCK, len(new_epcs), len(payload)), payload]
+            self._written_epcs += len(new_epcs)
+
+        payload = reads.tobytes()
+        parts += [BLOCK_HEADER.pack(READ_BLOCK, len(reads), len(payload)), payload]
+        return b''.join(parts)
+
+
+class SessionRecorder:
+    """Writes raw tag reads to an append-only binary session file.
+
+    on_tag_report is meant to be registered as a reader tag listener; it
+    only queues the report, parsing and disk writes happen on a background
+    thread. With the reader's clock the reads are stored with their
+    aligned reader time.
+    """
+
+    def __init__(self, filename: str, chunk_reads: int = DEFAULT_CHUNK_READS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, clock: Optional[ClockAlignment] = None):
+        self.logger = logging.getLogger(__name__)
+        self.filename = filename
+        self.chunk_reads = chunk_reads
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.epcs = EPCTable()
+        self.encoder = BlockEncoder(self.epcs)
+        self.reads_written = 0
+        self._queue = queue.Queue()
+        self._file = open(filename, 'wb')
+        self._file.write(self.encoder.header())
+        self._thread = threading.Thread(target=self._run, name='session-recorder', daemon=True)
+        self._thread.start()
+
+    def on_tag_report(self, reader, tags: List[Dict[str, Any]]) -> None:
+        self._queue.put((host_micros(), tags))
+
+    def _run(self) -> None:
+        pending = []
+        pending_count = 0
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                running = False
+            elif item:
+                host_us, tags = item
+                reads = reads_from_reports(tags, self.epcs.intern, host_us)
+                if self.clock is not None:
+                    self.clock.align(reads)
+                pending.append(reads)
+                pending_count += len(reads)
+
+            now = time.monotonic()
+            if pending and (not running or pending_count >= self.chunk_reads
+                            or now - last_flush >= self.flush_interval):
+                try:
+                    self._write_chunk(np.concatenate(pending))
+                except Exception as e:
+                    self.logger.error(f"Error writing session recording: {e}")
+                pending = []
+                pending_count = 0
+                last_flush = now
+        self._file.close()
+
+    def _write_chunk(self, reads: np.ndarray) -> None:
+        self._file.write(self.encoder.encode(reads))
+        self._file.flush()
+        self.reads_written += len(reads)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+
+class SessionFile:
+    """Memory-mapped, read-only view of a recorded session.
+
+    Older recordings are converted block by block on open: version 3
+    reads have channel 0, version 2 reads also keep the arrival time as
+    their time.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.epcs = EPCTable()
+        self._file = open(filename, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._blocks = []  # (first read index, array view)
+        self.count = 0
+        self._scan()
+
+    def _scan(self) -> None:
+        magic, version, record_size = FILE_HEADER.unpack_from(self._mmap, 0)
+        dtype = {VERSION: READ_DTYPE, 3: V3_READ_DTYPE, 2: V2_READ_DTYPE}.get(version) if magic == MAGIC else None
+        if dtype is None or record_size != dtype.itemsize:
+            raise ValueError(f"{self.filename} is not a supported session recording")
+
+        offset = FILE_HEADER.size
+        size = len(self._mmap)
+        remap = None  # file id to table id, once a stream defined ids again
+        while offset + BLOCK_HEADER.size <= size:
+            kind, count, length = BLOCK_HEADER.unpack_from(self._mmap, offset)
+            offset += BLOCK_HEADER.size
+            if offset + length > size:
+                break  # Truncated tail of a recording that is still being written
+            if kind == EPC_BLOCK:
+                position = offset
+                for _ in range(count):
+                    epc_id, epc_length = EPC_ENTRY.unpack_from(self._mmap, position)
+                    position += EPC_ENTRY.size
+                    known = len(self.epcs)
+                    table_id = self.epcs.intern(self._mmap[position:position + epc_length].decode('ascii'))
+                    position += epc_length
+                    if remap is None and table_id != epc_id:
+                        # Until now the file ids and the table ids agreed
+                        remap = np.arange(known, dtype=np.int64)
+                    if remap is not None:
+                        if epc_id >= len(remap):
+                            remap = np.concatenate([remap, np.zeros(max(epc_id + 1, 2 * len(remap)) - len(remap),
+                                                                    dtype=np.int64)])
+                        remap[epc_id] = table_id
+            elif kind == READ_BLOCK:
+                reads = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+                if dtype is not READ_DTYPE:
+                    reads = _upgrade(reads)
+                if remap is not None:
+                    reads = reads.copy() if dtype is READ_DTYPE else reads
+                    reads['epc_id'] = remap[reads['epc_id']]
+                self._blocks.append((self.count, reads))
+                self.count += count
+            offset += length
+        self._block_starts = [first for first, _ in self._blocks]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def reads(self, start: int, stop: int) -> np.ndarray:
+        # Zero-copy when the range lies within one block
+        start = max(0, start)
+        stop = min(stop, self.count)
+        if stop <= start:
+            return np.zeros(0, dtype=READ_DTYPE)
+        parts = []
+        index = int(np.searchsorted(self._block_starts, start, side='right')) - 1
+        while start < stop:
+            first, block = self._blocks[index]
+            part = block[start - first:min(stop - first, len(block))]
+            parts.append(part)
+            start += len(part)
+            index += 1
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def host_times(self) -> Tuple[int, int]:
+        # Arrival µs of the first and the last read
+        if not self.count:
+            return 0, 0
+        return int(self.reads(0, 1)['host_us'][0]), int(self.reads(self.count - 1, self.count)['host_us'][0])
+
+    def to_tag_dicts(self, reads: np.ndarray) -> List[Dict[str, Any]]:
+        # Rebuild reports in the shape the reader callback delivers
+        tags = []
+        epcs = self.epcs.epcs
+        for (epc_id, reader_id, antenna, peak_rssi, last_rssi, phase, doppler, channel, seen_count,
+             first_seen, last_seen, time_us, _) in reads.tolist():
+            tag_data = {
+                'EPC': epcs[epc_id],
+                'ReaderID': reader_id,
+                'AntennaID': antenna,
+                'TagSeenCount': {'Value': seen_count},
+                'AlignedTimestamp': time_us,
+            }
+            if peak_rssi == peak_rssi:
+                tag_data['PeakRSSI'] = {'Value': peak_rssi}
+            if last_rssi == last_rssi:
+                tag_data['RSSI'] = {'Value': last_rssi}
+            if phase == phase:
+                tag_data['Phase'] = {'Value': phase}
+            if doppler == doppler:
+                tag_data['DopplerFrequency'] = {'Value': doppler}
+            if channel:
+                tag_data['ChannelIndex'] = {'Value': channel}
+            if first_seen:
+                tag_data['FirstSeenTimestamp'] = {'Value': first_seen}
+            if last_seen:
+                tag_data['LastSeenTimestamp'] = {'Value': last_seen}
+            tags.append(tag_data)
+        return tags
+
+    def close(self) -> None:
+        self._blocks = []
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Arrays handed out still point into the map, it is released with them
+            pass
+        self._file.close()
+
+
+def _upgrade(reads: np.ndarray) -> np.ndarray:
+    upgraded = np.zeros(len(reads), dtype=READ_DTYPE)
+    for name in reads.dtype.names:
+        if name in READ_DTYPE.names:
+            upgraded[name] = reads[name]
+    if 'host_time' in reads.dtype.names:
+        upgraded['host_us'] = np.round(reads['host_time'] * 1e6)
+        upgraded['time_us'] = upgraded['host_us']
+    return upgraded
+
+
+class SessionReplay:
+    """Paces a recorded session against the host clock.
+
+    speed is a multiple of real time; 0 replays as fast as it is drained.
+    """
+
+    def __init__(self, session: SessionFile, speed: float = 1.0):
+        self.session = session
+        self.speed = speed
+        self.position = 0
+        self._start_clock = None
+        self._start_time = session.host_times()[0]
+
+    def start(self, now: Optional[float] = None) -> None:
+        self._start_clock = time.monotonic() if now is None else now
+        self.position = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= len(self.session)
+
+    def due(self, max_reads: int, now: Optional[float] = None) -> np.ndarray:
+        if self._start_clock is None:
+            self.start(now)
+        stop = min(self.position + max_reads, len(self.session))
+        if self.speed > 0:
+            now = time.monotonic() if now is None else now
+            until = self._start_time + int((now - self._start_clock) * self.speed * 1e6)
+            reads = self.session.reads(self.position, stop)
+            stop = self.position + int(np.searchsorted(reads['host_us'], until, side='right'))
+        reads = self.session.reads(self.position, stop)
+        self.position = stop
+        return reads
@@ -0,0 +1,33 @@
+import logging
+import threading
+from typing import Callable, List
+
+
+class Signal:
+    """Minimal Qt-free stand-in for pyqtSignal.
+
+    Slots are called synchronously on the emitting thread, so GUI code
+    that needs the main thread re-emits through a pyqtSignal of its own.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._slots: List[Callable] = []
+
+    def connect(self, slot: Callable) -> None:
+        with self._lock:
+            if slot not in self._slots:
+                self._slots.append(slot)
+
+    def disconnect(self, slot: Callable) -> None:
+        with self._lock:
+            if slot in self._slots:
+                self._slots.remove(slot)
+
+    def emit(self, *args) -> None:
+        for slot in list(self._slots):
+            try:
+                slot(*args)
+            except Exception as e:
+                self.logger.error(f"Error in signal handler {getattr(slot, '__qualname__', slot)}: {e}")
@@ -0,0 +1,861 @@
+import argparse
+import logging
+import math
+import select
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Just enough LLRP for sllurp's LLRPReaderClient: connection event,
+# capabilities, config, ROSpec handling, keepalives and RO_ACCESS_REPORTs
+# carrying the Impinj phase, peak RSSI and Doppler parameters.
+LLRP_VERSION = 1
+MSG_HEADER = struct.Struct('!HII')  # version/type, length, message id
+CUSTOM_SUBTYPE = struct.Struct('!IB')  # vendor id, subtype
+PARAM_HEADER = struct.Struct('!HH')  # type, length
+
+TYPE_CUSTOM = 1023
+VENDOR_IMPINJ = 25882
+IMPINJ_ENABLE_EXTENSIONS = 21
+IMPINJ_ENABLE_EXTENSIONS_RESPONSE = 22
+
+GET_READER_CAPABILITIES = 1
+GET_READER_CONFIG = 2
+SET_READER_CONFIG = 3
+CLOSE_CONNECTION = 14
+ADD_ROSPEC = 20
+DELETE_ROSPEC = 21
+START_ROSPEC = 22
+STOP_ROSPEC = 23
+ENABLE_ROSPEC = 24
+DISABLE_ROSPEC = 25
+RO_ACCESS_REPORT = 61
+KEEPALIVE = 62
+READER_EVENT_NOTIFICATION = 63
+KEEPALIVE_ACK = 72
+
+# Request type -> response type for everything answered with a bare status
+STATUS_RESPONSES = {
+    GET_READER_CONFIG: 12,
+    SET_READER_CONFIG: 13,
+    CLOSE_CONNECTION: 4,
+    ADD_ROSPEC: 30,
+    DELETE_ROSPEC: 31,
+    START_ROSPEC: 32,
+    STOP_ROSPEC: 33,
+    ENABLE_ROSPEC: 34,
+    DISABLE_ROSPEC: 35,
+    40: 50,  # ADD_ACCESSSPEC
+    41: 51,  # DELETE_ACCESSSPEC
+    42: 52,  # ENABLE_ACCESSSPEC
+    43: 53,  # DISABLE_ACCESSSPEC
+}
+GET_READER_CAPABILITIES_RESPONSE = 11
+C1G2_TAG_INVENTORY_MASK = 332
+ROSPEC = 177
+AISPEC = 183
+AISPEC_STOP_TRIGGER = 184
+TAG_OBSERVATION_TRIGGER = 185
+RO_REPORT_SPEC = 237
+INVENTORY_PARAMETER_SPEC = 186
+ANTENNA_CONFIGURATION = 222
+RF_TRANSMITTER = 224
+C1G2_INVENTORY_COMMAND = 330
+C1G2_SINGULATION_CONTROL = 336
+IMPINJ_INVENTORY_SEARCH_MODE = 23
+
+SPEED_OF_LIGHT = 299792458.0
+CHANNELS = 50
+BASE_FREQUENCY = 902.75e6
+CHANNEL_SPACING = 0.5e6
+
+MOTION_MODELS = ('static', 'walk', 'sine')
+
+DEFAULT_PORT = 5084
+DEFAULT_EPC_PREFIX = 'E2801160'
+DEFAULT_REPORT_INTERVAL = 0.01
+MAX_BACKLOG = 1.0  # seconds of reads generated at most after a stall
+
+# Transmit power table of the capabilities, index 0 asks for the maximum
+POWER_LEVELS = 91
+MIN_TX_DBM = 10.0
+TX_DBM_STEP = 0.25
+MAX_TX_DBM = MIN_TX_DBM + TX_DBM_STEP * (POWER_LEVELS - 1)
+
+# Air interface model (--air)
+READ_SENSITIVITY = -75.0  # dBm a reply needs at the reader
+SELF_JAMMING_DBM = 29.0  # above this carrier leakage desensitizes the receiver ...
+SELF_JAMMING_SLOPE = 1.5  # ... by this many dB per dB
+SUCCESS_SLOPE = 2.0  # dB of link margin per e-fold of the odds of decoding a reply
+CROWDING = 50  # participants per round that square the odds of a marginal tag
+ROUND_OVERHEAD = 0.002  # seconds of Query and Q adjustment per round
+# Seconds a tag stays in B after a single target read, by session; sessions 2 and 3 persist
+# at least 2 s without power, search mode 3 suppresses tags that keep answering for longer
+SESSION_PERSISTENCE = (0.0, 0.5, 5.0, 5.0)
+SUPPRESSED_PERSISTENCE = 30.0
+DUAL_TARGET_MODES = (0, 2)
+DEFAULT_SESSION = 2
+DEFAULT_SEARCH_MODE = 2
+
+# One TagReportData parameter with a fixed layout, so whole reports are
+# encoded as a NumPy array: EPC-96, AntennaID, PeakRSSI, ChannelIndex,
+# First/LastSeenTimestampUTC and TagSeenCount as TV parameters, then the
+# Impinj RFPhaseAngle (56), PeakRSSI (57) and RFDopplerFrequency (68).
+TAG_REPORT_DTYPE = np.dtype([
+    ('type', '>u2'), ('length', '>u2'),
+    ('epc_type', 'u1'), ('epc', 'S12'),
+    ('antenna_type', 'u1'), ('antenna', '>u2'),
+    ('rssi_type', 'u1'), ('rssi', 'i1'),
+    ('channel_type', 'u1'), ('channel', '>u2'),
+    ('first_seen_type', 'u1'), ('first_seen', '>u8'),
+    ('last_seen_type', 'u1'), ('last_seen', '>u8'),
+    ('seen_count_type', 'u1'), ('seen_count', '>u2'),
+    ('phase_type', '>u2'), ('phase_length', '>u2'), ('phase_vendor', '>u4'), ('phase_subtype', '>u4'),
+    ('phase', '>u2'),
+    ('impinj_rssi_type', '>u2'), ('impinj_rssi_length', '>u2'), ('impinj_rssi_vendor', '>u4'),
+    ('impinj_rssi_subtype', '>u4'), ('impinj_rssi', '>i2'),
+    ('doppler_type', '>u2'), ('doppler_length', '>u2'), ('doppler_vendor', '>u4'), ('doppler_subtype', '>u4'),
+    ('doppler', '>i2'),
+])
+
+_TEMPLATE = np.zeros(1, dtype=TAG_REPORT_DTYPE)[0]
+for _field, _value in (('type', 240), ('length', TAG_REPORT_DTYPE.itemsize),
+                       ('epc_type', 0x80 | 13), ('antenna_type', 0x80 | 1), ('rssi_type', 0x80 | 6),
+                       ('channel_type', 0x80 | 7), ('first_seen_type', 0x80 | 2),
+                       ('last_seen_type', 0x80 | 4), ('seen_count_type', 0x80 | 8), ('seen_count', 1)):
+    _TEMPLATE[_field] = _value
+for _prefix, _subtype in (('phase', 56), ('impinj_rssi', 57), ('doppler', 68)):
+    _TEMPLATE[_prefix + '_type'] = TYPE_CUSTOM
+    _TEMPLATE[_prefix + '_length'] = 14
+    _TEMPLATE[_prefix + '_vendor'] = VENDOR_IMPINJ
+    _TEMPLATE[_prefix + '_subtype'] = _subtype
+
+
+def _param(param_type: int, body: bytes = b'') -> bytes:
+    return PARAM_HEADER.pack(param_type, PARAM_HEADER.size + len(body)) + body
+
+
+def _status() -> bytes:
+    # LLRPStatus: Success with an empty error description
+    return _param(287, struct.pack('!HH', 0, 0))
+
+
+def _message(msg_type: int, msg_id: int, body: bytes = b'') -> bytes:
+    return MSG_HEADER.pack((LLRP_VERSION << 10) | msg_type, MSG_HEADER.size + len(body), msg_id) + body
+
+
+def _custom_message(subtype: int, msg_id: int, body: bytes = b'') -> bytes:
+    return _message(TYPE_CUSTOM, msg_id, CUSTOM_SUBTYPE.pack(VENDOR_IMPINJ, subtype) + body)
+
+
+def generate_epcs(count: int, prefix: str = DEFAULT_EPC_PREFIX) -> List[str]:
+    width = 24 - len(prefix)
+    return [f"{prefix}{i:0{width}X}" for i in range(count)]
+
+
+class TagPopulation:
+    """A set of simulated tags in front of a reader.
+
+    Every tag has a distance to every antenna; the motion model moves the
+    tags and RSSI, phase and Doppler are derived from distance, radial
+    speed and the current hop channel.
+    """
+
+    def __init__(self, epcs: Sequence[str], antennas: int = 4, motion: str = 'static',
+                 rssi_at_1m: float = -45.0, rssi_noise: float = 1.0,
+                 min_distance: float = 0.5, max_distance: float = 6.0,
+                 speed: float = 0.5, period: float = 4.0, hop_interval: float = 0.2,
+                 seed: Optional[int] = None):
+        if motion not in MOTION_MODELS:
+            raise ValueError(f"Unknown motion model {motion}, expected one of {', '.join(MOTION_MODELS)}")
+        self.rng = np.random.default_rng(seed)
+        # Kept as padded hex too: S12 items drop trailing NUL bytes, so EPCs ending in 00 lose them
+        self._hex = [epc.rjust(24, '0')[-24:].upper() for epc in epcs]
+        self.epcs = np.array([bytes.fromhex(epc) for epc in self._hex], dtype='S12')
+        self.antennas = max(1, antennas)
+        self.motion = motion
+        self.rssi_at_1m = rssi_at_1m
+        self.rssi_noise = rssi_noise
+        self.min_distance = min_distance
+        self.speed = speed
+        self.period = period
+        self.hop_interval = hop_interval
+
+        count = len(self.epcs)
+        self.distance = self.rng.uniform(min_distance, max_distance, (count, self.antennas))
+        self.phase_offset = self.rng.uniform(0, 2 * math.pi, count)
+        self.motion_phase = self.rng.uniform(0, 2 * math.pi, count)
+        self.offset = np.zeros(count)
+        self.velocity = np.zeros(count)
+        self._last_advance = None
+
+    def __len__(self) -> int:
+        return len(self.epcs)
+
+    def advance(self, now: float) -> None:
+        # Random walk state moves once per tick for the whole population
+        if self.motion != 'walk':
+            return
+        if self._last_advance is None:
+            self._last_advance = now
+            return
+        dt = now - self._last_advance
+        if dt <= 0:
+            return
+        self._last_advance = now
+        step = self.rng.normal(0.0, self.speed * math.sqrt(dt), len(self.offset))
+        self.offset += step
+        self.velocity = step / dt
+
+    def channel(self, now: float) -> int:
+        if self.hop_interval <= 0:
+            return 1
+        return 1 + int(now / self.hop_interval) % CHANNELS
+
+    def select(self, prefixes: Sequence[str]) -> Optional[np.ndarray]:
+        # Indices of the tags matching any EPC prefix, None selects every tag
+        if not prefixes:
+            return None
+        return np.array([i for i, epc in enumerate(self._hex) if epc.startswith(tuple(prefixes))], dtype=np.int64)
+
+    def sample(self, count: int, start: float, end: float, selected: Optional[np.ndarray] = None,
+               dwell: Optional[Dict[int, float]] = None) -> np.ndarray:
+        # count reads with timestamps spread over [start, end) in seconds; with a
+        # C1G2 filter only the selected tags answer and share the read rate,
+        # dwell (1-based antenna -> seconds per cycle) restricts the ports that
+        # are read and splits the reads in proportion
+        population = len(self.epcs) if selected is None else len(selected)
+        if not count or not population:
+            return np.empty(0, dtype=TAG_REPORT_DTYPE)
+        tags = self.rng.integers(0, population, count)
+        if selected is not None:
+            tags = selected[tags]
+        if dwell:
+            ports = [port for port in dwell if 0 < port <= self.antennas]
+            weights = np.array([dwell[port] for port in ports], dtype=np.float64)
+            if not ports or weights.sum() <= 0:
+                return np.empty(0, dtype=TAG_REPORT_DTYPE)
+            antennas = self.rng.choice(np.array(ports) - 1, count, p=weights / weights.sum())
+        else:
+            antennas = self.rng.integers(0, self.antennas, count)
+        times = start + (end - start) * (np.arange(count) + 0.5) / count
+        return self.render(tags, antennas, times, end)
+
+    def motion_at(self, tags: np.ndarray, antennas: np.ndarray,
+                  times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # (distance, radial velocity) of tags to 0-based antennas at times
+        if self.motion == 'sine':
+            omega = 2 * math.pi / self.period
+            amplitude = self.speed / omega
+            angle = omega * times + self.motion_phase[tags]
+            offset = amplitude * np.sin(angle)
+            velocity = self.speed * np.cos(angle)
+        else:
+            offset = self.offset[tags]
+            velocity = self.velocity[tags]
+        return np.maximum(self.distance[tags, antennas] + offset, self.min_distance), velocity
+
+    def path_loss(self, distance: np.ndarray) -> np.ndarray:
+        # Noise-free RSSI at full transmit power
+        return self.rssi_at_1m - 20 * np.log10(distance)
+
+    def render(self, tags: np.ndarray, antennas: np.ndarray, times: np.ndarray, end: float,
+               rssi_offset: Any = 0.0) -> np.ndarray:
+        # Tag reports for reads of tags on 0-based antennas at times, with
+        # rssi_offset dB for transmit powers below the maximum
+        count = len(tags)
+        reads = np.empty(count, dtype=TAG_REPORT_DTYPE)
+        reads[...] = _TEMPLATE
+        distance, velocity = self.motion_at(tags, antennas, times)
+
+        channel = self.channel(end)
+        frequency = BASE_FREQUENCY + (channel - 1) * CHANNEL_SPACING
+        rssi = self.path_loss(distance) + rssi_offset + self.rng.normal(0.0, self.rssi_noise, count)
+        phase = (4 * math.pi * frequency / SPEED_OF_LIGHT * distance + self.phase_offset[tags]) % (2 * math.pi)
+        doppler = -2 * velocity * frequency / SPEED_OF_LIGHT
+
+        micros = (times * 1e6).astype(np.uint64)
+        reads['epc'] = self.epcs[tags]
+        reads['antenna'] = antennas + 1
+        reads['rssi'] = np.clip(np.round(rssi), -128, 127)
+        reads['channel'] = channel
+        reads['first_seen'] = micros
+        reads['last_seen'] = micros
+        # Impinj units: 12-bit phase angle, centi-dBm and 1/16 Hz
+        reads['phase'] = (phase * 4096 / (2 * math.pi)).astype(np.uint16) & 0xFFF
+        reads['impinj_rssi'] = np.clip(np.round(rssi * 100), -32768, 32767)
+        reads['doppler'] = np.clip(np.round(doppler * 16), -32768, 32767)
+        return reads
+
+
+def inventory_masks(rospec: bytes) -> List[str]:
+    # Hex EPC prefixes of the C1G2TagInventoryMask parameters in an ADD_ROSPEC.
+    # Only EPC bank masks starting at the EPC (bit 0x20) are understood.
+    masks = []
+    header = PARAM_HEADER.pack(C1G2_TAG_INVENTORY_MASK, 0)[:2]
+    position = rospec.find(header)
+    while position >= 0:
+        if position + PARAM_HEADER.size + 5 <= len(rospec):
+            _, length = PARAM_HEADER.unpack_from(rospec, position)
+            bank, pointer, bits = struct.unpack_from('!BHH', rospec, position + PARAM_HEADER.size)
+            mask = rospec[position + PARAM_HEADER.size + 5:position + length]
+            if bank >> 6 == 1 and pointer == 0x20 and bits % 4 == 0 and len(mask) * 8 >= bits:
+                masks.append(mask.hex().upper()[:bits // 4])
+        position = rospec.find(header, position + 2)
+    return masks
+
+
+def _children(data: bytes, start: int, end: int):
+    # (type, offset, length) of the TLV parameters in data[start:end]
+    while start + PARAM_HEADER.size <= end:
+        param_type, length = PARAM_HEADER.unpack_from(data, start)
+        if length < PARAM_HEADER.size:
+            return
+        yield param_type & 0x3FF, start, length
+        start += length
+
+
+def antenna_dwell(rospec: bytes, read_rate: float, population: int) -> Dict[int, float]:
+    # Seconds per cycle each antenna of an ADD_ROSPEC is read, from the stop
+    # triggers of its AISpecs; empty when one of them uses all antennas (ID 0)
+    dwell = {}
+    round_time = population / max(read_rate, 1.0)
+    for param_type, offset, length in _children(rospec, 0, len(rospec)):
+        if param_type != ROSPEC:
+            continue
+        for child, start, size in _children(rospec, offset + 10, offset + length):
+            if child != AISPEC:
+                continue
+            count, = struct.unpack_from('!H', rospec, start + PARAM_HEADER.size)
+            ids = struct.unpack_from(f'!{count}H', rospec, start + PARAM_HEADER.size + 2)
+            if 0 in ids:
+                return {}
+            seconds = 1.0  # Null trigger: one AISpec runs on its own
+            for trigger, position, trigger_size in _children(rospec, start + 6 + 2 * count, start + size):
+                if trigger != AISPEC_STOP_TRIGGER:
+                    continue
+                kind, duration = struct.unpack_from('!BI', rospec, position + PARAM_HEADER.size)
+                if kind == 1 and duration:
+                    seconds = duration / 1000.0
+                elif kind == 3:
+                    for observation, at, _ in _children(rospec, position + 9, position + trigger_size):
+                        if observation == TAG_OBSERVATION_TRIGGER:
+                            kind, _, _, attempts, _, timeout = struct.unpack_from('!BBHHHI', rospec,
+                                                                                  at + PARAM_HEADER.size)
+                            if kind == 2 and attempts:
+                                seconds = attempts * round_time
+                                if timeout:
+                                    seconds = min(seconds, timeout / 1000.0)
+            for antenna in ids:
+                dwell[antenna] = dwell.get(antenna, 0.0) + seconds / len(ids)
+    return dwell
+
+
+def inventory_settings(rospec: bytes) -> Dict[str, Any]:
+    # Transmit power per antenna (dBm), session and Impinj search mode of the
+    # AntennaConfigurations in an ADD_ROSPEC, defaults where it has none
+    settings = {'power': {}, 'session': DEFAULT_SESSION, 'search_mode': DEFAULT_SEARCH_MODE}
+    for param_type, offset, length in _children(rospec, 0, len(rospec)):
+        if param_type != ROSPEC:
+            continue
+        for child, start, size in _children(rospec, offset + 10, offset + length):
+            if child != AISPEC:
+                continue
+            count, = struct.unpack_from('!H', rospec, start + PARAM_HEADER.size)
+            for spec, at, spec_size in _children(rospec, start + 6 + 2 * count, start + size):
+                if spec != INVENTORY_PARAMETER_SPEC:
+                    continue
+                for config, position, config_size in _children(rospec, at + 7, at + spec_size):
+                    if config == ANTENNA_CONFIGURATION:
+                        _antenna_configuration(rospec, position, config_size, settings)
+    return settings
+
+
+def _antenna_configuration(rospec: bytes, offset: int, length: int, settings: Dict[str, Any]) -> None:
+    antenna, = struct.unpack_from('!H', rospec, offset + PARAM_HEADER.size)
+    for child, start, size in _children(rospec, offset + 6, offset + length):
+        if child == RF_TRANSMITTER:
+            _, _, index = struct.unpack_from('!HHH', rospec, start + PARAM_HEADER.size)
+            settings['power'][antenna] = power_dbm(index)
+        elif child == C1G2_INVENTORY_COMMAND:
+            for param, at, param_size in _children(rospec, start + 5, start + size):
+                if param == C1G2_SINGULATION_CONTROL:
+                    settings['session'] = rospec[at + PARAM_HEADER.size] >> 6
+                elif param == TYPE_CUSTOM and param_size >= 14:
+                    vendor, subtype = struct.unpack_from('!II', rospec, at + PARAM_HEADER.size)
+                    if vendor == VENDOR_IMPINJ and subtype == IMPINJ_INVENTORY_SEARCH_MODE:
+                        settings['search_mode'], = struct.unpack_from('!H', rospec, at + 12)
+
+
+def power_dbm(index: int) -> float:
+    if not 0 < index <= POWER_LEVELS:
+        return MAX_TX_DBM
+    return MIN_TX_DBM + TX_DBM_STEP * (index - 1)
+
+
+def report_triggers(rospec: bytes, read_rate: float, population: int) -> Tuple[Optional[int], Optional[float]]:
+    # (tags per report, seconds per report) an ADD_ROSPEC asks for, None where
+    # it leaves the choice to the simulator's own report_batch/report_interval
+    batch = interval = None
+    for param_type, offset, length in _children(rospec, 0, len(rospec)):
+        if param_type != ROSPEC:
+            continue
+        for child, start, size in _children(rospec, offset + 10, offset + length):
+            if child == RO_REPORT_SPEC:
+                _, n = struct.unpack_from('!BH', rospec, start + PARAM_HEADER.size)
+                batch = n or None
+            elif child == AISPEC:
+                antennas, = struct.unpack_from('!H', rospec, start + PARAM_HEADER.size)
+                for trigger, position, trigger_size in _children(rospec, start + 6 + 2 * antennas, start + size):
+                    if trigger != AISPEC_STOP_TRIGGER:
+                        continue
+                    kind, duration = struct.unpack_from('!BI', rospec, position + PARAM_HEADER.size)
+                    if kind == 1 and duration:
+                        interval = duration / 1000.0  # Duration: one report per AISpec
+                    elif kind == 3:
+                        # Tag observation: a round reads every tag once, then waits out the silence
+                        for observation, at, _ in _children(rospec, position + 9, position + trigger_size):
+                            if observation == TAG_OBSERVATION_TRIGGER:
+                                _, _, _, _, silence, timeout = struct.unpack_from('!BBHHHI', rospec,
+                                                                                  at + PARAM_HEADER.size)
+                                interval = population / max(read_rate, 1.0) + silence / 1000.0
+                                if timeout:
+                                    interval = min(interval, timeout / 1000.0)
+    return batch, interval
+
+
+def encode_reports(reads: np.ndarray, batch: int, first_id: int) -> Tuple[bytes, int]:
+    # Splits reads into RO_ACCESS_REPORTs of at most batch tags (0 means one report)
+    batch = batch if batch > 0 else max(1, len(reads))
+    parts = []
+    msg_id = first_id
+    for offset in range(0, len(reads), batch):
+        payload = reads[offset:offset + batch].tobytes()
+        parts.append(_message(RO_ACCESS_REPORT, msg_id, payload))
+        msg_id += 1
+    return b''.join(parts), msg_id - first_id
+
+
+class AirInterface:
+    """Gen2 inventory rounds of one connection, a toy model for tuning tests.
+
+    Each round the tags in range of the active antenna that are not
+    resting answer once, in random order. A slot takes 1/read_rate at
+    the best Q, longer when the population falls between two frame sizes
+    and collides. A reply is decoded with odds that grow with the link
+    margin (transmit power, distance and self-jamming above
+    SELF_JAMMING_DBM) and shrink for marginal tags as the round fills up.
+    In the single target search modes a read tag rests for the
+    persistence of the session, which makes room for the weak tags but
+    keeps the strong ones quiet. Antennas take turns per the dwell of
+    the ROSpec's AISpecs.
+    """
+
+    def __init__(self, population: TagPopulation, read_rate: float):
+        self.population = population
+        self.read_rate = read_rate
+        self.rng = population.rng
+        self.rest_until = np.zeros(len(population))
+        self.clock = None
+        self.pending = None  # (tags, antennas, times, rssi offsets) read past the last tick
+        self.configure()
+
+    def configure(self, settings: Optional[Dict[str, Any]] = None, selected: Optional[np.ndarray] = None,
+                  dwell: Optional[Dict[int, float]] = None) -> None:
+        # settings from inventory_settings(); a new ROSpec also powers the tags down
+        settings = settings or {}
+        antennas = self.population.antennas
+        power = settings.get('power') or {antenna: MAX_TX_DBM for antenna in range(1, antennas + 1)}
+        ports = dwell or {antenna: 1.0 / len(power) for antenna in power}
+        self.turns = [(port - 1, seconds) for port, seconds in ports.items() if 0 < port <= antennas]
+        self.power = {port - 1: dbm for port, dbm in power.items()}
+        self.session = settings.get('session', DEFAULT_SESSION)
+        self.search_mode = settings.get('search_mode', DEFAULT_SEARCH_MODE)
+        self.selected = selected
+        self.rest_until[:] = 0.0
+        self.turn = 0
+        self.turn_left = self.turns[0][1] if self.turns else 0.0
+        self.clock = None
+        self.pending = None
+
+    def persistence(self) -> float:
+        if self.search_mode in DUAL_TARGET_MODES:
+            return 0.0
+        if self.search_mode == 3:
+            return SUPPRESSED_PERSISTENCE
+        return SESSION_PERSISTENCE[self.session & 3]
+
+    def run(self, start: float, end: float) -> np.ndarray:
+        # Reads decoded in [start, end) as tag reports
+        if not self.turns:
+            return np.empty(0, dtype=TAG_REPORT_DTYPE)
+        if self.clock is None or self.clock < end - MAX_BACKLOG:
+            self.clock = max(start, end - MAX_BACKLOG)
+        rounds = [self.pending] if self.pending is not None else []
+        while self.clock < end:
+            rounds.append(self._round())
+        if not rounds:
+            return np.empty(0, dtype=TAG_REPORT_DTYPE)
+        tags, antennas, times, offsets = (np.concatenate(column) for column in zip(*rounds))
+        due = times < end
+        later = ~due
+        self.pending = (tags[later], antennas[later], times[later], offsets[later]) if later.any() else None
+        return self.population.render(tags[due], antennas[due], times[due], end, offsets[due])
+
+    def _round(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        population = self.population
+        antenna, _ = self.turns[self.turn]
+        start = self.clock
+        tx_dbm = self.power.get(antenna, MAX_TX_DBM)
+        sensitivity = READ_SENSITIVITY + SELF_JAMMING_SLOPE * max(0.0, tx_dbm - SELF_JAMMING_DBM)
+
+        tags = np.arange(len(population)) if self.selected is None else self.selected
+        tags = tags[self.rest_until[tags] <= start]
+        ports = np.full(len(tags), antenna)
+        distance, _ = population.motion_at(tags, ports, np.full(len(tags), start))
+        margin = population.path_loss(distance) + tx_dbm - MAX_TX_DBM - sensitivity
+        # Tags too far from the antenna are not even powered up
+        powered = margin > -3 * SUCCESS_SLOPE
+        tags, margin = tags[powered], margin[powered]
+
+        count = len(tags)
+        duration = ROUND_OVERHEAD
+        read = np.zeros(0, dtype=np.int64)
+        times = np.zeros(0)
+        if count:
+            frame = 2 ** math.ceil(math.log2(count)) if count > 1 else 1
+            efficiency = min(1.0, math.e * count / frame * (1 - 1 / frame) ** (count - 1)) if frame > 1 else 1.0
+            slot = 1.0 / (self.read_rate * efficiency)
+            order = self.rng.permutation(count)
+            odds = (1.0 / (1.0 + np.exp(-margin[order] / SUCCESS_SLOPE))) ** (1 + count / CROWDING)
+            decoded = self.rng.random(count) < odds
+            read = tags[order][decoded]
+            times = start + ROUND_OVERHEAD + slot * (np.flatnonzero(decoded) + 0.5)
+            duration += slot * count
+            self.rest_until[read] = times + self.persistence()
+        self.clock = start + duration
+
+        self.turn_left -= duration
+        if self.turn_left <= 0:
+            self.turn = (self.turn + 1) % len(self.turns)
+            self.turn_left = self.turns[self.turn][1]
+        return read, np.full(len(read), antenna), times, np.full(len(read), tx_dbm - MAX_TX_DBM)
+
+
+class SimulatedReader:
+    """LLRP reader simulator listening on a local TCP port.
+
+    Each client connection runs on its own thread and streams reads from
+    the shared tag population at read_rate reads/s while a ROSpec is
+    enabled, every report_interval seconds in reports of report_batch tags.
+    A ROSpec that asks for N tags per report, an AISpec duration or
+    end-of-round reports overrides both for its connection. Only the
+    ROSpec's antennas and the tags matching its C1G2 masks are read, and
+    AISpecs with their own dwell split the reads by dwell time. With air
+    the reads come from an AirInterface per connection instead, so the
+    read rate depends on the ROSpec's power, session and search mode.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                 population: Optional[TagPopulation] = None, read_rate: float = 1000.0,
+                 report_batch: int = 1, report_interval: float = DEFAULT_REPORT_INTERVAL,
+                 keepalive_interval: float = 0.0, air: bool = False,
+                 clock_offset: float = 0.0, clock_drift_ppm: float = 0.0):
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.port = port
+        self.population = population or TagPopulation(generate_epcs(100))
+        self.read_rate = read_rate
+        self.report_batch = report_batch
+        self.report_interval = report_interval
+        self.keepalive_interval = keepalive_interval
+        self.air = air
+        # The reader's UTC clock runs clock_offset seconds off and clock_drift_ppm fast from start on
+        self.clock_offset = clock_offset
+        self.clock_drift_ppm = clock_drift_ppm
+        self.clock_start = time.time()
+        self.reads_sent = 0
+        self.reports_sent = 0
+        self.keepalive_acks = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.host, self.port
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._server = socket.create_server((self.host, self.port))
+        self._server.settimeout(0.2)
+        self.port = self._server.getsockname()[1]
+        thread = threading.Thread(target=self._accept_loop, name='llrp-simulator', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        self.logger.info(f"Simulated reader listening on {self.host}:{self.port}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._server:
+            self._server.close()
+            self._server = None
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                client, peer = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.logger.info(f"Simulated reader client connected from {peer[0]}:{peer[1]}")
+            thread = threading.Thread(target=self._serve, args=(client,),
+                                      name=f'llrp-simulator-{peer[1]}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _serve(self, client: socket.socket) -> None:
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = _Session(self, client)
+        try:
+            session.run()
+        except OSError as e:
+            self.logger.info(f"Simulated reader client disconnected: {e}")
+        except Exception as e:
+            self.logger.error(f"Error in simulated reader session: {e}")
+        finally:
+            client.close()
+
+    def _sample(self, count: int, start: float, end: float, selected: Optional[np.ndarray] = None,
+                dwell: Optional[Dict[int, float]] = None) -> np.ndarray:
+        with self._lock:
+            self.population.advance(end)
+            return self.population.sample(count, start, end, selected, dwell)
+
+    def reader_micros(self, wall: float) -> int:
+        return int((wall + self.clock_offset + (wall - self.clock_start) * self.clock_drift_ppm * 1e-6) * 1e6)
+
+    def _reader_clock(self, reads: np.ndarray) -> None:
+        # Moves the wall-clock timestamps of reads onto the reader's clock
+        if not (self.clock_offset or self.clock_drift_ppm) or not len(reads):
+            return
+        micros = reads['last_seen'].astype(np.float64)
+        shift = (self.clock_offset + (micros / 1e6 - self.clock_start) * self.clock_drift_ppm * 1e-6) * 1e6
+        reads['first_seen'] = (reads['first_seen'] + shift).astype(np.uint64)
+        reads['last_seen'] = (micros + shift).astype(np.uint64)
+
+    def _sample_air(self, air: AirInterface, start: float, end: float) -> np.ndarray:
+        with self._lock:
+            self.population.advance(end)
+            return air.run(start, end)
+
+
+class _Session:
+    def __init__(self, reader: SimulatedReader, client: socket.socket):
+        self.reader = reader
+        self.client = client
+        self.buffer = b''
+        self.next_id = 1
+        self.inventorying = False
+        self.closed = False
+        self.selected = None  # tags matching the ROSpec's C1G2 filters
+        self.dwell = {}  # antenna -> seconds per AISpec cycle of the ROSpec, empty for all antennas
+        self.report_batch = reader.report_batch
+        self.report_interval = reader.report_interval
+        self.air = AirInterface(reader.population, reader.read_rate) if reader.air else None
+
+    def send(self, data: bytes) -> None:
+        self.client.sendall(data)
+
+    def run(self) -> None:
+        reader = self.reader
+        self.send(self._connection_event())
+        last_wall = time.time()
+        next_tick = time.monotonic()
+        next_keepalive = next_tick + reader.keepalive_interval
+        carry = 0.0
+
+        while not reader._stop.is_set() and not self.closed:
+            now = time.monotonic()
+            timeout = 0.2
+            if self.inventorying:
+                timeout = min(timeout, max(0.0, next_tick - now))
+            if reader.keepalive_interval > 0:
+                timeout = min(timeout, max(0.0, next_keepalive - now))
+
+            readable, _, _ = select.select([self.client], [], [], timeout)
+            if readable:
+                data = self.client.recv(65536)
+                if not data:
+                    break
+                self.buffer += data
+                self._handle_messages()
+
+            now = time.monotonic()
+            if reader.keepalive_interval > 0 and now >= next_keepalive:
+                self.send(_message(KEEPALIVE, self._take_id()))
+                next_keepalive = now + reader.keepalive_interval
+
+            if not self.inventorying:
+                next_tick = now
+                last_wall = time.time()
+                carry = 0.0
+                continue
+            if now < next_tick:
+                continue
+            next_tick = max(next_tick + self.report_interval, now)
+
+            wall = time.time()
+            if self.air:
+                reads = reader._sample_air(self.air, last_wall, wall)
+                last_wall = wall
+                if not len(reads):
+                    continue
+            else:
+                due = carry + reader.read_rate * (wall - last_wall)
+                due = min(due, reader.read_rate * MAX_BACKLOG)
+                count = int(due)
+                carry = due - count
+                if not count:
+                    continue
+                reads = reader._sample(count, last_wall, wall, self.selected, self.dwell)
+                last_wall = wall
+            reader._reader_clock(reads)
+            data, reports = encode_reports(reads, self.report_batch, self.next_id)
+            self.next_id += reports
+            self.send(data)
+            reader.reads_sent += len(reads)
+            reader.reports_sent += reports
+
+    def _take_id(self) -> int:
+        msg_id = self.next_id
+        self.next_id += 1
+        return msg_id
+
+    def _handle_messages(self) -> None:
+        while len(self.buffer) >= MSG_HEADER.size:
+            type_field, length, msg_id = MSG_HEADER.unpack_from(self.buffer)
+            if len(self.buffer) < length:
+                return
+            body = self.buffer[MSG_HEADER.size:length]
+            self.buffer = self.buffer[length:]
+            self._handle(type_field & 0x3FF, msg_id, body)
+
+    def _handle(self, msg_type: int, msg_id: int, body: bytes) -> None:
+        if msg_type == TYPE_CUSTOM:
+            vendor, subtype = CUSTOM_SUBTYPE.unpack_from(body)
+            if vendor == VENDOR_IMPINJ and subtype == IMPINJ_ENABLE_EXTENSIONS:
+                self.send(_custom_message(IMPINJ_ENABLE_EXTENSIONS_RESPONSE, msg_id, _status()))
+            return
+        if msg_type == KEEPALIVE_ACK:
+            self.reader.keepalive_acks += 1
+            return
+        if msg_type == GET_READER_CAPABILITIES:
+            self.send(_message(GET_READER_CAPABILITIES_RESPONSE, msg_id, _status() + self._capabilities()))
+            return
+
+        response = STATUS_RESPONSES.get(msg_type)
+        if response is None:
+            return  # ENABLE_EVENTS_AND_REPORTS and anything unknown get no reply
+        if msg_type == ADD_ROSPEC:
+            reader = self.reader
+            self.selected = reader.population.select(inventory_masks(body))
+            population = len(reader.population) if self.selected is None else len(self.selected)
+            self.dwell = antenna_dwell(body, reader.read_rate, population)
+            if self.air:
+                self.air.configure(inventory_settings(body), self.selected, self.dwell)
+            batch, interval = report_triggers(body, reader.read_rate, population)
+            # End-of-AISpec reports carry everything read since the last one
+            self.report_batch = batch if batch else 0 if interval else reader.report_batch
+            self.report_interval = interval if interval else reader.report_interval
+        elif msg_type in (ENABLE_ROSPEC, START_ROSPEC):
+            self.inventorying = True
+        elif msg_type in (DISABLE_ROSPEC, STOP_ROSPEC, DELETE_ROSPEC):
+            self.inventorying = False
+        self.send(_message(response, msg_id, _status()))
+        if msg_type == CLOSE_CONNECTION:
+            self.closed = True
+
+    def _connection_event(self) -> bytes:
+        timestamp = _param(128, struct.pack('!Q', self.reader.reader_micros(time.time())))
+        event = _param(256, struct.pack('!H', 0))  # ConnectionAttemptEvent: Success
+        return _message(READER_EVENT_NOTIFICATION, self._take_id(), _param(246, timestamp + event))
+
+    def _capabilities(self) -> bytes:
+        firmware = b'simulator'
+        general = _param(137, struct.pack('!HHIIH', self.reader.population.antennas, 0xC000,
+                                          VENDOR_IMPINJ, 2001002, len(firmware)) + firmware)
+        # Transmit power 10.00 to 32.50 dBm in 0.25 dB steps, like an R420
+        power = b''.join(_param(145, struct.pack('!HH', index, round(power_dbm(index) * 100)))
+                         for index in range(1, POWER_LEVELS + 1))
+        mode = _param(329, struct.pack('!IBBBBIIIII', 1000, 0x80, 0, 0, 0, 640000, 1500, 6250, 6250, 0))
+        band = _param(144, power + _param(328, mode))
+        regulatory = _param(143, struct.pack('!HH', 840, 1) + band)
+        c1g2 = _param(327, struct.pack('!BH', 0, 2))
+        return general + regulatory + c1g2
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulated LLRP reader for load and soak tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--tags', type=int, default=100, help="number of simulated tags")
+    parser.add_argument('--epc-prefix', default=DEFAULT_EPC_PREFIX)
+    parser.add_argument('--epc-file', help="file with one EPC per line, overrides --tags")
+    parser.add_argument('--rate', type=float, default=1000.0, help="reads per second")
+    parser.add_argument('--antennas', type=int, default=4)
+    parser.add_argument('--motion', choices=MOTION_MODELS, default='static')
+    parser.add_argument('--speed', type=float, default=0.5, help="tag speed in m/s for walk and sine")
+    parser.add_argument('--period', type=float, default=4.0, help="sine motion period in seconds")
+    parser.add_argument('--rssi-noise', type=float, default=1.0, help="RSSI noise in dB")
+    parser.add_argument('--hop-interval', type=float, default=0.2, help="seconds per channel, 0 disables hopping")
+    parser.add_argument('--batch', type=int, default=1, help="tags per RO_ACCESS_REPORT, 0 for one per tick, "
+                                                                     "unless the client's ROSpec sets it")
+    parser.add_argument('--interval', type=float, default=DEFAULT_REPORT_INTERVAL, help="report tick in seconds")
+    parser.add_argument('--keepalive', type=float, default=0.0, help="keepalive interval in seconds")
+    parser.add_argument('--air', action='store_true',
+                        help="model Gen2 rounds, so power, session and search mode change the read rate")
+    parser.add_argument('--clock-offset', type=float, default=0.0, help="reader clock offset in seconds")
+    parser.add_argument('--clock-drift', type=float, default=0.0, help="reader clock drift in ppm")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.epc_file:
+        with open(args.epc_file) as f:
+            epcs = [line.strip() for line in f if line.strip()]
+    else:
+        epcs = generate_epcs(args.tags, args.epc_prefix)
+
+    population = TagPopulation(epcs, antennas=args.antennas, motion=args.motion,
+                               rssi_noise=args.rssi_noise, speed=args.speed, period=args.period,
+                               hop_interval=args.hop_interval, seed=args.seed)
+    reader = SimulatedReader(args.host, args.port, population, read_rate=args.rate,
+                             report_batch=args.batch, report_interval=args.interval,
+                             keepalive_interval=args.keepalive, air=args.air,
+                             clock_offset=args.clock_offset, clock_drift_ppm=args.clock_drift)
+    reader.start()
+    try:
+        last = reader.reads_sent
+        while True:
+            time.sleep(5)
+            sent = reader.reads_sent
+            reader.logger.info(f"{(sent - last) / 5:.0f} reads/s, {sent} reads in {reader.reports_sent} reports")
+            last = sent
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.stop()
+
+
+if __name__ == '__main__':
+    main()
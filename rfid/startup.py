@@ -0,0 +1,75 @@
+import builtins
+import sys
+import time
+from collections import defaultdict
+from typing import List, Tuple
+
+
+class ImportTimer:
+    """Measures import time per top-level package while installed.
+
+    Times are self times: a package importing another one is only charged
+    for its own module code, so numpy pulled in by rfid shows up as numpy.
+    """
+
+    def __init__(self):
+        self.times = defaultdict(float)
+        self._original = None
+        self._children = []  # time spent in nested imports, per active frame
+
+    def install(self) -> None:
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if not level and name in sys.modules and not fromlist:
+            return self._original(name, globals, locals, fromlist, level)
+        if level:
+            package = (globals or {}).get('__package__') or ''
+        else:
+            package = name
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._children.pop()
+            self.times[package.partition('.')[0]] += elapsed - nested
+            if self._children:
+                self._children[-1] += elapsed
+
+    def summary(self, limit: int = 10) -> List[Tuple[str, float]]:
+        return sorted(self.times.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+class StartupTimer:
+    """Wall-clock phases from process start to the first frame on screen."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self._last = self.start
+        self.imports = ImportTimer()
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> str:
+        total = self._last - self.start
+        lines = ["Startup timing:"]
+        lines += [f"  {phase:<32}{seconds * 1000:8.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"  {'total':<32}{total * 1000:8.1f} ms")
+        imports = self.imports.summary()
+        if imports:
+            lines.append("Import time by package (self time):")
+            lines += [f"  {package:<32}{seconds * 1000:8.1f} ms" for package, seconds in imports]
+        return '\n'.join(lines)
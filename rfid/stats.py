@@ -0,0 +1,214 @@
+import math
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .motion import MotionEngine, DEFAULT_CHANNEL_PLAN, DEFAULT_WINDOW as DEFAULT_MOTION_WINDOW
+from .store import EPCTable
+
+DEFAULT_RATE_WINDOW = 10.0
+DEFAULT_RATE_BUCKETS = 20
+
+
+class TagStatistics:
+    """Running statistics for one (EPC, reader, antenna) combination.
+
+    RSSI moments use Welford's update and the read rate is a ring of time
+    buckets with a running total, so every read is O(1).
+    """
+
+    __slots__ = ('epc_id', 'epc', 'reader', 'antenna', 'count', 'rssi_count', 'rssi_mean', 'rssi_m2',
+                 'rssi_min', 'rssi_max', 'last_phase', 'last_doppler', 'last_seen',
+                 '_buckets', '_bucket_index', '_window_count', '_bucket_width')
+
+    def __init__(self, epc: str, reader: int, antenna: int, window: float, buckets: int, epc_id: int = -1):
+        self.epc_id = epc_id
+        self.epc = epc
+        self.reader = reader
+        self.antenna = antenna
+        self.count = 0
+        self.rssi_count = 0
+        self.rssi_mean = 0.0
+        self.rssi_m2 = 0.0
+        self.rssi_min = None
+        self.rssi_max = None
+        self.last_phase = None
+        self.last_doppler = None
+        self.last_seen = None
+        self._buckets = [0] * buckets
+        self._bucket_index = None
+        self._window_count = 0
+        self._bucket_width = window / buckets
+
+    def add(self, now: float, rssi: Optional[float], phase: Optional[float],
+            doppler: Optional[float], reads: int = 1) -> None:
+        self.count += reads
+        self.last_seen = now
+        # Missing values arrive as None or NaN
+        if phase is not None and phase == phase:
+            self.last_phase = phase
+        if doppler is not None and doppler == doppler:
+            self.last_doppler = doppler
+
+        if rssi is not None and rssi == rssi:
+            self.rssi_count += 1
+            delta = rssi - self.rssi_mean
+            self.rssi_mean += delta / self.rssi_count
+            self.rssi_m2 += delta * (rssi - self.rssi_mean)
+            if self.rssi_min is None or rssi < self.rssi_min:
+                self.rssi_min = rssi
+            if self.rssi_max is None or rssi > self.rssi_max:
+                self.rssi_max = rssi
+
+        self._advance(now)
+        self._buckets[self._bucket_index % len(self._buckets)] += reads
+        self._window_count += reads
+
+    def _advance(self, now: float) -> None:
+        index = int(now / self._bucket_width)
+        if self._bucket_index is None:
+            self._bucket_index = index
+            return
+        # Expire the buckets that fell out of the window since the last read
+        steps = min(index - self._bucket_index, len(self._buckets))
+        for step in range(1, steps + 1):
+            slot = (self._bucket_index + step) % len(self._buckets)
+            self._window_count -= self._buckets[slot]
+            self._buckets[slot] = 0
+        if index > self._bucket_index:
+            self._bucket_index = index
+
+    def rate(self, now: float) -> float:
+        if self._bucket_index is None:
+            return 0.0
+        self._advance(now)
+        return self._window_count / (self._bucket_width * len(self._buckets))
+
+    @property
+    def rssi_stddev(self) -> Optional[float]:
+        if self.rssi_count < 2:
+            return None
+        return math.sqrt(self.rssi_m2 / (self.rssi_count - 1))
+
+
+class AntennaRates:
+    """Reads/s and unique tags/s per (reader, antenna).
+
+    Both are averaged over the whole seconds of the last `window` seconds.
+    Unique tags/s counts the distinct EPCs an antenna read within each
+    second: the coverage figure to tune power and dwell against, which a
+    few strong tags read over and over do not inflate. Updates are one
+    vectorized pass per batch.
+    """
+
+    def __init__(self, window: float = DEFAULT_RATE_WINDOW):
+        self.seconds = max(1, int(window))
+        self._seconds = {}  # (reader_id, antenna) -> deque of [second, reads, unique tags]
+        self._last_second = {}  # (reader_id, antenna) -> second each epc_id was last counted
+        self._first_second = None
+
+    def update(self, reads: np.ndarray, now: Optional[float] = None) -> None:
+        # reads is a batch of READ_DTYPE records
+        if not len(reads):
+            return
+        second = int(time.monotonic() if now is None else now)
+        if self._first_second is None:
+            self._first_second = second
+        keys = reads['reader_id'].astype(np.int64) << 16 | reads['antenna'].astype(np.int64)
+        for key in np.unique(keys).tolist():
+            epc_ids = reads['epc_id'][keys == key].astype(np.int64)
+            antenna = (key >> 16, key & 0xFFFF)
+            last = self._last_second.get(antenna)
+            size = int(epc_ids.max()) + 1
+            if last is None or len(last) < size:
+                grown = np.full(max(size, 2 * len(last) if last is not None else 0), -1, dtype=np.int64)
+                if last is not None:
+                    grown[:len(last)] = last
+                last = self._last_second[antenna] = grown
+            history = self._seconds.setdefault(antenna, deque())
+            if not history or history[-1][0] != second:
+                history.append([second, 0, 0])
+            history[-1][1] += len(epc_ids)
+            history[-1][2] += len(np.unique(epc_ids[last[epc_ids] != second]))
+            last[epc_ids] = second
+
+    def compact_epcs(self, mapping: np.ndarray) -> None:
+        # Follows EPCTable.compact, mapping is the new id of every old one or -1
+        for antenna, last in self._last_second.items():
+            old = mapping[:len(last)]
+            kept = np.flatnonzero(old >= 0)
+            compacted = np.full(max(int(mapping.max(initial=-1)) + 1, 1), -1, dtype=np.int64)
+            compacted[old[kept]] = last[kept]
+            self._last_second[antenna] = compacted
+
+    def rates(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        # One entry per (reader, antenna) with reads_per_s and tags_per_s, zero
+        # until the first whole second is over
+        if self._first_second is None:
+            return []
+        current = int(time.monotonic() if now is None else now)
+        seconds = min(self.seconds, current - self._first_second)
+        result = []
+        for antenna in sorted(self._seconds):
+            history = self._seconds[antenna]
+            while history and history[0][0] < current - self.seconds:
+                history.popleft()
+            complete = [entry for entry in history if entry[0] < current]
+            result.append({
+                'reader': antenna[0], 'antenna': antenna[1],
+                'reads_per_s': sum(entry[1] for entry in complete) / seconds if seconds else 0.0,
+                'tags_per_s': sum(entry[2] for entry in complete) / seconds if seconds else 0.0,
+            })
+        return result
+
+    def clear(self) -> None:
+        self._seconds.clear()
+        self._last_second.clear()
+        self._first_second = None
+
+
+class StatisticsEngine:
+    def __init__(self, window: float = DEFAULT_RATE_WINDOW, buckets: int = DEFAULT_RATE_BUCKETS,
+                 motion_window: float = DEFAULT_MOTION_WINDOW, channel_plan: str = DEFAULT_CHANNEL_PLAN):
+        self.window = window
+        self.buckets = buckets
+        self.stats = {}  # (epc_id, reader_id, antenna) -> TagStatistics
+        self.rows = []  # TagStatistics in first-seen order
+        self.antennas = AntennaRates(window)
+        self.motion = MotionEngine(motion_window, channel_plan)
+
+    def update(self, reads: np.ndarray, epcs: EPCTable, now: Optional[float] = None) -> None:
+        # reads is a batch of READ_DTYPE records from the TagReadStore
+        if now is None:
+            now = time.monotonic()
+        self.antennas.update(reads, now)
+        self.motion.add(reads)
+        stats = self.stats
+        for epc_id, reader_id, antenna, rssi, phase, doppler in zip(
+                reads['epc_id'].tolist(), reads['reader_id'].tolist(), reads['antenna'].tolist(),
+                reads['peak_rssi'].tolist(), reads['phase'].tolist(), reads['doppler'].tolist()):
+            key = (epc_id, reader_id, antenna)
+            entry = stats.get(key)
+            if entry is None:
+                entry = TagStatistics(epcs.epc(epc_id), reader_id, antenna, self.window, self.buckets, epc_id)
+                stats[key] = entry
+                self.rows.append(entry)
+            entry.add(now, rssi, phase, doppler)
+
+    def get(self, epc_id: int, antenna: int, reader_id: int = 0) -> Optional[TagStatistics]:
+        return self.stats.get((epc_id, reader_id, antenna))
+
+    def flush(self) -> None:
+        # Motion estimates catch up with the reads since the last flush
+        self.motion.flush()
+
+    def motion_of(self, entry: TagStatistics) -> Optional[Dict[str, Any]]:
+        return self.motion.get(entry.epc_id, entry.reader, entry.antenna)
+
+    def clear(self) -> None:
+        self.stats.clear()
+        self.rows = []
+        self.antennas.clear()
+        self.motion.clear()
@@ -0,0 +1,367 @@
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, Iterable, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .clock import ClockAlignment
+
+DEFAULT_CAPACITY = 1000000
+CHUNK_SIZE = 65536
+# Batches up to this size take the scalar paths, NumPy's fixed costs dominate below it
+SMALL_BATCH = 16
+
+READ_DTYPE = np.dtype([
+    ('epc_id', np.uint32),
+    ('reader_id', np.uint16),
+    ('antenna', np.uint16),
+    ('peak_rssi', np.float32),
+    ('last_rssi', np.float32),
+    ('phase', np.float32),
+    ('doppler', np.float32),
+    ('channel', np.uint16),  # hop table index, 0 when not reported
+    ('seen_count', np.uint32),
+    ('first_seen', np.uint64),  # reader clock, µs
+    ('last_seen', np.uint64),
+    ('time_us', np.int64),  # last_seen on the host clock (UTC µs), see ClockAlignment
+    ('host_us', np.int64),  # arrival on the host, UTC µs
+])
+
+
+def _value(tag_data: Dict[str, Any], key: str, default=None):
+    # Older sllurp wraps fields as {'Value': ...}, sllurp 3 reports plain values
+    value = tag_data.get(key)
+    if value is None:
+        return default
+    if isinstance(value, dict):
+        return value.get('Value', default)
+    return value
+
+
+def peak_rssi(tag_data: Dict[str, Any]) -> Optional[float]:
+    # dBm, None when the report carries no RSSI
+    rssi = tag_data.get('ImpinjPeakRSSI')
+    if rssi is None:
+        return _value(tag_data, 'PeakRSSI')
+    return rssi / 100.0  # centi-dBm
+
+
+def _unwrap(values: Tuple) -> Tuple:
+    # Older sllurp wraps fields as {'Value': ...}
+    if dict in map(type, values):
+        return tuple(value.get('Value') if isinstance(value, dict) else value for value in values)
+    return values
+
+
+def _scaled(values: Tuple, scale: float, tags: List[Dict[str, Any]], key: str) -> List[Any]:
+    # An Impinj extension field in its own unit, the plain LLRP field where it is missing
+    if None not in values:
+        return [value * scale for value in values]
+    return [_value(tag_data, key) if value is None else value * scale for value, tag_data in zip(values, tags)]
+
+
+def reads_from_reports(tags: Iterable[Dict[str, Any]], intern, host_us: int) -> np.ndarray:
+    # READ_DTYPE rows stamped with the arrival time; ClockAlignment.align replaces
+    # time_us with the reader's own time. Replayed reads carry theirs as AlignedTimestamp.
+    # The raw fields are picked in one pass and then converted a column at a time.
+    tags = tags if isinstance(tags, list) else list(tags)
+    if not tags:
+        return np.zeros(0, dtype=READ_DTYPE)
+    (epcs, reader_ids, antennas, peak, rssi, phase, doppler, channels, seen_counts, first_seen, last_seen,
+     times) = zip(*[(
+        tag_data.get('EPC', ''), tag_data.get('ReaderID', 0), tag_data.get('AntennaID'),
+        tag_data.get('ImpinjPeakRSSI'), tag_data.get('RSSI'), tag_data.get('ImpinjRFPhaseAngle'),
+        tag_data.get('ImpinjRFDopplerFrequency'), tag_data.get('ChannelIndex'), tag_data.get('TagSeenCount'),
+        tag_data.get('FirstSeenTimestamp') or tag_data.get('FirstSeenTimestampUTC')
+        or tag_data.get('FirstSeenTimestampUptime'),
+        tag_data.get('LastSeenTimestamp') or tag_data.get('LastSeenTimestampUTC')
+        or tag_data.get('LastSeenTimestampUptime'),
+        tag_data.get('AlignedTimestamp', host_us),
+    ) for tag_data in tags])
+    columns = (
+        [intern(epc) for epc in epcs],
+        reader_ids,
+        [antenna or 0 for antenna in antennas],
+        _scaled(peak, 0.01, tags, 'PeakRSSI'),  # centi-dBm
+        _unwrap(rssi),  # None becomes NaN
+        _scaled(phase, 360.0 / 4096, tags, 'Phase'),  # 12-bit angle to degrees
+        _scaled(doppler, 1 / 16.0, tags, 'DopplerFrequency'),  # 1/16 Hz
+        [channel or 0 for channel in _unwrap(channels)],
+        [1 if count is None else count for count in _unwrap(seen_counts)],
+        [time or 0 for time in _unwrap(first_seen)],
+        [time or 0 for time in _unwrap(last_seen)],
+        times,
+        [host_us] * len(tags),
+    )
+    # Field by field assignment has a fixed cost per field that only pays off past a few rows
+    if len(tags) <= SMALL_BATCH:
+        return np.array(list(zip(*columns)), dtype=READ_DTYPE)
+    reads = np.zeros(len(tags), dtype=READ_DTYPE)
+    for name, column in zip(READ_DTYPE.names, columns):
+        reads[name] = column
+    return reads
+
+
+class EPCTable:
+    """Interns EPC values to dense integer ids.
+
+    The table holds every distinct EPC since it was created or last
+    cleared, and so do the per-EPC arrays keyed by its ids elsewhere.
+    Owners bound it with clear() or, when some ids must survive,
+    compact(); both invalidate every id handed out before.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.ids = {}
+        self.epcs = []
+
+    def intern(self, epc) -> int:
+        # Keyed by the decoded EPC, so bytes and str values of one tag share an id
+        if not isinstance(epc, str):
+            epc = epc.decode('ascii', 'ignore')
+        epc_id = self.ids.get(epc)
+        if epc_id is None:
+            epc_id = len(self.epcs)
+            self.ids[epc] = epc_id
+            self.epcs.append(epc)
+        return epc_id
+
+    def find(self, epc) -> Optional[int]:
+        if not isinstance(epc, str):
+            epc = epc.decode('ascii', 'ignore')
+        return self.ids.get(epc)
+
+    def epc(self, epc_id: int) -> str:
+        return self.epcs[epc_id]
+
+    def compact(self, keep: np.ndarray) -> np.ndarray:
+        """Keeps only the given ids, renumbered densely in their old order.
+
+        Returns the new id of every old id, -1 for the dropped ones.
+        """
+        keep = np.unique(np.asarray(keep, dtype=np.int64))
+        mapping = np.full(len(self.epcs), -1, dtype=np.int64)
+        mapping[keep] = np.arange(len(keep))
+        self.epcs = [self.epcs[epc_id] for epc_id in keep.tolist()]
+        self.ids = {epc: epc_id for epc_id, epc in enumerate(self.epcs)}
+        return mapping
+
+    def __len__(self) -> int:
+        return len(self.epcs)
+
+
+class SlotTable:
+    """Assigns dense slot ids to int64 keys in first-seen order.
+
+    A batch of keys is one np.unique plus a searchsorted against the
+    sorted keys; per-slot state lives in arrays indexed by the slot.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self._sorted = np.zeros(0, dtype=np.int64)
+        self._sorted_slots = np.zeros(0, dtype=np.int64)
+        self.keys = np.zeros(0, dtype=np.int64)  # by slot
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def slots(self, keys: np.ndarray) -> np.ndarray:
+        # Slot of every key, new keys get the next free slots
+        unique, inverse = np.unique(np.asarray(keys, dtype=np.int64), return_inverse=True)
+        index = np.searchsorted(self._sorted, unique)
+        found = index < len(self._sorted)
+        found[found] = self._sorted[index[found]] == unique[found]
+        slots = np.empty(len(unique), dtype=np.int64)
+        slots[found] = self._sorted_slots[index[found]]
+        new = unique[~found]
+        if len(new):
+            slots[~found] = np.arange(len(self.keys), len(self.keys) + len(new))
+            self.keys = np.concatenate([self.keys, new])
+            keys = np.concatenate([self._sorted, new])
+            order = np.argsort(keys, kind='stable')
+            self._sorted = keys[order]
+            self._sorted_slots = np.concatenate([self._sorted_slots, slots[~found]])[order]
+        return slots[inverse]
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        # Slot of every key without adding any, -1 for keys never seen
+        keys = np.asarray(keys, dtype=np.int64)
+        if not len(self._sorted):
+            return np.full(len(keys), -1, dtype=np.int64)
+        index = np.minimum(np.searchsorted(self._sorted, keys), len(self._sorted) - 1)
+        return np.where(self._sorted[index] == keys, self._sorted_slots[index], -1)
+
+    def find(self, key: int) -> int:
+        # Slot of one key, -1 when it was never seen
+        index = int(np.searchsorted(self._sorted, key))
+        if index < len(self._sorted) and self._sorted[index] == key:
+            return int(self._sorted_slots[index])
+        return -1
+
+
+class TagReadStore:
+    """Append-only columnar store of tag reads shared by all views.
+
+    Reads live in fixed-size NumPy structured array chunks addressed by a
+    global sequence number; the oldest chunks are dropped past capacity.
+    Per-EPC read counts and the sequence of the latest read are kept as
+    arrays indexed by EPC id; they and the EPC table grow with the distinct
+    EPCs seen and start over at clear().
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, chunk_size: int = CHUNK_SIZE):
+        self._lock = threading.RLock()
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self.epcs = EPCTable()
+        self._chunks = deque()
+        self._first_seq = 0  # sequence number of the first row of the first chunk
+        self.next_seq = 0
+        self.latest_seq = np.full(0, -1, dtype=np.int64)
+        self.read_counts = np.zeros(0, dtype=np.int64)
+
+    def append_reports(self, tags: Iterable[Dict[str, Any]], host_us: int,
+                       clock: Optional['ClockAlignment'] = None) -> Tuple[int, np.ndarray]:
+        reads = reads_from_reports(tags, self.epcs.intern, host_us)
+        if clock is not None:
+            clock.align(reads)
+        return self.append(reads)
+
+    def append(self, reads: np.ndarray) -> Tuple[int, np.ndarray]:
+        # Returns the sequence number of the first appended read and the reads
+        with self._lock:
+            first = self.next_seq
+            count = len(reads)
+            offset = 0
+            while offset < count:
+                position = self.next_seq - self._first_seq
+                index, row = divmod(position, self.chunk_size)
+                if index == len(self._chunks):
+                    self._chunks.append(np.zeros(self.chunk_size, dtype=READ_DTYPE))
+                n = min(count - offset, self.chunk_size - row)
+                self._chunks[index][row:row + n] = reads[offset:offset + n]
+                offset += n
+                self.next_seq += n
+
+            self._track_epcs(reads['epc_id'], first)
+            self._evict()
+        return first, reads
+
+    def _track_epcs(self, epc_ids: np.ndarray, first: int) -> None:
+        if len(self.epcs) > len(self.latest_seq):
+            grow = max(len(self.epcs), 2 * len(self.latest_seq)) - len(self.latest_seq)
+            self.latest_seq = np.concatenate([self.latest_seq, np.full(grow, -1, dtype=np.int64)])
+            self.read_counts = np.concatenate([self.read_counts, np.zeros(grow, dtype=np.int64)])
+        if not len(epc_ids):
+            return
+        if len(epc_ids) <= SMALL_BATCH:
+            for seq, epc_id in enumerate(epc_ids.tolist(), first):
+                self.read_counts[epc_id] += 1
+                self.latest_seq[epc_id] = seq
+            return
+
+        ids, counts = np.unique(epc_ids, return_counts=True)
+        self.read_counts[ids] += counts
+        # Last occurrence of every EPC in this batch
+        reversed_ids = epc_ids[::-1]
+        ids, last = np.unique(reversed_ids, return_index=True)
+        self.latest_seq[ids] = first + len(epc_ids) - 1 - last
+
+    def _evict(self) -> None:
+        while self.next_seq - (self._first_seq + self.chunk_size) >= self.capacity:
+            self._chunks.popleft()
+            self._first_seq += self.chunk_size
+
+    @property
+    def first_seq(self) -> int:
+        return max(self._first_seq, self.next_seq - self.capacity)
+
+    def __len__(self) -> int:
+        return self.next_seq - self.first_seq
+
+    def record(self, seq: int) -> Optional[np.void]:
+        if seq < self.first_seq or seq >= self.next_seq:
+            return None
+        index, row = divmod(seq - self._first_seq, self.chunk_size)
+        return self._chunks[index][row]
+
+    def slice(self, start: int, stop: int) -> np.ndarray:
+        with self._lock:
+            start = max(start, self.first_seq)
+            stop = min(stop, self.next_seq)
+            if stop <= start:
+                return np.zeros(0, dtype=READ_DTYPE)
+            parts = []
+            seq = start
+            while seq < stop:
+                index, row = divmod(seq - self._first_seq, self.chunk_size)
+                n = min(stop - seq, self.chunk_size - row)
+                parts.append(self._chunks[index][row:row + n])
+                seq += n
+            return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+    def take(self, seqs: np.ndarray) -> np.ndarray:
+        with self._lock:
+            seqs = np.asarray(seqs, dtype=np.int64)
+            out = np.zeros(len(seqs), dtype=READ_DTYPE)
+            valid = np.flatnonzero((seqs >= self.first_seq) & (seqs < self.next_seq))
+            indexes, rows = np.divmod(seqs[valid] - self._first_seq, self.chunk_size)
+            for index in np.unique(indexes):
+                mask = indexes == index
+                out[valid[mask]] = self._chunks[index][rows[mask]]
+            return out
+
+    def latest(self, epc) -> Optional[np.void]:
+        epc_id = self.epcs.find(epc)
+        if epc_id is None or epc_id >= len(self.latest_seq):
+            return None
+        return self.record(int(self.latest_seq[epc_id]))
+
+    def read_count(self, epc) -> int:
+        epc_id = self.epcs.find(epc)
+        if epc_id is None or epc_id >= len(self.read_counts):
+            return 0
+        return int(self.read_counts[epc_id])
+
+    def tag_counts(self) -> Dict[str, int]:
+        counts = self.read_counts[:len(self.epcs)]
+        return {self.epcs.epc(i): int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def to_dict(self, record: np.void) -> Dict[str, Any]:
+        # Plain dict in the shape the matrix views render
+        def optional(value):
+            value = float(value)
+            return None if value != value else value
+
+        first_seen, last_seen, time_us = int(record['first_seen']), int(record['last_seen']), int(record['time_us'])
+        return {
+            'epc': self.epcs.epc(int(record['epc_id'])),
+            'reader': int(record['reader_id']),
+            'antenna': int(record['antenna']),
+            'peak_rssi': optional(record['peak_rssi']),
+            'last_rssi': optional(record['last_rssi']),
+            'phase': optional(record['phase']),
+            'doppler': optional(record['doppler']),
+            'channel': int(record['channel']),
+            # Host clock µs, first_seen shifted by the reader's own first-to-last interval
+            'first_seen': time_us - (last_seen - first_seen) if first_seen and last_seen else None,
+            'last_seen': time_us if last_seen else None,
+            'read_count': int(record['seen_count']),
+            'timestamp': time_us / 1e6,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+            self._first_seq = self.next_seq
+            # EPC ids start over, so everything keyed by them has to be cleared along with the store
+            self.epcs.clear()
+            self.latest_seq = np.full(0, -1, dtype=np.int64)
+            self.read_counts = np.zeros(0, dtype=np.int64)
@@ -0,0 +1,277 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .clock import host_micros
+
+# Stages a traced read is stamped at, in pipeline order, all in host µs
+STAGES = ('reader', 'socket', 'callback', 'queued', 'handle', 'view', 'paint')
+STAGE_NAMES = {
+    'reader': "reader timestamp",
+    'socket': "bytes received",
+    'callback': "reader callback",
+    'queued': "queued for the GUI",
+    'handle': "frame handling",
+    'view': "views updated",
+    'paint': "painted",
+}
+# Summarised spans, (from, to, name); the last one is end to end
+SPANS = (
+    ('reader', 'socket', 'reader to host'),
+    ('socket', 'callback', 'decode/merge'),
+    ('callback', 'queued', 'queue put'),
+    ('queued', 'handle', 'queue wait'),
+    ('handle', 'view', 'view update'),
+    ('view', 'paint', 'paint'),
+    ('reader', 'paint', 'total'),
+)
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+DEFAULT_SAMPLE_INTERVAL = 0.1
+# Completed traces kept for the trace file and for the rolling summaries
+MAX_TRACES = 5000
+SUMMARY_WINDOW = 1000
+MAX_MERGING = 16
+# A read that is not painted within this time (tab hidden, cell off screen) ends without a paint stage
+PAINT_TIMEOUT_US = 2000000
+
+
+class ReadTrace:
+    """Stage times of one sampled read on its way from the reader to the screen."""
+
+    __slots__ = ('number', 'epc', 'reader_id', 'antenna', 'stamps', 'outcome', 'position', 'tag_data')
+
+    def __init__(self, number: int, tag_data: Dict[str, Any]):
+        self.number = number
+        epc = tag_data.get('EPC', '')
+        self.epc = epc if isinstance(epc, str) else epc.decode('ascii', 'ignore')
+        self.reader_id = tag_data.get('ReaderID', 0)
+        self.antenna = tag_data.get('AntennaID', 0)
+        self.stamps: Dict[str, int] = {}
+        self.outcome = None  # 'painted', 'not painted', 'filtered' or 'dropped' once finished
+        self.position = -1  # ingest buffer position
+        self.tag_data = tag_data  # only while a ReaderPool merges it
+
+    def stamp(self, stage: str, micros: Optional[int] = None) -> None:
+        self.stamps[stage] = host_micros() if micros is None else int(micros)
+
+    def span(self, start: str, end: str) -> Optional[int]:
+        if start in self.stamps and end in self.stamps:
+            return self.stamps[end] - self.stamps[start]
+        return None
+
+
+class LatencyTracer:
+    """Samples reads and follows them through the pipeline, for latency tracing.
+
+    At most one report per sample_interval is traced, and only its newest
+    read, so the cost does not grow with the read rate. The reader starts
+    a trace on the network thread (begin, or begin_merge and locate for a
+    ReaderPool), the ingest callback hands it to the queue (claim and
+    queued), and the GUI picks it up again by buffer position when it
+    drains the batch (drained) and finishes it at the paint. Finished
+    traces feed the rolling summaries and chrome_trace.
+    """
+
+    def __init__(self, sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.sample_interval = sample_interval
+        self._next_sample = 0.0
+        self._numbers = itertools.count(1)
+        self._current = None  # (trace, index in the report) between begin and claim, network thread only
+        self._merging: List[ReadTrace] = []  # waiting in a ReaderPool merge, network thread only
+        self._queued = deque()  # in the ingest buffer, by position
+        self._painting: List[ReadTrace] = []  # views updated, waiting for the paint
+        self.completed = deque(maxlen=MAX_TRACES)
+        self.started = 0
+        self.finished = 0
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+        if not enabled:
+            self.clear_pending()
+
+    def clear_pending(self) -> None:
+        with self._lock:
+            self._queued.clear()
+            self._painting = []
+        self._merging = []
+        self._current = None
+
+    def clear(self) -> None:
+        self.clear_pending()
+        with self._lock:
+            self.completed.clear()
+
+    def sample(self) -> bool:
+        # Called per report on the network thread, True when it is time for the next trace
+        if not self.enabled:
+            return False
+        now = time.monotonic()
+        if now < self._next_sample:
+            return False
+        self._next_sample = now + self.sample_interval
+        return True
+
+    def _start(self, tags: List[Dict[str, Any]], clock, rx_us: Optional[int]) -> ReadTrace:
+        trace = ReadTrace(next(self._numbers), tags[-1])
+        self.started += 1
+        reader_us = tags[-1].get('LastSeenTimestampUTC') or tags[-1].get('LastSeenTimestampUptime')
+        if isinstance(reader_us, dict):
+            reader_us = reader_us.get('Value')
+        if reader_us and clock is not None:
+            host = clock.clock(trace.reader_id).to_host(np.array([reader_us], dtype=np.int64))
+            if host is not None:
+                trace.stamp('reader', host[0])
+        if rx_us:
+            trace.stamp('socket', rx_us)
+        return trace
+
+    def begin(self, tags: List[Dict[str, Any]], clock=None, rx_us: Optional[int] = None) -> None:
+        # A sampled report in the reader callback, traced by its newest read
+        trace = self._start(tags, clock, rx_us)
+        trace.stamp('callback')
+        trace.tag_data = None
+        self._current = (trace, len(tags) - 1)
+
+    def begin_merge(self, tags: List[Dict[str, Any]], clock=None, rx_us: Optional[int] = None) -> None:
+        # Like begin, for a read that goes through a ReaderPool merge first
+        if len(self._merging) >= MAX_MERGING:
+            self._merging.pop(0)  # never delivered
+        self._merging.append(self._start(tags, clock, rx_us))
+
+    def locate(self, tags: List[Dict[str, Any]]) -> None:
+        # A merged batch is delivered: the first waiting read found in it becomes the current trace
+        if not self._merging:
+            return
+        index_of = {id(tag_data): index for index, tag_data in enumerate(tags)}
+        for trace in self._merging:
+            index = index_of.get(id(trace.tag_data))
+            if index is not None:
+                self._merging.remove(trace)
+                trace.tag_data = None
+                trace.stamp('callback')
+                self._current = (trace, index)
+                return
+
+    def claim(self) -> Tuple[Optional[ReadTrace], Optional[int]]:
+        # The trace of the report being delivered and the index of its read, for put_report's mark
+        current, self._current = self._current, None
+        return current if current else (None, None)
+
+    def queued(self, trace: ReadTrace, position: int) -> None:
+        if position < 0:
+            self.finish(trace, 'dropped')
+            return
+        trace.position = position
+        trace.stamp('queued')
+        with self._lock:
+            self._queued.append(trace)
+
+    def drained(self, position: int, count: int) -> List[Tuple[int, ReadTrace]]:
+        # (batch index, trace) of the traced reads in a drained batch; older positions were evicted
+        if not self._queued:
+            return []
+        found = []
+        now = host_micros()
+        with self._lock:
+            while self._queued and self._queued[0].position < position + count:
+                trace = self._queued.popleft()
+                if trace.position < position:
+                    self._finish(trace, 'dropped')
+                else:
+                    trace.stamp('handle', now)
+                    found.append((trace.position - position, trace))
+        return found
+
+    def viewed(self, trace: ReadTrace, shown: bool) -> None:
+        # After the views took the read; shown is False when no visible view will paint it
+        trace.stamp('view')
+        if not shown:
+            self.finish(trace, 'not painted')
+            return
+        with self._lock:
+            self._painting.append(trace)
+
+    def painted(self, trace: ReadTrace) -> None:
+        with self._lock:
+            if trace in self._painting:
+                self._painting.remove(trace)
+                trace.stamp('paint')
+                self._finish(trace, 'painted')
+
+    def expire(self) -> None:
+        # Reads whose paint never came
+        now = host_micros()
+        with self._lock:
+            for trace in [trace for trace in self._painting if now - trace.stamps['view'] > PAINT_TIMEOUT_US]:
+                self._painting.remove(trace)
+                self._finish(trace, 'not painted')
+
+    def finish(self, trace: ReadTrace, outcome: str) -> None:
+        with self._lock:
+            self._finish(trace, outcome)
+
+    def _finish(self, trace: ReadTrace, outcome: str) -> None:
+        trace.outcome = outcome
+        self.completed.append(trace)
+        self.finished += 1
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Percentiles (ms) per span over the last SUMMARY_WINDOW finished traces."""
+        with self._lock:
+            traces = list(self.completed)[-SUMMARY_WINDOW:]
+        rows = []
+        for start, end, name in SPANS:
+            values = [trace.span(start, end) for trace in traces]
+            values = np.array([value for value in values if value is not None], dtype=np.float64) / 1000.0
+            row = {'span': name, 'from': start, 'to': end, 'count': len(values)}
+            for q in SUMMARY_QUANTILES:
+                row[f"p{q * 100:.0f}"] = float(np.quantile(values, q)) if len(values) else None
+            rows.append(row)
+        return rows
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Finished traces as Chrome trace-event JSON (chrome://tracing, Perfetto).
+
+        Every read is one async track: an outer "read" slice from its first
+        to its last stamp and one nested slice per stage span. Times are µs
+        relative to the first stamp, the epoch µs of which is in otherData.
+        """
+        with self._lock:
+            traces = list(self.completed)
+        stamped = [trace for trace in traces if trace.stamps]
+        base = min((min(trace.stamps.values()) for trace in stamped), default=0)
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': 1, 'tid': 1, 'args': {'name': 'RFID read pipeline'}}]
+        for trace in stamped:
+            stages = [stage for stage in STAGES if stage in trace.stamps]
+            times = [trace.stamps[stage] - base for stage in stages]
+            # Clock alignment error can put the reader timestamp a little after the arrival
+            times = np.maximum.accumulate(times).tolist()
+            common = {'cat': 'read', 'id': trace.number, 'pid': 1, 'tid': 1}
+            events.append(dict(common, name='read', ph='b', ts=times[0], args={
+                'epc': trace.epc, 'reader': trace.reader_id, 'antenna': trace.antenna, 'outcome': trace.outcome,
+                'stages': {stage: STAGE_NAMES[stage] for stage in stages}}))
+            for (stage, start), (next_stage, end) in zip(zip(stages, times), zip(stages[1:], times[1:])):
+                name = f"{stage} -> {next_stage}"
+                events.append(dict(common, name=name, ph='b', ts=start))
+                events.append(dict(common, name=name, ph='e', ts=end))
+            events.append(dict(common, name='read', ph='e', ts=times[-1]))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'epoch_us': base, 'traces': len(stamped)}}
+
+    def write(self, path: str) -> int:
+        # Returns the number of traces written
+        trace = self.chrome_trace()
+        with open(path, 'w') as f:
+            json.dump(trace, f)
+        return trace['otherData']['traces']
+
+    def pending(self) -> int:
+        return len(self._queued) + len(self._painting) + len(self._merging)
@@ -0,0 +1,245 @@
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .store import peak_rssi
+
+DEFAULT_TRIAL_SECONDS = 3.0
+# Reads right after a restart come from tags that were waiting for the carrier
+SETTLE_SECONDS = 0.5
+# Seconds a reconfigure may take before its trial is given up
+RECONFIGURE_WAIT = 5.0
+# Relative score gain a candidate needs to replace the current best, keeps noise from flapping
+MIN_IMPROVEMENT = 0.02
+DEFAULT_PASSES = 1
+
+# Candidates per setting, tried in this order one setting at a time; power goes first as
+# it decides which tags are in the field. Power values are power table indexes (0 is the
+# maximum, 81/61/41 are about 30/25/20 dBm on an Impinj R420)
+DEFAULT_SEARCH_SPACE = {
+    'power': [0, 81, 61, 41],
+    'search_mode': [2, 1, 3],
+    'session': [2, 1, 0],
+    'report_every_n': [1, 16, 64],
+}
+# Score = sum of weight * figure: distinct EPCs per second first, raw reads as a
+# tie breaker, and a penalty per dB of RSSI spread between reads of the same tag
+SCORE_WEIGHTS = {
+    'unique_per_s': 1.0,
+    'reads_per_s': 0.01,
+    'rssi_spread': -1.0,
+}
+
+
+class TrialRecorder:
+    """Tag listener that collects the read figures of one trial.
+
+    unique_per_s counts distinct EPCs per whole second of the trial, so a
+    configuration that reads every tag once and then goes quiet does not
+    look better than one that keeps all of them in view.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start = None
+        self.reads = 0
+        self.seconds = {}
+        self.rssi = {}
+
+    def begin(self, now: Optional[float] = None) -> None:
+        with self._lock:
+            self.start = time.monotonic() if now is None else now
+            self.reads = 0
+            self.seconds = {}
+            self.rssi = {}
+
+    def stop(self) -> None:
+        with self._lock:
+            self.start = None
+
+    def __call__(self, reader, tags: List[Dict[str, Any]]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.start is None:
+                return
+            seen = self.seconds.setdefault(int(now - self.start), set())
+            self.reads += len(tags)
+            for tag_data in tags:
+                epc = tag_data.get('EPC', '')
+                seen.add(epc)
+                rssi = peak_rssi(tag_data)
+                if rssi is not None:
+                    self.rssi.setdefault(epc, []).append(rssi)
+
+    def result(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            duration = now - self.start if self.start is not None else 0.0
+            complete = int(duration)
+            if complete:
+                unique = sum(len(self.seconds.get(second, ())) for second in range(complete)) / complete
+            else:
+                unique = len(set().union(*self.seconds.values())) / duration if duration > 0 else 0.0
+            spreads = [_std(values) for values in self.rssi.values() if len(values) > 1]
+            return {
+                'duration': duration,
+                'reads': self.reads,
+                'tags': len(set().union(*self.seconds.values())) if self.seconds else 0,
+                'reads_per_s': self.reads / duration if duration > 0 else 0.0,
+                'unique_per_s': unique,
+                'rssi_spread': sum(spreads) / len(spreads) if spreads else 0.0,
+            }
+
+
+def _std(values: Sequence[float]) -> float:
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+
+
+def tuned_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    # The reader_settings keys an auto-tune run may change, to store in RFIDConfig
+    keys = set(DEFAULT_SEARCH_SPACE) | {'antenna_power'}
+    return {key: value for key, value in settings.items() if key in keys}
+
+
+def score(result: Dict[str, Any], weights: Optional[Dict[str, float]] = None) -> float:
+    weights = SCORE_WEIGHTS if weights is None else weights
+    return sum(weight * result.get(figure, 0.0) for figure, weight in weights.items())
+
+
+class AutoTuner:
+    """Closed-loop search for the reader settings that read the most tags.
+
+    Runs short inventory trials on a connected RFIDReader or ReaderPool,
+    one setting of the search space at a time (coordinate descent): every
+    candidate of a setting is tried with the best values found so far for
+    the others, and the winner is kept before the next setting. passes
+    repeats the sweep. Each trial reconfigures the reader live, waits for
+    inventory to restart, lets the field settle and then scores the reads
+    of trial_seconds. The best settings are applied when the run ends and
+    returned, with every trial in trials. run blocks until then, cancel
+    ends it early with the best settings so far.
+    """
+
+    def __init__(self, reader, settings: Dict[str, Any], search_space: Optional[Dict[str, Sequence]] = None,
+                 trial_seconds: float = DEFAULT_TRIAL_SECONDS, weights: Optional[Dict[str, float]] = None,
+                 passes: int = DEFAULT_PASSES, progress: Optional[Callable[[int, int, Dict[str, Any]], None]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.reader = reader
+        self.settings = dict(settings)
+        self.search_space = dict(DEFAULT_SEARCH_SPACE if search_space is None else search_space)
+        if self.settings.get('report_mode', 'tags') != 'tags':
+            # report_every_n only applies to the tags report mode
+            self.search_space.pop('report_every_n', None)
+        self.trial_seconds = trial_seconds
+        self.weights = SCORE_WEIGHTS if weights is None else weights
+        self.passes = max(1, passes)
+        self.progress = progress  # (trial number, trial count, trial) after every trial
+        self.trials = []
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def trial_count(self) -> int:
+        # Upper bound, settings tried before are not run again
+        return self.passes * sum(len(set(values) | {self.settings.get(key, values[0])})
+                                 for key, values in self.search_space.items())
+
+    def candidate(self, best: Dict[str, Any], key: str, value: Any) -> Dict[str, Any]:
+        settings = dict(self.settings, **best)
+        settings[key] = value
+        if key == 'power':
+            # A common power only takes effect without per-antenna overrides
+            settings['antenna_power'] = {}
+        return settings
+
+    def run(self) -> Dict[str, Any]:
+        """Returns the best settings found, a copy of settings with the tuned keys replaced."""
+        best = {key: self.settings.get(key, values[0]) for key, values in self.search_space.items()}
+        if 'power' in best:
+            best['antenna_power'] = self.settings.get('antenna_power') or {}
+        results = {}
+        recorder = TrialRecorder()
+        self.reader.add_tag_listener(recorder)
+        # Trials need a running inventory, it is stopped again afterwards if it was not
+        started = not self.reader.inventory_running and self.reader.start_inventory()
+        try:
+            for _ in range(self.passes):
+                for key, values in self.search_space.items():
+                    # The current value goes first and stays unless a candidate clearly beats it
+                    best_score = None
+                    for value in [best[key]] + [value for value in values if value != best[key]]:
+                        if self._cancel.is_set():
+                            raise InterruptedError("auto-tune cancelled")
+                        settings = self.candidate(best, key, value)
+                        signature = tuple(sorted((name, repr(settings.get(name))) for name in best))
+                        trial = results.get(signature)
+                        if trial is None:
+                            trial = results[signature] = self._trial(settings, recorder)
+                        if trial['error']:
+                            continue
+                        if best_score is None or trial['score'] > best_score + MIN_IMPROVEMENT * abs(best_score):
+                            best_score = trial['score']
+                            best[key] = value
+                            if key == 'power':
+                                best['antenna_power'] = {}
+                    self.logger.info(f"Auto-tune: {key} = {best[key]}")
+        except InterruptedError as e:
+            self.logger.info(str(e))
+        finally:
+            recorder.stop()
+            self.reader.remove_tag_listener(recorder)
+        tuned = dict(self.settings, **best)
+        error = self._reconfigure(tuned)
+        if error:
+            self.logger.error(f"Error applying auto-tuned settings: {error}")
+        if started:
+            self.reader.stop_inventory()
+        return tuned
+
+    def _trial(self, settings: Dict[str, Any], recorder: TrialRecorder) -> Dict[str, Any]:
+        values = {key: settings.get(key) for key in self.search_space}
+        trial = {'settings': values, 'score': 0.0, 'error': None}
+        error = self._reconfigure(settings)
+        if error:
+            self.logger.error(f"Auto-tune trial {values} failed: {error}")
+            trial['error'] = error
+        else:
+            if self._cancel.wait(SETTLE_SECONDS):
+                raise InterruptedError("auto-tune cancelled")
+            recorder.begin()
+            if self._cancel.wait(self.trial_seconds):
+                raise InterruptedError("auto-tune cancelled")
+            result = recorder.result()
+            recorder.stop()
+            trial.update(result)
+            trial['score'] = score(result, self.weights)
+            self.logger.info(f"Auto-tune trial {values}: {result['unique_per_s']:.1f} tags/s, "
+                             f"{result['reads_per_s']:.0f} reads/s, RSSI spread {result['rssi_spread']:.1f} dB, "
+                             f"score {trial['score']:.2f}")
+        self.trials.append(trial)
+        if self.progress:
+            self.progress(len(self.trials), self.trial_count(), trial)
+        return trial
+
+    def _reconfigure(self, settings: Dict[str, Any]) -> Optional[str]:
+        # Applies settings and waits for the reader to run with them, returns the error if any
+        done = threading.Event()
+        outcome = {}
+
+        def on_reconfigured(pause, changed, error):
+            outcome['error'] = error
+            done.set()
+
+        self.reader.reconfigured.connect(on_reconfigured)
+        try:
+            if not self.reader.reconfigure(settings):
+                return "reader is not connected"
+            if not done.wait(RECONFIGURE_WAIT):
+                return f"no reconfigure result within {RECONFIGURE_WAIT:.0f}s"
+            return outcome.get('error')
+        finally:
+            self.reader.reconfigured.disconnect(on_reconfigured)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from rfid.clock import ClockAlignment, ReaderClock, report_timestamp
+from rfid.store import READ_DTYPE
+
+HOST_US = 1700000000000000
+
+
+def _observe(clock, seconds, offset_us, drift=0.0, rate=50, delay_us=2000, seed=1):
+    # Reports at rate per second whose reader clock is host - offset_us, running fast by drift
+    rng = np.random.default_rng(seed)
+    reader_us = 0
+    for i in range(seconds * rate):
+        read_us = HOST_US + i * 1000000 // rate
+        reader_us = int(read_us - offset_us + (read_us - HOST_US) * drift)
+        clock.observe(reader_us, read_us + delay_us + int(rng.exponential(15000)))
+    return read_us, reader_us
+
+
+def test_offset_and_drift_from_the_fastest_reports():
+    clock = ReaderClock()
+    read_us, reader_us = _observe(clock, 200, offset_us=-3250000, drift=80e-6)
+    # host - reader shrinks as the reader clock runs ahead
+    assert abs(clock.status()['drift_ppm'] + 80.0) < 5.0
+    error = int(clock.to_host(np.array([reader_us], dtype=np.uint64))[0]) - read_us
+    # Only the queueing delay of the fastest reports is left
+    assert 0 <= error < 3000
+
+
+def test_no_estimate_before_the_first_report():
+    assert ReaderClock().to_host(np.array([1], dtype=np.uint64)) is None
+
+
+def test_clock_step_starts_over():
+    clock = ReaderClock()
+    _observe(clock, 30, offset_us=-3250000)
+    # The reader rebooted, its uptime clock starts at 5 s
+    clock.observe(5000000, HOST_US + 60000000)
+    assert clock.status()['steps'] == 1
+    assert int(clock.to_host(np.array([5000000]))[0]) == HOST_US + 60000000
+
+
+def test_report_timestamp():
+    assert report_timestamp([]) == 0
+    assert report_timestamp([{'LastSeenTimestampUTC': 5}, {'LastSeenTimestamp': {'Value': 9}},
+                             {'LastSeenTimestampUptime': 7}]) == 9
+
+
+def test_alignment_per_reader():
+    alignment = ClockAlignment()
+    alignment.observe_report([{'ReaderID': 1, 'LastSeenTimestampUTC': 1000000}], host_us=HOST_US)
+    alignment.observe_report([{'ReaderID': 2, 'LastSeenTimestampUTC': 3000000}], host_us=HOST_US)
+    reads = np.zeros(4, dtype=READ_DTYPE)
+    reads['reader_id'] = [1, 2, 3, 1]
+    reads['last_seen'] = [1500000, 3500000, 500000, 0]
+    reads['time_us'] = reads['host_us'] = HOST_US + 10
+    alignment.align(reads)
+    # Readers without an estimate and reads without a timestamp keep the arrival time
+    assert reads['time_us'].tolist() == [HOST_US + 500000, HOST_US + 500000, HOST_US + 10, HOST_US + 10]
+    assert [status['reader_id'] for status in alignment.status()] == [1, 2]
+    alignment.reset()
+    assert alignment.status() == []
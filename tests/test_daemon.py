@@ -0,0 +1,45 @@
+import io
+import json
+
+import numpy as np
+
+from rfid.daemon import BinaryFormat, NDJSONFormat, StreamSink
+from rfid.recording import SessionFile
+from rfid.store import EPCTable, reads_from_reports
+
+HOST_US = 1700000000000000
+
+
+def _reads(epcs, tags):
+    return reads_from_reports(tags, epcs.intern, HOST_US)
+
+
+def test_ndjson_lines():
+    epcs = EPCTable()
+    sink = StreamSink(io.BytesIO(), NDJSONFormat, epcs)
+    reads = _reads(epcs, [{'EPC': 'AA01', 'ReaderID': 2, 'AntennaID': 1, 'ImpinjPeakRSSI': -5250,
+                           'ChannelIndex': 7, 'FirstSeenTimestampUTC': 70, 'LastSeenTimestampUTC': 77}])
+    reads['time_us'] = HOST_US + 500000  # aligned reader time
+    sink.write(reads)
+    sink.write(_reads(epcs, [{'EPC': 'AA"02'}]))
+    lines = [json.loads(line) for line in sink.stream.getvalue().splitlines()]
+    assert lines[0] == {'epc': 'AA01', 'reader': 2, 'antenna': 1, 'peak_rssi': -52.5, 'last_rssi': None,
+                        'phase': None, 'channel': 7, 'doppler': None, 'first_seen': HOST_US + 499993,
+                        'last_seen': HOST_US + 500000, 'read_count': 1, 'timestamp': (HOST_US + 500000) / 1e6}
+    assert lines[1]['epc'] == 'AA"02' and lines[1]['peak_rssi'] is None and lines[1]['last_seen'] is None
+
+
+def test_binary_stream_is_a_recording(tmp_path):
+    epcs = EPCTable()
+    path = tmp_path / 'stream.rfrec'
+    sink = StreamSink(open(path, 'wb'), BinaryFormat, epcs)
+    first = _reads(epcs, [{'EPC': 'AA01'}, {'EPC': 'AA02'}])
+    second = _reads(epcs, [{'EPC': 'AA02'}, {'EPC': 'AA03'}])
+    sink.write(first)
+    sink.write(second)
+    sink.close()
+
+    session = SessionFile(str(path))
+    assert session.epcs.epcs == ['AA01', 'AA02', 'AA03']
+    assert session.reads(0, 4).tobytes() == np.concatenate([first, second]).tobytes()
+    session.close()
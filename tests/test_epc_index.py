@@ -0,0 +1,73 @@
+import numpy as np
+
+from rfid.epc_index import EPCIdLookup, EPCIndex, reader_filter_prefixes
+
+
+def test_set_epcs_moves_only_changed_slots():
+    index = EPCIndex(['aa01', 'AA02', 'AA03'])
+    assert index.slot('AA01') == 0 and index.slot(b'AA03') == 2
+    version = index.version
+    index.set_epcs(['AA01', 'AA02', 'AA03'])
+    assert index.version == version
+
+    index.set_epcs(['AA01', 'AA04', 'AA03', 'AA02'])
+    assert index.version == version + 1
+    assert [index.slot(epc) for epc in ('AA01', 'AA04', 'AA03', 'AA02')] == [0, 1, 2, 3]
+    index.set_epcs(['AA01'])
+    assert index.slot('AA04') is None and len(index) == 1
+    assert 'AA01' in index and 'AA02' not in index
+
+
+def test_duplicate_epcs_keep_their_first_slot():
+    index = EPCIndex(['AA01', 'AA02', 'AA01'])
+    assert index.slot('AA01') == 0
+    index.set_epcs(['AA01', 'AA02'])
+    assert index.slot('AA01') == 0
+
+
+def test_rules():
+    index = EPCIndex(rules=['3034*', 'e200', 'F0/F0', 'A000-AFFF', 'A800-B0FF', 'zz-1', ''])
+    assert index.rules == ['3034*', 'E200', 'F0/F0', 'A000-AFFF', 'A800-B0FF']
+    assert index.lookup('30341234') == (True, None)
+    assert index.accepts('E2001234')
+    assert index.accepts('FA') and not index.accepts('0A')
+    assert index.accepts('B0FF') and index.accepts('A000') and not index.accepts('B100')
+    assert not index.accepts('12345678')
+    index.set_rules([])
+    assert not index.accepts('30341234')
+
+
+def test_list_entries_win_over_rules():
+    index = EPCIndex(['30340001'], rules=['3034*'])
+    assert index.lookup('30340001') == (True, 0)
+    assert index.lookup('30340002') == (True, None)
+
+
+def test_id_lookup_follows_index_changes():
+    index = EPCIndex(['AA02'], rules=['BB*'])
+    lookup = EPCIdLookup(index)
+    epcs = ['AA01', 'AA02', 'BB01']
+    accepted, slots = lookup.tables(epcs)
+    assert accepted.tolist() == [False, True, True]
+    assert slots.tolist() == [-1, 0, -1]
+
+    epcs.append('AA03')
+    index.set_epcs(['AA03', 'AA01'])
+    accepted, slots = lookup.tables(epcs)
+    assert accepted.tolist() == [True, False, True, True]
+    assert slots.tolist() == [1, -1, -1, 0]
+
+    lookup.clear()
+    accepted, slots = lookup.tables([])
+    assert accepted.dtype == np.bool_ and len(accepted) == len(slots) == 0
+
+
+def test_reader_filter_prefixes():
+    epcs = ['303400000001', '303400000002']
+    assert reader_filter_prefixes(epcs, []) == epcs
+    assert reader_filter_prefixes(epcs, [], limit=1) == ['30340000000']
+    assert reader_filter_prefixes([], ['3034*', '30341*', 'E2*']) == ['3034', 'E2']
+    assert reader_filter_prefixes(['AAAA'], ['A000-AFFF']) == ['A']
+    # A rule that fixes no leading digits needs every tag reported
+    assert reader_filter_prefixes(epcs, ['F0/F0']) == []
+    assert reader_filter_prefixes([], []) == []
@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from rfid.ingest import BLOCK, DROP_NEWEST, DROP_OLDEST, TagReadBuffer
+
+
+def _tags(start, count):
+    return [{'EPC': f"{i:04d}"} for i in range(start, start + count)]
+
+
+def _epcs(batch):
+    return [tag_data['EPC'] for tag_data in batch]
+
+
+def test_drop_oldest_keeps_the_newest_reads():
+    buffer = TagReadBuffer(capacity=5, policy=DROP_OLDEST)
+    buffer.put_report(_tags(0, 4))
+    buffer.put_report(_tags(4, 3))
+    assert (buffer.received, buffer.dropped, buffer.high_water) == (7, 2, 5)
+    assert _epcs(buffer.drain()) == ['0002', '0003', '0004', '0005', '0006']
+
+    # A report larger than the buffer keeps its tail
+    buffer.put_report(_tags(10, 8))
+    assert _epcs(buffer.drain()) == ['0013', '0014', '0015', '0016', '0017']
+
+
+def test_drop_newest_keeps_the_queued_reads():
+    buffer = TagReadBuffer(capacity=5, policy=DROP_NEWEST)
+    buffer.put_report(_tags(0, 4))
+    buffer.put_report(_tags(4, 3))
+    assert buffer.dropped == 2
+    assert _epcs(buffer.drain()) == ['0000', '0001', '0002', '0003', '0004']
+
+
+def test_block_drops_the_newest_after_the_timeout():
+    buffer = TagReadBuffer(capacity=2, policy=BLOCK, block_timeout=0.05)
+    buffer.put_report(_tags(0, 2))
+    start = time.monotonic()
+    buffer.put_report(_tags(2, 1))
+    assert time.monotonic() - start >= 0.04
+    assert buffer.dropped == 1 and buffer.blocked_time > 0
+    assert _epcs(buffer.drain()) == ['0000', '0001']
+
+
+def test_block_waits_for_the_consumer():
+    buffer = TagReadBuffer(capacity=2, policy=BLOCK, block_timeout=5.0)
+    buffer.put_report(_tags(0, 2))
+    drained = []
+    consumer = threading.Timer(0.05, lambda: drained.extend(buffer.drain()))
+    consumer.start()
+    buffer.put_report(_tags(2, 2))
+    consumer.join()
+    assert buffer.dropped == 0
+    assert _epcs(drained) + _epcs(buffer.drain()) == ['0000', '0001', '0002', '0003']
+
+
+def test_positions_follow_drains_and_drops():
+    buffer = TagReadBuffer(capacity=4, policy=DROP_OLDEST)
+    assert buffer.put_report(_tags(0, 3), mark=1) == 1
+    position = buffer.put_report(_tags(3, 3), mark=2)
+    assert position == 5
+    batch = buffer.drain(max_reads=3)
+    assert _epcs(batch) == ['0002', '0003', '0004']
+    assert buffer.drain_position == 2
+    batch = buffer.drain()
+    assert batch[position - buffer.drain_position]['EPC'] == '0005'
+    # The marked read of a report cut by drop_oldest was dropped
+    assert buffer.put_report(_tags(6, 6), mark=0) == -1
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        TagReadBuffer(policy='drop_all')
+    with pytest.raises(ValueError):
+        TagReadBuffer().set_policy('drop_all')
+
+
+def test_drain_in_frames():
+    buffer = TagReadBuffer(capacity=10)
+    buffer.put_report(_tags(0, 3))
+    buffer.put(_tags(3, 1)[0])
+    assert buffer.depth() == 4
+    assert _epcs(buffer.drain(max_reads=3)) == ['0000', '0001', '0002']
+    assert _epcs(buffer.drain(max_reads=3)) == ['0003']
+    assert buffer.drain() == []
+
+
+def test_clear_and_reset_counters():
+    buffer = TagReadBuffer(capacity=2, policy=DROP_OLDEST)
+    buffer.put_report(_tags(0, 3))
+    buffer.clear()
+    assert buffer.depth() == 0 and buffer.dropped == 1
+    buffer.reset_counters()
+    assert (buffer.received, buffer.dropped) == (0, 0)
+    assert (buffer.total_received, buffer.total_dropped) == (3, 1)
@@ -0,0 +1,77 @@
+import logging
+import urllib.request
+
+import pytest
+
+from rfid.metrics import CONTENT_TYPE, ErrorCounter, MetricsRegistry, quantile, start_metrics_server
+
+
+def test_exposition():
+    registry = MetricsRegistry()
+    reads = registry.counter('rfid_reads_total', "Reads", ('reader',))
+    reads.inc(3, (1,))
+    reads.inc(2, (1,))
+    registry.gauge('rfid_queue_depth', "Queued reads", function=lambda: 7)
+    registry.gauge('rfid_rows', "Rows", ('view',), function=lambda: {'tag "data"': 2.5})
+    histogram = registry.histogram('rfid_wait_seconds', "Wait", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value)
+    assert registry.counter('rfid_reads_total', "Again") is reads
+    assert registry.exposition().splitlines() == [
+        '# HELP rfid_reads_total Reads',
+        '# TYPE rfid_reads_total counter',
+        'rfid_reads_total{reader="1"} 5',
+        '# HELP rfid_queue_depth Queued reads',
+        '# TYPE rfid_queue_depth gauge',
+        'rfid_queue_depth 7',
+        '# HELP rfid_rows Rows',
+        '# TYPE rfid_rows gauge',
+        'rfid_rows{view="tag \\"data\\""} 2.5',
+        '# HELP rfid_wait_seconds Wait',
+        '# TYPE rfid_wait_seconds histogram',
+        'rfid_wait_seconds_bucket{le="0.1"} 1',
+        'rfid_wait_seconds_bucket{le="1"} 2',
+        'rfid_wait_seconds_bucket{le="+Inf"} 3',
+        'rfid_wait_seconds_sum 2.55',
+        'rfid_wait_seconds_count 3',
+    ]
+
+
+def test_failing_collector_is_left_out():
+    registry = MetricsRegistry()
+    registry.gauge('rfid_broken', "Broken", function=lambda: 1 / 0)
+    registry.counter('rfid_ok_total', "Ok")
+    assert registry.exposition().splitlines()[-1] == 'rfid_ok_total 0'
+
+
+def test_quantile():
+    assert quantile((1.0, 2.0), [0, 0, 0], 0.5) is None
+    assert quantile((1.0, 2.0), [2, 2, 0], 0.5) == 1.0
+    assert quantile((1.0, 2.0), [2, 2, 0], 0.75) == pytest.approx(1.5)
+    assert quantile((1.0, 2.0), [0, 0, 4], 0.95) == 2.0
+
+
+def test_error_counter():
+    registry = MetricsRegistry()
+    errors = ErrorCounter(registry)
+    logger = logging.getLogger('rfid.test')
+    errors.install(logger)
+    try:
+        logger.warning("not counted")
+        logger.error("failed %d", 3)
+    finally:
+        errors.uninstall(logger)
+    assert errors.counter.value('rfid.test') == 1
+    assert errors.last_message == 'rfid.test: failed 3'
+
+
+def test_server():
+    registry = MetricsRegistry()
+    registry.counter('rfid_reads_total', "Reads").inc(4)
+    server = start_metrics_server(registry, 0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            assert 'rfid_reads_total 4' in response.read().decode()
+    finally:
+        server.close()
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+import pytest
+
+from rfid.motion import CHANNEL_PLANS, SPEED_OF_LIGHT, MotionEngine
+from rfid.store import READ_DTYPE
+
+CHANNEL = 5
+FREQUENCY = CHANNEL_PLANS['FCC'][CHANNEL - 1]
+
+
+def _walk(velocity, count=100, interval_us=20000, epc_id=0, doppler=True):
+    # Reads of a tag moving radially at velocity m/s from 1 m, all on one channel
+    reads = np.zeros(count, dtype=READ_DTYPE)
+    time_us = 1000000 + np.arange(count) * interval_us
+    distance = 1.0 + velocity * (time_us - time_us[0]) / 1e6
+    reads['epc_id'] = epc_id
+    reads['reader_id'] = 1
+    reads['antenna'] = 1
+    reads['channel'] = CHANNEL
+    reads['time_us'] = time_us
+    reads['phase'] = np.degrees((4 * math.pi * FREQUENCY * distance / SPEED_OF_LIGHT) % (2 * math.pi))
+    reads['doppler'] = -2 * velocity * FREQUENCY / SPEED_OF_LIGHT if doppler else np.nan
+    return reads
+
+
+def test_receding_tag_across_batches():
+    engine = MotionEngine()
+    reads = _walk(1.0)
+    for start in range(0, len(reads), 7):
+        engine.update(reads[start:start + 7])
+    motion = engine.get(0, 1, 1)
+    assert motion['motion'] == 'moving' and motion['direction'] == 'receding'
+    # Phase turns at 1 m/s are resolved by the Doppler prediction
+    assert motion['velocity'] == pytest.approx(1.0, rel=1e-3)
+    assert motion['displacement'] == pytest.approx(1.98, rel=1e-3)
+
+
+def test_phase_slope_without_doppler():
+    engine = MotionEngine()
+    engine.update(_walk(-0.2, doppler=False))
+    motion = engine.get(0, 1, 1)
+    assert motion['doppler_velocity'] is None
+    assert motion['velocity'] == pytest.approx(-0.2, rel=1e-3)
+    assert motion['direction'] == 'approaching'
+
+
+def test_states_and_counts():
+    engine = MotionEngine()
+    engine.update(np.concatenate([_walk(0.0, epc_id=0), _walk(0.5, epc_id=1), _walk(0.5, count=1, epc_id=2,
+                                                                                    doppler=False)]))
+    assert engine.get(0, 1, 1)['motion'] == 'stationary'
+    assert engine.get(0, 1, 1)['velocity'] == pytest.approx(0.0, abs=1e-6)
+    assert engine.get(2, 1, 1)['motion'] == 'unknown'
+    assert engine.get(3, 1, 1) is None
+    assert engine.counts() == {'unknown': 1, 'stationary': 1, 'moving': 1}
+
+
+def test_reads_on_another_channel_are_not_paired():
+    engine = MotionEngine()
+    reads = _walk(0.3, doppler=False)
+    reads['channel'][1::2] = CHANNEL + 1
+    engine.update(reads)
+    motion = engine.get(0, 1, 1)
+    assert motion['motion'] == 'unknown' and motion['displacement'] == 0.0
+
+
+def test_queued_batches_apply_on_flush():
+    engine = MotionEngine()
+    reads = _walk(1.0)
+    for start in range(0, len(reads), 10):
+        engine.add(reads[start:start + 10])
+    assert engine.get(0, 1, 1) is None
+    engine.flush()
+    assert engine.get(0, 1, 1)['velocity'] == pytest.approx(1.0, rel=1e-3)
+
+    engine.add(_walk(1.0, epc_id=1))
+    engine.clear()
+    engine.flush()
+    assert engine.get(1, 1, 1) is None and engine.counts()['moving'] == 0
+
+
+def test_unknown_channel_plan():
+    with pytest.raises(ValueError):
+        MotionEngine(channel_plan='MARS')
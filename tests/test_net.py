@@ -0,0 +1,67 @@
+import socket
+import threading
+import time
+
+from rfid.net import Backoff, EventLoop
+
+
+def test_backoff_grows_to_the_maximum_with_jitter():
+    backoff = Backoff(initial=1.0, maximum=8.0, jitter=0.5)
+    delays = [backoff.next() for _ in range(6)]
+    for delay, step in zip(delays, [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]):
+        assert step / 2 <= delay <= step
+    backoff.reset()
+    assert backoff.next() <= 1.0
+
+
+def test_cancelled_and_fired_timers_are_forgotten():
+    loop = EventLoop('test-net')
+    loop.start()
+    fired = []
+    handles = []
+
+    def on_loop(callback):
+        # Timers are scheduled and cancelled on the loop thread
+        done = threading.Event()
+        loop.call_soon(lambda: (callback(), done.set()))
+        assert done.wait(2.0)
+
+    try:
+        on_loop(lambda: handles.extend([loop.call_later(0.0, fired.append, 'a'),
+                                        loop.call_later(0.01, fired.append, 'b')]))
+        on_loop(lambda: loop.cancel(handles[1]))
+        time.sleep(0.05)
+        on_loop(lambda: [loop.cancel(handle) for handle in handles + [None]])
+        assert fired == ['a']
+        assert loop._scheduled == set()
+    finally:
+        loop.stop()
+
+
+def test_connects_to_host_names_and_ipv6():
+    from sllurp.llrp import LLRPReaderConfig
+
+    from rfid.net import LLRPConnection
+
+    loop = EventLoop('test-net')
+    loop.start()
+    try:
+        for host in ('localhost', '::1'):
+            # Listen on the address the connection will pick, the first one getaddrinfo returns
+            try:
+                family, _, _, _, address = socket.getaddrinfo(host, 0, type=socket.SOCK_STREAM)[0]
+                server = socket.socket(family, socket.SOCK_STREAM)
+                server.bind(address)
+            except OSError:
+                continue
+            with server:
+                server.listen(1)
+                server.settimeout(2.0)
+                connection = LLRPConnection(loop, host, server.getsockname()[1], LLRPReaderConfig({}))
+                loop.call_soon(connection.open)
+                peer, _ = server.accept()
+                peer.close()
+                loop.call_soon(connection.close)
+                assert connection.closed.wait(2.0)
+    finally:
+        loop.stop()
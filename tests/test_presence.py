@@ -0,0 +1,140 @@
+import numpy as np
+
+from rfid.presence import DWELL, ENTER, EXIT, PresenceEngine, TimerWheel
+from rfid.store import READ_DTYPE, SMALL_BATCH, EPCTable
+
+TICK_US = 50000
+START_US = 1000 * TICK_US
+
+
+def _reads(epc_ids, host_us, antenna=1, reader_id=1, rssi=-50.0):
+    reads = np.zeros(len(epc_ids), dtype=READ_DTYPE)
+    reads['epc_id'] = epc_ids
+    reads['reader_id'] = reader_id
+    reads['antenna'] = antenna
+    reads['peak_rssi'] = rssi
+    reads['host_us'] = host_us
+    return reads
+
+
+def _engine(**options):
+    engine = PresenceEngine(tick=TICK_US / 1e6, **options)
+    engine.wheel = TimerWheel(TICK_US / 1e6, now_us=START_US)
+    return engine
+
+
+def _kinds(events):
+    return sorted(zip(events['kind'].tolist(), events['epc_id'].tolist()))
+
+
+def test_timer_wheel_fires_every_level():
+    wheel = TimerWheel(TICK_US / 1e6, now_us=0)
+    # Ticks within level 0 and levels 1 to 3
+    ticks = np.array([1, 63, 64, 4097, 5000, 300000, 300001])
+    wheel.schedule(np.arange(len(ticks)), ticks * TICK_US)
+    fired = {}
+    for tick in sorted(set(ticks.tolist()) | {2, 4095, 299999}):
+        for timer in wheel.advance(tick * TICK_US).tolist():
+            fired[timer] = tick
+    assert fired == {timer: tick for timer, tick in enumerate(ticks.tolist())}
+    assert wheel.pending == 0
+
+
+def test_timer_wheel_rounds_up_and_never_fires_in_the_current_tick():
+    wheel = TimerWheel(TICK_US / 1e6, now_us=10 * TICK_US)
+    wheel.schedule(np.array([1, 2]), np.array([5 * TICK_US, 11 * TICK_US + 1]))
+    assert wheel.advance(10 * TICK_US + TICK_US - 1).tolist() == []
+    assert wheel.advance(11 * TICK_US).tolist() == [1]
+    assert wheel.advance(12 * TICK_US).tolist() == [2]
+
+
+def test_enter_exit_and_dwell():
+    engine = _engine(timeout=1.0, dwell=2.0)
+    events = engine.update(_reads([0, 1, 0], START_US))
+    assert _kinds(events) == [(ENTER, 0), (ENTER, 1)]
+    assert engine.present_count() == 2 and engine.is_present(1)
+
+    # Tag 0 keeps being read, tag 1 times out
+    for step in range(1, 50):
+        engine.update(_reads([0], START_US + step * 100000))
+        events = engine.advance(START_US + step * 100000)
+        if len(events):
+            assert _kinds(events) in ([(EXIT, 1)], [(DWELL, 0)])
+    assert not engine.is_present(1) and engine.is_present(0)
+    events = engine.advance(START_US + 10000000)
+    assert _kinds(events) == [(EXIT, 0)]
+    exit_event = events[0]
+    assert exit_event['time_us'] == START_US + 4900000 + 1000000
+    assert exit_event['duration_us'] == 5900000
+    assert engine.total_events == [2, 2, 1]
+    assert _kinds(engine.history()) == [(ENTER, 0), (ENTER, 1), (EXIT, 0), (EXIT, 1), (DWELL, 0)]
+
+
+def test_rssi_hysteresis():
+    engine = _engine(timeout=1.0, dwell=0, enter_rssi=-60.0, exit_rssi=-70.0)
+    assert len(engine.update(_reads([0], START_US, rssi=-65.0))) == 0
+    assert len(engine.update(_reads([0], START_US + 100000, rssi=-55.0))) == 1
+    # Reads between both levels keep the tag, weaker ones do not
+    engine.update(_reads([0], START_US + 900000, rssi=-65.0))
+    engine.update(_reads([0], START_US + 1500000, rssi=-75.0))
+    assert len(engine.advance(START_US + 1800000)) == 0
+    events = engine.advance(START_US + 2000000)
+    assert _kinds(events) == [(EXIT, 0)] and events['rssi'][0] == -65.0
+
+
+def test_zones_group_antennas():
+    engine = _engine(zones={'1': 'dock', '2:3': 'dock'})
+    events = engine.update(_reads([0, 0, 0], START_US, antenna=np.array([1, 3, 4]),
+                                  reader_id=np.array([1, 2, 1])))
+    assert len(events) == 2
+    names = [engine.zone_names[zone] for zone in events['zone'].tolist()]
+    assert sorted(names) == ['1:4', 'dock']
+    events = engine.update(_reads([0], START_US, antenna=1, reader_id=2))
+    assert len(events) == 0 and int(engine.epc_zones[0]) == 2
+    assert engine.event_dicts(engine.history()[:1], _table(1))[0]['epc'] == 'E000'
+
+
+def _table(count):
+    epcs = EPCTable()
+    for i in range(count):
+        epcs.intern(f"E{i:03d}")
+    return epcs
+
+
+def test_small_batches_match_the_vector_path():
+    rng = np.random.default_rng(7)
+    engines = [_engine(timeout=0.5, dwell=1.0, enter_rssi=-60.0, exit_rssi=-70.0) for _ in range(2)]
+    now = START_US
+    for step in range(400):
+        now += int(rng.integers(0, 100000))
+        size = int(rng.integers(1, SMALL_BATCH + 1))
+        reads = _reads(rng.integers(0, 20, size), now, antenna=rng.integers(1, 3, size),
+                       rssi=rng.uniform(-80.0, -40.0, size))
+        small = engines[0].update(reads)
+        # Repeated past SMALL_BATCH the same reads take the vector path, with the same outcome
+        vector = engines[1].update(np.concatenate([reads] * (SMALL_BATCH + 1)))
+        assert _kinds(small) == _kinds(vector)
+        assert _kinds(engines[0].advance(now)) == _kinds(engines[1].advance(now))
+    assert engines[0].total_events == engines[1].total_events
+    slots = engines[1].slots.lookup(engines[0].slots.keys)
+    present = engines[0].present[:len(engines[0].slots)]
+    assert np.array_equal(present, engines[1].present[slots])
+    assert np.array_equal(engines[0].last_seen[:len(present)][present], engines[1].last_seen[slots][present])
+
+
+def test_compact_epcs_keeps_present_tags_and_their_timers():
+    engine = _engine(timeout=1.0, dwell=2.0)
+    engine.update(_reads([0, 1, 2, 3], START_US))
+    engine.update(_reads([1, 3], START_US + 1500000))
+    engine.advance(START_US + 1500000)
+    assert [engine.is_present(epc_id) for epc_id in range(4)] == [False, True, False, True]
+
+    epcs = _table(4)
+    mapping = epcs.compact(np.flatnonzero(engine.epc_zones[:4] > 0))
+    engine.compact_epcs(mapping)
+    assert epcs.epcs == ['E001', 'E003']
+    assert engine.present_count() == 2 and len(engine.history()) == 0
+
+    events = engine.advance(START_US + 2500000)
+    assert _kinds(events) == [(EXIT, 0), (EXIT, 1)]
+    assert events['duration_us'].tolist() == [2500000, 2500000]
@@ -0,0 +1,34 @@
+from rfid.clock import ClockAlignment
+from rfid.reader_pool import ReportMerger, parse_addresses
+
+
+def test_parse_addresses():
+    assert parse_addresses('10.0.0.1, 10.0.0.2:5085;localhost:15084') == [
+        ('10.0.0.1', 5084), ('10.0.0.2', 5085), ('localhost', 15084)]
+    assert parse_addresses('::1 [fe80::1]:5085 [::2]') == [('::1', 5084), ('fe80::1', 5085), ('::2', 5084)]
+    assert parse_addresses(' ') == []
+
+
+def test_merger_holds_reports_for_the_window():
+    merger = ReportMerger(window=0.05)
+    merger.push([{'EPC': 'A'}], arrival=10.0, host_us=3)
+    merger.push([{'EPC': 'B'}, {'EPC': 'C'}], arrival=10.02, host_us=2)
+    merger.push([], arrival=10.03)
+    assert merger.pop_ready(now=10.04) == [] and len(merger) == 2
+    # Without clock estimates every read sorts by arrival
+    assert [tag['EPC'] for tag in merger.pop_ready(now=10.1)] == ['B', 'C', 'A']
+    assert len(merger) == 0
+
+
+def test_merger_sorts_on_aligned_reader_time():
+    clock = ClockAlignment()
+    # Reader 1 runs 1000 s ahead of the host, reader 2 is on time
+    clock.clock(1).observe(1001000000, 1000000)
+    clock.clock(2).observe(1000000, 1000000)
+    merger = ReportMerger(window=0.05, clock=clock)
+    merger.push([{'EPC': 'A', 'ReaderID': 1, 'LastSeenTimestampUTC': 1003000000},
+                 {'EPC': 'B', 'ReaderID': 1}], arrival=10.0, host_us=2500000)
+    merger.push([{'EPC': 'C', 'ReaderID': 2, 'LastSeenTimestampUTC': 2000000},
+                 {'EPC': 'D', 'ReaderID': 2, 'LastSeenTimestampUTC': 4000000}], arrival=10.01, host_us=4500000)
+    merger.push([{'EPC': 'E', 'ReaderID': 3, 'LastSeenTimestampUTC': 1}], arrival=10.02, host_us=3500000)
+    assert [tag['EPC'] for tag in merger.pop_ready(now=10.1)] == ['C', 'B', 'A', 'E', 'D']
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from rfid.recording import (BLOCK_HEADER, EPC_BLOCK, EPC_ENTRY, FILE_HEADER, MAGIC, READ_BLOCK, V2_READ_DTYPE,
+                            V3_READ_DTYPE, BlockEncoder, SessionFile, SessionRecorder, SessionReplay)
+from rfid.store import READ_DTYPE, EPCTable, reads_from_reports
+
+HOST_US = 1700000000000000
+
+
+def _tags(count, start=0):
+    return [{'EPC': f"E{i % 5:03d}", 'ReaderID': 1, 'AntennaID': 1 + i % 2, 'ImpinjPeakRSSI': -5000 - i,
+             'ImpinjRFPhaseAngle': i, 'ChannelIndex': 3, 'TagSeenCount': 1,
+             'FirstSeenTimestampUTC': HOST_US + i, 'LastSeenTimestampUTC': HOST_US + i}
+            for i in range(start, start + count)]
+
+
+def _record(path, reports):
+    recorder = SessionRecorder(path, chunk_reads=8)
+    for tags in reports:
+        recorder.on_tag_report(None, tags)
+    recorder.close()
+    return recorder
+
+
+def _write(path, version, dtype, epcs, reads):
+    payload = b''.join(EPC_ENTRY.pack(i, len(epc)) + epc.encode('ascii') for i, epc in enumerate(epcs))
+    with open(path, 'wb') as f:
+        f.write(FILE_HEADER.pack(MAGIC, version, dtype.itemsize))
+        f.write(BLOCK_HEADER.pack(EPC_BLOCK, len(epcs), len(payload)) + payload)
+        f.write(BLOCK_HEADER.pack(READ_BLOCK, len(reads), reads.nbytes) + reads.tobytes())
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'session.rfrec')
+    recorder = _record(path, [_tags(6, start) for start in range(0, 30, 6)])
+    assert recorder.reads_written == 30
+
+    session = SessionFile(path)
+    try:
+        assert len(session) == 30
+        assert session.epcs.epcs == [f"E{i:03d}" for i in range(5)]
+        reads = session.reads(0, 30)
+        assert reads['antenna'].tolist() == [1 + i % 2 for i in range(30)]
+        assert reads['channel'].tolist() == [3] * 30
+        assert session.reads(5, 9)['phase'].tolist() == session.reads(0, 30)['phase'][5:9].tolist()
+
+        # Rebuilt reports parse back to the same records
+        epcs = EPCTable()
+        rebuilt = reads_from_reports(session.to_tag_dicts(reads), epcs.intern, 0)
+        rebuilt['host_us'] = reads['host_us']
+        assert rebuilt.tobytes() == reads.tobytes()
+        first, last = session.host_times()
+        assert first <= last
+    finally:
+        session.close()
+
+
+def test_version_3_reads_get_channel_0(tmp_path):
+    path = str(tmp_path / 'v3.rfrec')
+    old = np.zeros(2, dtype=V3_READ_DTYPE)
+    old['epc_id'] = [0, 1]
+    old['peak_rssi'] = -55.0
+    old['time_us'] = [HOST_US, HOST_US + 5]
+    old['host_us'] = HOST_US + 10
+    _write(path, 3, V3_READ_DTYPE, ['AA01', 'AA02'], old)
+    session = SessionFile(path)
+    reads = session.reads(0, 2)
+    assert reads.dtype == READ_DTYPE
+    assert reads['channel'].tolist() == [0, 0]
+    assert reads['time_us'].tolist() == [HOST_US, HOST_US + 5]
+    assert reads['peak_rssi'].tolist() == [-55.0, -55.0]
+    session.close()
+
+
+def test_version_2_arrival_time_becomes_the_time(tmp_path):
+    path = str(tmp_path / 'v2.rfrec')
+    old = np.zeros(2, dtype=V2_READ_DTYPE)
+    old['host_time'] = [1000.5, 1001.25]
+    old['last_seen'] = 7
+    _write(path, 2, V2_READ_DTYPE, ['BB02'], old)
+    session = SessionFile(path)
+    reads = session.reads(0, 2)
+    assert reads['host_us'].tolist() == [1000500000, 1001250000]
+    assert reads['time_us'].tolist() == reads['host_us'].tolist()
+    assert reads['last_seen'].tolist() == [7, 7]
+    assert session.host_times() == (1000500000, 1001250000)
+    session.close()
+
+
+def test_truncated_tail_is_left_out(tmp_path):
+    path = tmp_path / 'session.rfrec'
+    _record(str(path), [_tags(5)])
+    with open(path, 'ab') as f:
+        f.write(BLOCK_HEADER.pack(READ_BLOCK, 1, 4096))
+    session = SessionFile(str(path))
+    assert len(session) == 5
+    session.close()
+
+
+def test_stream_that_defines_ids_again(tmp_path):
+    # A live stream compacts its table and defines the ids it keeps from 0 again
+    epcs = EPCTable()
+    encoder = BlockEncoder(epcs)
+    first = reads_from_reports(_tags(5), epcs.intern, HOST_US)
+    chunks = [encoder.header(), encoder.encode(first)]
+    epcs.compact(np.array([3]))
+    encoder.reset()
+    second = reads_from_reports([{'EPC': 'E003'}, {'EPC': 'F000'}], epcs.intern, HOST_US)
+    chunks.append(encoder.encode(second))
+    path = tmp_path / 'stream.rfrec'
+    path.write_bytes(b''.join(chunks) + BLOCK_HEADER.pack(READ_BLOCK, 1, 4096))
+
+    session = SessionFile(str(path))
+    assert len(session) == 7  # the truncated tail is left out
+    reads = session.reads(0, 7)
+    assert [session.epcs.epc(epc_id) for epc_id in reads['epc_id'].tolist()] == [
+        'E000', 'E001', 'E002', 'E003', 'E004', 'E003', 'F000']
+    session.close()
+
+
+def test_replay_paces_on_arrival_time(tmp_path):
+    path = str(tmp_path / 'session.rfrec')
+    reads = reads_from_reports(_tags(5), EPCTable().intern, HOST_US)
+    reads['host_us'] += np.arange(5) * 1000000
+    _write(path, 4, READ_DTYPE, [f"E{i:03d}" for i in range(5)], reads)
+
+    replay = SessionReplay(SessionFile(path), speed=2.0)
+    replay.start(now=0.0)
+    assert len(replay.due(100, now=0.0)) == 1
+    assert len(replay.due(100, now=1.0)) == 2
+    assert len(replay.due(1, now=10.0)) == 1
+    assert len(replay.due(100, now=10.0)) == 1 and replay.finished
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / 'other.rfrec'
+    path.write_bytes(FILE_HEADER.pack(b'SOMETHNG', 4, READ_DTYPE.itemsize))
+    with pytest.raises(ValueError):
+        SessionFile(str(path))
+    path.write_bytes(FILE_HEADER.pack(MAGIC, 4, READ_DTYPE.itemsize + 1))
+    with pytest.raises(ValueError):
+        SessionFile(str(path))
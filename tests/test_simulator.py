@@ -0,0 +1,22 @@
+from rfid.simulator import TagPopulation, generate_epcs
+
+
+def test_generate_epcs():
+    assert generate_epcs(2, prefix='3034') == ['303400000000000000000000', '303400000000000000000001']
+
+
+def test_select_matches_epc_prefixes():
+    epcs = ['303400000000000000000001', '303400000000000000000102', 'E20000000000000000000001']
+    population = TagPopulation(epcs, seed=1)
+    assert population.select([]) is None
+    assert population.select(['3034']).tolist() == [0, 1]
+    assert population.select(['30340000000000000000010', 'E2']).tolist() == [1, 2]
+    assert population.select(['AB']).tolist() == []
+
+
+def test_select_matches_epcs_ending_in_zero_bytes():
+    epcs = ['303400000000000000000100', '303400000000000000000000', 'e20000000000000000000000']
+    population = TagPopulation(epcs, seed=1)
+    assert population.select(['303400000000000000000100']).tolist() == [0]
+    assert population.select(['3034000000000000000000']).tolist() == [1]
+    assert population.select(['E200000000']).tolist() == [2]
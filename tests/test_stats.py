@@ -0,0 +1,75 @@
+import statistics
+
+import numpy as np
+import pytest
+
+from rfid.stats import AntennaRates, StatisticsEngine, TagStatistics
+from rfid.store import READ_DTYPE, EPCTable
+
+
+def _reads(epc_ids, antenna=1, reader_id=1, rssi=-50.0):
+    reads = np.zeros(len(epc_ids), dtype=READ_DTYPE)
+    reads['epc_id'] = epc_ids
+    reads['reader_id'] = reader_id
+    reads['antenna'] = antenna
+    reads['peak_rssi'] = rssi
+    reads['phase'] = np.nan
+    reads['doppler'] = np.nan
+    return reads
+
+
+def test_welford_matches_the_batch_statistics():
+    values = np.random.default_rng(3).normal(-60.0, 4.0, 500).tolist()
+    entry = TagStatistics('AA01', 1, 1, window=10.0, buckets=20)
+    for i, rssi in enumerate(values):
+        entry.add(i * 0.01, rssi, None, None)
+    entry.add(5.0, None, 12.0, float('nan'))
+    entry.add(5.0, float('nan'), float('nan'), -3.0)
+    assert entry.count == len(values) + 2
+    assert entry.rssi_count == len(values)
+    assert entry.rssi_mean == pytest.approx(statistics.fmean(values))
+    assert entry.rssi_stddev == pytest.approx(statistics.stdev(values))
+    assert (entry.rssi_min, entry.rssi_max) == (min(values), max(values))
+    assert (entry.last_phase, entry.last_doppler) == (12.0, -3.0)
+
+
+def test_stddev_needs_two_values():
+    entry = TagStatistics('AA01', 1, 1, window=10.0, buckets=20)
+    entry.add(0.0, -50.0, None, None)
+    assert entry.rssi_stddev is None
+
+
+def test_rate_window_expires_old_buckets():
+    entry = TagStatistics('AA01', 1, 1, window=10.0, buckets=10)
+    for i in range(100):
+        entry.add(100.0 + i * 0.1, -50.0, None, None)
+    assert entry.rate(110.0) == pytest.approx(9.0)
+    assert entry.rate(115.0) == pytest.approx(4.0)
+    assert entry.rate(200.0) == 0.0
+
+
+def test_antenna_rates_count_unique_tags_per_second():
+    rates = AntennaRates(window=10.0)
+    rates.update(_reads([0, 0, 1]), now=100.2)
+    rates.update(_reads([1, 2]), now=100.7)
+    rates.update(_reads([0, 0]), now=101.5)
+    rates.update(_reads([5]), now=101.5)
+    rates.update(_reads([3], antenna=2), now=101.5)
+    assert rates.rates(now=102.0) == [
+        {'reader': 1, 'antenna': 1, 'reads_per_s': 4.0, 'tags_per_s': 2.5},
+        {'reader': 1, 'antenna': 2, 'reads_per_s': 0.5, 'tags_per_s': 0.5},
+    ]
+
+
+def test_engine_rows_per_epc_reader_and_antenna():
+    epcs = EPCTable()
+    for epc in ('AA01', 'AA02'):
+        epcs.intern(epc)
+    engine = StatisticsEngine()
+    engine.update(_reads([0, 1, 0]), epcs, now=10.0)
+    engine.update(_reads([0], antenna=2, rssi=-70.0), epcs, now=10.5)
+    assert [(row.epc, row.reader, row.antenna, row.count) for row in engine.rows] == [
+        ('AA01', 1, 1, 2), ('AA02', 1, 1, 1), ('AA01', 1, 2, 1)]
+    assert engine.get(0, 2, reader_id=1).rssi_mean == -70.0
+    engine.clear()
+    assert engine.rows == [] and engine.get(0, 1, reader_id=1) is None
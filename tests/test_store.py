@@ -0,0 +1,95 @@
+import numpy as np
+
+from rfid.store import SMALL_BATCH, EPCTable, SlotTable, TagReadStore, reads_from_reports
+
+
+def _report(count, **fields):
+    return [dict({'EPC': f"E{i:03d}", 'AntennaID': 1 + i % 4}, **fields) for i in range(count)]
+
+
+def test_reads_from_reports_fields():
+    epcs = EPCTable()
+    tags = [
+        {'EPC': 'AA01', 'ReaderID': 2, 'AntennaID': 3, 'ImpinjPeakRSSI': -5250, 'ImpinjRFPhaseAngle': 1024,
+         'ImpinjRFDopplerFrequency': -32, 'ChannelIndex': 7, 'TagSeenCount': 4,
+         'FirstSeenTimestampUTC': 100, 'LastSeenTimestampUTC': 200},
+        {'EPC': 'AA02', 'AntennaID': 1, 'PeakRSSI': {'Value': -61}, 'Phase': {'Value': 12.5},
+         'LastSeenTimestamp': {'Value': 300}, 'AlignedTimestamp': 42},
+        {'EPC': 'AA01'},
+    ]
+    reads = reads_from_reports(tags, epcs.intern, 1000)
+    assert epcs.epcs == ['AA01', 'AA02']
+    assert reads['epc_id'].tolist() == [0, 1, 0]
+    assert reads['reader_id'].tolist() == [2, 0, 0]
+    assert reads['peak_rssi'].tolist()[:2] == [-52.5, -61.0]
+    assert np.isnan(reads['peak_rssi'][2])
+    assert reads['phase'][0] == 90.0 and reads['phase'][1] == 12.5
+    assert reads['doppler'][0] == -2.0 and np.isnan(reads['doppler'][1])
+    assert reads['channel'].tolist() == [7, 0, 0]
+    assert reads['seen_count'].tolist() == [4, 1, 1]
+    assert reads['first_seen'].tolist() == [100, 0, 0]
+    assert reads['last_seen'].tolist() == [200, 300, 0]
+    assert reads['time_us'].tolist() == [1000, 42, 1000]
+    assert reads['host_us'].tolist() == [1000, 1000, 1000]
+
+
+def test_reads_from_reports_small_and_large_batches_agree():
+    tags = _report(SMALL_BATCH + 1, ImpinjPeakRSSI=-6000, TagSeenCount=2)
+    large = reads_from_reports(tags, EPCTable().intern, 5)
+    small = np.concatenate([reads_from_reports(tags[:SMALL_BATCH], EPCTable().intern, 5),
+                            reads_from_reports(tags[SMALL_BATCH:], EPCTable().intern, 5)])
+    small['epc_id'][SMALL_BATCH:] = SMALL_BATCH
+    assert large.tobytes() == small.tobytes()
+
+
+def test_epc_table():
+    epcs = EPCTable()
+    assert [epcs.intern(epc) for epc in ('AA01', 'AA02', 'AA01', b'AA01', b'AA03')] == [0, 1, 0, 0, 2]
+    assert epcs.epcs == ['AA01', 'AA02', 'AA03'] and len(epcs) == 3
+    assert epcs.find(b'AA02') == 1 and epcs.find('AA04') is None
+
+
+def test_epc_table_compact():
+    epcs = EPCTable()
+    for epc in ('A', 'B', 'C', 'D'):
+        epcs.intern(epc)
+    mapping = epcs.compact(np.array([3, 1, 3]))
+    assert mapping.tolist() == [-1, 0, -1, 1]
+    assert epcs.epcs == ['B', 'D']
+    assert epcs.intern('D') == 1 and epcs.intern('A') == 2
+
+
+def test_slot_table():
+    table = SlotTable()
+    assert table.lookup([5]).tolist() == [-1]
+    # New keys of one batch take the next slots in key order
+    assert table.slots(np.array([30, 10, 30, 20])).tolist() == [2, 0, 2, 1]
+    assert table.slots(np.array([20, 40])).tolist() == [1, 3]
+    assert table.keys.tolist() == [10, 20, 30, 40]
+    assert table.lookup([40, 10, 15]).tolist() == [3, 0, -1]
+    assert table.find(30) == 2 and table.find(35) == -1
+
+
+def test_store_tracks_epcs_and_clears():
+    store = TagReadStore()
+    for batch in (_report(3), _report(SMALL_BATCH + 4)):
+        store.append_reports(batch, 1000)
+    assert len(store) == SMALL_BATCH + 7
+    assert store.read_counts[:3].tolist() == [2, 2, 2]
+    assert store.latest_seq[:3].tolist() == [3, 4, 5]
+    assert store.latest_seq[SMALL_BATCH + 3] == SMALL_BATCH + 6
+    assert store.read_count('E006') == 1 and store.read_count(b'E006') == 1
+    assert store.latest(b'E002')['antenna'] == 3
+    assert store.to_dict(store.record(0))['epc'] == 'E000'
+    store.clear()
+    assert len(store) == 0 and store.latest('E000') is None and store.tag_counts() == {}
+    assert len(store.epcs) == 0 and len(store.latest_seq) == 0 and len(store.read_counts) == 0
+
+
+def test_store_evicts_whole_chunks_past_capacity():
+    store = TagReadStore(capacity=8, chunk_size=4)
+    store.append_reports(_report(10), 1)
+    assert (store.first_seq, store.next_seq, len(store)) == (2, 10, 8)
+    assert store.record(1) is None and store.record(2) is not None
+    assert store.slice(0, 6)['epc_id'].tolist() == [2, 3, 4, 5]
+    assert store.take([0, 3, 9])['epc_id'].tolist() == [0, 3, 9]
@@ -0,0 +1,50 @@
+from rfid.ingest import TagReadBuffer
+from rfid.tracing import LatencyTracer
+
+
+def _tags(start, count):
+    return [{'EPC': f"{i:04d}", 'ReaderID': 1, 'AntennaID': 2} for i in range(start, start + count)]
+
+
+def test_trace_follows_the_read_through_the_buffer():
+    tracer = LatencyTracer(sample_interval=0.0)
+    tracer.set_enabled(True)
+    buffer = TagReadBuffer(capacity=10)
+    buffer.put_report(_tags(0, 2))
+
+    assert tracer.sample()
+    tags = _tags(2, 3)
+    tracer.begin(tags, rx_us=1)
+    trace, index = tracer.claim()
+    assert trace.epc == '0004' and index == 2
+    tracer.queued(trace, buffer.put_report(tags, mark=index))
+    assert tracer.claim() == (None, None)
+
+    position = buffer.drain_position
+    batch = buffer.drain()
+    (batch_index, found), = tracer.drained(position, len(batch))
+    assert found is trace and batch[batch_index]['EPC'] == '0004'
+    tracer.viewed(trace, shown=True)
+    tracer.painted(trace)
+    assert trace.outcome == 'painted' and tracer.pending() == 0
+    # No clock was given, so there is no reader stamp
+    assert trace.span('socket', 'paint') >= 0 and trace.span('reader', 'paint') is None
+
+    summary = {row['span']: row for row in tracer.summary()}
+    assert summary['paint']['count'] == 1 and summary['total']['count'] == 0
+    events = tracer.chrome_trace()['traceEvents']
+    assert [event['name'] for event in events if event['ph'] == 'b'][0] == 'read'
+
+
+def test_dropped_and_merged_reads():
+    tracer = LatencyTracer(sample_interval=0.0)
+    tracer.set_enabled(True)
+    tags = _tags(0, 2)
+    tracer.begin_merge(tags)
+    tracer.locate(_tags(5, 1))
+    assert tracer.claim() == (None, None)
+    tracer.locate([tags[0], tags[1]])
+    trace, index = tracer.claim()
+    assert index == 1 and trace.epc == '0001'
+    tracer.queued(trace, -1)
+    assert trace.outcome == 'dropped' and tracer.finished == 1
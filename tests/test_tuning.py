@@ -0,0 +1,51 @@
+import pytest
+
+from rfid.config import RFIDConfig
+from rfid.reader import RFIDReader
+from rfid.simulator import SimulatedReader, TagPopulation, generate_epcs
+from rfid.tuning import AutoTuner, score, tuned_settings
+
+
+@pytest.fixture
+def air_reader():
+    # A connected reader on a simulated air interface, where dual target
+    # inventory keeps reading the tags single target ones leave resting
+    population = TagPopulation(generate_epcs(1000), antennas=1, max_distance=12.0, seed=3)
+    simulator = SimulatedReader(port=0, population=population, read_rate=1000, air=True)
+    simulator.start()
+    config = RFIDConfig()
+    config.update_reader_settings({'ip': f"127.0.0.1:{simulator.port}", 'filter_by_epc': False,
+                                   'search_mode': 1, 'session': 2})
+    settings = config.connection_settings()
+    reader = RFIDReader()
+    assert reader.connect(settings['ip'], settings, lambda reader, tags: None)
+    yield reader, settings
+    reader.disconnect(timeout=2)
+    simulator.stop()
+
+
+def test_auto_tune_finds_the_better_search_mode(air_reader):
+    reader, settings = air_reader
+    trials = []
+    tuner = AutoTuner(reader, settings, search_space={'search_mode': [1, 2]}, trial_seconds=1.0,
+                      progress=lambda number, count, trial: trials.append((number, count)))
+    best = tuner.run()
+    assert best['search_mode'] == 2
+    assert best['session'] == 2 and best['ip'] == settings['ip']
+    assert [trial['settings'] for trial in tuner.trials] == [{'search_mode': 1}, {'search_mode': 2}]
+    assert not any(trial['error'] for trial in tuner.trials)
+    assert tuner.trials[1]['unique_per_s'] > tuner.trials[0]['unique_per_s']
+    assert trials == [(1, 2), (2, 2)]
+    # The inventory was only started for the trials, the best settings stay applied
+    assert not reader.inventory_running
+    assert reader.settings['search_mode'] == 2
+
+
+def test_candidates_and_stored_keys():
+    tuner = AutoTuner(None, {'power': 30, 'antenna_power': {1: 25}, 'report_mode': 'interval'},
+                      search_space={'power': [20, 30], 'report_every_n': [1, 8]})
+    assert 'report_every_n' not in tuner.search_space
+    assert tuner.candidate({'power': 30}, 'power', 20)['antenna_power'] == {}
+    assert tuner.trial_count() == 2
+    assert tuned_settings({'power': 20, 'antenna_power': {}, 'ip': 'x'}) == {'power': 20, 'antenna_power': {}}
+    assert score({'unique_per_s': 2.0}, {'unique_per_s': 1.5, 'reads_per_s': 1.0}) == 3.0